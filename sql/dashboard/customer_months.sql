@@ -0,0 +1,40 @@
+-- =============================================================================
+-- customer_months.sql
+-- Activite mensuelle par client — base des matrices de cohortes
+-- =============================================================================
+-- Retourne une ligne par (client unique, mois de commande) avec :
+--   - customer_unique_key : cle entiere du client unique (rang dans l'ordre
+--                           trie des customer_unique_id, comme l'ETL)
+--   - order_month         : mois de la commande (format AAAAMM)
+--   - revenue             : revenu des articles livres ce mois-la
+--
+-- Les pages Cohortes et Clients construisent a partir de ce resultat,
+-- en une passe numpy (src/dashboard/cohort_engine.py), les matrices de
+-- retention, de revenu et de LTV cumulee : toutes les cohortes, tout
+-- l'horizon, sans LIMIT 12 ni sous-requete correlee.
+--
+-- Concepts SQL utilises :
+-- -----------------------------------------------------------------------
+-- 1. DENSE_RANK() OVER (ORDER BY ...) : cle entiere compacte par client
+--    unique (resultat plus leger qu'un identifiant texte de 32 caracteres)
+-- 2. GROUP BY sur une expression (date_key / 100 -> AAAAMM)
+-- =============================================================================
+
+WITH customer_keys AS (
+    SELECT
+        customer_unique_id,
+        DENSE_RANK() OVER (ORDER BY customer_unique_id) AS customer_unique_key
+    FROM (SELECT DISTINCT customer_unique_id FROM dim_customers WHERE customer_unique_id IS NOT NULL)
+)
+
+SELECT
+    k.customer_unique_key,
+    f.date_key / 100 AS order_month,
+    ROUND(SUM(f.price), 2) AS revenue
+FROM fact_orders f
+JOIN dim_customers c ON f.customer_key = c.customer_key
+JOIN customer_keys k ON k.customer_unique_id = c.customer_unique_id
+WHERE f.order_status = 'delivered'
+  AND f.date_key IS NOT NULL
+GROUP BY k.customer_unique_key, f.date_key / 100
+ORDER BY k.customer_unique_key, order_month;
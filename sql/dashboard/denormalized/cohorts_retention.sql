@@ -0,0 +1,58 @@
+-- =============================================================================
+-- denormalized/cohorts_retention.sql
+-- Retention par cohorte mensuelle — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../cohorts_retention.sql (cohort_month,
+-- months_since_first, nb_customers), sans jointure ni vue :
+--   - customer_unique_key et month_key sont lus directement dans fact_orders
+--   - le mois de premier achat est un MIN() OVER (PARTITION BY client)
+--     calcule sur les couples (client, mois) deja distincts, au lieu de
+--     recalculer v_customer_cohorts et de la re-joindre a dim_customers
+--
+-- Index utilise : idx_fact_status_cust_unique (couvrant, ordre client -> mois).
+-- =============================================================================
+
+WITH orders_monthly AS (
+    SELECT DISTINCT
+        customer_unique_key,
+        month_key AS order_month
+    FROM fact_orders
+    WHERE order_status = 'delivered'
+      AND customer_unique_key IS NOT NULL
+      AND month_key IS NOT NULL
+),
+
+with_cohort AS (
+    SELECT
+        customer_unique_key,
+        order_month,
+        MIN(order_month) OVER (PARTITION BY customer_unique_key) AS cohort_month
+    FROM orders_monthly
+),
+
+eligible_cohorts AS (
+    SELECT DISTINCT cohort_month
+    FROM with_cohort
+    ORDER BY cohort_month
+    LIMIT 12
+),
+
+cohort_activity AS (
+    SELECT
+        cohort_month,
+        (order_month / 100 * 12 + order_month % 100)
+        - (cohort_month / 100 * 12 + cohort_month % 100)
+        AS months_since_first,
+        customer_unique_key
+    FROM with_cohort
+    WHERE cohort_month IN (SELECT cohort_month FROM eligible_cohorts)
+)
+
+SELECT
+    cohort_month,
+    months_since_first,
+    COUNT(DISTINCT customer_unique_key) AS nb_customers
+FROM cohort_activity
+WHERE months_since_first BETWEEN 0 AND 11
+GROUP BY cohort_month, months_since_first
+ORDER BY cohort_month, months_since_first;
@@ -0,0 +1,20 @@
+-- =============================================================================
+-- denormalized/customer_months.sql
+-- Activite mensuelle par client — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../customer_months.sql, sans jointure ni DENSE_RANK :
+-- customer_unique_key (meme numerotation) et month_key sont lus dans fact_orders.
+--
+-- Index utilise : idx_fact_status_cust_unique (couvrant, ordre client -> mois).
+-- =============================================================================
+
+SELECT
+    customer_unique_key,
+    month_key AS order_month,
+    ROUND(SUM(price), 2) AS revenue
+FROM fact_orders
+WHERE order_status = 'delivered'
+  AND customer_unique_key IS NOT NULL
+  AND month_key IS NOT NULL
+GROUP BY customer_unique_key, month_key
+ORDER BY customer_unique_key, order_month;
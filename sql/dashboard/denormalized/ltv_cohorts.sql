@@ -0,0 +1,85 @@
+-- =============================================================================
+-- denormalized/ltv_cohorts.sql
+-- LTV cumulative par cohorte — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../ltv_cohorts.sql, sans jointure vers dim_customers
+-- ni recalcul de v_customer_cohorts : le CA est agrege par
+-- (customer_unique_key, month_key), puis la cohorte de chaque client est
+-- obtenue par MIN() OVER (PARTITION BY customer_unique_key).
+--
+-- Index utilise : idx_fact_status_cust_unique (couvrant).
+-- =============================================================================
+
+WITH orders_monthly AS (
+    SELECT
+        customer_unique_key,
+        month_key AS order_month,
+        SUM(price) AS revenue
+    FROM fact_orders
+    WHERE order_status = 'delivered'
+      AND customer_unique_key IS NOT NULL
+      AND month_key IS NOT NULL
+    GROUP BY customer_unique_key, month_key
+),
+
+with_cohort AS (
+    SELECT
+        customer_unique_key,
+        order_month,
+        revenue,
+        MIN(order_month) OVER (PARTITION BY customer_unique_key) AS cohort_month
+    FROM orders_monthly
+),
+
+eligible_cohorts AS (
+    SELECT DISTINCT cohort_month
+    FROM with_cohort
+    ORDER BY cohort_month
+    LIMIT 12
+),
+
+cohort_ltv AS (
+    SELECT
+        cohort_month,
+        (order_month / 100 * 12 + order_month % 100)
+        - (cohort_month / 100 * 12 + cohort_month % 100)
+        AS months_since_first,
+        COUNT(DISTINCT customer_unique_key) AS nb_customers,
+        ROUND(SUM(revenue), 2) AS cohort_revenue
+    FROM with_cohort
+    WHERE cohort_month IN (SELECT cohort_month FROM eligible_cohorts)
+    GROUP BY cohort_month, months_since_first
+)
+
+SELECT
+    cl.cohort_month,
+    cl.months_since_first,
+    cl.nb_customers,
+    cl.cohort_revenue,
+    ROUND(
+        SUM(cl.cohort_revenue) OVER (
+            PARTITION BY cl.cohort_month
+            ORDER BY cl.months_since_first
+            ROWS UNBOUNDED PRECEDING
+        ),
+        2
+    ) AS cumulative_revenue,
+    ROUND(
+        SUM(cl.cohort_revenue) OVER (
+            PARTITION BY cl.cohort_month
+            ORDER BY cl.months_since_first
+            ROWS UNBOUNDED PRECEDING
+        )
+        * 1.0
+        / NULLIF(
+            (SELECT cl0.nb_customers
+             FROM cohort_ltv cl0
+             WHERE cl0.cohort_month = cl.cohort_month
+               AND cl0.months_since_first = 0),
+            0
+        ),
+        2
+    ) AS ltv_per_customer
+FROM cohort_ltv cl
+WHERE cl.months_since_first BETWEEN 0 AND 11
+ORDER BY cl.cohort_month, cl.months_since_first;
@@ -0,0 +1,52 @@
+-- =============================================================================
+-- denormalized/new_vs_recurring.sql
+-- Nouveaux vs recurrents par mois — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../new_vs_recurring.sql (month_label, new_customers,
+-- recurring, total, new_pct), sans jointure vers dim_customers ni
+-- v_customer_cohorts : un client est "nouveau" le mois egal a son
+-- MIN(month_key) OVER (PARTITION BY customer_unique_key).
+--
+-- Index utilise : idx_fact_status_cust_unique (couvrant).
+-- =============================================================================
+
+WITH order_months AS (
+    SELECT DISTINCT
+        customer_unique_key,
+        month_key AS order_month
+    FROM fact_orders
+    WHERE order_status = 'delivered'
+      AND customer_unique_key IS NOT NULL
+      AND month_key IS NOT NULL
+),
+
+classified AS (
+    SELECT
+        order_month,
+        customer_unique_key,
+        CASE
+            WHEN order_month = MIN(order_month) OVER (PARTITION BY customer_unique_key)
+                THEN 'new'
+            ELSE 'recurring'
+        END AS customer_type
+    FROM order_months
+)
+
+SELECT
+    (order_month / 100) || '-' || PRINTF('%02d', order_month % 100) AS month_label,
+    COUNT(DISTINCT CASE
+        WHEN customer_type = 'new' THEN customer_unique_key
+    END) AS new_customers,
+    COUNT(DISTINCT CASE
+        WHEN customer_type = 'recurring' THEN customer_unique_key
+    END) AS recurring,
+    COUNT(DISTINCT customer_unique_key) AS total,
+    ROUND(
+        COUNT(DISTINCT CASE WHEN customer_type = 'new' THEN customer_unique_key END)
+        * 100.0
+        / NULLIF(COUNT(DISTINCT customer_unique_key), 0),
+        1
+    ) AS new_pct
+FROM classified
+GROUP BY order_month
+ORDER BY order_month;
@@ -0,0 +1,21 @@
+-- =============================================================================
+-- denormalized/overview_monthly_mini.sql
+-- CA mensuel (sparkline) — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../overview_monthly_mini.sql (year, month, month_label,
+-- monthly_revenue), mais annee et mois sont derives de month_key (AAAAMM)
+-- au lieu d'une jointure vers dim_dates.
+--
+-- Index utilise : idx_fact_status_month (couvrant, deja trie par mois).
+-- =============================================================================
+
+SELECT
+    month_key / 100 AS year,
+    month_key % 100 AS month,
+    (month_key / 100) || '-' || PRINTF('%02d', month_key % 100) AS month_label,
+    ROUND(SUM(price), 2) AS monthly_revenue
+FROM fact_orders
+WHERE order_status = 'delivered'
+  AND month_key IS NOT NULL
+GROUP BY month_key
+ORDER BY month_key;
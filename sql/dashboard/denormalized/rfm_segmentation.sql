@@ -0,0 +1,91 @@
+-- =============================================================================
+-- denormalized/rfm_segmentation.sql
+-- Segmentation RFM — variante pour fact_orders denormalisee
+-- =============================================================================
+-- Meme resultat que ../rfm_segmentation.sql (une ligne par segment avec
+-- nb_customers, avg_monetary, avg_frequency), mais sans jointure :
+--   - customer_unique_key remplace JOIN dim_customers (customer_unique_id)
+--   - date_key AAAAMMJJ est converti en date par PRINTF, sans JOIN dim_dates
+--   - la date de reference MAX(date_key) est lue sur idx_fact_date_key
+--
+-- Les cles customer_unique_key suivent l'ordre trie des customer_unique_id :
+-- departager les ex-aequo des NTILE(5) par la cle donne donc les memes
+-- quintiles que la requete d'origine.
+--
+-- Index utilise : idx_fact_status_cust_unique (couvrant).
+-- =============================================================================
+
+WITH rfm_raw AS (
+    SELECT
+        f.customer_unique_key,
+
+        -- RECENCY : jours entre la derniere date de la base et le dernier achat
+        CAST(
+            JULIANDAY(
+                (SELECT PRINTF('%04d-%02d-%02d',
+                               MAX(f2.date_key) / 10000,
+                               MAX(f2.date_key) / 100 % 100,
+                               MAX(f2.date_key) % 100)
+                 FROM fact_orders f2)
+            )
+            - JULIANDAY(
+                PRINTF('%04d-%02d-%02d',
+                       MAX(f.date_key) / 10000,
+                       MAX(f.date_key) / 100 % 100,
+                       MAX(f.date_key) % 100)
+            )
+        AS INTEGER) AS recency,
+
+        -- FREQUENCY : nombre de commandes distinctes du client
+        COUNT(DISTINCT f.order_id) AS frequency,
+
+        -- MONETARY : montant total depense
+        ROUND(SUM(f.price), 2) AS monetary
+
+    FROM fact_orders f
+    WHERE f.order_status = 'delivered'
+      AND f.customer_unique_key IS NOT NULL
+      AND f.date_key IS NOT NULL
+    GROUP BY f.customer_unique_key
+),
+
+rfm_scored AS (
+    SELECT
+        customer_unique_key,
+        recency,
+        frequency,
+        monetary,
+        NTILE(5) OVER (ORDER BY recency DESC, customer_unique_key) AS r_score,
+        NTILE(5) OVER (ORDER BY frequency ASC, customer_unique_key) AS f_score,
+        NTILE(5) OVER (ORDER BY monetary ASC, customer_unique_key) AS m_score
+    FROM rfm_raw
+),
+
+rfm_segmented AS (
+    SELECT
+        customer_unique_key,
+        recency,
+        frequency,
+        monetary,
+        r_score,
+        f_score,
+        m_score,
+        CASE
+            WHEN r_score >= 4 AND f_score >= 4 THEN 'Champions'
+            WHEN r_score <= 2 AND f_score >= 3 THEN 'At Risk'
+            WHEN f_score >= 3 THEN 'Loyal'
+            WHEN r_score <= 2 AND f_score <= 2 THEN 'Lost'
+            WHEN r_score >= 4 AND f_score = 1 THEN 'New'
+            ELSE 'Others'
+        END AS segment
+    FROM rfm_scored
+)
+
+SELECT
+    segment,
+    COUNT(*) AS nb_customers,
+    ROUND(AVG(monetary), 2) AS avg_monetary,
+    ROUND(AVG(frequency), 2) AS avg_frequency
+FROM rfm_segmented
+GROUP BY segment
+ORDER BY nb_customers DESC;
@@ -56,6 +56,28 @@
 -- =============================================================================
 
 
+-- ─────────────────────────────────────────────────────────────────────────────
+-- 0. ECART PAR COMMANDE (calcul partage)
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Les 5 analyses reposent sur le meme GROUP BY order_id sur toute la table
+-- de faits : il est calcule une seule fois dans une table temporaire de
+-- session, relue par chaque requete suivante (db.query_statements_from_file).
+-- payment_type est constant par commande (type dominant agrege par l'ETL) :
+-- l'ajouter au GROUP BY ne change pas le nombre de lignes.
+
+DROP TABLE IF EXISTS temp.order_deltas;
+
+CREATE TEMP TABLE order_deltas AS
+SELECT
+    order_id,
+    payment_type,
+    SUM(price) + SUM(freight_value)                              AS invoiced_total,
+    MAX(order_payment_total)                                     AS paid_total,
+    MAX(order_payment_total) - (SUM(price) + SUM(freight_value)) AS delta
+FROM fact_orders
+GROUP BY order_id, payment_type;
+
+
 -- ─────────────────────────────────────────────────────────────────────────────
 -- 1. STATISTIQUES GLOBALES
 -- ─────────────────────────────────────────────────────────────────────────────
@@ -66,14 +88,8 @@ SELECT
     ROUND(MIN(delta), 2)            AS delta_min,
     ROUND(MAX(delta), 2)            AS delta_max,
     ROUND(SUM(ABS(delta)), 2)       AS somme_abs_deltas
-FROM (
-    SELECT
-        order_id,
-        MAX(order_payment_total) - (SUM(price) + SUM(freight_value)) AS delta
-    FROM fact_orders
-    GROUP BY order_id
-    HAVING ABS(delta) > 0.01
-);
+FROM order_deltas
+WHERE ABS(delta) > 0.01;
 -- Resultat attendu :
 --   nb_commandes_avec_ecart = 384
 --   delta_moyen = 7.48, delta_min = -51.62, delta_max = 182.81
@@ -92,13 +108,7 @@ SELECT
     COUNT(*)                        AS nb_commandes,
     ROUND(AVG(ABS(delta)), 2)       AS ecart_abs_moyen,
     ROUND(SUM(delta), 2)            AS somme_delta
-FROM (
-    SELECT
-        order_id,
-        MAX(order_payment_total) - (SUM(price) + SUM(freight_value)) AS delta
-    FROM fact_orders
-    GROUP BY order_id
-)
+FROM order_deltas
 GROUP BY type_ecart;
 -- Resultat attendu :
 --   surpaye  : 290 commandes, somme = +3070.40
@@ -122,13 +132,7 @@ SELECT
         ELSE '> 50'
     END                             AS tranche_delta,
     COUNT(*)                        AS nb_commandes
-FROM (
-    SELECT
-        order_id,
-        MAX(order_payment_total) - (SUM(price) + SUM(freight_value)) AS delta
-    FROM fact_orders
-    GROUP BY order_id
-)
+FROM order_deltas
 GROUP BY tranche_delta
 ORDER BY MIN(delta);
 
@@ -148,14 +152,7 @@ SELECT
     )                               AS pct_ecart,
     ROUND(AVG(CASE WHEN ABS(delta) > 0.01 THEN delta END), 2)
                                     AS delta_moyen
-FROM (
-    SELECT
-        order_id,
-        payment_type,
-        MAX(order_payment_total) - (SUM(price) + SUM(freight_value)) AS delta
-    FROM fact_orders
-    GROUP BY order_id, payment_type
-)
+FROM order_deltas
 GROUP BY payment_type
 ORDER BY nb_avec_ecart DESC;
 -- Resultat attendu :
@@ -171,15 +168,12 @@ ORDER BY nb_avec_ecart DESC;
 
 SELECT
     order_id,
-    ROUND(SUM(price) + SUM(freight_value), 2) AS invoiced_total,
-    ROUND(MAX(order_payment_total), 2)        AS paid_total,
-    ROUND(
-        MAX(order_payment_total) - (SUM(price) + SUM(freight_value)), 2
-    )                                         AS delta
-FROM fact_orders
-GROUP BY order_id
-HAVING ABS(delta) > 0.01
-ORDER BY ABS(delta) DESC
+    ROUND(invoiced_total, 2)                  AS invoiced_total,
+    ROUND(paid_total, 2)                      AS paid_total,
+    ROUND(delta, 2)                           AS delta
+FROM order_deltas
+WHERE ABS(ROUND(delta, 2)) > 0.01
+ORDER BY ABS(ROUND(delta, 2)) DESC
 LIMIT 20;
 
 
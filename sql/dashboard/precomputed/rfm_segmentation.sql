@@ -0,0 +1,20 @@
+-- =============================================================================
+-- precomputed/rfm_segmentation.sql
+-- Segmentation RFM — lecture de la table rfm_segments precalculee par l'ETL
+-- =============================================================================
+-- Meme resultat que ../rfm_segmentation.sql (segment, nb_customers,
+-- avg_monetary, avg_frequency). Les metriques par client, les trois
+-- NTILE(5) et la classification CASE WHEN sont calcules une fois par
+-- chargement (src/etl/scores.py) : la page ne lit plus qu'une ligne par
+-- segment au lieu de trier toute la base client a chaque affichage.
+--
+-- Detail par client : table customer_rfm (index sur segment et scores).
+-- =============================================================================
+
+SELECT
+    segment,
+    nb_customers,
+    avg_monetary,
+    avg_frequency
+FROM rfm_segments
+ORDER BY nb_customers DESC;
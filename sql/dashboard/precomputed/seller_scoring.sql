@@ -0,0 +1,32 @@
+-- =============================================================================
+-- precomputed/seller_scoring.sql
+-- Scoring vendeurs — lecture de la table seller_scores precalculee par l'ETL
+-- =============================================================================
+-- Meme resultat que ../seller_scoring.sql (top 50 vendeurs, metriques,
+-- 5 quintiles, score total, RANK et DENSE_RANK). Les cinq NTILE(5) et les
+-- rangs sont calcules une fois par chargement (src/etl/scores.py).
+--
+-- Index utilise : idx_seller_scores_total (total_score DESC, seller_id) —
+-- le LIMIT 50 s'arrete apres 50 entrees d'index, sans tri.
+-- =============================================================================
+
+SELECT
+    seller_id,
+    seller_city,
+    seller_state,
+    total_revenue,
+    nb_orders,
+    avg_review,
+    avg_delivery_days,
+    on_time_pct,
+    revenue_score,
+    volume_score,
+    review_score_ntile,
+    delivery_score,
+    ontime_score,
+    total_score,
+    seller_rank,
+    seller_dense_rank
+FROM seller_scores
+ORDER BY total_score DESC, seller_id
+LIMIT 50;
@@ -81,6 +81,10 @@ WITH rfm_raw AS (
 -- CTE 2 : Attribution des scores RFM via NTILE(5) — quintiles
 -- NTILE(5) divise les clients en 5 groupes de taille egale.
 -- Score 5 = meilleur pour chaque dimension.
+-- customer_unique_id departage les ex-aequo (tres nombreux en frequence) :
+-- sans lui, la frontiere entre deux quintiles depend de l'ordre interne
+-- du tri SQLite. Les scores precalcules par l'ETL (src/etl/scores.py)
+-- appliquent le meme ordre.
 rfm_scored AS (
     SELECT
         customer_unique_id,
@@ -90,13 +94,13 @@ rfm_scored AS (
 
         -- Score Recency : ORDER BY recency DESC fait que les plus petites
         -- recences (achats recents) se retrouvent dans le quintile 5 (meilleur).
-        NTILE(5) OVER (ORDER BY recency DESC) AS r_score,
+        NTILE(5) OVER (ORDER BY recency DESC, customer_unique_id) AS r_score,
 
         -- Score Frequency : les clients les plus frequents = quintile 5
-        NTILE(5) OVER (ORDER BY frequency ASC) AS f_score,
+        NTILE(5) OVER (ORDER BY frequency ASC, customer_unique_id) AS f_score,
 
         -- Score Monetary : les clients qui depensent le plus = quintile 5
-        NTILE(5) OVER (ORDER BY monetary ASC) AS m_score
+        NTILE(5) OVER (ORDER BY monetary ASC, customer_unique_id) AS m_score
 
     FROM rfm_raw
 ),
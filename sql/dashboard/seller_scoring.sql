@@ -86,6 +86,8 @@ WITH seller_metrics AS (
 
 -- CTE 2 : Attribution des scores par quintiles et classement
 -- NTILE(5) divise les vendeurs en 5 groupes egaux sur chaque axe.
+-- seller_id departage les ex-aequo pour que les quintiles soient
+-- deterministes (memes scores que la table seller_scores de l'ETL).
 seller_scored AS (
     SELECT
         seller_id,
@@ -98,21 +100,21 @@ seller_scored AS (
         on_time_pct,
 
         -- Score revenue : les vendeurs avec le plus gros CA = quintile 5
-        NTILE(5) OVER (ORDER BY total_revenue ASC) AS revenue_score,
+        NTILE(5) OVER (ORDER BY total_revenue ASC, seller_id) AS revenue_score,
 
         -- Score volume : les vendeurs avec le plus de commandes = quintile 5
-        NTILE(5) OVER (ORDER BY nb_orders ASC) AS volume_score,
+        NTILE(5) OVER (ORDER BY nb_orders ASC, seller_id) AS volume_score,
 
         -- Score avis : les mieux notes = quintile 5
-        NTILE(5) OVER (ORDER BY avg_review ASC) AS review_score_ntile,
+        NTILE(5) OVER (ORDER BY avg_review ASC, seller_id) AS review_score_ntile,
 
         -- Score livraison (INVERSE) : les plus rapides = quintile 5
         -- ORDER BY DESC car un petit delai est meilleur, donc les plus
         -- rapides doivent recevoir le score le plus eleve.
-        NTILE(5) OVER (ORDER BY avg_delivery_days DESC) AS delivery_score,
+        NTILE(5) OVER (ORDER BY avg_delivery_days DESC, seller_id) AS delivery_score,
 
         -- Score ponctualite : les plus ponctuels = quintile 5
-        NTILE(5) OVER (ORDER BY on_time_pct ASC) AS ontime_score
+        NTILE(5) OVER (ORDER BY on_time_pct ASC, seller_id) AS ontime_score
 
     FROM seller_metrics
 )
@@ -154,5 +156,5 @@ SELECT
     ) AS seller_dense_rank
 
 FROM seller_scored
-ORDER BY total_score DESC
+ORDER BY total_score DESC, seller_id
 LIMIT 50;
@@ -0,0 +1,24 @@
+-- Colonnes dénormalisées optionnelles de fact_orders (ETL_DENORMALIZE_FACT=1)
+-- Appliqué par load_to_sqlite juste après create_star_schema.sql, avant
+-- l'insertion des lignes, lorsque la table de faits porte ces colonnes.
+--
+--   customer_unique_key : clé entière de dim_customers.customer_unique_id
+--                         (rang dense dans l'ordre trié des identifiants)
+--   month_key           : mois d'achat au format AAAAMM (= date_key / 100)
+--
+-- Les requêtes de sql/dashboard/denormalized/ s'appuient sur ces colonnes
+-- pour éviter les jointures vers dim_customers et dim_dates.
+
+ALTER TABLE fact_orders ADD COLUMN customer_unique_key INTEGER;
+ALTER TABLE fact_orders ADD COLUMN month_key INTEGER;
+
+-- ── Index ───────────────────────────────────────────────────────────────
+
+-- Agrégats par client (RFM, cohortes, LTV, nouveaux vs récurrents) :
+-- index couvrant, parcouru dans l'ordre client -> mois sans accès à la table.
+CREATE INDEX idx_fact_status_cust_unique
+    ON fact_orders(order_status, customer_unique_key, month_key, date_key, order_id, price);
+
+-- Agrégats mensuels sans dim_dates.
+CREATE INDEX idx_fact_status_month
+    ON fact_orders(order_status, month_key, price);
@@ -0,0 +1,24 @@
+-- =============================================================================
+-- fact_partitions.sql
+-- Manifeste des partitions de fact_orders (ETL_PARTITION_BY=year|quarter)
+-- =============================================================================
+-- En mode partitionne, fact_orders n'existe pas dans la base principale :
+-- chaque partition est un fichier SQLite a cote de olist_dw.db
+-- (olist_dw.fact_2017.db, olist_dw.fact_2017q3.db, ...) contenant sa propre
+-- table fact_orders et ses index. Le dashboard attache ces fichiers et les
+-- reunit derriere une vue temporaire fact_orders.
+--
+-- source_hash permet a l'ETL de ne reecrire que les partitions dont les
+-- lignes sources ont change depuis le dernier chargement.
+-- =============================================================================
+
+DROP TABLE IF EXISTS fact_partitions;
+
+CREATE TABLE fact_partitions (
+    partition_label  TEXT    PRIMARY KEY,   -- '2017', '2017q3' ou 'undated'
+    file_name        TEXT    NOT NULL,
+    date_key_min     INTEGER,               -- bornes AAAAMMJJ (NULL : undated)
+    date_key_max     INTEGER,
+    row_count        INTEGER NOT NULL,
+    source_hash      TEXT    NOT NULL
+);
@@ -0,0 +1,27 @@
+-- =============================================================================
+-- scores/customer_rfm_metrics.sql
+-- Metriques RFM brutes par client (entree de src/etl/scores.py)
+-- =============================================================================
+-- Memes expressions que la CTE rfm_raw de sql/dashboard/rfm_segmentation.sql.
+-- Le tri par customer_unique_id fixe l'ordre de depart des ex-aequo pour les
+-- quintiles calcules en numpy (meme departage que le NTILE de la requete).
+-- =============================================================================
+
+SELECT
+    c.customer_unique_id,
+    CAST(
+        JULIANDAY(
+            (SELECT MAX(d2.full_date)
+             FROM fact_orders f2
+             JOIN dim_dates d2 ON f2.date_key = d2.date_key)
+        )
+        - JULIANDAY(MAX(d.full_date))
+    AS INTEGER) AS recency,
+    COUNT(DISTINCT f.order_id) AS frequency,
+    ROUND(SUM(f.price), 2) AS monetary
+FROM fact_orders f
+JOIN dim_customers c ON f.customer_key = c.customer_key
+JOIN dim_dates d ON f.date_key = d.date_key
+WHERE f.order_status = 'delivered'
+GROUP BY c.customer_unique_id
+ORDER BY c.customer_unique_id;
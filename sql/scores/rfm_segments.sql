@@ -0,0 +1,15 @@
+-- =============================================================================
+-- scores/rfm_segments.sql
+-- Synthese par segment, calculee une fois depuis customer_rfm
+-- =============================================================================
+-- Memes agregats que la requete finale de sql/dashboard/rfm_segmentation.sql.
+-- =============================================================================
+
+INSERT INTO rfm_segments (segment, nb_customers, avg_monetary, avg_frequency)
+SELECT
+    segment,
+    COUNT(*) AS nb_customers,
+    ROUND(AVG(monetary), 2) AS avg_monetary,
+    ROUND(AVG(frequency), 2) AS avg_frequency
+FROM customer_rfm
+GROUP BY segment;
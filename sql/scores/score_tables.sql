@@ -0,0 +1,57 @@
+-- =============================================================================
+-- scores/score_tables.sql
+-- Tables de scores precalcules, reconstruites a chaque chargement ETL
+-- =============================================================================
+-- customer_rfm  : une ligne par client (metriques, quintiles R/F/M, segment)
+-- rfm_segments  : une ligne par segment (lue par la page RFM)
+-- seller_scores : une ligne par vendeur (5 quintiles, score total, rangs)
+--
+-- Les quintiles reproduisent NTILE(5) de SQLite, ex-aequo departages par
+-- identifiant (cf. sql/dashboard/rfm_segmentation.sql, seller_scoring.sql).
+-- =============================================================================
+
+DROP TABLE IF EXISTS customer_rfm;
+DROP TABLE IF EXISTS rfm_segments;
+DROP TABLE IF EXISTS seller_scores;
+
+CREATE TABLE customer_rfm (
+    customer_unique_id TEXT    PRIMARY KEY,
+    recency            INTEGER NOT NULL,
+    frequency          INTEGER NOT NULL,
+    monetary           REAL    NOT NULL,
+    r_score            INTEGER NOT NULL,
+    f_score            INTEGER NOT NULL,
+    m_score            INTEGER NOT NULL,
+    segment            TEXT    NOT NULL
+);
+
+CREATE TABLE rfm_segments (
+    segment        TEXT    PRIMARY KEY,
+    nb_customers   INTEGER NOT NULL,
+    avg_monetary   REAL,
+    avg_frequency  REAL
+);
+
+CREATE TABLE seller_scores (
+    seller_id           TEXT    PRIMARY KEY,
+    seller_city         TEXT,
+    seller_state        TEXT,
+    total_revenue       REAL,
+    nb_orders           INTEGER,
+    avg_review          REAL,
+    avg_delivery_days   REAL,
+    on_time_pct         REAL,
+    revenue_score       INTEGER NOT NULL,
+    volume_score        INTEGER NOT NULL,
+    review_score_ntile  INTEGER NOT NULL,
+    delivery_score      INTEGER NOT NULL,
+    ontime_score        INTEGER NOT NULL,
+    total_score         INTEGER NOT NULL,
+    seller_rank         INTEGER NOT NULL,
+    seller_dense_rank   INTEGER NOT NULL
+);
+
+CREATE INDEX idx_customer_rfm_segment ON customer_rfm(segment);
+CREATE INDEX idx_customer_rfm_scores  ON customer_rfm(r_score, f_score, m_score);
+CREATE INDEX idx_rfm_segments_size    ON rfm_segments(nb_customers DESC);
+CREATE INDEX idx_seller_scores_total  ON seller_scores(total_score DESC, seller_id);
@@ -0,0 +1,28 @@
+-- =============================================================================
+-- scores/seller_metrics.sql
+-- Metriques brutes par vendeur (entree de src/etl/scores.py)
+-- =============================================================================
+-- Memes expressions que la CTE seller_metrics de sql/dashboard/seller_scoring.sql,
+-- triees par seller_id (departage des ex-aequo des quintiles).
+-- =============================================================================
+
+SELECT
+    s.seller_id,
+    s.city AS seller_city,
+    s.state AS seller_state,
+    ROUND(SUM(f.price), 2) AS total_revenue,
+    COUNT(DISTINCT f.order_id) AS nb_orders,
+    ROUND(AVG(f.review_score), 2) AS avg_review,
+    ROUND(AVG(f.delivery_days), 1) AS avg_delivery_days,
+    ROUND(
+        AVG(CASE
+            WHEN f.delivery_delta_days <= 0 THEN 1.0
+            ELSE 0.0
+        END) * 100,
+        1
+    ) AS on_time_pct
+FROM fact_orders f
+JOIN dim_sellers s ON f.seller_key = s.seller_key
+WHERE f.order_status = 'delivered'
+GROUP BY s.seller_id, s.city, s.state
+ORDER BY s.seller_id;
@@ -7,8 +7,11 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
 DATABASE_DIR = DATA_DIR / "database"
+PROCESSED_DIR = DATA_DIR / "processed"
 
 DATABASE_PATH = DATABASE_DIR / "olist_dw.db"
+# Présent dans DATABASE_DIR tant que l'ETL écrit la base (cf. src/etl/pipeline.py)
+ETL_LOCK_FILE = ".etl.lock"
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
 # ── Correspondance des fichiers CSV ─────────────────────────────────────
@@ -0,0 +1,217 @@
+"""Charges utiles des graphiques : DataFrame -> colonnes ECharts / tableaux Plotly.
+
+Les builders construisaient leurs données ligne à ligne (``itertuples``,
+``iterrows``, boucles ``.loc`` par cellule, ``to_dict('records')``). Ici,
+chaque colonne est convertie en une opération numpy : arrondi à
+``precision`` décimales, NaN -> ``None``, puis ``tolist()``.
+
+- ``echarts_dataset`` : ``dataset.source`` au format colonnes
+  (``{"col": [...]}``), les séries le lisent via ``encode`` ;
+- ``echarts_matrix`` : cellules (x, y, valeur) d'une heatmap ;
+- ``plotly_arrays`` : tableaux numpy, encodés par Plotly en tableaux typés
+  (base64) plutôt qu'en listes JSON ;
+- ``records`` : lignes pour ``ui.table``.
+
+Les conversions sont mises en cache par empreinte du résultat
+(``frame_hash``) ; ``payload_json`` garde aussi leur JSON sérialisé. Les
+listes rendues sont partagées par le cache : ne pas les modifier.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+_PRECISION_DEFAULT = 2
+_PAYLOAD_CACHE_ENTRIES = 256
+
+
+def get_chart_precision() -> int:
+    """Décimales conservées dans les charges utiles (DASHBOARD_CHART_PRECISION)."""
+    raw = os.getenv("DASHBOARD_CHART_PRECISION")
+    if raw is None or not raw.strip():
+        return _PRECISION_DEFAULT
+    try:
+        precision = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_CHART_PRECISION invalide : '{raw}'") from exc
+    if not 0 <= precision <= 15:
+        raise ValueError(f"DASHBOARD_CHART_PRECISION invalide : '{raw}'")
+    return precision
+
+
+class PayloadCache:
+    """Cache LRU des charges utiles, par (empreinte, forme, options)."""
+
+    def __init__(self, max_entries: int = _PAYLOAD_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: tuple, build: Callable[[], object]) -> object:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_cache = PayloadCache()
+
+
+def payload_cache() -> PayloadCache:
+    return _cache
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Empreinte du contenu (valeurs, index, colonnes et types), calculée en numpy."""
+    digest = hashlib.sha1(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _precision(precision: int | None) -> int:
+    return get_chart_precision() if precision is None else precision
+
+
+def column_values(series: pd.Series, precision: int | None = None) -> list:
+    """Valeurs JSON d'une colonne : flottants arrondis, manquants -> ``None``."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        if not series.hasnans:
+            return series.to_numpy().tolist()
+    if pd.api.types.is_numeric_dtype(series):
+        values = np.round(series.to_numpy(dtype=float, na_value=np.nan), _precision(precision))
+        missing = np.isnan(values)
+        if not missing.any():
+            return values.tolist()
+        out = values.astype(object)
+        out[missing] = None
+        return out.tolist()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    # Copie explicite : to_numpy peut renvoyer une vue (en lecture seule sous
+    # pandas 3) sur le résultat partagé du cache de requêtes.
+    values = np.array(series, dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def _columns(df: pd.DataFrame, columns: Sequence[str] | None) -> list[str]:
+    return list(df.columns) if columns is None else list(columns)
+
+
+def columns_payload(
+    df: pd.DataFrame,
+    columns: Sequence[str] | None = None,
+    precision: int | None = None,
+) -> dict[str, list]:
+    """``{colonne: valeurs}`` (mis en cache par empreinte du résultat)."""
+    names = _columns(df, columns)
+    digits = _precision(precision)
+    key = (frame_hash(df), "columns", tuple(names), digits)
+    return _cache.get_or_build(
+        key, lambda: {str(name): column_values(df[name], digits) for name in names}
+    )
+
+
+def echarts_dataset(
+    df: pd.DataFrame,
+    columns: Sequence[str] | None = None,
+    precision: int | None = None,
+) -> dict:
+    """Option ``dataset`` ECharts au format colonnes ; les séries utilisent ``encode``."""
+    source = columns_payload(df, columns, precision)
+    return {"dimensions": list(source), "source": source}
+
+
+def echarts_matrix(matrix: pd.DataFrame, precision: int | None = None) -> dict:
+    """Cellules renseignées d'une matrice en ``dataset`` (x = colonne, y = ligne, valeur)."""
+    digits = _precision(precision)
+
+    def build() -> dict:
+        values = matrix.to_numpy(dtype=float, na_value=np.nan)
+        rows, cols = np.nonzero(~np.isnan(values))
+        return {
+            "dimensions": ["x", "y", "value"],
+            "source": {
+                "x": cols.tolist(),
+                "y": rows.tolist(),
+                "value": np.round(values[rows, cols], digits).tolist(),
+            },
+        }
+
+    return _cache.get_or_build((frame_hash(matrix), "matrix", digits), build)
+
+
+def plotly_arrays(
+    df: pd.DataFrame,
+    columns: Sequence[str] | None = None,
+    precision: int | None = None,
+) -> dict[str, np.ndarray | list]:
+    """Colonnes numériques en tableaux numpy (flottants arrondis), les autres en listes."""
+    names = _columns(df, columns)
+    digits = _precision(precision)
+
+    def build() -> dict[str, np.ndarray | list]:
+        arrays = {}
+        for name in names:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                if pd.api.types.is_integer_dtype(series) and not series.hasnans:
+                    arrays[name] = series.to_numpy()
+                else:
+                    arrays[name] = np.round(series.to_numpy(dtype=float, na_value=np.nan), digits)
+            else:
+                arrays[name] = column_values(series, digits)
+        return arrays
+
+    return _cache.get_or_build((frame_hash(df), "plotly", tuple(names), digits), build)
+
+
+def records(df: pd.DataFrame, precision: int | None = None) -> list[dict]:
+    """Lignes ``{colonne: valeur}`` pour ``ui.table``, construites depuis les colonnes."""
+    digits = _precision(precision)
+
+    def build() -> list[dict]:
+        source = columns_payload(df, None, digits)
+        names = list(source)
+        return [dict(zip(names, row)) for row in zip(*source.values())]
+
+    return _cache.get_or_build((frame_hash(df), "records", digits), build)
+
+
+def payload_json(
+    df: pd.DataFrame,
+    columns: Sequence[str] | None = None,
+    precision: int | None = None,
+) -> bytes:
+    """JSON compact de ``columns_payload``, sérialisé une fois par résultat."""
+    names = _columns(df, columns)
+    digits = _precision(precision)
+    key = (frame_hash(df), "json", tuple(names), digits)
+    return _cache.get_or_build(
+        key,
+        lambda: json.dumps(
+            columns_payload(df, names, digits), separators=(",", ":"), ensure_ascii=False
+        ).encode(),
+    )
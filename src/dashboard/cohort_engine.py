@@ -0,0 +1,149 @@
+"""Matrices de cohortes (rétention, revenu, LTV cumulée) calculées en numpy.
+
+Entrée : l'activité mensuelle par client (``customer_months.sql``), soit
+trois tableaux alignés — clé client, mois de commande AAAAMM, revenu. Le mois
+de premier achat de chaque client, puis sa cohorte et le délai en mois de
+chaque commande sont dérivés en une passe ; chaque matrice
+(cohorte x mois depuis le premier achat) est un ``np.bincount`` sur l'index
+aplati ``cohorte * horizon + délai``.
+
+Toutes les cohortes et tout l'horizon observé sont calculés ; les pages
+choisissent ensuite ce qu'elles affichent. Les cellules postérieures au
+dernier mois de données sont ``NaN`` (non observées), pas zéro.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def month_index(yyyymm: np.ndarray) -> np.ndarray:
+    """AAAAMM -> nombre absolu de mois (AAAA * 12 + MM) : la différence donne un délai."""
+    yyyymm = np.asarray(yyyymm, dtype=np.int64)
+    return yyyymm // 100 * 12 + yyyymm % 100
+
+
+def month_label(yyyymm: int) -> str:
+    """201701 -> '2017-01'."""
+    return f"{yyyymm // 100}-{yyyymm % 100:02d}"
+
+
+@dataclass(frozen=True)
+class CohortMatrices:
+    """Matrices (cohorte x mois depuis le premier achat) d'une analyse de cohortes."""
+
+    cohorts: np.ndarray  # mois de cohorte AAAAMM, croissants
+    active: np.ndarray  # clients distincts actifs (int)
+    revenue: np.ndarray  # revenu de la cohorte ce mois-là
+    observed: np.ndarray  # cellule dans la période couverte par les données (bool)
+
+    @property
+    def horizon(self) -> int:
+        return self.active.shape[1]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """Clients au mois 0 (taille de chaque cohorte)."""
+        return self.active[:, 0]
+
+    @property
+    def labels(self) -> list[str]:
+        return [month_label(int(cohort)) for cohort in self.cohorts]
+
+    def _masked(self, values: np.ndarray) -> np.ndarray:
+        return np.where(self.observed, values, np.nan)
+
+    @property
+    def retention(self) -> np.ndarray:
+        """Part des clients de la cohorte actifs chaque mois (%)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._masked(self.active / self.sizes[:, None] * 100)
+
+    @property
+    def cumulative_revenue(self) -> np.ndarray:
+        return self._masked(np.cumsum(self.revenue, axis=1))
+
+    @property
+    def ltv(self) -> np.ndarray:
+        """Revenu cumulé par client de la cohorte (LTV)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.cumulative_revenue / self.sizes[:, None]
+
+    def select(self, min_size: int = 0, horizon: int | None = None) -> "CohortMatrices":
+        """Cohortes d'au moins ``min_size`` clients, sur ``horizon`` mois au plus."""
+        rows = self.sizes >= min_size
+        cols = slice(0, self.horizon if horizon is None else min(horizon, self.horizon))
+        return CohortMatrices(
+            cohorts=self.cohorts[rows],
+            active=self.active[rows, cols],
+            revenue=self.revenue[rows, cols],
+            observed=self.observed[rows, cols],
+        )
+
+    def frame(self, values: np.ndarray) -> pd.DataFrame:
+        """Matrice en DataFrame : index = cohorte AAAA-MM, colonnes = mois depuis le 1er achat."""
+        return pd.DataFrame(values, index=self.labels, columns=range(values.shape[1]))
+
+    def long(self) -> pd.DataFrame:
+        """Une ligne par cellule observée avec activité (format des requêtes SQL d'origine)."""
+        rows, cols = np.nonzero(self.observed & (self.active > 0))
+        return pd.DataFrame({
+            "cohort_month": self.cohorts[rows],
+            "months_since_first": cols,
+            "nb_customers": self.active[rows, cols],
+            "cohort_revenue": self.revenue[rows, cols].round(2),
+            "cumulative_revenue": self.cumulative_revenue[rows, cols].round(2),
+            "ltv_per_customer": self.ltv[rows, cols].round(2),
+        })
+
+
+def build_cohorts(
+    customers: np.ndarray | pd.Series,
+    order_months: np.ndarray | pd.Series,
+    revenue: np.ndarray | pd.Series | None = None,
+) -> CohortMatrices:
+    """Construit toutes les matrices depuis l'activité (client, mois AAAAMM[, revenu]).
+
+    Plusieurs lignes pour un même (client, mois) sont admises : un client
+    n'est compté qu'une fois par mois, les revenus s'additionnent.
+    """
+    codes, _ = pd.factorize(np.asarray(customers), sort=False)
+    months = month_index(order_months)
+    amounts = (
+        np.zeros(len(months)) if revenue is None else np.asarray(revenue, dtype=float)
+    )
+    if len(months) == 0:
+        return CohortMatrices(
+            cohorts=np.zeros(0, dtype=np.int64),
+            active=np.zeros((0, 1), dtype=np.int64),
+            revenue=np.zeros((0, 1)),
+            observed=np.zeros((0, 1), dtype=bool),
+        )
+
+    # Premier mois de chaque client, puis délai de chaque commande.
+    first = np.full(codes.max() + 1, months.max(), dtype=np.int64)
+    np.minimum.at(first, codes, months)
+    delay = months - first[codes]
+    cohort_months, cohort_of_customer = np.unique(first, return_inverse=True)
+    cohort = cohort_of_customer[codes]
+
+    n_cohorts = len(cohort_months)
+    horizon = int(delay.max()) + 1
+    cells = cohort * horizon + delay
+    size = n_cohorts * horizon
+
+    # Clients distincts par cellule : un couple (client, délai) ne compte qu'une fois.
+    _, distinct = np.unique(codes.astype(np.int64) * horizon + delay, return_index=True)
+    active = np.bincount(cells[distinct], minlength=size).reshape(n_cohorts, horizon)
+    revenue_matrix = np.bincount(cells, weights=amounts, minlength=size).reshape(n_cohorts, horizon)
+
+    # Mois observables : cohorte + délai <= dernier mois des données.
+    observed = (cohort_months[:, None] + np.arange(horizon)[None, :]) <= months.max()
+    yyyymm = (cohort_months - 1) // 12 * 100 + (cohort_months - 1) % 12 + 1
+    return CohortMatrices(yyyymm, active, revenue_matrix, observed)
+
+
+def cohorts_from_frame(df: pd.DataFrame) -> CohortMatrices:
+    """Matrices depuis le résultat de ``customer_months.sql``."""
+    return build_cohorts(df["customer_unique_key"], df["order_month"], df["revenue"])
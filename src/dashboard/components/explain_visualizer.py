@@ -54,70 +54,8 @@ class ExplainVisualizer:
         return container
 
     def _parse_explain(self, output: str) -> list[dict]:
-        """
-        Parse la sortie EXPLAIN QUERY PLAN.
-
-        Format SQLite :
-        ```
-        QUERY PLAN
-        |--SCAN TABLE fact_orders
-        |--SEARCH TABLE fact_orders USING INDEX idx_orders_date (order_date>?)
-        `--USE TEMP B-TREE FOR ORDER BY
-        ```
-
-        Returns:
-            Liste de dicts avec {text, type, optimized, explanation}
-        """
-        steps = []
-        lines = output.strip().split('\n')
-
-        for line in lines:
-            # Skip header
-            if 'QUERY PLAN' in line or line.strip() == '':
-                continue
-
-            # Retirer préfixes tree (|--, `--)
-            clean_line = re.sub(r'^[|\s`-]+', '', line).strip()
-
-            # Identifier type d'opération
-            step_type = 'unknown'
-            optimized = False
-            explanation = ""
-
-            if 'SCAN TABLE' in clean_line.upper():
-                step_type = 'scan'
-                explanation = "⚠️ Parcours complet de la table (lent sur grandes tables)"
-
-            elif 'SEARCH TABLE' in clean_line.upper():
-                if 'USING INDEX' in clean_line.upper():
-                    step_type = 'search_indexed'
-                    optimized = True
-                    explanation = "✅ Recherche optimisée avec index (rapide)"
-                else:
-                    step_type = 'search'
-                    explanation = "🟡 Recherche sans index (moyen)"
-
-            elif 'USE TEMP B-TREE' in clean_line.upper():
-                step_type = 'temp_btree'
-                explanation = "🔵 Tri temporaire en mémoire (OK si peu de lignes)"
-
-            elif 'MATERIALIZE' in clean_line.upper():
-                step_type = 'materialize'
-                optimized = True
-                explanation = "✅ Matérialisation de CTE (évite recalculs)"
-
-            else:
-                step_type = 'other'
-                explanation = "📝 Opération auxiliaire"
-
-            steps.append({
-                'text': clean_line,
-                'type': step_type,
-                'optimized': optimized,
-                'explanation': explanation,
-            })
-
-        return steps
+        """Parse la sortie EXPLAIN QUERY PLAN (voir ``parse_explain``)."""
+        return parse_explain(output)
 
     def _render_steps(self):
         """Affiche tous les steps avec highlight du step courant."""
@@ -210,3 +148,76 @@ class ExplainVisualizer:
         else:
             # Lancer auto-play en background
             ui.timer(0, lambda: asyncio.create_task(self._autoplay()), once=True)
+
+
+def parse_explain(output: str) -> list[dict]:
+    """
+    Parse la sortie EXPLAIN QUERY PLAN.
+
+    Format SQLite (shell sqlite3, ou ``telemetry.format_query_plan``) :
+    ```
+    QUERY PLAN
+    |--SCAN fact_orders
+    |--SEARCH d USING INTEGER PRIMARY KEY (rowid=?)
+    `--USE TEMP B-TREE FOR ORDER BY
+    ```
+    Les anciennes versions de SQLite écrivent ``SCAN TABLE`` / ``SEARCH TABLE``.
+
+    Returns:
+        Liste de dicts avec {text, type, optimized, explanation, depth}
+        (``depth`` : niveau dans l'arbre, 0 à la racine)
+    """
+    steps = []
+    lines = output.strip().split('\n')
+
+    for line in lines:
+        # Skip header
+        if 'QUERY PLAN' in line or line.strip() == '':
+            continue
+
+        # Retirer préfixes tree (|--, `--) ; chaque niveau ajoute 3 caractères
+        prefix = re.match(r'^[|\s`-]*', line).group(0)
+        clean_line = line[len(prefix):].strip()
+        upper = clean_line.upper()
+        depth = max(len(prefix) // 3 - 1, 0)
+
+        # Identifier type d'opération
+        step_type = 'unknown'
+        optimized = False
+        explanation = ""
+
+        if upper.startswith('SCAN'):
+            step_type = 'scan'
+            explanation = "⚠️ Parcours complet de la table (lent sur grandes tables)"
+
+        elif upper.startswith('SEARCH'):
+            if 'INDEX' in upper or 'PRIMARY KEY' in upper:
+                step_type = 'search_indexed'
+                optimized = True
+                explanation = "✅ Recherche optimisée avec index (rapide)"
+            else:
+                step_type = 'search'
+                explanation = "🟡 Recherche sans index (moyen)"
+
+        elif 'USE TEMP B-TREE' in upper:
+            step_type = 'temp_btree'
+            explanation = "🔵 Tri temporaire en mémoire (OK si peu de lignes)"
+
+        elif 'MATERIALIZE' in upper:
+            step_type = 'materialize'
+            optimized = True
+            explanation = "✅ Matérialisation de CTE (évite recalculs)"
+
+        else:
+            step_type = 'other'
+            explanation = "📝 Opération auxiliaire"
+
+        steps.append({
+            'text': clean_line,
+            'type': step_type,
+            'optimized': optimized,
+            'explanation': explanation,
+            'depth': depth,
+        })
+
+    return steps
@@ -0,0 +1,167 @@
+"""Barre de filtres globale — periode, etat client, etat vendeur, categorie.
+
+La selection vit dans l'URL (``/ventes?date_from=2017-01-01&customer_state=SP``) :
+elle suit la navigation entre pages, se partage par lien, et chaque page
+relit ses requetes filtrees (cache par combinaison de filtres).
+
+La barre s'affiche tout de suite avec la selection de l'URL ; les valeurs
+proposees (etats, categories, bornes de dates) arrivent ensuite par
+``db.aquery``, sans bloquer la construction de la page.
+"""
+
+import asyncio
+import logging
+from urllib.parse import urlencode
+
+from nicegui import background_tasks, ui
+
+from src.dashboard import db
+from src.dashboard.filters import DashboardFilters, iso_date
+from src.dashboard.theme import BG_CARD, PRIMARY
+
+logger = logging.getLogger(__name__)
+
+_STATES_SQL = "SELECT DISTINCT state FROM {table} WHERE state IS NOT NULL ORDER BY state"
+_CATEGORIES_SQL = (
+    "SELECT DISTINCT COALESCE(category_name_en, category_name_pt, 'Unknown') AS category "
+    "FROM dim_products ORDER BY category"
+)
+_DATE_BOUNDS_SQL = "SELECT MIN(date_key) AS first_key, MAX(date_key) AS last_key FROM fact_orders"
+
+
+def current_filters() -> DashboardFilters:
+    """Filtres de la page courante, lus dans l'URL."""
+    return DashboardFilters.from_query(ui.context.client.request.query_params)
+
+
+def query_suffix() -> str:
+    """``?...`` a ajouter a un lien pour conserver les filtres courants."""
+    query = current_filters().to_query()
+    return f"?{urlencode(query)}" if query else ""
+
+
+async def filter_options() -> dict:
+    """Valeurs proposees par la barre (requetes servies par le cache de resultats)."""
+    bounds, customer_states, seller_states, categories = await asyncio.gather(
+        db.aquery(_DATE_BOUNDS_SQL),
+        db.aquery(_STATES_SQL.format(table="dim_customers")),
+        db.aquery(_STATES_SQL.format(table="dim_sellers")),
+        db.aquery(_CATEGORIES_SQL),
+    )
+    return {
+        "customer_states": customer_states["state"].tolist(),
+        "seller_states": seller_states["state"].tolist(),
+        "categories": categories["category"].tolist(),
+        "first_key": int(bounds["first_key"].iloc[0]),
+        "last_key": int(bounds["last_key"].iloc[0]),
+    }
+
+
+def _iso(date_key: int | None) -> str:
+    return "" if date_key is None else iso_date(date_key)
+
+
+def _known(value: str | None, choices: list[str]) -> str | None:
+    """Valeur d'URL absente des choix (lien perime) : select vide plutot qu'une erreur."""
+    return value if value in choices else None
+
+
+def _initial(value: str | None) -> list[str]:
+    """Choix en attendant les options : la seule valeur de l'URL."""
+    return [value] if value else []
+
+
+def filter_bar(current_path: str) -> None:
+    """Affiche la barre ; « Appliquer » recharge la page avec les filtres dans l'URL."""
+    filters = current_filters()
+    options: dict = {}
+
+    with ui.card().classes("w-full p-3 mb-2").style(f"background: {BG_CARD}"):
+        with ui.row().classes("w-full items-center gap-3 no-wrap"):
+            ui.icon("filter_alt").classes("text-2xl").style(f"color: {PRIMARY}")
+            date_from = ui.input("Du", value=_iso(filters.date_from)).props(
+                "type=date dense outlined"
+            )
+            date_to = ui.input("Au", value=_iso(filters.date_to)).props(
+                "type=date dense outlined"
+            )
+            customer_state = ui.select(
+                _initial(filters.customer_state),
+                label="Etat client",
+                value=filters.customer_state,
+                clearable=True,
+            ).props("dense outlined").classes("w-32")
+            seller_state = ui.select(
+                _initial(filters.seller_state),
+                label="Etat vendeur",
+                value=filters.seller_state,
+                clearable=True,
+            ).props("dense outlined").classes("w-32")
+            category = ui.select(
+                _initial(filters.category),
+                label="Categorie",
+                value=filters.category,
+                clearable=True, with_input=True,
+            ).props("dense outlined").classes("w-64")
+            selects = (
+                (customer_state, "customer_states"),
+                (seller_state, "seller_states"),
+                (category, "categories"),
+            )
+
+            def _apply() -> None:
+                selected = DashboardFilters.from_query({
+                    "date_from": date_from.value,
+                    "date_to": date_to.value,
+                    "customer_state": customer_state.value,
+                    "seller_state": seller_state.value,
+                    "category": category.value,
+                })
+                if (
+                    selected.date_from is not None
+                    and selected.date_to is not None
+                    and selected.date_from > selected.date_to
+                ):
+                    ui.notify("La date de debut doit preceder la date de fin", type="warning")
+                    return
+                # Bornes de l'historique : pas de filtre (meme cle de cache que sans filtre).
+                if selected.date_from is not None and selected.date_from <= options["first_key"]:
+                    selected = DashboardFilters(**{**selected.params(), "date_from": None})
+                if selected.date_to is not None and selected.date_to >= options["last_key"]:
+                    selected = DashboardFilters(**{**selected.params(), "date_to": None})
+                query = selected.to_query()
+                ui.navigate.to(f"{current_path}?{urlencode(query)}" if query else current_path)
+
+            apply_button = ui.button("Appliquer", icon="check", on_click=_apply).props(
+                "unelevated dense loading"
+            ).style(f"background: {PRIMARY}")
+            apply_button.disable()
+            if filters.active:
+                ui.button(
+                    icon="close", on_click=lambda: ui.navigate.to(current_path)
+                ).props("flat dense").tooltip("Reinitialiser les filtres")
+        ui.label(filters.describe()).style("color: #9E9E9E; font-size: 0.8rem")
+
+    client = ui.context.client
+
+    async def _load() -> None:
+        try:
+            options.update(await filter_options())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Barre inutilisable mais page intacte : les sections ont leurs propres requetes.
+            logger.exception("Options de la barre de filtres en echec")
+            apply_button.props(remove="loading")
+            return
+        date_from.value = date_from.value or _iso(options["first_key"])
+        date_to.value = date_to.value or _iso(options["last_key"])
+        for select, name in selects:
+            select.set_options(options[name], value=_known(select.value, options[name]))
+        apply_button.props(remove="loading")
+        apply_button.enable()
+
+    task = background_tasks.create(_load(), name="filter_options")
+    # NiceGUI >= 3 distingue la reconnexion (on_disconnect) de la fermeture définitive.
+    on_gone = getattr(client, "on_delete", client.on_disconnect)
+    on_gone(lambda: task.cancel())
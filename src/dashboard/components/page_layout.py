@@ -2,18 +2,20 @@
 
 from nicegui import ui
 
+from src.dashboard.components.filter_bar import filter_bar, query_suffix
 from src.dashboard.theme import BG_DARK, CUSTOM_CSS, PRIMARY
 
 NAV_ITEMS = [
-    {"label": "Vue d'ensemble", "icon": "dashboard", "path": "/"},
-    {"label": "Tendances", "icon": "trending_up", "path": "/trends"},
-    {"label": "Segmentation RFM", "icon": "people", "path": "/rfm"},
-    {"label": "Pareto vendeurs", "icon": "leaderboard", "path": "/pareto"},
-    {"label": "Cohortes", "icon": "grid_on", "path": "/cohorts"},
-    {"label": "Scoring vendeurs", "icon": "star_rate", "path": "/scoring"},
-    {"label": "Ventes", "icon": "shopping_bag", "path": "/ventes"},
-    {"label": "Clients", "icon": "group", "path": "/clients"},
+    {"label": "Vue d'ensemble", "icon": "dashboard", "path": "/", "filters": True},
+    {"label": "Tendances", "icon": "trending_up", "path": "/trends", "filters": True},
+    {"label": "Segmentation RFM", "icon": "people", "path": "/rfm", "filters": True},
+    {"label": "Pareto vendeurs", "icon": "leaderboard", "path": "/pareto", "filters": True},
+    {"label": "Cohortes", "icon": "grid_on", "path": "/cohorts", "filters": True},
+    {"label": "Scoring vendeurs", "icon": "star_rate", "path": "/scoring", "filters": True},
+    {"label": "Ventes", "icon": "shopping_bag", "path": "/ventes", "filters": True},
+    {"label": "Clients", "icon": "group", "path": "/clients", "filters": True},
     {"label": "Optimisation", "icon": "speed", "path": "/optimisation"},
+    {"label": "Admin", "icon": "monitor_heart", "path": "/admin"},
 ]
 
 
@@ -52,16 +54,22 @@ def layout(current_path: str = "/") -> ui.left_drawer:
         ui.label("Navigation").classes("text-sm font-bold mb-2").style(
             "color: #9E9E9E; text-transform: uppercase; letter-spacing: 1px"
         )
+        # Les pages filtrables conservent la selection de la barre de filtres.
+        suffix = query_suffix()
         for item in NAV_ITEMS:
             is_active = current_path == item["path"]
+            target = item["path"] + (suffix if item.get("filters") else "")
             btn = ui.button(
                 item["label"],
                 icon=item["icon"],
-                on_click=lambda p=item["path"]: ui.navigate.to(p),
+                on_click=lambda p=target: ui.navigate.to(p),
             ).classes("w-full justify-start").props("flat align=left")
             if is_active:
                 btn.style(f"background: rgba(0,200,83,0.12); color: {PRIMARY}")
             else:
                 btn.style("color: #9E9E9E")
 
+    if any(item["path"] == current_path and item.get("filters") for item in NAV_ITEMS):
+        filter_bar(current_path)
+
     return drawer
@@ -4,7 +4,7 @@
 Fonctionnalités :
 - Édition SQL avec syntax highlighting (CodeMirror)
 - Exécution READ-ONLY sécurisée
-- Affichage résultats : tableau + graphique automatique
+- Affichage résultats : tableau paginé (pages lues à la demande) + graphique automatique
 - Validation exercices avec comparaison solution
 - Messages d'erreur pédagogiques
 """
@@ -16,12 +16,18 @@ from typing import Callable
 import re
 
 from src.dashboard import db
+from src.dashboard.chart_payload import echarts_dataset, records
 from src.dashboard.course.content import Exercise
 
 
 class SQLEditor:
     """Éditeur SQL interactif pour les exercices du cours."""
 
+    # Lignes par page du tableau de résultats
+    PAGE_SIZE = 50
+    # Décimales affichées dans le tableau (le graphique suit DASHBOARD_CHART_PRECISION)
+    TABLE_PRECISION = 6
+
     def __init__(
         self,
         initial_sql: str = "",
@@ -43,8 +49,13 @@ class SQLEditor:
         # UI components (initialisés dans render())
         self.editor = None
         self.result_container = None
+        self.table_container = None
         self.status_label = None
 
+        # Dernière requête exécutée et son total (valeur, exact ?)
+        self._sql = ""
+        self._total = (0, True)
+
     def render(self) -> ui.column:
         """Construit l'UI de l'éditeur."""
         with ui.column().classes('w-full gap-4') as container:
@@ -80,8 +91,8 @@ class SQLEditor:
 
         return container
 
-    def _execute(self):
-        """Exécute la requête SQL et affiche les résultats."""
+    async def _execute(self):
+        """Exécute la requête SQL et affiche la première page de résultats."""
         sql = self.editor.value.strip()
 
         # Vérification sécurité : READ-ONLY
@@ -89,19 +100,25 @@ class SQLEditor:
             self._show_error("❌ Seules les requêtes SELECT sont autorisées (READ-ONLY).")
             return
 
-        # Exécution
+        # Exécution paginée (budget « exercise » dans une leçon, « editor » sinon)
         try:
-            result_df = db.query(sql)
-
-            # Affichage résultats
-            self._show_results(result_df)
-
+            with db.query_origin(self._origin):
+                page = await db.afetch_page(sql, page_size=self.PAGE_SIZE, profile=self._profile)
+        except db.QueryCancelled as e:
+            self._show_cancelled(e)
+            return
         except sqlite3.Error as e:
             self._show_pedagogical_error(e)
+            return
         except Exception as e:
             self._show_error(f"❌ Erreur inattendue: {str(e)}")
+            return
+
+        self._sql = sql
+        self._total = (page.total, page.total_exact)
+        self._show_results(page)
 
-    def _validate(self):
+    async def _validate(self):
         """Valide l'exercice en comparant avec la solution de référence."""
         if not self.exercise:
             return
@@ -114,8 +131,9 @@ class SQLEditor:
             return
 
         try:
-            # Exécuter requête utilisateur
-            result_df = db.query(sql)
+            # Exécuter requête utilisateur (résultat complet pour le validateur)
+            with db.query_origin(self._origin):
+                result_df = await db.aquery(sql, profile="exercise")
 
             # Appeler validateur
             success, feedback = self.exercise.validator(result_df)
@@ -126,48 +144,89 @@ class SQLEditor:
             else:
                 self._show_warning(feedback)
 
+        except db.QueryCancelled as e:
+            self._show_cancelled(e)
         except sqlite3.Error as e:
             self._show_pedagogical_error(e)
         except Exception as e:
             self._show_error(f"❌ Erreur lors de la validation: {str(e)}")
 
-    def _show_results(self, df: pd.DataFrame):
-        """Affiche les résultats de la requête."""
+    @property
+    def _profile(self) -> str:
+        return "exercise" if self.exercise else "editor"
+
+    @property
+    def _origin(self) -> str:
+        """Origine des requêtes dans le journal des requêtes lentes."""
+        return f"sql_editor:{self.exercise.id}" if self.exercise else "sql_editor"
+
+    def _total_label(self) -> str:
+        total, exact = self._total
+        return f"{total:,}".replace(",", " ") if exact else f"plus de {total - 1:,}".replace(",", " ")
+
+    def _show_results(self, page: db.ResultPage):
+        """Affiche la première page de résultats, le total et le graphique automatique."""
         self.result_container.clear()
 
         with self.result_container:
-            ui.label(f"✓ Requête exécutée avec succès : {len(df)} ligne(s)").classes(
+            ui.label(f"✓ Requête exécutée avec succès : {self._total_label()} ligne(s)").classes(
                 'text-green-400 font-semibold'
             )
 
-            if len(df) == 0:
+            if page.rows.empty:
                 ui.label("Aucun résultat.").classes('text-gray-400 italic')
                 return
 
-            # Tableau de résultats
+            # Tableau paginé : chaque page est demandée à la base à la demande
             with ui.card().classes('w-full'):
                 ui.label("Résultats :").classes('text-lg font-semibold mb-2')
+                self.table_container = ui.column().classes('w-full gap-2')
+                self._render_page(page)
 
-                # Limiter à 50 lignes pour l'affichage
-                display_df = df.head(50)
-                if len(df) > 50:
-                    ui.label(f"(Affichage des 50 premières lignes sur {len(df)})").classes(
-                        'text-sm text-gray-400 mb-2'
-                    )
-
-                # Table NiceGUI
-                columns = [{'name': col, 'label': col, 'field': col} for col in display_df.columns]
-                rows = display_df.to_dict('records')
-
-                ui.table(columns=columns, rows=rows, row_key='index').classes('w-full')
-
-            # Graphique automatique si structure adaptée
-            chart = self._auto_chart(display_df)
+            # Graphique automatique si structure adaptée (première page)
+            chart = self._auto_chart(page.rows)
             if chart:
                 with ui.card().classes('w-full'):
                     ui.label("Visualisation automatique :").classes('text-lg font-semibold mb-2')
                     chart
 
+    def _render_page(self, page: db.ResultPage):
+        """Affiche une page du tableau et les contrôles de navigation."""
+        self.table_container.clear()
+        with self.table_container:
+            first, last = page.first_row + 1, page.first_row + len(page.rows)
+            with ui.row().classes('items-center gap-2'):
+                ui.button(
+                    icon='chevron_left', on_click=lambda: self._goto_page(page.page - 1)
+                ).props('flat dense').set_enabled(page.page > 0)
+                ui.label(f"Lignes {first}–{last} sur {self._total_label()}").classes(
+                    'text-sm text-gray-400'
+                )
+                ui.button(
+                    icon='chevron_right', on_click=lambda: self._goto_page(page.page + 1)
+                ).props('flat dense').set_enabled(page.has_more)
+
+            columns = [{'name': col, 'label': col, 'field': col} for col in page.rows.columns]
+            rows = records(page.rows, precision=self.TABLE_PRECISION)
+            ui.table(columns=columns, rows=rows, row_key='index').classes('w-full')
+
+    async def _goto_page(self, page_num: int):
+        """Charge une autre page du dernier résultat (sans recompter le total)."""
+        try:
+            with db.query_origin(self._origin):
+                page = await db.afetch_page(
+                    self._sql, page_num, self.PAGE_SIZE, profile=self._profile, count=False
+                )
+        except db.QueryCancelled as e:
+            self._show_cancelled(e)
+            return
+        total, exact = self._total
+        if page.total_exact:
+            self._total = (page.total, True)
+        elif not exact:
+            self._total = (max(total, page.total), False)
+        self._render_page(page)
+
     def _auto_chart(self, df: pd.DataFrame):
         """
         Génère un graphique automatiquement si la structure est adaptée.
@@ -191,28 +250,22 @@ class SQLEditor:
         # Limiter à 20 premières lignes pour lisibilité
         chart_df = df.head(20)
 
-        # Construire options ECharts
+        # Construire options ECharts : dataset en colonnes, une série par colonne numérique
         x_col = text_cols[0]
-        categories = chart_df[x_col].tolist()
-
-        series = []
-        for num_col in numeric_cols:
-            series.append({
-                'name': num_col,
-                'type': 'bar',
-                'data': chart_df[num_col].tolist(),
-            })
 
         chart_options = {
+            'dataset': echarts_dataset(chart_df, [x_col, *numeric_cols]),
             'tooltip': {'trigger': 'axis'},
             'legend': {'data': numeric_cols},
             'xAxis': {
                 'type': 'category',
-                'data': categories,
                 'axisLabel': {'rotate': 45, 'fontSize': 10},
             },
             'yAxis': {'type': 'value'},
-            'series': series,
+            'series': [
+                {'name': num_col, 'type': 'bar', 'encode': {'x': x_col, 'y': num_col}}
+                for num_col in numeric_cols
+            ],
             'grid': {'bottom': 80},
         }
 
@@ -288,6 +341,15 @@ SELECT o.customer_id FROM fact_orders o JOIN dim_customers c ...
 💡 Consultez la syntaxe SQL et réessayez.
 """).classes('text-gray-300')
 
+    def _show_cancelled(self, error: db.QueryCancelled):
+        """Explique l'annulation d'une requête hors budget."""
+        tips = {
+            "timeout": "Vérifiez les conditions de jointure (un produit cartésien explose vite).",
+            "steps": "Vérifiez les conditions de jointure et filtrez plus tôt (WHERE).",
+            "rows": "Ajoutez un `LIMIT` ou agrégez le résultat (GROUP BY).",
+        }
+        self._show_error(f"⏱️ **{error}**\n\n💡 {tips[error.reason]}")
+
     def _show_error(self, message: str):
         """Affiche un message d'erreur."""
         self.result_container.clear()
@@ -1,11 +1,121 @@
 """Composant central : affiche SQL → exécute → chart."""
 
+import asyncio
+import logging
+import weakref
 from typing import Callable
 
 import pandas as pd
-from nicegui import ui
+from nicegui import background_tasks, ui
 
 from src.dashboard import db
+from src.dashboard.components.filter_bar import current_filters
+from src.dashboard.downsample import (
+    DEFAULT_CHART_WIDTH,
+    ChartResolution,
+    chart_resolution,
+    current_chart_width,
+)
+from src.dashboard.render_cache import SectionInputs, current_section_inputs, section_inputs
+
+logger = logging.getLogger(__name__)
+
+_WIDTH_TIMEOUT = 3.0
+
+# Chargement d'une section différée : dès l'affichage (eager), à son entrée
+# dans la fenêtre (visible) ou à l'appel de la fonction rendue (on_demand).
+LOAD_MODES = ("eager", "visible", "on_demand")
+_LAZY_CLASS = "lazy-section"
+# La requête part un peu avant que la section n'entre dans la fenêtre.
+_VIEWPORT_MARGIN_PX = 200
+
+# Un seul IntersectionObserver par page : chaque élément ``lazy-section``
+# (y compris ajouté plus tard) reçoit un événement ``visible`` à sa première
+# entrée dans la fenêtre. NiceGUI le transmet au serveur après la poignée de main.
+_LAZY_SECTION_JS = f"""
+(() => {{
+  const seen = new WeakSet();
+  const observer = new IntersectionObserver((entries) => {{
+    for (const entry of entries) {{
+      if (!entry.isIntersecting) continue;
+      observer.unobserve(entry.target);
+      entry.target.dispatchEvent(new CustomEvent("visible"));
+    }}
+  }}, {{ rootMargin: "{_VIEWPORT_MARGIN_PX}px" }});
+  const watch = (node) => {{
+    if (node.nodeType !== Node.ELEMENT_NODE) return;
+    const found = node.matches(".{_LAZY_CLASS}") ? [node] : [];
+    for (const el of [...found, ...node.querySelectorAll(".{_LAZY_CLASS}")]) {{
+      if (seen.has(el)) continue;
+      seen.add(el);
+      observer.observe(el);
+    }}
+  }};
+  new MutationObserver((mutations) => {{
+    for (const mutation of mutations) mutation.addedNodes.forEach(watch);
+  }}).observe(document.documentElement, {{ childList: true, subtree: true }});
+}})();
+"""
+
+# Clients ayant déjà reçu le script (une fois par page).
+_lazy_clients: weakref.WeakSet = weakref.WeakSet()
+
+
+def _render_header(title: str, description: str) -> None:
+    ui.label(title).classes("page-title mt-4")
+    with ui.element("div").classes("sql-concepts mb-2"):
+        ui.html(f"<b>Concepts SQL :</b> {description}")
+
+
+def _render_sql(sql_text: str) -> None:
+    with ui.expansion("Voir la requête SQL", icon="code").classes(
+        "w-full sql-block"
+    ).props("dense"):
+        ui.code(sql_text, language="sql").classes("w-full")
+
+
+def _render_chart(df: pd.DataFrame, chart_builder: Callable[[pd.DataFrame], None]) -> None:
+    """Graphique aux dimensions de l'écran ; la série brute n'est envoyée qu'à la demande."""
+    chart = ui.column().classes("w-full gap-0")
+    width_px = current_chart_width()
+    # Gardées pour le bouton « Pleine resolution », rappelé hors de la section.
+    inputs = current_section_inputs()
+
+    def draw(full: bool) -> ChartResolution:
+        chart.clear()
+        with chart, chart_resolution(ChartResolution(width_px, full)) as resolution, section_inputs(inputs):
+            chart_builder(df)
+        return resolution
+
+    resolution = draw(False)
+    if resolution.reduced:
+        raw_points = max(total for total, _ in resolution.reduced)
+        shown_points = max(kept for _, kept in resolution.reduced)
+        ui.switch(
+            f"Pleine resolution ({raw_points} points, {shown_points} affiches)",
+            on_change=lambda e: draw(e.value),
+        ).props("dense").style("color: #9E9E9E; font-size: 0.8rem")
+
+
+def _render_result(
+    df: pd.DataFrame,
+    chart_builder: Callable[[pd.DataFrame], None],
+    show_table: bool,
+) -> None:
+    if df.empty:
+        ui.label("Aucune donnee retournee par cette requete.").classes("text-center mt-4")
+        return
+
+    _render_chart(df, chart_builder)
+
+    if show_table and not df.empty:
+        with ui.expansion("Données brutes", icon="table_chart").classes("w-full mt-2"):
+            ui.table.from_pandas(df.head(50)).classes("w-full")
+
+
+def _origin() -> str:
+    """Page appelante, pour le journal des requêtes lentes."""
+    return f"{ui.context.client.page.path} (sql_viewer)"
 
 
 def sql_viewer(
@@ -24,23 +134,137 @@ def sql_viewer(
         chart_builder: Callback (df) → construit le graphique
         show_table: Si True, affiche aussi les données brutes
     """
-    sql_text, df = db.query_from_file(sql_file)
+    filters = current_filters()
+    with db.query_origin(_origin()):
+        version = db.data_version()
+        sql_text, df = db.query_from_file(sql_file, filters)
 
-    ui.label(title).classes("page-title mt-4")
-    with ui.element("div").classes("sql-concepts mb-2"):
-        ui.html(f"<b>Concepts SQL :</b> {description}")
+    _render_header(title, description)
+    _render_sql(sql_text)
+    with section_inputs(SectionInputs(sql_file, version, filters)):
+        _render_result(df, chart_builder, show_table)
 
-    with ui.expansion("Voir la requête SQL", icon="code").classes(
-        "w-full sql-block"
-    ).props("dense"):
-        ui.code(sql_text, language="sql").classes("w-full")
 
-    if df.empty:
-        ui.label("Aucune donnee retournee par cette requete.").classes("text-center mt-4")
-        return
+async def _measure_width(client, element: ui.element) -> int:
+    """Largeur affichée de ``element`` ; ``DEFAULT_CHART_WIDTH`` si le navigateur ne répond pas."""
+    try:
+        await client.connected(timeout=_WIDTH_TIMEOUT)
+        width = await client.run_javascript(
+            f"getHtmlElement({element.id}).clientWidth", timeout=_WIDTH_TIMEOUT
+        )
+    except Exception:  # client absent, déconnecté ou trop lent : largeur par défaut
+        return DEFAULT_CHART_WIDTH
+    return int(width) if isinstance(width, (int, float)) and width > 0 else DEFAULT_CHART_WIDTH
 
-    chart_builder(df)
 
-    if show_table and not df.empty:
-        with ui.expansion("Données brutes", icon="table_chart").classes("w-full mt-2"):
-            ui.table.from_pandas(df.head(50)).classes("w-full")
+def _when_visible(element: ui.element, start: Callable[[], None]) -> None:
+    """Appelle ``start`` quand ``element`` entre dans la fenêtre du navigateur."""
+    client = ui.context.client
+    if client not in _lazy_clients:
+        _lazy_clients.add(client)
+        if client.has_socket_connection:  # section ajoutée après le chargement de la page
+            client.run_javascript(_LAZY_SECTION_JS)
+        else:
+            ui.add_head_html(f"<script>{_LAZY_SECTION_JS}</script>")
+    element.classes(_LAZY_CLASS)
+    element.on("visible", lambda: start(), [])
+
+
+def deferred_query(
+    sql_file: str,
+    render: Callable[[str, pd.DataFrame], None],
+    placeholder_height: str = "300px",
+    load: str = "eager",
+) -> Callable[[], None]:
+    """Affiche un squelette puis ``render(sql_text, df)`` quand la requête a abouti.
+
+    La requête s'exécute sur l'exécuteur borné de ``db.aquery`` : la
+    construction de la page rend la main immédiatement. Si le client quitte
+    la page, la tâche est annulée et la requête SQLite interrompue.
+    ``render`` est appelé dans la section (``section_inputs``) : ses
+    ``section_chart`` sont mis en cache par fichier, entrepôt et filtres.
+
+    ``load`` (cf. ``LOAD_MODES``) choisit quand la requête part : tout de
+    suite, quand le squelette entre dans la fenêtre, ou à l'appel de la
+    fonction retournée (qui lance la requête une seule fois).
+    """
+    if load not in LOAD_MODES:
+        raise ValueError(f"Mode de chargement inconnu : '{load}' (disponibles : {LOAD_MODES})")
+    container = ui.column().classes("w-full gap-0")
+    with container:
+        ui.skeleton().classes("w-full").style(f"height: {placeholder_height}")
+    client = ui.context.client
+    origin = _origin()
+    filters = current_filters()
+
+    async def _load() -> None:
+        try:
+            with db.query_origin(origin):
+                (sql_text, df, version), width_px = await asyncio.gather(
+                    db.aquery_from_file_versioned(sql_file, filters),
+                    _measure_width(client, container),
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("Requete %s en echec", sql_file)
+            container.clear()
+            with container:
+                ui.label(f"Erreur lors de l'execution de {sql_file} : {exc}").classes(
+                    "text-center mt-4"
+                )
+            return
+        container.clear()
+        inputs = SectionInputs(sql_file, version, filters)
+        with container, chart_resolution(ChartResolution(width_px)), section_inputs(inputs):
+            render(sql_text, df)
+
+    tasks: list[asyncio.Task] = []
+
+    def start() -> None:
+        if tasks or client.is_deleted:
+            return
+        task = background_tasks.create(_load(), name=f"query:{sql_file}")
+        tasks.append(task)
+        # NiceGUI >= 3 distingue la reconnexion (on_disconnect) de la fermeture définitive.
+        on_gone = getattr(client, "on_delete", client.on_disconnect)
+        on_gone(lambda: task.cancel())
+
+    if load == "eager":
+        start()
+    elif load == "visible":
+        _when_visible(container, start)
+    return start
+
+
+def sql_viewer_async(
+    title: str,
+    description: str,
+    sql_file: str,
+    chart_builder: Callable[[pd.DataFrame], None],
+    show_table: bool = False,
+    load: str = "eager",
+) -> None:
+    """Variante non bloquante de ``sql_viewer`` : squelette, puis SQL et chart à l'arrivée du résultat.
+
+    Mêmes arguments que ``sql_viewer``, plus ``load`` :
+
+    - ``"eager"`` : la requête part à la construction de la page ;
+    - ``"visible"`` : quand la section entre dans la fenêtre (sections sous
+      la ligne de flottaison : le premier affichage ne paie que le haut) ;
+    - ``"expansion"`` : résultat replié, requête à la première ouverture.
+    """
+    if load not in ("eager", "visible", "expansion"):
+        raise ValueError(f"Mode de chargement inconnu : '{load}'")
+    _render_header(title, description)
+
+    def _render(sql_text: str, df: pd.DataFrame) -> None:
+        _render_sql(sql_text)
+        _render_result(df, chart_builder, show_table)
+
+    if load != "expansion":
+        deferred_query(sql_file, _render, load=load)
+        return
+    with ui.expansion("Afficher l'analyse", icon="insights").classes("w-full") as expansion:
+        start = deferred_query(sql_file, _render, load="on_demand")
+    expansion.on_value_change(lambda event: start() if event.value else None)
@@ -0,0 +1,138 @@
+"""API de données : résultats des requêtes du dashboard en JSON ou Arrow IPC.
+
+``GET /api/query/{sql_file}`` exécute un fichier de ``sql/dashboard/`` comme
+les pages (variante de l'entrepôt, filtres globaux en paramètres d'URL,
+caches de résultats) et renvoie :
+
+- JSON (défaut) : ``{"columns": [...], "rows": n, "data": {colonne: [...]}}`` ;
+- Arrow IPC stream (``?format=arrow`` ou ``Accept:
+  application/vnd.apache.arrow.stream``), si ``pyarrow`` est installé.
+
+Chaque réponse porte un ETag = empreinte de l'entrepôt + SQL exécuté +
+paramètres + format. Un client (ou un reverse proxy) qui renvoie
+``If-None-Match`` reçoit ``304 Not Modified`` sans que la requête soit
+relancée : seul le SQL est résolu.
+
+Seules les requêtes à une instruction sont servies (``db.dashboard_query_files``) ;
+une erreur SQLite est renvoyée en JSON (500), une annulation par le
+gouverneur en 503.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Mapping
+
+import pandas as pd
+from starlette.responses import Response
+
+from src.dashboard import db
+from src.dashboard.chart_payload import frame_hash, payload_cache, payload_json
+from src.dashboard.filters import DashboardFilters
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+FORMATS = {"json": JSON_MEDIA_TYPE, "arrow": ARROW_MEDIA_TYPE}
+
+# Décimales du JSON : pleine précision utile d'un float64 (les graphiques arrondissent à 2).
+API_PRECISION = 15
+
+
+class ArrowUnavailable(RuntimeError):
+    """Format Arrow demandé sans ``pyarrow`` installé."""
+
+
+def negotiate_format(requested: str | None, accept: str | None) -> str:
+    """Format de la réponse : paramètre ``format``, sinon en-tête ``Accept``, sinon JSON."""
+    if requested:
+        name = requested.strip().lower()
+        if name not in FORMATS:
+            raise ValueError(f"Format inconnu : '{requested}' (disponibles : {sorted(FORMATS)})")
+        return name
+    if accept and ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    return "json"
+
+
+def result_etag(fingerprint: str, sql: str, params, fmt: str) -> str:
+    """ETag fort d'un résultat : change avec l'entrepôt, le SQL, les paramètres ou le format."""
+    params_key = sorted(params.items()) if isinstance(params, Mapping) else list(params)
+    digest = hashlib.sha256(repr((fingerprint, sql, params_key, fmt)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Vrai si ``If-None-Match`` désigne ``etag`` (liste, ``*`` et préfixe faible admis)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def encode_json(df: pd.DataFrame) -> bytes:
+    """Corps JSON ; les colonnes viennent de ``payload_json`` (sérialisées une fois par résultat)."""
+    header = json.dumps(
+        {"columns": [str(column) for column in df.columns], "rows": len(df)},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode()
+    return header[:-1] + b',"data":' + payload_json(df, precision=API_PRECISION) + b"}"
+
+
+def encode_arrow(df: pd.DataFrame) -> bytes:
+    """Corps Arrow IPC stream (mis en cache par empreinte du résultat)."""
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ArrowUnavailable("Format Arrow indisponible : installer pyarrow") from exc
+
+    def build() -> bytes:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    return payload_cache().get_or_build((frame_hash(df), "arrow"), build)
+
+
+def _error(status: int, message: str) -> Response:
+    body = json.dumps({"error": message}, ensure_ascii=False).encode()
+    return Response(body, status_code=status, media_type=JSON_MEDIA_TYPE)
+
+
+def query_response(
+    sql_file: str,
+    query_params: Mapping[str, str],
+    headers: Mapping[str, str],
+) -> Response:
+    """Réponse HTTP de ``/api/query/{sql_file}`` (200, 304 ou erreur JSON)."""
+    if sql_file not in db.dashboard_query_files():
+        return _error(404, f"Fichier SQL inconnu : '{sql_file}'")
+    try:
+        fmt = negotiate_format(query_params.get("format"), headers.get("accept"))
+    except ValueError as exc:
+        return _error(406, str(exc))
+
+    filters = DashboardFilters.from_query(query_params)
+    try:
+        sql, params, fingerprint = db.resolve_query_file(sql_file, filters)
+    except sqlite3.Error as exc:
+        return _error(500, f"Erreur SQL dans '{sql_file}' : {exc}")
+    etag = result_etag(fingerprint, sql, params, fmt)
+    # no-cache : stockable, mais revalidé à chaque usage (304 si l'ETag tient).
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    try:
+        _, df = db.query_from_file(sql_file, filters)
+    except db.QueryCancelled as exc:
+        return _error(503, str(exc))
+    except (sqlite3.Error, pd.errors.DatabaseError) as exc:
+        return _error(500, f"Erreur SQL dans '{sql_file}' : {exc}")
+    try:
+        body = encode_arrow(df) if fmt == "arrow" else encode_json(df)
+    except ArrowUnavailable as exc:
+        return _error(406, str(exc))
+    return Response(body, media_type=FORMATS[fmt], headers=cache_headers)
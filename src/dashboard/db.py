@@ -1,17 +1,90 @@
-"""Couche données — connexion SQLite read-only et helpers."""
+"""Couche données — connexion SQLite read-only, cache de résultats et helpers."""
 
+import asyncio
+import functools
+import hashlib
+import os
+import re
 import sqlite3
+import sys
 import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TypeVar
 
 import pandas as pd
 
-from src.config import DATABASE_PATH
+from src.config import DATABASE_PATH as _DEFAULT_DATABASE_PATH
+from src.config import ETL_LOCK_FILE
+from src.database.partitions import (
+    FactPartition,
+    attach_partitions,
+    read_manifest,
+    union_view_sql,
+)
+from src.database.sql_script import split_statements
+from src.dashboard.filters import DashboardFilters, apply_filters
+from src.dashboard.result_store import (
+    DiskCacheStats,
+    DiskResultStore,
+    get_disk_cache_bytes,
+    get_disk_cache_dir,
+    get_disk_cache_max_age,
+)
+from src.dashboard.slow_log import (
+    SlowQuery,
+    SlowQueryLog,
+    get_slow_log_bytes,
+    get_slow_log_path,
+    get_slow_query_threshold,
+)
+from src.dashboard.telemetry import (
+    PlanChange,
+    QueryMetrics,
+    QueryTelemetry,
+    format_query_plan,
+    get_telemetry_sample_rate,
+    render_prometheus,
+)
+
+
+def get_database_path() -> Path:
+    """Entrepôt servi par le dashboard (DASHBOARD_DATABASE, défaut data/database/olist_dw.db)."""
+    raw = os.getenv("DASHBOARD_DATABASE")
+    if raw is None or not raw.strip():
+        return _DEFAULT_DATABASE_PATH
+    return Path(raw)
+
+
+DATABASE_PATH = get_database_path()
 
 _SQL_DIR = Path(__file__).resolve().parent.parent.parent / "sql" / "dashboard"
+_DENORMALIZED_SQL_DIR = _SQL_DIR / "denormalized"
+_PRECOMPUTED_SQL_DIR = _SQL_DIR / "precomputed"
 _VIEWS_SQL = Path(__file__).resolve().parent.parent.parent / "sql" / "views.sql"
-_conn: sqlite3.Connection | None = None
-_conn_lock = threading.Lock()
+_T = TypeVar("_T")
+_fact_denormalized = False
+_scores_precomputed = False
+_partitions: list[FactPartition] = []
+# (st_dev, st_ino) du fichier ouvert par le pool : change quand l'ETL remplace la base.
+_db_identity: tuple[int, int] | None = None
+# Incrémenté quand une connexion observe un changement de PRAGMA data_version.
+_data_epoch = 0
+# Version de l'entrepôt à laquelle _fact_denormalized / _scores_precomputed ont été relevés.
+_capabilities_version: tuple[int, ...] | None = None
+_version_lock = threading.Lock()
+
+# Colonnes ajoutées à fact_orders par ETL_DENORMALIZE_FACT (cf. src/etl/load.py)
+_DENORMALIZED_COLUMNS = {"customer_unique_key", "month_key"}
+
+# Tables écrites par la phase de scores de l'ETL (cf. src/etl/scores.py)
+_SCORE_TABLES = {"customer_rfm", "rfm_segments", "seller_scores"}
 
 
 def _ensure_views() -> None:
@@ -20,6 +93,10 @@ def _ensure_views() -> None:
         return
     # Vérifier si les vues existent déjà
     ro = sqlite3.connect(f"file:{DATABASE_PATH}?mode=ro", uri=True)
+    # Base partitionnée : les vues sont créées en TEMP à la connexion.
+    if read_manifest(ro):
+        ro.close()
+        return
     existing = {
         row[0]
         for row in ro.execute(
@@ -36,23 +113,842 @@ def _ensure_views() -> None:
     rw.close()
 
 
-def get_connection() -> sqlite3.Connection:
-    """Retourne une connexion SQLite read-only singleton."""
-    global _conn
-    if _conn is None:
-        with _conn_lock:
-            if _conn is None:
-                _ensure_views()
-                uri = f"file:{DATABASE_PATH}?mode=ro"
-                _conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
-                # Evite les erreurs "unable to open database file" sur les requêtes
-                # analytiques qui nécessitent des structures temporaires (DISTINCT,
-                # GROUP BY, ORDER BY, window functions) en mode read-only.
-                _conn.execute("PRAGMA temp_store=MEMORY")
-                # Laisse SQLite attendre un verrou plutot que d'echouer immediatement.
-                _conn.execute("PRAGMA busy_timeout=5000")
-                _conn.row_factory = sqlite3.Row
-    return _conn
+def _has_denormalized_fact(conn: sqlite3.Connection) -> bool:
+    """Vrai si fact_orders porte les colonnes dénormalisées."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(fact_orders)").fetchall()}
+    return _DENORMALIZED_COLUMNS <= columns
+
+
+def _has_score_tables(conn: sqlite3.Connection) -> bool:
+    """Vrai si les tables de scores précalculés sont présentes."""
+    tables = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    }
+    return _SCORE_TABLES <= tables
+
+
+class _ReadOnlyConnection(sqlite3.Connection):
+    """Connexion du pool : mémorise le dernier PRAGMA data_version observé."""
+
+    data_version: int | None = None
+    immutable: bool = False
+
+
+# ── Profils de performance ───────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """Réglages SQLite appliqués à chaque connexion du pool.
+
+    ``cache_size_kib`` / ``mmap_size_mb`` / ``threads`` : 0 = valeur par
+    défaut de SQLite. ``immutable`` ouvre la base en ``immutable=1`` (ni
+    verrou ni détection de changement) quand aucun ETL n'écrit.
+    ``prefetch`` lit les pages de fact_orders au démarrage.
+    """
+
+    name: str
+    cache_size_kib: int = 0
+    mmap_size_mb: int = 0
+    threads: int = 0
+    immutable: bool = False
+    prefetch: bool = False
+
+
+# ``baseline`` : PRAGMA d'origine (réglages SQLite par défaut), pour comparaison.
+CONNECTION_PROFILES = {
+    "baseline": ConnectionProfile("baseline"),
+    "cached": ConnectionProfile("cached", cache_size_kib=32_768, mmap_size_mb=256, threads=2),
+    "immutable": ConnectionProfile(
+        "immutable",
+        cache_size_kib=32_768,
+        mmap_size_mb=1024,
+        threads=2,
+        immutable=True,
+        prefetch=True,
+    ),
+}
+DEFAULT_CONNECTION_PROFILE = "cached"
+
+
+def get_connection_profile() -> ConnectionProfile:
+    """Profil des connexions dashboard (DASHBOARD_DB_PROFILE, défaut ``cached``)."""
+    raw = os.getenv("DASHBOARD_DB_PROFILE")
+    if raw is None or not raw.strip():
+        return CONNECTION_PROFILES[DEFAULT_CONNECTION_PROFILE]
+    name = raw.strip().lower()
+    if name not in CONNECTION_PROFILES:
+        raise ValueError(
+            f"DASHBOARD_DB_PROFILE invalide : '{raw}' (disponibles : {sorted(CONNECTION_PROFILES)})"
+        )
+    return CONNECTION_PROFILES[name]
+
+
+_profile = get_connection_profile()
+
+
+def _immutable_safe(db_path: Path) -> bool:
+    """Vrai si la base ne peut pas changer : pas d'ETL en cours ni de WAL non vide."""
+    if db_path.with_name(ETL_LOCK_FILE).exists():
+        return False
+    return _file_state(Path(f"{db_path}-wal"))[1] == 0
+
+
+def _connect(
+    db_path: Path, profile: ConnectionProfile
+) -> tuple[_ReadOnlyConnection, list[FactPartition]]:
+    """Connexion read-only réglée selon ``profile``, partitions attachées."""
+    immutable = profile.immutable and _immutable_safe(db_path)
+    conn = sqlite3.connect(
+        f"file:{db_path}?mode=ro" + ("&immutable=1" if immutable else ""),
+        uri=True,
+        check_same_thread=False,
+        factory=_ReadOnlyConnection,
+    )
+    conn.immutable = immutable
+    # Evite les erreurs "unable to open database file" sur les requêtes
+    # analytiques qui nécessitent des structures temporaires (DISTINCT,
+    # GROUP BY, ORDER BY, window functions) en mode read-only.
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # Laisse SQLite attendre un verrou plutot que d'echouer immediatement.
+    conn.execute("PRAGMA busy_timeout=5000")
+    if profile.cache_size_kib:
+        # Valeur négative : taille en Kio plutôt qu'en pages.
+        conn.execute(f"PRAGMA cache_size=-{profile.cache_size_kib}")
+    if profile.mmap_size_mb:
+        conn.execute(f"PRAGMA mmap_size={profile.mmap_size_mb * 1024 * 1024}")
+    if profile.threads:
+        conn.execute(f"PRAGMA threads={profile.threads}")
+    partitions = attach_partitions(
+        conn,
+        db_path,
+        views_sql=_VIEWS_SQL.read_text() if _VIEWS_SQL.exists() else "",
+        immutable=immutable,
+    )
+    if profile.mmap_size_mb:
+        # Le PRAGMA sans schéma ne vaut que pour main : l'appliquer aux partitions.
+        for partition in partitions:
+            conn.execute(
+                f"PRAGMA {partition.schema}.mmap_size={profile.mmap_size_mb * 1024 * 1024}"
+            )
+    conn.row_factory = sqlite3.Row
+    return conn, partitions
+
+
+def _open_connection() -> sqlite3.Connection:
+    """Ouvre une connexion read-only configurée (profil, partitions, vues TEMP)."""
+    global _db_identity, _partitions
+    _ensure_views()
+    stat = DATABASE_PATH.stat()
+    conn, partitions = _connect(DATABASE_PATH, _profile)
+    _db_identity = (stat.st_dev, stat.st_ino)
+    _partitions = partitions
+    return conn
+
+
+def _prefetch_on(conn: sqlite3.Connection, partitions: list[FactPartition]) -> int:
+    """Parcourt les pages de fact_orders (table ou partitions) ; rend le nombre de lignes lues.
+
+    ``COUNT(*) ... NOT INDEXED`` visite chaque feuille de la table : les pages
+    passent dans le cache de l'OS (et le mapping mémoire) pour toutes les
+    connexions du pool.
+    """
+    if partitions:
+        sources = [f"{p.schema}.fact_orders" for p in partitions]
+    else:
+        sources = ["main.fact_orders"]
+    return sum(
+        conn.execute(f"SELECT COUNT(*) FROM {source} NOT INDEXED").fetchone()[0]
+        for source in sources
+    )
+
+
+def open_profiled_connection(db_path: Path, profile: ConnectionProfile) -> sqlite3.Connection:
+    """Connexion read-only hors pool, ouverte comme celles du pool (prefetch compris).
+
+    Pour mesurer un profil sur un entrepôt quelconque ; l'appelant la ferme.
+    """
+    conn, partitions = _connect(db_path, profile)
+    if profile.prefetch:
+        _prefetch_on(conn, partitions)
+    return conn
+
+
+# ── Pool de connexions ───────────────────────────────────────────────────
+
+def get_pool_size() -> int:
+    """Nombre maximal de connexions read-only (DASHBOARD_DB_POOL_SIZE)."""
+    raw = os.getenv("DASHBOARD_DB_POOL_SIZE")
+    if raw is None or not raw.strip():
+        return min(8, os.cpu_count() or 4)
+    try:
+        size = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_DB_POOL_SIZE invalide : '{raw}'") from exc
+    if size < 1:
+        raise ValueError(f"DASHBOARD_DB_POOL_SIZE invalide : '{raw}'")
+    return size
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Métriques du pool de connexions."""
+
+    size: int
+    max_size: int
+    in_use: int
+    checkouts: int
+    waits: int
+    timeouts: int
+    total_wait_s: float
+    max_wait_s: float
+
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite, empruntées le temps d'une requête.
+
+    Une connexion n'est utilisée que par un thread à la fois : les curseurs
+    ne s'entrelacent plus et les lectures progressent en parallèle (sqlite3
+    relâche le GIL pendant l'exécution). ``reset()`` écarte les connexions
+    existantes, par exemple après un remplacement de la base par l'ETL.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], max_size: int):
+        self.max_size = max_size
+        self._factory = factory
+        self._idle: list[sqlite3.Connection] = []
+        self._open = 0
+        self._in_use = 0
+        self._generation = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._cond = threading.Condition()
+
+    def _acquire(self, timeout: float | None) -> tuple[sqlite3.Connection, int]:
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while not self._idle and self._open >= self.max_size:
+                waited = True
+                remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+                if remaining is not None and remaining <= 0:
+                    self._timeouts += 1
+                    raise TimeoutError(
+                        f"Aucune connexion SQLite disponible après {timeout:.0f} s "
+                        f"({self.max_size} connexions occupées)"
+                    )
+                self._cond.wait(remaining)
+            wait = time.perf_counter() - start
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            self._in_use += 1
+            generation = self._generation
+            if self._idle:
+                # LIFO : la connexion la plus récente a le cache de pages le plus chaud.
+                return self._idle.pop(), generation
+            self._open += 1
+        try:
+            return self._factory(), generation
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection, generation: int) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if generation == self._generation:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if conn is not None:
+            conn.close()
+
+    @contextmanager
+    def connection(self, timeout: float | None = 30.0) -> Iterator[sqlite3.Connection]:
+        """Emprunte une connexion, rendue au pool en sortie de bloc."""
+        conn, generation = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._release(conn, generation)
+
+    def reset(self) -> None:
+        """Ferme les connexions libres ; celles en cours le seront à leur retour."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._generation += 1
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(
+                size=self._open,
+                max_size=self.max_size,
+                in_use=self._in_use,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                timeouts=self._timeouts,
+                total_wait_s=self._total_wait,
+                max_wait_s=self._max_wait,
+            )
+
+
+_pool = ConnectionPool(_open_connection, get_pool_size())
+
+
+def connection(timeout: float | None = 30.0):
+    """Emprunte une connexion read-only au pool (``with db.connection() as conn:``).
+
+    À réserver aux usages qui enchaînent plusieurs instructions sur une même
+    session (benchmarks, tables TEMP) ; ``query()`` gère l'emprunt lui-même.
+    """
+    _reconnect_if_replaced()
+    return _pool.connection(timeout)
+
+
+def pool_stats() -> PoolStats:
+    """Taille du pool, connexions occupées et temps d'attente cumulé."""
+    return _pool.stats()
+
+
+def close_connections() -> None:
+    """Ferme les connexions du pool (rouvertes à la demande)."""
+    _pool.reset()
+
+
+def connection_profile() -> ConnectionProfile:
+    """Profil de performance appliqué aux connexions du pool."""
+    return _profile
+
+
+def prefetch_fact_pages(force: bool = False) -> int:
+    """Précharge les pages de fact_orders si le profil le prévoit (``force`` : toujours).
+
+    Rend le nombre de lignes parcourues (0 si rien n'a été fait).
+    """
+    if not (_profile.prefetch or force):
+        return 0
+    with connection() as conn:
+        return _prefetch_on(conn, _partitions)
+
+
+# ── Cache de résultats ───────────────────────────────────────────────────
+
+# Budget mémoire du cache (Mo) ; 0 désactive le cache.
+_QUERY_CACHE_MB_DEFAULT = 256
+
+# pandas >= 3 (ou mode.copy_on_write) : une copie superficielle est copiée
+# paresseusement à la première écriture, le cache reste intact.
+_LAZY_COPY = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+_QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def get_query_cache_bytes() -> int:
+    """Budget du cache de résultats, en octets (DASHBOARD_QUERY_CACHE_MB)."""
+    raw = os.getenv("DASHBOARD_QUERY_CACHE_MB")
+    if raw is None or not raw.strip():
+        return _QUERY_CACHE_MB_DEFAULT * 1024 * 1024
+    try:
+        megabytes = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_QUERY_CACHE_MB invalide : '{raw}'") from exc
+    if megabytes < 0:
+        raise ValueError(f"DASHBOARD_QUERY_CACHE_MB invalide : '{raw}'")
+    return int(megabytes * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class QueryCacheStats:
+    """Compteurs du cache de résultats."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class QueryCache:
+    """Cache LRU de DataFrames, borné par leur taille mémoire estimée.
+
+    Les entrées sont rendues en copie (paresseuse sous copy-on-write) :
+    un appelant qui modifie son DataFrame ne corrompt pas le cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return entry[0].copy(deep=not _LAZY_COPY)
+
+    def put(self, key: tuple, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        stored = df.copy(deep=not _LAZY_COPY)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (stored, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            return QueryCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size,
+                max_bytes=self.max_bytes,
+            )
+
+
+_query_cache = QueryCache(get_query_cache_bytes())
+
+
+def query_cache_stats() -> QueryCacheStats:
+    """Compteurs hits / misses / évictions du cache de résultats."""
+    return _query_cache.stats()
+
+
+def clear_query_cache() -> None:
+    """Vide le cache de résultats (les compteurs sont conservés)."""
+    _query_cache.clear()
+
+
+_disk_cache = DiskResultStore(get_disk_cache_dir(), get_disk_cache_bytes(), get_disk_cache_max_age())
+# Au-delà, une requête n'attend plus le calcul de la même entrée par un autre worker.
+_LOCK_WAIT_MAX_S = 30.0
+# (version de l'entrepôt, empreinte) : l'empreinte n'est recalculée qu'au changement de version.
+_fingerprint_memo: tuple[tuple[int, ...], str] | None = None
+
+
+def disk_cache_stats() -> DiskCacheStats:
+    """Compteurs et occupation du cache persistant (data/processed/cache/)."""
+    return _disk_cache.stats()
+
+
+def clear_disk_cache() -> None:
+    """Supprime les entrées du cache persistant."""
+    _disk_cache.clear()
+
+
+def _normalize_sql(sql: str) -> str:
+    """Forme canonique d'une requête : commentaires retirés, espaces réduits hors littéraux."""
+    parts = _QUOTED_RE.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", _COMMENT_RE.sub(" ", parts[i]))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _params_key(params) -> tuple:
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _file_state(path: Path) -> tuple[int, int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _database_version(conn: sqlite3.Connection) -> tuple[int, ...]:
+    """Version de l'entrepôt : identité et date du fichier (et du WAL), data_version.
+
+    ``PRAGMA data_version`` n'est comparable qu'au sein d'une même connexion :
+    chaque connexion du pool retient sa dernière valeur, et tout changement
+    observé incrémente une époque commune. Un remplacement du fichier par
+    l'ETL (os.replace) change son inode.
+    """
+    global _data_epoch
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    with _version_lock:
+        previous = getattr(conn, "data_version", None)
+        if previous is not None and previous != data_version:
+            _data_epoch += 1
+        conn.data_version = data_version
+        epoch = _data_epoch
+    stat = DATABASE_PATH.stat()
+    wal_state = _file_state(Path(f"{DATABASE_PATH}-wal"))
+    return (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size, *wal_state, epoch)
+
+
+def _warehouse_fingerprint(version: tuple[int, ...]) -> str:
+    """Empreinte du contenu de l'entrepôt, stable d'un redémarrage à l'autre.
+
+    Contrairement à ``_database_version`` (inode, époque propre au processus),
+    elle ne dépend que des fichiers : compteur de modifications et cookie de
+    schéma de l'en-tête SQLite, taille et date de la base, du WAL et des
+    partitions attachées.
+    """
+    global _fingerprint_memo
+    memo = _fingerprint_memo
+    if memo is not None and memo[0] == version:
+        return memo[1]
+    with open(DATABASE_PATH, "rb") as handle:
+        header = handle.read(100)
+    parts = [
+        header[24:28].hex(),
+        header[40:44].hex(),
+        _file_state(DATABASE_PATH),
+        _file_state(Path(f"{DATABASE_PATH}-wal")),
+    ]
+    for partition in _partitions:
+        path = DATABASE_PATH.with_name(partition.file_name)
+        parts.append((partition.file_name, partition.source_hash, _file_state(path)))
+    fingerprint = hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+    _fingerprint_memo = (version, fingerprint)
+    return fingerprint
+
+
+def _reconnect_if_replaced() -> None:
+    """Écarte les connexions ouvertes si l'ETL a remplacé le fichier de la base."""
+    global _db_identity
+    if _db_identity is None:
+        return
+    try:
+        stat = DATABASE_PATH.stat()
+    except FileNotFoundError:
+        return
+    if (stat.st_dev, stat.st_ino) != _db_identity:
+        _db_identity = None
+        _pool.reset()
+        _query_cache.clear()
+
+
+# ── Gouverneur de requêtes ───────────────────────────────────────────────
+
+# Le handler de progression est appelé toutes les N instructions de la VM SQLite.
+_PROGRESS_INTERVAL = 100_000
+_FETCH_CHUNK = 1_000
+
+# Profils : requêtes intégrées aux pages, éditeur libre, exercices du cours.
+QUERY_PROFILES = ("dashboard", "editor", "exercise")
+# (durée max en s, instructions VM max, lignes max) ; 0 = illimité.
+_BUDGET_DEFAULTS = {
+    "dashboard": (120.0, 0, 0),
+    "editor": (10.0, 500_000_000, 100_000),
+    "exercise": (20.0, 1_000_000_000, 100_000),
+}
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """Bornes d'exécution d'une requête ; 0 = illimité.
+
+    ``profile`` : profil d'origine. Seuls les résultats ``dashboard`` vont
+    dans le cache persistant ; ceux de l'éditeur restent en mémoire.
+    """
+
+    timeout_s: float = 0.0
+    max_steps: int = 0
+    max_rows: int = 0
+    profile: str = "dashboard"
+
+
+class QueryCancelled(sqlite3.OperationalError):
+    """Requête annulée par le gouverneur : durée, instructions ou lignes dépassées."""
+
+    def __init__(self, reason: str, budget: QueryBudget):
+        self.reason = reason
+        self.budget = budget
+        details = {
+            "timeout": f"durée maximale de {budget.timeout_s:g} s dépassée",
+            "steps": f"plus de {budget.max_steps:,} instructions SQLite".replace(",", " "),
+            "rows": f"plus de {budget.max_rows:,} lignes retournées".replace(",", " "),
+        }
+        super().__init__(f"Requête annulée : {details[reason]}")
+
+
+def _budget_value(profile: str, name: str, default, cast):
+    variable = f"DASHBOARD_BUDGET_{profile.upper()}_{name}"
+    raw = os.getenv(variable)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = cast(raw)
+    except ValueError as exc:
+        raise ValueError(f"{variable} invalide : '{raw}'") from exc
+    if value < 0:
+        raise ValueError(f"{variable} invalide : '{raw}'")
+    return value
+
+
+def get_query_budget(profile: str) -> QueryBudget:
+    """Budget d'un profil (DASHBOARD_BUDGET_<PROFIL>_TIMEOUT_S / _MAX_STEPS / _MAX_ROWS)."""
+    if profile not in _BUDGET_DEFAULTS:
+        raise ValueError(f"Profil de requête inconnu : '{profile}'")
+    timeout_s, max_steps, max_rows = _BUDGET_DEFAULTS[profile]
+    return QueryBudget(
+        timeout_s=_budget_value(profile, "TIMEOUT_S", timeout_s, float),
+        max_steps=_budget_value(profile, "MAX_STEPS", max_steps, int),
+        max_rows=_budget_value(profile, "MAX_ROWS", max_rows, int),
+        profile=profile,
+    )
+
+
+_budgets = {profile: get_query_budget(profile) for profile in QUERY_PROFILES}
+
+
+class _Governor:
+    """Handler de progression : interrompt la requête hors budget."""
+
+    def __init__(self, budget: QueryBudget):
+        self.budget = budget
+        self.deadline = time.monotonic() + budget.timeout_s if budget.timeout_s else None
+        self.steps = 0
+        self.reason: str | None = None
+
+    def __call__(self) -> int:
+        self.steps += _PROGRESS_INTERVAL
+        if self.budget.max_steps and self.steps > self.budget.max_steps:
+            self.reason = "steps"
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "timeout"
+        return 1 if self.reason else 0
+
+
+@contextmanager
+def _governed(conn: sqlite3.Connection, budget: QueryBudget) -> Iterator[None]:
+    """Applique ``budget`` (durée, instructions) aux instructions exécutées dans le bloc."""
+    if not budget.timeout_s and not budget.max_steps:
+        yield
+        return
+    governor = _Governor(budget)
+    conn.set_progress_handler(governor, _PROGRESS_INTERVAL)
+    try:
+        yield
+    except Exception as exc:
+        # pandas enveloppe l'erreur "interrupted" de SQLite dans sa propre DatabaseError.
+        if governor.reason is not None:
+            raise QueryCancelled(governor.reason, budget) from exc
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def _fetch_frame(cursor: sqlite3.Cursor, budget: QueryBudget | None = None) -> pd.DataFrame:
+    """DataFrame du résultat d'un curseur, lu par blocs ; annulé au-delà de ``budget.max_rows``."""
+    max_rows = budget.max_rows if budget is not None else 0
+    columns = [col[0] for col in cursor.description]
+    rows: list[tuple] = []
+    while chunk := cursor.fetchmany(_FETCH_CHUNK):
+        rows.extend(tuple(row) for row in chunk)
+        if max_rows and len(rows) > max_rows:
+            raise QueryCancelled("rows", budget)
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def _read_governed(
+    conn: sqlite3.Connection, sql: str, params, budget: QueryBudget
+) -> pd.DataFrame:
+    with _governed(conn, budget):
+        if not budget.max_rows:
+            return pd.read_sql_query(sql, conn, params=params)
+        return _fetch_frame(conn.execute(sql, params), budget)
+
+
+def _check_rows(df: pd.DataFrame, budget: QueryBudget) -> pd.DataFrame:
+    if budget.max_rows and len(df) > budget.max_rows:
+        raise QueryCancelled("rows", budget)
+    return df
+
+
+# ── Télémétrie ───────────────────────────────────────────────────────────
+
+_telemetry = QueryTelemetry(get_telemetry_sample_rate())
+
+
+@functools.lru_cache(maxsize=1024)
+def _query_label(sql: str) -> str:
+    """Identifiant d'une requête hors fichier .sql : empreinte du SQL normalisé."""
+    return "q:" + hashlib.sha1(_normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params, version: tuple) -> str:
+    """Plan de ``sql`` au format du shell sqlite3 ; vide si l'instruction n'en a pas."""
+    try:
+        # Texte propre à la version : une instruction EXPLAIN gardée dans le cache
+        # de sqlite3 n'est pas re-préparée après un changement de schéma.
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}\n-- {version}", params).fetchall()
+    except sqlite3.Error:
+        # PRAGMA, script ou instruction sans plan : rien à relever.
+        return ""
+    return format_query_plan(rows) if rows else ""
+
+
+def _capture_plan(conn: sqlite3.Connection, name: str, sql: str, params) -> None:
+    """Relève le plan de ``sql`` une fois par version de l'entrepôt."""
+    version = _database_version(conn)
+    if _telemetry.plan_due(name, version):
+        _telemetry.record_plan(name, sql, version, _explain(conn, sql, params, version))
+
+
+def telemetry_sample_rate() -> float:
+    """Fraction des requêtes mesurées (0 : télémétrie désactivée)."""
+    return _telemetry.sample_rate
+
+
+def query_metrics() -> list[QueryMetrics]:
+    """Compteurs par fichier .sql / empreinte de requête, les plus coûteux en tête."""
+    return _telemetry.snapshot()
+
+
+def query_plan_changes() -> list[PlanChange]:
+    """Changements de plan observés, du plus récent au plus ancien."""
+    return _telemetry.plan_changes()
+
+
+def reset_query_metrics() -> None:
+    """Remet à zéro les compteurs de télémétrie."""
+    _telemetry.reset()
+
+
+def prometheus_metrics() -> str:
+    """Télémétrie des requêtes, du cache et du pool au format texte Prometheus."""
+    pool = pool_stats()
+    memory = query_cache_stats()
+    disk = disk_cache_stats()
+    gauges = [
+        ("query_sample_rate", "gauge", "Fraction of queries measured", _telemetry.sample_rate),
+        ("result_cache_hits_total", "counter", "In-memory result cache hits", memory.hits),
+        ("result_cache_misses_total", "counter", "In-memory result cache misses", memory.misses),
+        ("result_cache_bytes", "gauge", "In-memory result cache size", memory.size_bytes),
+        ("disk_cache_hits_total", "counter", "Disk result cache hits", disk.hits),
+        ("disk_cache_misses_total", "counter", "Disk result cache misses", disk.misses),
+        ("disk_cache_bytes", "gauge", "Disk result cache size", disk.size_bytes),
+        ("pool_connections", "gauge", "Open pooled connections", pool.size),
+        ("pool_in_use", "gauge", "Connections currently borrowed", pool.in_use),
+        ("pool_waits_total", "counter", "Checkouts that had to wait", pool.waits),
+        ("pool_timeouts_total", "counter", "Checkouts that timed out", pool.timeouts),
+    ]
+    return render_prometheus(query_metrics(), gauges)
+
+
+# ── Journal des requêtes lentes ──────────────────────────────────────────
+
+_slow_log = SlowQueryLog(get_slow_log_path(), get_slow_query_threshold(), get_slow_log_bytes())
+# Page / composant à l'origine des requêtes ; copié vers les threads de l'exécuteur.
+_query_origin: ContextVar[str | None] = ContextVar("query_origin", default=None)
+_ORIGIN_SKIPPED = {__name__, "src.dashboard.telemetry", "src.dashboard.slow_log"}
+
+
+@contextmanager
+def query_origin(origin: str) -> Iterator[None]:
+    """Désigne l'appelant des requêtes du bloc dans le journal des requêtes lentes."""
+    token = _query_origin.set(origin)
+    try:
+        yield
+    finally:
+        _query_origin.reset(token)
+
+
+def _calling_origin() -> str:
+    """Origine déclarée par ``query_origin``, sinon premier module du dashboard dans la pile."""
+    origin = _query_origin.get()
+    if origin is not None:
+        return origin
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("src.dashboard.") and module not in _ORIGIN_SKIPPED:
+            return f"{module.removeprefix('src.dashboard.')}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+def _log_slow_query(
+    conn: sqlite3.Connection,
+    name: str,
+    sql: str,
+    params,
+    elapsed: float,
+    rows: int,
+    source: str,
+    error: str = "",
+) -> None:
+    from src.dashboard.components.explain_visualizer import parse_explain
+
+    plan = _explain(conn, sql, params, _database_version(conn))
+    _slow_log.append(
+        SlowQuery(
+            query=name,
+            sql=sql,
+            duration_ms=round(elapsed * 1000, 2),
+            rows=rows,
+            origin=_calling_origin(),
+            params=dict(params) if isinstance(params, dict) else list(params),
+            source=source,
+            error=error,
+            plan=plan,
+            steps=parse_explain(plan) if plan else [],
+        )
+    )
+
+
+def slow_queries(limit: int = 200) -> list[SlowQuery]:
+    """Dernières entrées du journal des requêtes lentes, la plus récente en tête."""
+    return _slow_log.entries(limit)
+
+
+def slow_query_threshold_ms() -> float:
+    """Seuil du journal en millisecondes (0 : journal désactivé)."""
+    return _slow_log.threshold_s * 1000
+
+
+def clear_slow_queries() -> None:
+    """Vide le journal des requêtes lentes (rotations comprises)."""
+    _slow_log.clear()
 
 
 def load_sql(filename: str) -> str:
@@ -60,12 +956,506 @@ def load_sql(filename: str) -> str:
     return (_SQL_DIR / filename).read_text(encoding="utf-8")
 
 
-def query(sql: str, params: tuple = ()) -> pd.DataFrame:
-    """Exécute une requête SQL et retourne un DataFrame."""
-    return pd.read_sql_query(sql, get_connection(), params=params)
+def _pruned_fact_view(conn: sqlite3.Connection, date_from: int, date_to: int) -> str:
+    """Vue TEMP limitée aux partitions qui recouvrent [date_from, date_to]."""
+    selected = [p for p in _partitions if p.overlaps(date_from, date_to)]
+    if not selected or len(selected) == len(_partitions):
+        return "fact_orders"
+    name = f"fact_orders__{'_'.join(p.label for p in selected)}"
+    # Vue propre à chaque connexion du pool, créée au premier besoin.
+    conn.execute(union_view_sql(selected, view_name=name, if_not_exists=True))
+    return name
+
+
+def _query_on(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: tuple,
+    date_range: tuple[int, int] | None,
+    cache: bool,
+    budget: QueryBudget,
+    label: str | None = None,
+) -> pd.DataFrame:
+    if date_range is not None and _partitions:
+        view = _pruned_fact_view(conn, *date_range)
+        sql = re.sub(r"\bfact_orders\b", view, sql)
+    sampled = _telemetry.sampled()
+    if not (sampled or _slow_log.enabled):
+        return _run_query(conn, sql, params, cache, budget)[0]
+
+    # SQL saisi (éditeur, exercices) : une série par profil, pas une par texte.
+    adhoc = label is None and budget.profile != "dashboard"
+    name = budget.profile if adhoc else label or _query_label(sql)
+    start = time.perf_counter()
+    try:
+        df, source = _run_query(conn, sql, params, cache, budget)
+    except Exception as exc:
+        elapsed = time.perf_counter() - start
+        if sampled:
+            _telemetry.record_error(name, sql, elapsed)
+        if _slow_log.is_slow(elapsed):
+            _log_slow_query(conn, name, sql, params, elapsed, 0, "sqlite", error=str(exc))
+        raise
+    elapsed = time.perf_counter() - start
+    if sampled:
+        nbytes = int(df.memory_usage(index=True, deep=True).sum()) if source == "sqlite" else 0
+        _telemetry.record(name, sql, elapsed, len(df), nbytes, source)
+        if source == "sqlite" and not adhoc:
+            _capture_plan(conn, name, sql, params)
+    if _slow_log.is_slow(elapsed):
+        _log_slow_query(conn, name, sql, params, elapsed, len(df), source)
+    return df
+
+
+def _lock_wait(budget: QueryBudget) -> float:
+    """Attente maximale du calcul d'un autre worker : dans le budget de la requête."""
+    if budget.timeout_s:
+        return min(budget.timeout_s, _LOCK_WAIT_MAX_S)
+    return _LOCK_WAIT_MAX_S
+
+
+def _run_query(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: tuple,
+    cache: bool,
+    budget: QueryBudget,
+) -> tuple[pd.DataFrame, str]:
+    """(DataFrame, source) ; source : ``memory``, ``disk`` ou ``sqlite``."""
+    if not cache or _query_cache.max_bytes <= 0:
+        return _read_governed(conn, sql, params, budget), "sqlite"
+
+    version = _database_version(conn)
+    key = (_normalize_sql(sql), _params_key(params), version)
+    df = _query_cache.get(key)
+    if df is not None:
+        return _check_rows(df, budget), "memory"
+    if _disk_cache.enabled and budget.profile == "dashboard":
+        fingerprint = _warehouse_fingerprint(version)
+        disk_key = hashlib.sha256(repr(key[:2]).encode()).hexdigest()[:32]
+        stored = _disk_cache.get(fingerprint, disk_key)
+        if stored is None:
+            # Un seul worker (ou thread) exécute la requête ; les autres attendent
+            # son verrou (propre à l'entrée, attente bornée) puis relisent
+            # l'entrée qu'il vient d'écrire. Passé le délai, calcul sans verrou.
+            with _disk_cache.compute_lock(fingerprint, disk_key, _lock_wait(budget)):
+                stored = _disk_cache.get(fingerprint, disk_key, count_miss=False)
+                if stored is None:
+                    df = _read_governed(conn, sql, params, budget)
+                    _disk_cache.put(fingerprint, disk_key, df, sql=key[0])
+        if stored is not None:
+            _query_cache.put(key, stored)
+            # Colonnes adossées au fichier, en lecture seule : copie (paresseuse sous CoW).
+            return _check_rows(stored.copy(deep=not _LAZY_COPY), budget), "disk"
+    else:
+        df = _read_governed(conn, sql, params, budget)
+    _query_cache.put(key, df)
+    return df, "sqlite"
+
+
+def query(
+    sql: str,
+    params: tuple = (),
+    date_range: tuple[int, int] | None = None,
+    cache: bool = True,
+    profile: str = "dashboard",
+) -> pd.DataFrame:
+    """Exécute une requête SQL et retourne un DataFrame.
+
+    ``date_range`` (date_key min, max) : sur un entrepôt partitionné, les
+    références à fact_orders sont routées vers les seules partitions de la
+    plage. Le filtre sur date_key doit rester dans la requête.
+
+    Les résultats sont mis en cache par (SQL normalisé, paramètres, version
+    de l'entrepôt) : un rechargement ETL invalide le cache sans intervention.
+    ``cache=False`` force l'exécution.
+
+    ``profile`` (``dashboard``, ``editor``, ``exercise``) choisit le budget
+    d'exécution : au-delà, la requête est interrompue et ``QueryCancelled``
+    levée.
+    """
+    budget = _budgets[profile]
+    with connection() as conn:
+        return _query_on(conn, sql, params, date_range, cache, budget)
+
+
+@functools.lru_cache(maxsize=256)
+def _read_sql_text(path: Path, mtime_ns: int) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def _read_sql_file(path: Path) -> str:
+    """Contenu d'un .sql, relu seulement si le fichier a changé."""
+    return _read_sql_text(path, path.stat().st_mtime_ns)
+
+
+def _refresh_capabilities(conn: sqlite3.Connection) -> None:
+    """Relève les variantes disponibles si l'entrepôt a changé depuis le dernier relevé.
+
+    Chaque rechargement ETL remplace la base (scores compris) : un simple
+    changement de version suffit à prendre en compte ses tables.
+    """
+    global _capabilities_version, _fact_denormalized, _scores_precomputed
+    version = _database_version(conn)
+    if version == _capabilities_version:
+        return
+    _fact_denormalized = _has_denormalized_fact(conn)
+    _scores_precomputed = _has_score_tables(conn)
+    _capabilities_version = version
+
+
+def resolve_sql_file(filename: str) -> Path:
+    """Chemin du .sql à exécuter : variante précalculée ou dénormalisée si la base le permet."""
+    with connection() as conn:
+        _refresh_capabilities(conn)
+    return _variant_path(filename)
+
+
+def _variant_path(filename: str, precomputed: bool = True) -> Path:
+    candidates = (
+        (_scores_precomputed and precomputed, _PRECOMPUTED_SQL_DIR / filename),
+        (_fact_denormalized, _DENORMALIZED_SQL_DIR / filename),
+    )
+    for enabled, variant in candidates:
+        if enabled and variant.exists():
+            return variant
+    return _SQL_DIR / filename
+
+
+def _filtered_fact_source(conn: sqlite3.Connection, filters: DashboardFilters) -> str:
+    """Faits lus par la CTE de filtrage : partitions de la période si l'entrepôt est partitionné."""
+    if not _partitions:
+        return "main.fact_orders"
+    if filters.date_from is None and filters.date_to is None:
+        return "temp.fact_orders"
+    view = _pruned_fact_view(
+        conn,
+        filters.date_from if filters.date_from is not None else 0,
+        filters.date_to if filters.date_to is not None else 99_991_231,
+    )
+    return "temp.fact_orders" if view == "fact_orders" else view
+
+
+def _file_sql_on(
+    conn: sqlite3.Connection, filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, tuple | dict]:
+    """(SQL à exécuter, paramètres) d'un fichier : variante de l'entrepôt, filtres poussés."""
+    _refresh_capabilities(conn)
+    if filters is None or not filters.active:
+        return _read_sql_file(_variant_path(filename)), ()
+    # Les scores précalculés couvrent tout l'historique : on relit les faits.
+    template = _read_sql_file(_variant_path(filename, precomputed=False))
+    return apply_filters(template, filters, _filtered_fact_source(conn, filters))
+
+
+def _query_file_on(
+    conn: sqlite3.Connection, filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, pd.DataFrame]:
+    sql, params = _file_sql_on(conn, filename, filters)
+    return sql, _query_on(conn, sql, params, None, True, _budgets["dashboard"], label=filename)
+
+
+def dashboard_sql_files() -> list[str]:
+    """Fichiers .sql de sql/dashboard/ (hors variantes)."""
+    return sorted(path.name for path in _SQL_DIR.glob("*.sql"))
+
+
+def dashboard_query_files() -> list[str]:
+    """Fichiers de ``dashboard_sql_files`` réduits à une instruction (``query_from_file``).
+
+    Les scripts multi-instructions (tables TEMP + SELECT) passent par
+    ``query_statements_from_file`` et ne prennent pas de filtres.
+    """
+    return [
+        name
+        for name in dashboard_sql_files()
+        if len(split_statements(_read_sql_file(_SQL_DIR / name))) == 1
+    ]
+
+
+def resolve_query_file(
+    filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, tuple | dict, str]:
+    """(SQL, paramètres, empreinte de l'entrepôt) de ``query_from_file``, sans l'exécuter.
+
+    Sert à revalider un résultat (ETag) sans relancer la requête.
+    """
+    with connection() as conn:
+        sql, params = _file_sql_on(conn, filename, filters)
+        return sql, params, _warehouse_fingerprint(_database_version(conn))
+
+
+def data_version() -> str:
+    """Empreinte de l'entrepôt courant : change à chaque rechargement ETL."""
+    with connection() as conn:
+        return _warehouse_fingerprint(_database_version(conn))
+
+
+def query_from_file(
+    filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, pd.DataFrame]:
+    """Charge un .sql, l'exécute, et retourne (sql_text, DataFrame).
+
+    Si l'ETL a précalculé les scores, la lecture de sql/dashboard/precomputed/
+    est exécutée (et affichée) à la place ; sinon, sur un entrepôt dénormalisé,
+    la réécriture sans jointure de sql/dashboard/denormalized/.
+
+    ``filters`` (filtres globaux du dashboard) sont poussés dans le template
+    en paramètres nommés, avant les agrégations (cf. ``filters.apply_filters``) ;
+    ``sql_text`` est alors la requête filtrée exécutée. Chaque combinaison de
+    filtres a sa propre entrée dans le cache de résultats.
+    """
+    with connection() as conn:
+        return _query_file_on(conn, filename, filters)
+
+
+def _temp_tables(conn: sqlite3.Connection) -> set[str]:
+    return {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'")
+    }
+
+
+def query_statements(sql: str) -> list[pd.DataFrame]:
+    """Exécute un script multi-instructions, un DataFrame par instruction SELECT.
+
+    Les sous-calculs communs se déclarent une fois en tête de script
+    (``CREATE TEMP TABLE ... AS SELECT ...``) et sont relus par les
+    instructions suivantes. Les instructions sans résultat (DDL) ne
+    produisent pas de DataFrame ; les tables TEMP créées par le script sont
+    supprimées à la fin.
+    """
+    frames: list[pd.DataFrame] = []
+    # Connexion empruntée pour tout le script : les tables TEMP y restent privées.
+    with connection() as conn:
+        before = _temp_tables(conn)
+        try:
+            for statement in split_statements(sql):
+                with _governed(conn, _budgets["dashboard"]):
+                    cursor = conn.execute(statement)
+                    if cursor.description is None:
+                        continue
+                    frames.append(_fetch_frame(cursor))
+        finally:
+            for name in _temp_tables(conn) - before:
+                conn.execute(f'DROP TABLE IF EXISTS temp."{name}"')
+    return frames
+
+
+def query_statements_from_file(filename: str) -> tuple[str, list[pd.DataFrame]]:
+    """Charge un .sql multi-instructions et retourne (sql_text, DataFrames)."""
+    sql = _read_sql_file(resolve_sql_file(filename))
+    return sql, query_statements(sql)
+
+
+# ── Pagination ───────────────────────────────────────────────────────────
+
+# Budget du comptage total : au-delà, seule une borne inférieure est rendue.
+_COUNT_TIMEOUT_S = 1.0
+_WRAPPABLE_RE = re.compile(r"^(select|with|values)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ResultPage:
+    """Une page de résultat : ``rows`` (au plus ``page_size`` lignes) et le total connu."""
+
+    rows: pd.DataFrame
+    page: int
+    page_size: int
+    has_more: bool
+    total: int
+    total_exact: bool
+
+    @property
+    def first_row(self) -> int:
+        return self.page * self.page_size
+
+
+class _LimitedCursor:
+    """Vue d'un curseur limitée à ``limit`` lignes (pour ``_fetch_frame``)."""
+
+    def __init__(self, cursor: sqlite3.Cursor, limit: int):
+        self.description = cursor.description
+        self._cursor = cursor
+        self._left = limit
+
+    def fetchmany(self, size: int) -> list:
+        rows = self._cursor.fetchmany(min(size, self._left)) if self._left > 0 else []
+        self._left -= len(rows)
+        return rows
+
+
+def _count_rows(conn: sqlite3.Connection, inner: str, budget: QueryBudget) -> int | None:
+    """COUNT(*) du résultat sous un budget court ; None si trop coûteux."""
+    timeout = min(_COUNT_TIMEOUT_S, budget.timeout_s) if budget.timeout_s else _COUNT_TIMEOUT_S
+    count_budget = QueryBudget(timeout_s=timeout, max_steps=budget.max_steps, profile=budget.profile)
+    try:
+        df = _query_on(conn, f"SELECT COUNT(*) AS n FROM ({inner})", (), None, True, count_budget)
+    except QueryCancelled:
+        return None
+    return int(df["n"].iloc[0])
+
+
+def _fetch_page_on(
+    conn: sqlite3.Connection, sql: str, page: int, page_size: int, profile: str, count: bool
+) -> ResultPage:
+    if page < 0 or page_size <= 0:
+        raise ValueError(f"Page invalide : page={page}, page_size={page_size}")
+    budget = _budgets[profile]
+    offset = page * page_size
+    inner = _normalize_sql(sql)
+
+    if _WRAPPABLE_RE.match(inner):
+        # Une ligne de plus que la page pour savoir s'il en reste.
+        df = _query_on(
+            conn,
+            f"SELECT * FROM ({inner}) LIMIT ? OFFSET ?",
+            (page_size + 1, offset),
+            None,
+            True,
+            budget,
+        )
+    else:
+        # EXPLAIN, PRAGMA... : lecture au curseur, les lignes sautées ne sont pas gardées.
+        with _governed(conn, budget):
+            cursor = conn.execute(sql)
+            if cursor.description is None:
+                return ResultPage(pd.DataFrame(), page, page_size, False, 0, True)
+            skipped = _LimitedCursor(cursor, offset)
+            while skipped.fetchmany(_FETCH_CHUNK):
+                pass
+            df = _fetch_frame(_LimitedCursor(cursor, page_size + 1))
+
+    has_more = len(df) > page_size
+    rows = df.iloc[:page_size]
+    if not has_more:
+        return ResultPage(rows, page, page_size, False, offset + len(rows), True)
+    total = _count_rows(conn, inner, budget) if count and _WRAPPABLE_RE.match(inner) else None
+    if total is None:
+        return ResultPage(rows, page, page_size, True, offset + len(df), False)
+    return ResultPage(rows, page, page_size, True, total, True)
+
+
+def fetch_page(
+    sql: str,
+    page: int = 0,
+    page_size: int = 50,
+    profile: str = "editor",
+    count: bool = True,
+) -> ResultPage:
+    """Page ``page`` du résultat de ``sql`` (offset paging, mémoire bornée).
+
+    Une requête SELECT/WITH est enveloppée dans ``LIMIT ? OFFSET ?`` : seules
+    ``page_size + 1`` lignes remontent dans Python, et chaque page est mise en
+    cache. Les autres instructions (EXPLAIN, PRAGMA) sont lues au curseur par
+    ``fetchmany``. Le total est exact quand la dernière page est atteinte ou
+    quand un ``COUNT(*)`` aboutit en moins d'une seconde ; sinon c'est une
+    borne inférieure (``total_exact=False``). ``count=False`` saute le
+    comptage (pages suivantes, total déjà connu par l'appelant).
+    """
+    with connection() as conn:
+        return _fetch_page_on(conn, sql, page, page_size, profile, count)
+
+
+# ── Exécution asynchrone ─────────────────────────────────────────────────
+
+# Autant de workers que de connexions : une requête en file n'occupe pas de thread.
+_query_executor = ThreadPoolExecutor(max_workers=_pool.max_size, thread_name_prefix="dashboard-query")
+
+
+class _Interruptible:
+    """Connexion d'une requête asynchrone, interrompue si l'appelant annule."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.cancelled = False
+
+    def attach(self, conn: sqlite3.Connection | None) -> None:
+        with self._lock:
+            if self.cancelled and conn is not None:
+                raise asyncio.CancelledError()
+            self._conn = conn
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                # sqlite3_interrupt : la requête en cours échoue avec "interrupted".
+                self._conn.interrupt()
+
+
+async def _run_interruptible(work: Callable[[sqlite3.Connection], _T]) -> _T:
+    handle = _Interruptible()
+
+    def run() -> _T:
+        with connection() as conn:
+            handle.attach(conn)
+            try:
+                return work(conn)
+            finally:
+                handle.attach(None)
+
+    # Contexte copié : l'origine déclarée par query_origin() suit la requête dans le thread.
+    future = asyncio.get_running_loop().run_in_executor(_query_executor, copy_context().run, run)
+    try:
+        return await future
+    except asyncio.CancelledError:
+        handle.cancel()
+        raise
+
+
+async def aquery(
+    sql: str,
+    params: tuple = (),
+    date_range: tuple[int, int] | None = None,
+    cache: bool = True,
+    profile: str = "dashboard",
+) -> pd.DataFrame:
+    """Version asynchrone de ``query()`` : ``df = await db.aquery(sql)``.
+
+    La requête s'exécute sur un exécuteur borné (taille du pool) sans bloquer
+    la boucle d'événements. Annuler la tâche appelante interrompt la requête
+    SQLite en cours (``Connection.interrupt``) ou la retire de la file.
+    """
+    budget = _budgets[profile]
+    return await _run_interruptible(
+        lambda conn: _query_on(conn, sql, params, date_range, cache, budget)
+    )
+
+
+async def aquery_from_file(
+    filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, pd.DataFrame]:
+    """Version asynchrone de ``query_from_file()``."""
+    return await _run_interruptible(lambda conn: _query_file_on(conn, filename, filters))
+
+
+async def aquery_from_file_versioned(
+    filename: str, filters: DashboardFilters | None = None
+) -> tuple[str, pd.DataFrame, str]:
+    """``aquery_from_file()`` et l'empreinte de l'entrepôt, lue avant la requête.
+
+    Lue avant : un rechargement ETL pendant la requête associe au plus un
+    résultat récent à l'ancienne empreinte, jamais l'inverse.
+    """
+
+    def run(conn: sqlite3.Connection) -> tuple[str, pd.DataFrame, str]:
+        version = _warehouse_fingerprint(_database_version(conn))
+        sql_text, df = _query_file_on(conn, filename, filters)
+        return sql_text, df, version
+
+    return await _run_interruptible(run)
 
 
-def query_from_file(filename: str) -> tuple[str, pd.DataFrame]:
-    """Charge un .sql, l'exécute, et retourne (sql_text, DataFrame)."""
-    sql = load_sql(filename)
-    return sql, query(sql)
+async def afetch_page(
+    sql: str,
+    page: int = 0,
+    page_size: int = 50,
+    profile: str = "editor",
+    count: bool = True,
+) -> ResultPage:
+    """Version asynchrone de ``fetch_page()``."""
+    return await _run_interruptible(
+        lambda conn: _fetch_page_on(conn, sql, page, page_size, profile, count)
+    )
@@ -0,0 +1,162 @@
+"""Sous-échantillonnage serveur des séries temporelles avant construction des graphiques.
+
+Un graphique ne peut pas afficher plus de points que de pixels : au-delà,
+Plotly/ECharts reçoivent des mégaoctets de JSON pour un tracé identique.
+``for_chart`` réduit la série à ``largeur du graphique / PX_PER_POINT``
+points avec LTTB (Largest-Triangle-Three-Buckets, garde la forme de la
+courbe) ou min/max par tranche (garde les extrêmes).
+
+La largeur et le mode « pleine résolution » sont fournis par ``sql_viewer``
+via ``chart_resolution`` ; les builders n'appellent que ``for_chart`` et
+gardent le DataFrame complet pour leurs insights.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHART_WIDTH = 1200
+PX_PER_POINT = 2
+MIN_POINTS = 50
+
+
+def target_points(width_px: int) -> int:
+    """Nombre de points utiles pour un graphique de ``width_px`` pixels."""
+    return max(MIN_POINTS, int(width_px) // PX_PER_POINT)
+
+
+@dataclass
+class ChartResolution:
+    """Largeur mesurée du graphique ; ``reduced`` liste les (points bruts, points tracés).
+
+    ``series`` garde la longueur de chaque série passée à ``for_chart`` (réduite
+    ou non) : le cache de rendu en déduit les largeurs où un graphique reste valable.
+    """
+
+    width_px: int = DEFAULT_CHART_WIDTH
+    full: bool = False
+    reduced: list[tuple[int, int]] = field(default_factory=list)
+    series: list[int] = field(default_factory=list)
+
+    @property
+    def target_points(self) -> int:
+        return target_points(self.width_px)
+
+
+_resolution: ContextVar[ChartResolution | None] = ContextVar("chart_resolution", default=None)
+
+
+@contextmanager
+def chart_resolution(resolution: ChartResolution) -> Iterator[ChartResolution]:
+    """Résolution appliquée par ``for_chart`` pendant la construction d'un graphique."""
+    token = _resolution.set(resolution)
+    try:
+        yield resolution
+    finally:
+        _resolution.reset(token)
+
+
+def current_resolution() -> ChartResolution:
+    """Résolution courante (une résolution par défaut, non partagée, hors contexte)."""
+    return _resolution.get() or ChartResolution()
+
+
+def current_chart_width() -> int:
+    """Largeur de la résolution courante (``DEFAULT_CHART_WIDTH`` hors contexte)."""
+    return current_resolution().width_px
+
+
+def _numeric_axis(x: pd.Series) -> np.ndarray:
+    """Abscisses numériques : dates en ns, libellés (``month_label``...) par rang."""
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.astype("int64").to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=float)
+    return np.arange(len(x), dtype=float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices retenus par LTTB (premier et dernier point toujours conservés)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    # n_out - 2 tranches entre le premier et le dernier point.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        # Aire du triangle (point précédent, candidat, moyenne de la tranche suivante).
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (avg_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices du minimum et du maximum de chaque tranche (extrêmes garantis)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    kept = [0, n - 1]
+    for bucket in np.array_split(np.arange(1, n - 1), (n_out - 2) // 2):
+        if len(bucket):
+            values = y[bucket]
+            kept += [bucket[values.argmin()], bucket[values.argmax()]]
+    return np.unique(kept)
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: str | list[str],
+    n_out: int,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """Lignes de ``df`` retenues pour tracer ``y`` en fonction de ``x`` sur ``n_out`` points.
+
+    Plusieurs colonnes ``y`` : union des points retenus pour chacune, les
+    lignes restent entières (les autres colonnes suivent).
+    """
+    if len(df) <= n_out:
+        return df
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Méthode de sous-échantillonnage inconnue : '{method}'")
+    columns = [y] if isinstance(y, str) else list(y)
+    axis = _numeric_axis(df[x])
+    kept = np.unique(np.concatenate([
+        lttb_indices(axis, df[column].to_numpy(dtype=float), n_out)
+        if method == "lttb"
+        else minmax_indices(df[column].to_numpy(dtype=float), n_out)
+        for column in columns
+    ]))
+    return df.iloc[kept].reset_index(drop=True)
+
+
+def for_chart(
+    df: pd.DataFrame,
+    x: str,
+    y: str | list[str],
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """Série à tracer : réduite à la largeur du graphique, sauf en pleine résolution."""
+    resolution = current_resolution()
+    resolution.series.append(len(df))
+    if resolution.full or len(df) <= resolution.target_points:
+        return df
+    reduced = downsample(df, x, y, resolution.target_points, method)
+    resolution.reduced.append((len(df), len(reduced)))
+    return reduced
@@ -0,0 +1,191 @@
+"""Filtres globaux du dashboard : période, état client, état vendeur, catégorie.
+
+Les filtres sont poussés dans les templates sql/dashboard/ en paramètres
+nommés (``:date_from``, ``:customer_state``...). Une CTE ``fact_orders``
+``NOT MATERIALIZED`` filtre la table de faits et masque la table du même
+nom ; les vues de sql/views.sql lues par le template sont recopiées en CTE
+pour lire les faits filtrés. SQLite aplatit ces CTE : les prédicats
+s'appliquent avant les agrégations, via les index de fact_orders.
+
+Un template qui ne lit pas fact_orders (scores précalculés) n'est pas
+modifié : sa clé de cache ne dépend pas des filtres.
+"""
+
+import datetime
+import functools
+import re
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_VIEWS_SQL = Path(__file__).resolve().parent.parent.parent / "sql" / "views.sql"
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_VIEW_RE = re.compile(r"CREATE\s+VIEW\s+(\w+)\s+AS\s+(.*?);", re.IGNORECASE | re.DOTALL)
+# Commentaires et espaces en tête du template, puis WITH [RECURSIVE] éventuel.
+_LEADING_RE = re.compile(r"(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*", re.DOTALL)
+_WITH_RE = re.compile(r"WITH(?:\s+RECURSIVE)?\s+", re.IGNORECASE)
+_FACT_RE = re.compile(r"\bfact_orders\b")
+_STATE_RE = re.compile(r"^[A-Z]{2}$")
+# ISO étendu (formulaire, URL) ou date_key ; date.fromisoformat ne lit le
+# second qu'à partir de Python 3.11.
+_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$|^(\d{4})(\d{2})(\d{2})$")
+
+# Catégorie telle qu'exposée par v_orders_enriched.product_category.
+_CATEGORY_EXPR = "COALESCE(category_name_en, category_name_pt, 'Unknown')"
+
+
+def _date_key(value: str | None) -> int | None:
+    """'2017-03-01' ou '20170301' -> 20170301 ; None si absent ou invalide."""
+    if not value:
+        return None
+    match = _DATE_RE.match(value.strip())
+    if match is None:
+        return None
+    year, month, day_of_month = (int(part) for part in match.groups() if part is not None)
+    try:
+        day = datetime.date(year, month, day_of_month)
+    except ValueError:
+        return None
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def iso_date(date_key: int) -> str:
+    """20170301 -> '2017-03-01'."""
+    return f"{date_key // 10000:04d}-{date_key // 100 % 100:02d}-{date_key % 100:02d}"
+
+
+@dataclass(frozen=True)
+class DashboardFilters:
+    """Sélection courante ; ``None`` = pas de filtre sur ce critère."""
+
+    date_from: int | None = None  # date_key AAAAMMJJ inclus
+    date_to: int | None = None
+    customer_state: str | None = None
+    seller_state: str | None = None
+    category: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return any(value is not None for value in asdict(self).values())
+
+    def params(self) -> dict:
+        """Paramètres nommés des critères actifs."""
+        return {name: value for name, value in asdict(self).items() if value is not None}
+
+    @classmethod
+    def from_query(cls, query: Mapping[str, str]) -> "DashboardFilters":
+        """Lit les paramètres d'URL ; une valeur invalide est ignorée."""
+
+        def state(name: str) -> str | None:
+            value = (query.get(name) or "").strip().upper()
+            return value if _STATE_RE.match(value) else None
+
+        category = (query.get("category") or "").strip()
+        return cls(
+            date_from=_date_key(query.get("date_from")),
+            date_to=_date_key(query.get("date_to")),
+            customer_state=state("customer_state"),
+            seller_state=state("seller_state"),
+            category=category or None,
+        )
+
+    def to_query(self) -> dict[str, str]:
+        """Paramètres d'URL (dates au format ISO) des critères actifs."""
+        query = {}
+        for name, value in self.params().items():
+            query[name] = iso_date(value) if name in ("date_from", "date_to") else value
+        return query
+
+    def describe(self) -> str:
+        """Résumé lisible de la sélection."""
+        parts = []
+        if self.date_from is not None or self.date_to is not None:
+            start = iso_date(self.date_from) if self.date_from is not None else "…"
+            end = iso_date(self.date_to) if self.date_to is not None else "…"
+            parts.append(f"{start} → {end}")
+        if self.customer_state:
+            parts.append(f"clients {self.customer_state}")
+        if self.seller_state:
+            parts.append(f"vendeurs {self.seller_state}")
+        if self.category:
+            parts.append(self.category)
+        return " · ".join(parts) if parts else "Toutes les données"
+
+
+@functools.lru_cache(maxsize=4)
+def _view_definitions(path: Path, mtime_ns: int) -> dict[str, str]:
+    return {
+        name: body.strip()
+        for name, body in _VIEW_RE.findall(_COMMENT_RE.sub("", path.read_text(encoding="utf-8")))
+    }
+
+
+def view_definitions(path: Path = _VIEWS_SQL) -> dict[str, str]:
+    """Requêtes des vues de sql/views.sql, par nom (relues si le fichier change)."""
+    if not path.exists():
+        return {}
+    return _view_definitions(path, path.stat().st_mtime_ns)
+
+
+def fact_predicates(filters: DashboardFilters) -> list[str]:
+    """Prédicats sur fact_orders des critères actifs (paramètres nommés)."""
+    predicates = []
+    if filters.date_from is not None:
+        predicates.append("date_key >= :date_from")
+    if filters.date_to is not None:
+        predicates.append("date_key <= :date_to")
+    if filters.customer_state is not None:
+        predicates.append(
+            "customer_key IN (SELECT customer_key FROM dim_customers WHERE state = :customer_state)"
+        )
+    if filters.seller_state is not None:
+        predicates.append(
+            "seller_key IN (SELECT seller_key FROM dim_sellers WHERE state = :seller_state)"
+        )
+    if filters.category is not None:
+        predicates.append(
+            f"product_key IN (SELECT product_key FROM dim_products WHERE {_CATEGORY_EXPR} = :category)"
+        )
+    return predicates
+
+
+def apply_filters(
+    sql: str,
+    filters: DashboardFilters,
+    fact_source: str = "main.fact_orders",
+) -> tuple[str, dict]:
+    """Retourne (SQL filtré, paramètres nommés) pour un template mono-instruction.
+
+    ``fact_source`` : table (ou vue de partitions) lue par la CTE de filtrage.
+    Sans filtre actif, ou si le template ne lit pas fact_orders, ``sql`` est
+    rendu inchangé avec des paramètres vides.
+    """
+    if not filters.active:
+        return sql, {}
+    code = _COMMENT_RE.sub(" ", sql)
+    views = {
+        name: body
+        for name, body in view_definitions().items()
+        if re.search(rf"\b{name}\b", code) and _FACT_RE.search(body)
+    }
+    if not (_FACT_RE.search(code) or views):
+        return sql, {}
+
+    where = "\n      AND ".join(fact_predicates(filters))
+    ctes = [
+        f"fact_orders AS NOT MATERIALIZED (\n    SELECT * FROM {fact_source}\n    WHERE {where}\n)"
+    ]
+    ctes += [f"{name} AS (\n{body}\n)" for name, body in views.items()]
+    prefix = ",\n".join(ctes)
+
+    start = _LEADING_RE.match(sql).end()
+    head, body = sql[:start], sql[start:]
+    with_clause = _WITH_RE.match(body)
+    if with_clause:
+        keyword = body[: with_clause.end()]
+        rest = body[with_clause.end():]
+        filtered = f"{head}{keyword}-- Filtres du dashboard\n{prefix},\n{rest}"
+    else:
+        filtered = f"{head}-- Filtres du dashboard\nWITH {prefix}\n{body}"
+    return filtered, filters.params()
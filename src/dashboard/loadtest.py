@@ -0,0 +1,546 @@
+"""Test de charge : N clients simulés rejouent un parcours de pages et de soumissions SQL.
+
+Usage : python -m src.dashboard.loadtest --clients 20 --duration 60 --output report.json
+
+Le dashboard est démarré comme ``make dashboard`` (``python -m src.dashboard``,
+donc ``src.dashboard.main.run``) sur un port libre et l'entrepôt choisi
+(``--database``), puis interrogé une fois le pré-calcul terminé. ``--url``
+vise à la place un serveur déjà lancé (multi-workers, autre machine...).
+
+Chaque client fait ce que fait un navigateur :
+
+- visite de page : ``GET``, puis connexion websocket (socket.io de NiceGUI)
+  avec le ``client_id`` de la page ; la page est chargée quand plus aucun
+  spinner n'est affiché et que le serveur n'envoie plus rien depuis
+  ``idle_s`` (les sections différées de ``sql_viewer`` comprises). Les
+  mesures de largeur (``run_javascript``) reçoivent ``width_px`` ;
+- défilement (``--scroll``, défaut) : les sections chargées à leur entrée
+  dans la fenêtre reçoivent leur événement ``visible``, mesuré à part
+  (route ``scroll /page``) ;
+- soumission dans l'éditeur SQL d'une leçon : remplace le document de
+  l'éditeur, clique « Exécuter » et attend la fin des mises à jour.
+
+Le rapport (JSON trié, nombres arrondis) donne par route le débit, les
+percentiles de latence et le taux d'erreur ; ``--baseline`` compare avec le
+rapport d'une version précédente.
+"""
+
+import asyncio
+import html
+import json
+import logging
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urlencode
+
+import click
+import httpx
+import numpy as np
+import socketio
+
+from src.dashboard.course.content import COURSE_MODULES
+from src.dashboard.db import get_database_path
+
+logger = logging.getLogger(__name__)
+
+PAGE_WEIGHTS = {
+    "/": 3.0,
+    "/ventes": 2.0,
+    "/rfm": 1.0,
+    "/cohorts": 1.0,
+    "/optimisation": 0.5,
+    "/presentation": 1.0,
+}
+PERCENTILES = (50, 90, 95, 99)
+
+_CLIENT_ID_RE = re.compile(r"'client_id': '([0-9a-f-]+)'")
+_ELEMENTS_RE = re.compile(r"parseElements\(String\.raw`(.*?)`\)", re.DOTALL)
+_RUN_LABEL = "Exécuter"
+# Carte d'erreur de l'éditeur (SQL invalide, requête annulée par le gouverneur).
+_ERROR_CARD_CLASS = "border-red-500"
+# Sections de sql_viewer chargées à leur entrée dans la fenêtre (load="visible").
+_LAZY_CLASS = "lazy-section"
+
+
+@dataclass(frozen=True)
+class Action:
+    """Étape du parcours : visite de ``path`` (``page``) ou soumission de ``sql`` (``editor``)."""
+
+    kind: str
+    path: str
+    weight: float = 1.0
+    sql: str = ""
+
+    @property
+    def route(self) -> str:
+        return self.path if self.kind == "page" else f"editor {self.path}"
+
+
+@dataclass(frozen=True)
+class Sample:
+    """Une mesure : route, latence, erreur éventuelle (``None`` si succès)."""
+
+    route: str
+    latency_ms: float
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class LoadOptions:
+    """Réglages d'une session de charge."""
+
+    clients: int = 10
+    duration_s: float = 30.0
+    think_s: float = 0.5
+    idle_s: float = 0.3
+    timeout_s: float = 30.0
+    width_px: int = 1200
+    seed: int = 0
+    scroll: bool = True
+
+
+# ── Parcours ─────────────────────────────────────────────────────────────
+
+
+def default_scenario() -> list[Action]:
+    """Pages principales + soumission de la solution de chaque exercice du cours."""
+    actions = [Action("page", path, weight) for path, weight in PAGE_WEIGHTS.items()]
+    for module in COURSE_MODULES:
+        for index, lesson in enumerate(module.lessons):
+            if lesson.exercise is not None:
+                actions.append(Action(
+                    "editor",
+                    f"/presentation/{module.id}/{index}",
+                    weight=0.5,
+                    sql=lesson.exercise.solution_sql,
+                ))
+    return actions
+
+
+def load_scenario(path: Path) -> list[Action]:
+    """Parcours JSON : liste de ``{"kind", "path", "weight", "sql"}``."""
+    actions = [Action(**entry) for entry in json.loads(path.read_text(encoding="utf-8"))]
+    unknown = {action.kind for action in actions} - {"page", "editor"}
+    if unknown or not actions:
+        raise ValueError(f"Parcours invalide : {path} (types inconnus : {sorted(unknown)})")
+    return actions
+
+
+# ── Protocole NiceGUI ────────────────────────────────────────────────────
+
+
+def parse_page(page_html: str) -> tuple[str, dict[str, dict]]:
+    """(client_id, éléments par id) d'une page NiceGUI rendue."""
+    client_id = _CLIENT_ID_RE.search(page_html)
+    elements = _ELEMENTS_RE.search(page_html)
+    if client_id is None or elements is None:
+        raise ValueError("Page NiceGUI illisible (client_id ou éléments absents)")
+    raw = elements.group(1).replace("&#36;", "$").replace("&#96;", "`")
+    return client_id.group(1), json.loads(html.unescape(raw))
+
+
+def _listener(element: dict, event_type: str) -> str | None:
+    for event in element.get("events", []):
+        if event.get("type") == event_type:
+            return event["listener_id"]
+    return None
+
+
+def find_editor(elements: dict[str, dict]) -> tuple[str, dict, str, str]:
+    """(id de l'éditeur, son élément, id du bouton « Exécuter », son listener de clic)."""
+    editor = next(
+        (key for key, element in elements.items() if "codemirror" in element.get("tag", "")),
+        None,
+    )
+    button = next(
+        (
+            key for key, element in elements.items()
+            if _RUN_LABEL in str(element.get("props", {}).get("label", ""))
+            and _listener(element, "click")
+        ),
+        None,
+    )
+    if editor is None or button is None:
+        raise ValueError("Éditeur SQL introuvable sur la page")
+    return editor, elements[editor], button, _listener(elements[button], "click")
+
+
+def lazy_sections(elements: dict[str, dict]) -> list[tuple[str, str]]:
+    """(id, listener ``visible``) des sections chargées à leur entrée dans la fenêtre."""
+    sections = []
+    for key, element in elements.items():
+        listener = _listener(element, "visible")
+        if listener and _LAZY_CLASS in element.get("class", []):
+            sections.append((key, listener))
+    return sections
+
+
+def replace_document(old: str, new: str) -> dict:
+    """Change set CodeMirror qui remplace tout le document (longueurs en unités UTF-16)."""
+    return {
+        "sections": [len(old.encode("utf-16-le")) // 2, len(new.encode("utf-16-le")) // 2],
+        "inserted": [new.split("\n")],
+    }
+
+
+class _Session:
+    """Connexion websocket d'une page : suit les éléments et répond aux mesures de largeur."""
+
+    def __init__(self, client_id: str, elements: dict[str, dict], width_px: int):
+        self.client_id = client_id
+        self.elements = elements
+        self.width_px = width_px
+        self.last_message = time.perf_counter()
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on("*", self._on_message)
+
+    async def _on_message(self, event: str, data=None) -> None:
+        self.last_message = time.perf_counter()
+        if event == "update" and isinstance(data, dict):
+            for key, element in data.items():
+                if key == "_id":
+                    continue
+                if element is None:
+                    self.elements.pop(key, None)
+                else:
+                    self.elements[key] = element
+        elif event == "run_javascript" and isinstance(data, dict) and data.get("request_id"):
+            result = self.width_px if "clientWidth" in data.get("code", "") else None
+            await self.sio.emit("javascript_response", {
+                "request_id": data["request_id"], "client_id": self.client_id, "result": result,
+            })
+
+    async def connect(self, base_url: str) -> None:
+        query = urlencode({
+            "client_id": self.client_id,
+            "tab_id": self.client_id,
+            "document_id": self.client_id,
+            "next_message_id": 0,
+            "implicit_handshake": "true",
+        })
+        await self.sio.connect(
+            f"{base_url}?{query}", socketio_path="/_nicegui_ws/socket.io", transports=["websocket"]
+        )
+
+    async def emit_event(self, element_id: str, listener_id: str, *args) -> None:
+        """Événement d'un élément, arguments sérialisés un à un comme par le navigateur."""
+        await self.sio.emit("event", {
+            "id": int(element_id), "client_id": self.client_id,
+            "listener_id": listener_id, "args": [json.dumps(arg) for arg in args],
+        })
+
+    def loading(self) -> bool:
+        return any(element.get("tag", "").startswith("q-spinner") for element in self.elements.values())
+
+    async def settle(self, since: float, idle_s: float, timeout_s: float, expect_update: bool) -> float:
+        """Instant du dernier message quand la page est stable (plus de spinner, plus de message)."""
+        deadline = since + timeout_s
+        while True:
+            now = time.perf_counter()
+            received = self.last_message > since
+            if now - self.last_message >= idle_s and not self.loading() and (received or not expect_update):
+                return self.last_message if received else since
+            if now > deadline:
+                raise TimeoutError
+            await asyncio.sleep(0.02)
+
+
+async def run_action(
+    http: httpx.AsyncClient, base_url: str, action: Action, options: LoadOptions
+) -> list[Sample]:
+    """Exécute une étape du parcours ; une soumission mesure aussi le chargement de sa leçon."""
+    samples: list[Sample] = []
+    route = action.path
+    start = time.perf_counter()
+    session = None
+    try:
+        response = await http.get(action.path)
+        if response.status_code != 200:
+            return [Sample(route, (time.perf_counter() - start) * 1000, f"http_{response.status_code}")]
+        session = _Session(*parse_page(response.text), options.width_px)
+        await session.connect(base_url)
+        loaded = await session.settle(start, options.idle_s, options.timeout_s, expect_update=False)
+        samples.append(Sample(route, (max(loaded, start) - start) * 1000))
+
+        sections = lazy_sections(session.elements) if options.scroll else []
+        if sections:
+            # Défilement jusqu'en bas : toutes les sections différées entrent dans la fenêtre.
+            route = f"scroll {action.path}"
+            start = time.perf_counter()
+            for element_id, listener in sections:
+                await session.emit_event(element_id, listener)
+            done = await session.settle(start, options.idle_s, options.timeout_s, expect_update=True)
+            samples.append(Sample(route, (done - start) * 1000))
+
+        if action.kind == "editor":
+            route = action.route
+            editor_id, editor, button_id, click = find_editor(session.elements)
+            current = editor.get("props", {}).get("value", "")
+            await session.emit_event(
+                editor_id, _listener(editor, "update:value"), replace_document(current, action.sql)
+            )
+            start = time.perf_counter()
+            await session.emit_event(button_id, click)
+            done = await session.settle(start, options.idle_s, options.timeout_s, expect_update=True)
+            failed = any(
+                _ERROR_CARD_CLASS in element.get("class", []) for element in session.elements.values()
+            )
+            samples.append(Sample(route, (done - start) * 1000, "sql_error" if failed else None))
+    except TimeoutError:
+        samples.append(Sample(route, (time.perf_counter() - start) * 1000, "timeout"))
+    except (httpx.HTTPError, socketio.exceptions.ConnectionError, OSError) as exc:
+        samples.append(Sample(route, (time.perf_counter() - start) * 1000, type(exc).__name__))
+    except ValueError as exc:
+        logger.debug("Page inattendue %s : %s", route, exc)
+        samples.append(Sample(route, (time.perf_counter() - start) * 1000, "page"))
+    finally:
+        if session is not None and session.sio.connected:
+            await session.sio.disconnect()
+    return samples
+
+
+async def _client(
+    index: int, base_url: str, actions: list[Action], deadline: float, options: LoadOptions
+) -> list[Sample]:
+    rng = random.Random(options.seed * 1_000_003 + index)
+    weights = [action.weight for action in actions]
+    samples: list[Sample] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=options.timeout_s) as http:
+        while time.perf_counter() < deadline:
+            action = rng.choices(actions, weights=weights)[0]
+            samples += await run_action(http, base_url, action, options)
+            if options.think_s > 0:
+                await asyncio.sleep(rng.expovariate(1 / options.think_s))
+    return samples
+
+
+async def run_load(base_url: str, actions: list[Action], options: LoadOptions) -> tuple[list[Sample], float]:
+    """(mesures, durée réelle en s) de ``options.clients`` clients pendant ``duration_s``."""
+    start = time.perf_counter()
+    deadline = start + options.duration_s
+    results = await asyncio.gather(*(
+        _client(index, base_url, actions, deadline, options) for index in range(options.clients)
+    ))
+    return [sample for samples in results for sample in samples], time.perf_counter() - start
+
+
+# ── Rapport ──────────────────────────────────────────────────────────────
+
+
+def _route_stats(samples: list[Sample], elapsed_s: float) -> dict:
+    latencies = np.array([sample.latency_ms for sample in samples if sample.error is None])
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if sample.error is not None:
+            errors[sample.error] = errors.get(sample.error, 0) + 1
+    stats = {
+        "requests": len(samples),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "error_kinds": errors,
+        "throughput_rps": round(len(samples) / elapsed_s, 3) if elapsed_s > 0 else 0.0,
+    }
+    for percentile in PERCENTILES:
+        value = float(np.percentile(latencies, percentile)) if len(latencies) else None
+        stats[f"p{percentile}_ms"] = None if value is None else round(value, 1)
+    stats["max_ms"] = round(float(latencies.max()), 1) if len(latencies) else None
+    return stats
+
+
+def build_report(samples: list[Sample], elapsed_s: float, meta: dict) -> dict:
+    """Rapport par route et total ; ``meta`` décrit la session (clients, durée, entrepôt...)."""
+    routes = sorted({sample.route for sample in samples})
+    return {
+        "meta": {**meta, "elapsed_s": round(elapsed_s, 2)},
+        "routes": {
+            route: _route_stats([s for s in samples if s.route == route], elapsed_s)
+            for route in routes
+        },
+        "total": _route_stats(samples, elapsed_s),
+    }
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def format_report(report: dict) -> str:
+    """Tableau texte du rapport."""
+    header = f"{'route':<48} {'req':>6} {'req/s':>7} {'err%':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}"
+    lines = [header, "-" * len(header)]
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, stats in rows:
+        lines.append(
+            f"{route[:48]:<48} {stats['requests']:>6} {stats['throughput_rps']:>7.2f} "
+            f"{stats['error_rate'] * 100:>6.1f} {_ms(stats['p50_ms']):>7} {_ms(stats['p95_ms']):>7} "
+            f"{_ms(stats['p99_ms']):>7} {_ms(stats['max_ms']):>7}"
+        )
+    return "\n".join(lines)
+
+
+def compare_reports(baseline: dict, current: dict) -> str:
+    """Écarts de p95, de débit et de taux d'erreur par route entre deux rapports."""
+    header = f"{'route':<48} {'p95 avant':>10} {'p95 après':>10} {'Δ p95':>8} {'Δ req/s':>8} {'Δ err%':>7}"
+    lines = [header, "-" * len(header)]
+    before_routes = {**baseline["routes"], "TOTAL": baseline["total"]}
+    after_routes = {**current["routes"], "TOTAL": current["total"]}
+    for route in sorted(set(before_routes) | set(after_routes), key=lambda r: (r == "TOTAL", r)):
+        before, after = before_routes.get(route), after_routes.get(route)
+        if before is None or after is None:
+            lines.append(f"{route[:48]:<48} {'absente avant' if before is None else 'absente après':>10}")
+            continue
+        p95_before, p95_after = before["p95_ms"], after["p95_ms"]
+        delta = (
+            f"{(p95_after - p95_before) / p95_before * 100:+.0f}%"
+            if p95_before and p95_after is not None else "-"
+        )
+        lines.append(
+            f"{route[:48]:<48} {_ms(p95_before):>10} {_ms(p95_after):>10} {delta:>8} "
+            f"{after['throughput_rps'] - before['throughput_rps']:>+8.2f} "
+            f"{(after['error_rate'] - before['error_rate']) * 100:>+7.1f}"
+        )
+    return "\n".join(lines)
+
+
+# ── Serveur ──────────────────────────────────────────────────────────────
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_warm(base_url: str, process: subprocess.Popen, timeout_s: float) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le dashboard s'est arrêté (code {process.returncode})")
+        try:
+            state = httpx.get(f"{base_url}/api/warmup", timeout=2).json().get("state")
+        except (httpx.HTTPError, ValueError):
+            state = None
+        if state in ("warm", "disabled"):
+            return
+        time.sleep(0.5)
+    raise RuntimeError(f"Dashboard pas prêt après {timeout_s:g} s")
+
+
+@contextmanager
+def dashboard_server(database: Path, workers: int = 1, timeout_s: float = 120.0) -> Iterator[str]:
+    """Dashboard lancé sur un port libre et ``database`` ; rend son URL une fois chaud."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DASHBOARD_PORT": str(port),
+        "DASHBOARD_SHOW_BROWSER": "0",
+        "DASHBOARD_DATABASE": str(database),
+        "DASHBOARD_WORKERS": str(workers),
+    }
+    log = tempfile.NamedTemporaryFile("w+b", prefix="dashboard-loadtest-", suffix=".log", delete=False)
+    process = subprocess.Popen([sys.executable, "-m", "src.dashboard"], env=env, stdout=log, stderr=log)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_warm(base_url, process, timeout_s)
+        logger.info("Dashboard prêt sur %s (journal : %s)", base_url, log.name)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+
+@click.command()
+@click.option("--clients", type=click.IntRange(min=1), default=10, show_default=True)
+@click.option("--duration", type=float, default=30.0, show_default=True, help="Durée (s)")
+@click.option("--think", type=float, default=0.5, show_default=True, help="Pause moyenne entre étapes (s)")
+@click.option(
+    "--database",
+    type=click.Path(dir_okay=False, exists=True, path_type=Path),
+    default=get_database_path(),
+    show_default=True,
+    help="Entrepôt servi par le dashboard démarré",
+)
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True)
+@click.option("--url", default=None, help="Viser un dashboard déjà lancé (sans en démarrer un)")
+@click.option(
+    "--scenario",
+    type=click.Path(dir_okay=False, exists=True, path_type=Path),
+    default=None,
+    help="Parcours JSON (défaut : pages principales + exercices du cours)",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--scroll/--no-scroll", default=True, show_default=True,
+              help="Faire défiler chaque page pour charger ses sections différées")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help="Écrire le rapport JSON")
+@click.option("--baseline", type=click.Path(dir_okay=False, exists=True, path_type=Path), default=None,
+              help="Rapport JSON d'une version précédente à comparer")
+def main(
+    clients: int,
+    duration: float,
+    think: float,
+    database: Path,
+    workers: int,
+    url: str | None,
+    scenario: Path | None,
+    seed: int,
+    scroll: bool,
+    output: Path | None,
+    baseline: Path | None,
+) -> None:
+    """Rejouer un parcours de N clients sur le dashboard et rapporter latences et erreurs."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(name)s | %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    actions = load_scenario(scenario) if scenario else default_scenario()
+    options = LoadOptions(clients=clients, duration_s=duration, think_s=think, seed=seed, scroll=scroll)
+
+    @contextmanager
+    def target() -> Iterator[str]:
+        if url:
+            yield url.rstrip("/")
+        else:
+            with dashboard_server(database, workers) as base_url:
+                yield base_url
+
+    with target() as base_url:
+        samples, elapsed = asyncio.run(run_load(base_url, actions, options))
+
+    meta = {
+        **asdict(options),
+        "database": str(database) if not url else None,
+        "url": url,
+        "workers": workers if not url else None,
+        "scenario": [
+            {"kind": action.kind, "path": action.path, "weight": action.weight} for action in actions
+        ],
+    }
+    report = build_report(samples, elapsed, meta)
+    click.echo(format_report(report))
+    if baseline is not None:
+        click.echo("\n== Comparaison avec " + str(baseline) + " ==")
+        click.echo(compare_reports(json.loads(baseline.read_text(encoding="utf-8")), report))
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False) + "\n",
+                          encoding="utf-8")
+        click.echo(f"\nRapport écrit dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,115 @@
-"""Point d'entrée NiceGUI — routage des pages."""
+"""Point d'entrée NiceGUI — routage des pages.
+
+Les modules de pages ne sont pas importés au démarrage : ``register_pages``
+pose sur chaque route un relais qui importe le module à la première requête.
+Le ``@ui.page`` du module remplace alors le relais (NiceGUI garde la
+dernière définition d'une route) et les requêtes suivantes vont droit à la
+page. Le serveur accepte ainsi les connexions sans avoir chargé pandas,
+plotly ni les pages.
+"""
 
 import asyncio
+import importlib
+import inspect
 import os
+import typing
+from collections.abc import Callable
+from dataclasses import asdict
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
+from nicegui import Client, app, background_tasks, ui
+
+# Route -> module qui la déclare (``@ui.page``), importé à la première visite.
+PAGE_ROUTES: dict[str, str] = {
+    "/": "src.dashboard.pages.overview",
+    "/ventes": "src.dashboard.pages.ventes",
+    "/clients": "src.dashboard.pages.clients",
+    "/scoring": "src.dashboard.pages.seller_scoring",
+    "/pareto": "src.dashboard.pages.pareto",
+    "/trends": "src.dashboard.pages.trends",
+    "/cohorts": "src.dashboard.pages.cohorts",
+    "/rfm": "src.dashboard.pages.rfm",
+    "/optimisation": "src.dashboard.pages.optimisation",
+    "/admin": "src.dashboard.pages.admin",
+    "/presentation": "src.dashboard.presentation",
+    "/presentation/{module_id}/{lesson_index}": "src.dashboard.presentation",
+}
+
+
+def _page_function(path: str, module_name: str) -> Callable:
+    """Importe ``module_name`` et retourne sa fonction de page pour ``path``."""
+    importlib.import_module(module_name)
+    for func, route in Client.page_routes.items():
+        if route == path and func.__module__ == module_name:
+            return func
+    raise RuntimeError(f"{module_name} ne declare pas la route '{path}'")
+
+
+def _page_arguments(func: Callable, request: Request) -> dict:
+    """Arguments de ``func`` : parametres de chemin convertis selon leurs annotations."""
+    hints = typing.get_type_hints(func)
+    arguments = {}
+    for name in inspect.signature(func).parameters:
+        if name == "request":
+            arguments[name] = request
+        elif name in request.path_params:
+            arguments[name] = hints.get(name, str)(request.path_params[name])
+    return arguments
+
+
+def _lazy_page(path: str, module_name: str) -> None:
+    """Enregistre sur ``path`` un relais qui charge la vraie page a la premiere requete."""
 
-from nicegui import app, background_tasks, ui
+    async def relay(request: Request):
+        # L'import (pandas, plotly, la page) se fait hors de la boucle d'evenements.
+        await _import_in_background(module_name)
+        func = _page_function(path, module_name)
+        result = func(**_page_arguments(func, request))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    relay.__name__ = f"lazy_{module_name.rsplit('.', 1)[-1]}"
+    ui.page(path)(relay)
+
+
+def register_pages() -> None:
+    """Pose les relais de toutes les routes de ``PAGE_ROUTES`` (aucun import de page)."""
+    for path, module_name in PAGE_ROUTES.items():
+        _lazy_page(path, module_name)
+
+
+async def _import_in_background(module_name: str):
+    """Importe un module lourd dans un thread, sans bloquer la boucle d'evenements."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, importlib.import_module, module_name)
 
 
 async def _precompute_benchmarks() -> None:
-    """Lance les benchmarks en arriere-plan pour remplir le cache."""
-    from src.dashboard.pages.optimisation import COMPARISONS, ITERATIONS, WARMUP
-    from src.dashboard.components.benchmark import run_all_benchmarks
+    """Lance les benchmarks en arriere-plan pour remplir le cache.
+
+    En multi-workers, un seul worker les execute ; les autres reprennent
+    ses mesures (``run_once``) sans importer la page d'optimisation.
+    """
+    benchmark = await _import_in_background("src.dashboard.components.benchmark")
+    from src.dashboard.workers import run_once
+
+    def _measure() -> list[dict]:
+        from src.dashboard.pages.optimisation import COMPARISONS, ITERATIONS, WARMUP
+
+        results = benchmark.run_all_benchmarks(COMPARISONS, iterations=ITERATIONS, warmup=WARMUP)
+        return [asdict(result) for result in results]
 
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(
-        None, lambda: run_all_benchmarks(COMPARISONS, iterations=ITERATIONS, warmup=WARMUP)
-    )
+    shared = await loop.run_in_executor(None, lambda: run_once("benchmarks", _measure))
+    benchmark.set_cache([benchmark.BenchmarkResult(**result) for result in shared])
+
+
+async def _warm_page_queries() -> None:
+    """Pre-calcule les requetes des pages (``warmup`` et pandas importes hors de la boucle)."""
+    warmup = await _import_in_background("src.dashboard.warmup")
+    await warmup.warm_page_queries()
 
 
 def _get_dashboard_port(default: int = 8080) -> int:
@@ -42,28 +137,54 @@ def _schedule_benchmark_warmup() -> None:
     background_tasks.create(_precompute_benchmarks(), name="precompute_benchmarks")
 
 
+def _schedule_query_warmup() -> None:
+    """Declenche le pre-calcul des requetes des pages sans bloquer le startup."""
+    background_tasks.create(_warm_page_queries(), name="warm_page_queries")
+
+
+@app.get("/api/warmup")
+def _warmup_status() -> dict:
+    """Avancement du pre-calcul (le launcher distingue « serveur up » et « dashboard chaud »)."""
+    from src.dashboard.warmup import get_warmup_progress
+
+    return get_warmup_progress().as_dict()
+
+
+@app.get("/api/query/{sql_file}")
+def _query_api(sql_file: str, request: Request) -> Response:
+    """Resultat d'un fichier de sql/dashboard/ en JSON ou Arrow, revalide par ETag."""
+    from src.dashboard.data_api import query_response
+
+    return query_response(sql_file, request.query_params, request.headers)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def _metrics() -> str:
+    """Telemetrie des requetes au format texte Prometheus."""
+    from src.dashboard import db
+
+    return db.prometheus_metrics()
+
+
 def run() -> None:
-    """Démarre le serveur NiceGUI."""
-    # Import des pages (les décorateurs @ui.page enregistrent les routes)
-    from src.dashboard.pages import (  # noqa: F401
-        clients,
-        cohorts,
-        optimisation,
-        overview,
-        pareto,
-        rfm,
-        seller_scoring,
-        trends,
-        ventes,
-    )
-    from src.dashboard import presentation  # noqa: F401
+    """Démarre le serveur NiceGUI (ou ses workers si DASHBOARD_WORKERS > 1)."""
+    from src.dashboard.workers import get_dashboard_workers, is_worker, serve
+
+    workers = get_dashboard_workers()
+    if workers > 1:
+        serve(workers, _get_dashboard_port(), show=_get_show_browser())
+        return
 
+    register_pages()
+    app.on_startup(_schedule_query_warmup)
     app.on_startup(_schedule_benchmark_warmup)
 
     ui.run(
         title="Olist SQL Explorer",
         dark=True,
         reload=False,
+        # Un worker n'est joint que par le proxy du superviseur.
+        host="127.0.0.1" if is_worker() else None,
         port=_get_dashboard_port(),
         show=_get_show_browser(),
     )
@@ -0,0 +1,124 @@
+"""Page Admin — telemetrie des requetes (latences, cache, plans d'execution)."""
+
+import datetime
+
+import pandas as pd
+from nicegui import ui
+
+from src.dashboard import db
+from src.dashboard.components.kpi_card import kpi_card
+from src.dashboard.components.page_layout import layout
+from src.dashboard.telemetry import QueryMetrics
+from src.dashboard.theme import ACCENT, DANGER, PRIMARY, SECONDARY
+
+
+@ui.page("/admin")
+def page() -> None:
+    layout(current_path="/admin")
+    content()
+
+
+def content() -> None:
+    """Construit le contenu de la page Admin."""
+    with ui.element("div").classes("narrative-block"):
+        ui.html(
+            "<b>Telemetrie des requetes</b> — "
+            "Chaque fichier .sql (ou requete ad hoc, identifiee par son empreinte) "
+            "est mesure a chaque appel : latence, lignes, octets materialises et "
+            "part servie par le cache. Le plan <code>EXPLAIN QUERY PLAN</code> est "
+            "releve a chaque nouvelle version de l'entrepot. Les memes compteurs "
+            "sont exposes au format Prometheus sur <a href='/metrics'>/metrics</a>."
+        )
+
+    with ui.row().classes("items-center gap-2 mb-4"):
+        ui.button("Actualiser", icon="refresh", on_click=telemetry_content.refresh).props(
+            "outline"
+        ).style(f"color: {PRIMARY}; border-color: {PRIMARY}")
+
+        def _on_reset() -> None:
+            db.reset_query_metrics()
+            telemetry_content.refresh()
+
+        ui.button("Remettre a zero", icon="restart_alt", on_click=_on_reset).props(
+            "flat"
+        ).style("color: #9E9E9E")
+
+    telemetry_content()
+
+
+@ui.refreshable
+def telemetry_content() -> None:
+    """KPIs, tableau par requete et changements de plan."""
+    metrics = db.query_metrics()
+    changes = db.query_plan_changes()
+    rate = db.telemetry_sample_rate()
+    if rate <= 0:
+        ui.label(
+            "Telemetrie desactivee (DASHBOARD_TELEMETRY_SAMPLE=0)."
+        ).style("color: #9E9E9E")
+        return
+
+    calls = sum(m.calls for m in metrics)
+    hits = sum(m.cache_hits for m in metrics)
+    with ui.row().classes("w-full gap-4 mt-2 mb-4"):
+        kpi_card("Requetes suivies", str(len(metrics)), f"echantillon {rate:.0%}", "query_stats")
+        kpi_card("Appels", f"{calls:,}".replace(",", " "), "depuis le demarrage", "bolt", ACCENT)
+        kpi_card(
+            "Hit rate cache",
+            f"{hits / calls:.0%}" if calls else "—",
+            f"{hits} hits",
+            "cached",
+            SECONDARY,
+        )
+        kpi_card(
+            "Changements de plan",
+            str(len(changes)),
+            "depuis le demarrage",
+            "alt_route",
+            DANGER if changes else PRIMARY,
+        )
+
+    if not metrics:
+        ui.label("Aucune requete mesuree pour l'instant.").style("color: #9E9E9E")
+        return
+
+    ui.table.from_pandas(_metrics_frame(metrics)).classes("w-full")
+
+    ui.label("Plans d'execution").classes("page-title mt-6")
+    for m in metrics:
+        if not m.plan:
+            continue
+        caption = f"{m.query} — {m.plan_changes} changement(s)" if m.plan_changes else m.query
+        with ui.expansion(caption, icon="account_tree").classes("w-full"):
+            if m.plan_changes:
+                ui.label("Premier plan").style("color: #9E9E9E")
+                ui.code(m.first_plan, language="text").classes("w-full")
+                ui.label("Plan actuel").style("color: #9E9E9E")
+            ui.code(m.plan, language="text").classes("w-full")
+
+    if changes:
+        ui.label("Historique des changements").classes("page-title mt-6")
+        for change in changes:
+            when = datetime.datetime.fromtimestamp(change.at).strftime("%Y-%m-%d %H:%M:%S")
+            with ui.expansion(f"{when} — {change.query}", icon="history").classes("w-full"):
+                with ui.row().classes("w-full no-wrap gap-4"):
+                    ui.code(change.previous, language="text").classes("w-1/2")
+                    ui.code(change.current, language="text").classes("w-1/2")
+
+
+def _metrics_frame(metrics: list[QueryMetrics]) -> pd.DataFrame:
+    """Une ligne par requete, durees en millisecondes."""
+    return pd.DataFrame(
+        {
+            "requete": [m.query for m in metrics],
+            "appels": [m.calls for m in metrics],
+            "erreurs": [m.errors for m in metrics],
+            "hit rate": [f"{m.hit_rate:.0%}" for m in metrics],
+            "p50 (ms)": [round(m.p50 * 1000, 1) for m in metrics],
+            "p95 (ms)": [round(m.p95 * 1000, 1) for m in metrics],
+            "p99 (ms)": [round(m.p99 * 1000, 1) for m in metrics],
+            "total (s)": [round(m.duration_s, 2) for m in metrics],
+            "lignes": [m.rows for m in metrics],
+            "Ko materialises": [round(m.bytes / 1024, 1) for m in metrics],
+        }
+    )
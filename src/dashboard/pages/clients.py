@@ -1,11 +1,14 @@
 """Page Clients — Nouveaux vs recurrents, LTV par cohorte."""
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from nicegui import ui
 
+from src.dashboard.cohort_engine import cohorts_from_frame
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
+from src.dashboard.render_cache import section_chart
 from src.dashboard.theme import CHART_COLORS, PLOTLY_TEMPLATE, PRIMARY, SECONDARY
 from src.dashboard.components.insight import insight_block
 
@@ -28,7 +31,7 @@ def content() -> None:
         )
 
     # ── Nouveaux vs recurrents ─────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Nouveaux clients vs recurrents par mois",
         description=(
             "<code>CTEs multi-niveaux</code>, "
@@ -41,17 +44,16 @@ def content() -> None:
     )
 
     # ── LTV par cohorte ────────────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Lifetime Value (LTV) par cohorte",
         description=(
-            "<code>CTEs multi-niveaux (3)</code>, "
-            "<code>SUM() OVER (PARTITION BY ... ORDER BY ...)</code>, "
-            "<code>Sous-requete correlee</code>, "
-            "<code>Calcul delta mois AAAAMM</code>"
+            "<code>GROUP BY client, mois AAAAMM</code>, "
+            "<code>JOIN dim_customers</code> (client unique) ; "
+            "cumul et LTV calcules en numpy sur toutes les cohortes"
         ),
-        sql_file="ltv_cohorts.sql",
+        sql_file="customer_months.sql",
         chart_builder=_build_ltv_cohorts,
-        show_table=True,
+        load="visible",
     )
 
 
@@ -67,39 +69,7 @@ def _build_new_vs_recurring(df: pd.DataFrame) -> None:
         ui.label("Aucune donnee disponible apres filtrage.").classes("text-center mt-4")
         return
 
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Bar(
-            x=df["month_label"],
-            y=df["new_customers"],
-            name="Nouveaux",
-            marker_color=CHART_COLORS[0],
-            hovertemplate="Mois: %{x}<br>Nouveaux: %{y}<extra></extra>",
-        )
-    )
-
-    fig.add_trace(
-        go.Bar(
-            x=df["month_label"],
-            y=df["recurring"],
-            name="Recurrents",
-            marker_color=CHART_COLORS[1],
-            hovertemplate="Mois: %{x}<br>Recurrents: %{y}<extra></extra>",
-        )
-    )
-
-    fig.update_layout(
-        template=PLOTLY_TEMPLATE,
-        barmode="stack",
-        height=450,
-        margin=dict(l=50, r=30, t=30, b=50),
-        xaxis_title="Mois",
-        yaxis_title="Nombre de clients",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
-    )
-
-    ui.plotly(fig).classes("w-full mt-4")
+    ui.plotly(section_chart(_new_vs_recurring_figure, df)).classes("w-full mt-4")
 
     # KPI complementaire : taux de clients recurrents
     total_new = df["new_customers"].sum()
@@ -134,36 +104,86 @@ def _build_new_vs_recurring(df: pd.DataFrame) -> None:
     )
 
 
+def _new_vs_recurring_figure(df: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Bar(
+            x=df["month_label"],
+            y=df["new_customers"],
+            name="Nouveaux",
+            marker_color=CHART_COLORS[0],
+            hovertemplate="Mois: %{x}<br>Nouveaux: %{y}<extra></extra>",
+        )
+    )
+
+    fig.add_trace(
+        go.Bar(
+            x=df["month_label"],
+            y=df["recurring"],
+            name="Recurrents",
+            marker_color=CHART_COLORS[1],
+            hovertemplate="Mois: %{x}<br>Recurrents: %{y}<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        template=PLOTLY_TEMPLATE,
+        barmode="stack",
+        height=450,
+        margin=dict(l=50, r=30, t=30, b=50),
+        xaxis_title="Mois",
+        yaxis_title="Nombre de clients",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
+
+
 def _build_ltv_cohorts(df: pd.DataFrame) -> None:
-    """Line chart — LTV cumulative par cohorte."""
+    """Line chart — LTV cumulative par cohorte (matrices du moteur de cohortes)."""
     if df.empty:
         ui.label("Aucune donnee disponible.").classes("text-center mt-4")
         return
 
-    # Convertir cohort_month en label lisible
-    df = df.copy()
-    df["cohort_label"] = (
-        (df["cohort_month"] // 100).astype(str)
-        + "-"
-        + (df["cohort_month"] % 100).apply(lambda m: f"{m:02d}")
-    )
+    fig, best, table = section_chart(_ltv_cohorts_render, df)
+    ui.plotly(fig).classes("w-full mt-4")
 
-    # Selectionner les cohortes avec assez de clients (>= 500 au mois 0)
-    month0 = df[df["months_since_first"] == 0]
-    large_cohorts = month0[month0["nb_customers"] >= 500]["cohort_label"].tolist()
+    if best is not None:
+        label, value = best
+        insight_block(
+            f"La cohorte la plus rentable est <b>{label}</b> "
+            f"avec une LTV de <b>R$ {value:.2f}</b> par client. "
+            f"Les cohortes plus recentes n'ont pas encore eu le temps de "
+            f"developper leur plein potentiel de valeur."
+        )
+
+    with ui.expansion("Données par cohorte", icon="table_chart").classes("w-full mt-2"):
+        ui.table.from_pandas(table, pagination=12).classes("w-full")
+
+
+def _ltv_cohorts_render(
+    df: pd.DataFrame,
+) -> tuple[go.Figure, tuple[str, float] | None, pd.DataFrame]:
+    """Figure, meilleure cohorte (libelle, LTV) et table longue, depuis les memes matrices."""
+    matrices = cohorts_from_frame(df)
 
-    if not large_cohorts:
+    # Selectionner les cohortes avec assez de clients (>= 500 au mois 0)
+    large = matrices.select(min_size=500)
+    if len(large.cohorts) == 0:
         # Fallback : prendre les 6 plus grandes cohortes
-        large_cohorts = month0.nlargest(6, "nb_customers")["cohort_label"].tolist()
+        sizes = np.sort(matrices.sizes)[::-1]
+        large = matrices.select(min_size=sizes[min(5, len(sizes) - 1)])
 
+    ltv = large.ltv
+    months = np.arange(large.horizon)
     fig = go.Figure()
 
-    for i, cohort in enumerate(large_cohorts):
-        cohort_data = df[df["cohort_label"] == cohort]
+    for i, (cohort, values) in enumerate(zip(large.labels, ltv)):
+        observed = ~np.isnan(values)
         fig.add_trace(
             go.Scatter(
-                x=cohort_data["months_since_first"],
-                y=cohort_data["ltv_per_customer"],
+                x=months[observed],
+                y=values[observed].round(2),
                 mode="lines+markers",
                 name=cohort,
                 line=dict(color=CHART_COLORS[i % len(CHART_COLORS)], width=2),
@@ -191,23 +211,11 @@ def _build_ltv_cohorts(df: pd.DataFrame) -> None:
         ),
     )
 
-    ui.plotly(fig).classes("w-full mt-4")
-
-    # Insight LTV cohortes
-    if large_cohorts:
-        best_ltv_cohort = None
-        best_ltv_val = 0
-        for cohort in large_cohorts:
-            cdata = df[df["cohort_label"] == cohort]
-            if not cdata.empty:
-                last_ltv = cdata["ltv_per_customer"].iloc[-1]
-                if last_ltv > best_ltv_val:
-                    best_ltv_val = last_ltv
-                    best_ltv_cohort = cohort
-        if best_ltv_cohort:
-            insight_block(
-                f"La cohorte la plus rentable est <b>{best_ltv_cohort}</b> "
-                f"avec une LTV de <b>R$ {best_ltv_val:.2f}</b> par client. "
-                f"Les cohortes plus recentes n'ont pas encore eu le temps de "
-                f"developper leur plein potentiel de valeur."
-            )
+    # La LTV cumulee ne decroit pas : son max est la derniere valeur observee
+    best = None
+    if len(large.cohorts):
+        last_ltv = np.nanmax(ltv, axis=1)
+        index = int(last_ltv.argmax())
+        if last_ltv[index] > 0:
+            best = (large.labels[index], float(last_ltv[index]))
+    return fig, best, matrices.long()
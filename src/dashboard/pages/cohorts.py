@@ -1,14 +1,22 @@
 """Page Cohortes rétention — heatmap ECharts."""
 
+import numpy as np
 import pandas as pd
 from nicegui import ui
 
+from src.dashboard.chart_payload import echarts_matrix
+from src.dashboard.cohort_engine import CohortMatrices, cohorts_from_frame
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
 from src.dashboard.theme import PRIMARY
 from src.dashboard.components.insight import insight_block
 
 
+MIN_COHORT_SIZE = 50
+# Mois depuis le premier achat affichés (0 = tout l'historique observé)
+HORIZONS = {6: "6 mois", 12: "12 mois", 0: "Tout"}
+
+
 @ui.page("/cohorts")
 def page() -> None:
     layout(current_path="/cohorts")
@@ -28,17 +36,15 @@ def content() -> None:
         )
 
     # ── SQL viewer + heatmap ─────────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Rétention par cohorte mensuelle",
         description=(
-            "<code>DATE / strftime</code>, "
-            "<code>GROUP BY cohorte</code>, "
-            "<code>COUNT DISTINCT</code>, "
-            "<code>auto-jointure (self-join)</code>"
+            "<code>GROUP BY client, mois AAAAMM</code>, "
+            "<code>JOIN dim_customers</code> (client unique) ; "
+            "matrices de rétention calculées en numpy sur toutes les cohortes"
         ),
-        sql_file="cohorts_retention.sql",
+        sql_file="customer_months.sql",
         chart_builder=_build_heatmap,
-        show_table=True,
     )
 
 
@@ -48,45 +54,43 @@ def _build_heatmap(df: pd.DataFrame) -> None:
         ui.label("Aucune donnée de cohorte disponible.").classes("text-center mt-4")
         return
 
-    # Pivot : lignes = cohorte, colonnes = mois depuis 1er achat
-    pivot = df.pivot(
-        index="cohort_month",
-        columns="months_since_first",
-        values="nb_customers",
-    )
-
-    # Filtrer les cohortes trop petites (< 50 clients au mois 0)
-    if 0 in pivot.columns:
-        pivot = pivot[pivot[0] >= 50]
-
-    if pivot.empty:
+    # Matrices de toutes les cohortes ; filtrer les trop petites (< 50 clients au mois 0)
+    matrices = cohorts_from_frame(df).select(min_size=MIN_COHORT_SIZE)
+    if len(matrices.cohorts) == 0:
         ui.label("Pas assez de données pour les cohortes.").classes("text-center mt-4")
         return
 
-    # Taux de rétention (%) relatif au mois 0
-    month_zero = pivot[0]
-    retention = pivot.div(month_zero, axis=0) * 100
+    # Horizon affiché : les matrices couvrent déjà tout l'historique, pas de nouvelle requête
+    heatmap = ui.column().classes("w-full gap-0")
+
+    def show(horizon: int) -> None:
+        heatmap.clear()
+        with heatmap:
+            _render_heatmap(matrices.select(horizon=horizon or None))
+
+    ui.toggle(HORIZONS, value=12, on_change=lambda e: show(e.value)).props("dense")
+    show(12)
+
+    # Afficher la taille des cohortes en complément
+    ui.label("Taille des cohortes (clients au mois 0)").classes("page-title mt-4")
+    size_df = pd.DataFrame({"Cohorte": matrices.labels, "Clients": matrices.sizes})
+    ui.table.from_pandas(size_df).classes("w-full mt-2")
+
 
-    # Préparer les axes
-    cohorts = [str(c) for c in pivot.index]
+def _render_heatmap(matrices: CohortMatrices) -> None:
+    """Heatmap et insight sur l'horizon sélectionné."""
+    retention = matrices.frame(matrices.retention)
+    cohorts = matrices.labels
     # Exclure mois 0 (toujours 100%) pour mieux voir la rétention réelle
-    ret_cols = [c for c in pivot.columns if c > 0]
+    ret_cols = [c for c in retention.columns if c > 0]
     months_labels = [str(m) for m in ret_cols]
 
-    # Carte du mois 0 : affichée séparément comme texte
-    cohort_sizes = {str(c): int(pivot.loc[c, 0]) for c in pivot.index}
-
-    # Données heatmap : [x (mois), y (cohorte), valeur (%)] — sans mois 0
-    data = []
-    for i, cohort_key in enumerate(pivot.index):
-        for j, month_col in enumerate(ret_cols):
-            val = retention.loc[cohort_key, month_col] if month_col in retention.columns else None
-            if pd.notna(val):
-                data.append([j, i, round(val, 1)])
+    # Cellules heatmap : x (mois), y (cohorte), valeur (%) — sans mois 0 ni mois non observés
+    dataset = echarts_matrix(retention[ret_cols], precision=1)
 
     # Calculer le max réel (hors mois 0) pour l'échelle de couleur
-    vals = [d[2] for d in data if d[2] > 0]
-    max_val = max(vals) if vals else 1.0
+    values = np.asarray(dataset["source"]["value"])
+    max_val = values[values > 0].max() if (values > 0).any() else 1.0
     # Arrondir vers le haut au prochain entier
     max_scale = min(max(round(max_val + 0.5), 1), 100)
 
@@ -115,6 +119,7 @@ def _build_heatmap(df: pd.DataFrame) -> None:
             "splitArea": {"show": True},
         },
         "visualMap": {
+            "dimension": 2,
             "min": 0,
             "max": max_scale,
             "calculable": True,
@@ -126,14 +131,15 @@ def _build_heatmap(df: pd.DataFrame) -> None:
             },
             "textStyle": {"color": "#ccc", "fontSize": 11},
         },
+        "dataset": dataset,
         "series": [
             {
                 "type": "heatmap",
-                "data": data,
+                "encode": {"x": "x", "y": "y", "value": "value"},
                 "label": {
                     "show": True,
                     "fontSize": 10,
-                    "formatter": "{@[2]} %",
+                    "formatter": "{@value} %",
                 },
                 "emphasis": {
                     "itemStyle": {
@@ -148,22 +154,14 @@ def _build_heatmap(df: pd.DataFrame) -> None:
     ui.echart(options).classes("w-full").style("height: 450px")
 
     # Insight cohortes
-    if ret_cols and len(retention) > 0:
+    if 1 in retention.columns and retention[1].notna().any():
         # Retention moyenne au mois 1
-        if 1 in retention.columns:
-            avg_ret_m1 = retention[1].mean()
-            best_cohort_idx = retention[1].idxmax()
-            best_cohort_val = retention.loc[best_cohort_idx, 1]
-            insight_block(
-                f"La retention moyenne au mois 1 est de <b>{avg_ret_m1:.1f}%</b>, "
-                f"typique du e-commerce. La meilleure cohorte est "
-                f"<b>{best_cohort_idx}</b> avec <b>{best_cohort_val:.1f}%</b> de retention. "
-                f"Ameliorer la retention au mois 1 aurait un effet multiplicateur sur la LTV."
-            )
-
-    # Afficher la taille des cohortes en complément
-    ui.label("Taille des cohortes (clients au mois 0)").classes("page-title mt-4")
-    size_df = pd.DataFrame([
-        {"Cohorte": k, "Clients": v} for k, v in cohort_sizes.items()
-    ])
-    ui.table.from_pandas(size_df).classes("w-full mt-2")
+        avg_ret_m1 = retention[1].mean()
+        best_cohort_idx = retention[1].idxmax()
+        best_cohort_val = retention.loc[best_cohort_idx, 1]
+        insight_block(
+            f"La retention moyenne au mois 1 est de <b>{avg_ret_m1:.1f}%</b>, "
+            f"typique du e-commerce. La meilleure cohorte est "
+            f"<b>{best_cohort_idx}</b> avec <b>{best_cohort_val:.1f}%</b> de retention. "
+            f"Ameliorer la retention au mois 1 aurait un effet multiplicateur sur la LTV."
+        )
@@ -1,9 +1,11 @@
-"""Page Optimisation SQL — benchmarks mesures avec KPIs et graphiques."""
+"""Page Optimisation SQL — benchmarks mesures avec KPIs et graphiques, requetes lentes."""
 
 import asyncio
+import datetime
 
 from nicegui import background_tasks, ui
 
+from src.dashboard import db
 from src.dashboard.components.benchmark import (
     BenchmarkResult,
     get_cache,
@@ -162,6 +164,8 @@ def content() -> None:
 
     background_tasks.create(benchmark_content(), name="benchmark_init")
 
+    _render_slow_query_section()
+
 
 @ui.refreshable
 async def benchmark_content() -> None:
@@ -370,6 +374,115 @@ def _render_comparison(comp: dict, result: BenchmarkResult) -> None:
         ui.markdown(comp["explanation"])
 
 
+# ── Journal des requetes lentes ──────────────────────────────────────────
+
+SLOW_QUERY_FILTERS = {
+    "all": "Toutes",
+    "scan": "Avec SCAN",
+    "temp_btree": "Avec B-tree temporaire",
+}
+SLOW_QUERY_LIMIT = 50
+
+_STEP_COLORS = {
+    "scan": DANGER,
+    "search_indexed": PRIMARY,
+    "search": SECONDARY,
+    "temp_btree": ACCENT,
+    "materialize": PRIMARY,
+}
+
+
+def _render_slow_query_section() -> None:
+    """Section journal des requetes lentes : filtre, actualisation, entrees."""
+    ui.separator().classes("my-4")
+    with ui.row().classes("items-center gap-2 mt-4"):
+        ui.icon("hourglass_bottom").classes("text-2xl").style(f"color: {PRIMARY}")
+        ui.label("Journal des requetes lentes").classes("page-title")
+
+    threshold = db.slow_query_threshold_ms()
+    if threshold <= 0:
+        ui.label("Journal desactive (DASHBOARD_SLOW_QUERY_MS=0).").style("color: #9E9E9E")
+        return
+    ui.markdown(
+        f"Chaque requete du dashboard qui depasse **{threshold:.0f} ms** est journalisee avec "
+        "son plan `EXPLAIN QUERY PLAN`. Les **SCAN** (parcours complets) et les "
+        "**B-trees temporaires** (tris, GROUP BY, DISTINCT sans index) sont signales : "
+        "un nouveau fichier .sql qui en introduit apparait ici."
+    )
+
+    state = {"filter": "all"}
+
+    def _on_filter(event) -> None:
+        state["filter"] = event.value
+        slow_query_content.refresh()
+
+    def _on_clear() -> None:
+        db.clear_slow_queries()
+        slow_query_content.refresh()
+
+    with ui.row().classes("items-center gap-2 mb-2"):
+        ui.select(SLOW_QUERY_FILTERS, value="all", on_change=_on_filter).props("dense outlined")
+        ui.button("Actualiser", icon="refresh", on_click=slow_query_content.refresh).props(
+            "outline"
+        ).style(f"color: {PRIMARY}; border-color: {PRIMARY}")
+        ui.button("Vider", icon="delete_sweep", on_click=_on_clear).props("flat").style(
+            "color: #9E9E9E"
+        )
+
+    slow_query_content(state)
+
+
+@ui.refreshable
+def slow_query_content(state: dict) -> None:
+    """Dernieres entrees du journal, filtrees sur le type d'etape du plan."""
+    entries = db.slow_queries(SLOW_QUERY_LIMIT)
+    if state["filter"] == "scan":
+        entries = [e for e in entries if e.scans]
+    elif state["filter"] == "temp_btree":
+        entries = [e for e in entries if e.temp_btrees]
+    if not entries:
+        ui.label("Aucune requete lente journalisee.").style("color: #9E9E9E")
+        return
+
+    for entry in entries:
+        when = datetime.datetime.fromtimestamp(entry.at).strftime("%Y-%m-%d %H:%M:%S")
+        flags = []
+        if entry.scans:
+            flags.append(f"{entry.scans} SCAN")
+        if entry.temp_btrees:
+            flags.append(f"{entry.temp_btrees} B-tree temp.")
+        if entry.error:
+            flags.append("erreur")
+        caption = f"{when} — {entry.query} — {entry.duration_ms:.0f} ms"
+        if flags:
+            caption += f" — {', '.join(flags)}"
+        with ui.expansion(caption, icon="hourglass_bottom").classes("w-full"):
+            ui.label(
+                f"Origine : {entry.origin or 'inconnue'} · {entry.rows} ligne(s) · "
+                f"source : {entry.source}"
+            ).style("color: #9E9E9E; font-size: 0.8rem")
+            if entry.error:
+                ui.label(entry.error).style(f"color: {DANGER}; font-size: 0.8rem")
+            ui.code(entry.sql, language="sql").classes("w-full")
+            if entry.params:
+                ui.label(f"Parametres : {entry.params}").style("color: #9E9E9E; font-size: 0.8rem")
+            if entry.steps:
+                _render_plan_steps(entry.steps)
+
+
+def _render_plan_steps(steps: list[dict]) -> None:
+    """Plan analyse (``parse_explain``) : une ligne par etape, indentee et coloree par type."""
+    with ui.element("div").style(
+        "background: #1a1a2e; border-radius: 6px; padding: 10px 14px; "
+        "font-family: monospace; font-size: 0.82rem"
+    ):
+        for step in steps:
+            color = _STEP_COLORS.get(step["type"], "#E0E0E0")
+            ui.label(step["text"]).style(
+                f"color: {color}; margin: 2px 0; padding-left: {step.get('depth', 0) * 16}px"
+            ).tooltip(step["explanation"])
+
+
 # ── Helpers ──────────────────────────────────────────────────────────────
 
 
@@ -4,11 +4,12 @@ import pandas as pd
 import plotly.graph_objects as go
 from nicegui import ui
 
-from src.dashboard import db
+from src.dashboard.chart_payload import plotly_arrays
+from src.dashboard.downsample import for_chart
 from src.dashboard.theme import ACCENT, CHART_COLORS, PLOTLY_TEMPLATE, PRIMARY, SECONDARY
 from src.dashboard.components.page_layout import layout
 from src.dashboard.components.kpi_card import kpi_card
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import deferred_query, sql_viewer_async
 from src.dashboard.components.insight import insight_block
 
 
@@ -33,7 +34,54 @@ def content() -> None:
         )
 
     # ── KPI cards ─────────────────────────────────────────────────────────
-    _, df_kpis = db.query_from_file("overview_kpis.sql")
+    deferred_query("overview_kpis.sql", _render_kpis, placeholder_height="120px")
+
+    # ── Sparkline mensuelle ───────────────────────────────────────────────
+    def _build_sparkline(df):
+        plot = for_chart(df, "month_label", "monthly_revenue")
+        arrays = plotly_arrays(plot, ["month_label", "monthly_revenue"])
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=arrays["month_label"],
+            y=arrays["monthly_revenue"],
+            mode="lines",
+            fill="tozeroy",
+            line=dict(color=PRIMARY, width=2),
+            fillcolor="rgba(0, 200, 83, 0.15)",
+            name="Revenue mensuel",
+        ))
+        fig.update_layout(
+            template=PLOTLY_TEMPLATE,
+            height=300,
+            margin=dict(l=40, r=20, t=30, b=40),
+            xaxis_title="Mois",
+            yaxis_title="Revenue (R$)",
+            showlegend=False,
+        )
+        ui.plotly(fig).classes("w-full")
+
+        # Insight sparkline
+        if len(df) >= 2:
+            best_month = df.loc[df["monthly_revenue"].idxmax()]
+            best_label = best_month["month_label"]
+            best_val = best_month["monthly_revenue"]
+            last_val = df.iloc[-1]["monthly_revenue"]
+            insight_block(
+                f"Le mois le plus fort est <b>{best_label}</b> avec "
+                f"<b>R$ {best_val:,.0f}</b>. ".replace(",", " ")
+                + f"Le dernier mois enregistre <b>R$ {last_val:,.0f}</b>.".replace(",", " ")
+            )
+
+    sql_viewer_async(
+        title="Evolution mensuelle du chiffre d'affaires",
+        description="JOIN, GROUP BY, ORDER BY, fonctions d'agregation (SUM, ROUND)",
+        sql_file="overview_monthly_mini.sql",
+        chart_builder=_build_sparkline,
+    )
+
+
+def _render_kpis(_sql_text: str, df_kpis: pd.DataFrame) -> None:
+    """KPI cards et insight a partir du resultat de overview_kpis.sql."""
     if df_kpis.empty:
         ui.label("Aucune donnee KPI disponible.").classes("text-center mt-4")
     else:
@@ -92,44 +140,3 @@ def content() -> None:
             f"<b>{satisfaction}</b>. Le delai moyen de <b>{avg_delivery}</b> reste competitif "
             f"pour le e-commerce bresilien."
         )
-
-    # ── Sparkline mensuelle ───────────────────────────────────────────────
-    def _build_sparkline(df):
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=df["month_label"],
-            y=df["monthly_revenue"],
-            mode="lines",
-            fill="tozeroy",
-            line=dict(color=PRIMARY, width=2),
-            fillcolor="rgba(0, 200, 83, 0.15)",
-            name="Revenue mensuel",
-        ))
-        fig.update_layout(
-            template=PLOTLY_TEMPLATE,
-            height=300,
-            margin=dict(l=40, r=20, t=30, b=40),
-            xaxis_title="Mois",
-            yaxis_title="Revenue (R$)",
-            showlegend=False,
-        )
-        ui.plotly(fig).classes("w-full")
-
-        # Insight sparkline
-        if len(df) >= 2:
-            best_month = df.loc[df["monthly_revenue"].idxmax()]
-            best_label = best_month["month_label"]
-            best_val = best_month["monthly_revenue"]
-            last_val = df.iloc[-1]["monthly_revenue"]
-            insight_block(
-                f"Le mois le plus fort est <b>{best_label}</b> avec "
-                f"<b>R$ {best_val:,.0f}</b>. ".replace(",", " ")
-                + f"Le dernier mois enregistre <b>R$ {last_val:,.0f}</b>.".replace(",", " ")
-            )
-
-    sql_viewer(
-        title="Evolution mensuelle du chiffre d'affaires",
-        description="JOIN, GROUP BY, ORDER BY, fonctions d'agregation (SUM, ROUND)",
-        sql_file="overview_monthly_mini.sql",
-        chart_builder=_build_sparkline,
-    )
@@ -6,7 +6,7 @@ from nicegui import ui
 from plotly.subplots import make_subplots
 
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
 from src.dashboard.theme import CHART_COLORS, PLOTLY_TEMPLATE
 from src.dashboard.components.insight import insight_block
 
@@ -29,7 +29,7 @@ def content() -> None:
         )
 
     # -- SQL viewer + graphique Pareto --
-    sql_viewer(
+    sql_viewer_async(
         title="Pareto des vendeurs",
         description=(
             "SUM() OVER (ROWS UNBOUNDED PRECEDING) cumul fenetre, "
@@ -3,8 +3,9 @@
 import pandas as pd
 from nicegui import ui
 
+from src.dashboard.chart_payload import columns_payload
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
 from src.dashboard.theme import CHART_COLORS
 from src.dashboard.components.insight import insight_block
 
@@ -28,7 +29,7 @@ def content() -> None:
         )
 
     # -- SQL viewer + treemap --
-    sql_viewer(
+    sql_viewer_async(
         title="Segments RFM",
         description=(
             "CTE (WITH), NTILE() fenetre de quartiles, "
@@ -46,20 +47,12 @@ def _chart_builder(df: pd.DataFrame) -> None:
         ui.label("Aucune donnee disponible.").classes("text-center mt-4")
         return
 
-    # Associer une couleur a chaque segment
-    color_map = {
-        row.segment: CHART_COLORS[i % len(CHART_COLORS)]
-        for i, row in enumerate(df.itertuples())
-    }
-
-    # Donnees du treemap
+    # Donnees du treemap (une couleur par segment, dans l'ordre du resultat)
+    payload = columns_payload(df, ["segment", "nb_customers"], precision=0)
+    colors = [CHART_COLORS[i % len(CHART_COLORS)] for i in range(len(df))]
     tree_data = [
-        {
-            "name": row.segment,
-            "value": int(row.nb_customers),
-            "itemStyle": {"color": color_map[row.segment]},
-        }
-        for row in df.itertuples()
+        {"name": name, "value": int(value), "itemStyle": {"color": color}}
+        for name, value, color in zip(payload["segment"], payload["nb_customers"], colors)
     ]
 
     options = {
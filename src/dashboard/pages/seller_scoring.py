@@ -1,11 +1,12 @@
 """Page Scoring vendeurs — radar Plotly + tableau interactif."""
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from nicegui import ui
 
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
 from src.dashboard.theme import CHART_COLORS, PLOTLY_TEMPLATE
 from src.dashboard.components.insight import insight_block
 
@@ -29,7 +30,7 @@ def content() -> None:
         )
 
     # ── SQL viewer + radar + tableau ─────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Classement et profil des vendeurs",
         description=(
             "<code>NTILE()</code>, "
@@ -63,14 +64,13 @@ def _build_radar_and_table(df: pd.DataFrame) -> None:
 
     fig = go.Figure()
 
-    for i, (_, row) in enumerate(top5.iterrows()):
-        values = [row[col] for col in score_cols]
-        # Fermer le polygone en répétant la première valeur
-        values_closed = values + [values[0]]
-        cats_closed = categories + [categories[0]]
-
-        seller_label = f"#{int(row['seller_rank'])} — {row['seller_city']}"
+    # Scores en matrice (vendeurs x dimensions), polygones fermés en répétant la 1re colonne
+    score_matrix = top5[score_cols].to_numpy()
+    closed = np.column_stack([score_matrix, score_matrix[:, 0]]).tolist()
+    cats_closed = categories + [categories[0]]
+    labels = "#" + top5["seller_rank"].astype(int).astype(str) + " — " + top5["seller_city"].astype(str)
 
+    for i, (values_closed, seller_label) in enumerate(zip(closed, labels)):
         fig.add_trace(
             go.Scatterpolar(
                 r=values_closed,
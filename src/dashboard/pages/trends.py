@@ -4,9 +4,12 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from nicegui import ui
 
+from src.dashboard.chart_payload import plotly_arrays
+from src.dashboard.downsample import for_chart
+from src.dashboard.render_cache import section_chart
 from src.dashboard.theme import CHART_COLORS, PLOTLY_TEMPLATE
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
 from src.dashboard.components.insight import insight_block
 
 
@@ -38,87 +41,13 @@ def content() -> None:
             ui.label("Aucune donnee disponible apres filtrage.").classes("text-center mt-4")
             return
 
-        # Plafonner la croissance à ±100% pour éviter les pics aberrants
-        growth_capped = df["growth_pct"].clip(-100, 100)
-
-        fig = make_subplots(
-            rows=2,
-            cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.12,
-            subplot_titles=(
-                "Revenue mensuel & croissance (%)",
-                "Cumul du chiffre d'affaires",
-            ),
-            specs=[[{"secondary_y": True}], [{"secondary_y": False}]],
-        )
-
-        # --- Subplot 1 : revenue (bar) + growth_pct (line, secondary y) ---
-        fig.add_trace(
-            go.Bar(
-                x=df["month_label"],
-                y=df["monthly_revenue"],
-                name="Revenue (R$)",
-                marker_color=CHART_COLORS[0],
-                opacity=0.85,
-            ),
-            row=1, col=1, secondary_y=False,
-        )
-
-        fig.add_trace(
-            go.Scatter(
-                x=df["month_label"],
-                y=growth_capped,
-                name="Croissance (%)",
-                mode="lines+markers",
-                line=dict(color=CHART_COLORS[1], width=2),
-                marker=dict(size=5),
-            ),
-            row=1, col=1, secondary_y=True,
-        )
-
-        # --- Subplot 2 : running total (area) ---
-        fig.add_trace(
-            go.Scatter(
-                x=df["month_label"],
-                y=df["running_total"],
-                name="Cumul CA",
-                mode="lines",
-                fill="tozeroy",
-                line=dict(color=CHART_COLORS[2], width=2),
-                fillcolor="rgba(0, 229, 255, 0.15)",
-            ),
-            row=2, col=1,
-        )
-
-        fig.update_layout(
-            template=PLOTLY_TEMPLATE,
-            height=650,
-            margin=dict(l=50, r=50, t=50, b=40),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.04,
-                xanchor="center",
-                x=0.5,
-            ),
-        )
-
-        fig.update_yaxes(title_text="Revenue (R$)", row=1, col=1, secondary_y=False)
-        fig.update_yaxes(
-            title_text="Croissance (%)", range=[-100, 100],
-            row=1, col=1, secondary_y=True,
-        )
-        fig.update_yaxes(title_text="Cumul (R$)", row=2, col=1)
-        fig.update_xaxes(title_text="Mois", row=2, col=1)
-
-        ui.plotly(fig).classes("w-full")
+        ui.plotly(section_chart(_trends_figure, df)).classes("w-full")
 
         # Insight tendances
         if len(df) >= 2:
             cumul = df["running_total"].iloc[-1]
             cumul_fmt = f"R$ {cumul / 1_000_000:.1f}M"
-            valid_growth = growth_capped.dropna()
+            valid_growth = df["growth_pct"].clip(-100, 100).dropna()
             avg_growth = valid_growth.mean() if len(valid_growth) > 0 else 0
             sign = "+" if avg_growth > 0 else ""
             insight_block(
@@ -131,7 +60,7 @@ def content() -> None:
                 )
             )
 
-    sql_viewer(
+    sql_viewer_async(
         title="Analyse des tendances mensuelles",
         description=(
             "Vue SQL reutilisee (<code>v_monthly_sales</code>), "
@@ -140,3 +69,89 @@ def content() -> None:
         sql_file="trends_monthly.sql",
         chart_builder=_build_trends_chart,
     )
+
+
+def _trends_figure(df) -> go.Figure:
+    """Revenue + croissance (axe secondaire), puis cumul du CA."""
+    # Plafonner la croissance à ±100% pour éviter les pics aberrants
+    growth_capped = df["growth_pct"].clip(-100, 100)
+    plot = for_chart(
+        df.assign(growth_capped=growth_capped),
+        "month_label",
+        ["monthly_revenue", "growth_capped", "running_total"],
+    )
+    arrays = plotly_arrays(
+        plot, ["month_label", "monthly_revenue", "growth_capped", "running_total"]
+    )
+
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.12,
+        subplot_titles=(
+            "Revenue mensuel & croissance (%)",
+            "Cumul du chiffre d'affaires",
+        ),
+        specs=[[{"secondary_y": True}], [{"secondary_y": False}]],
+    )
+
+    # --- Subplot 1 : revenue (bar) + growth_pct (line, secondary y) ---
+    fig.add_trace(
+        go.Bar(
+            x=arrays["month_label"],
+            y=arrays["monthly_revenue"],
+            name="Revenue (R$)",
+            marker_color=CHART_COLORS[0],
+            opacity=0.85,
+        ),
+        row=1, col=1, secondary_y=False,
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=arrays["month_label"],
+            y=arrays["growth_capped"],
+            name="Croissance (%)",
+            mode="lines+markers",
+            line=dict(color=CHART_COLORS[1], width=2),
+            marker=dict(size=5),
+        ),
+        row=1, col=1, secondary_y=True,
+    )
+
+    # --- Subplot 2 : running total (area) ---
+    fig.add_trace(
+        go.Scatter(
+            x=arrays["month_label"],
+            y=arrays["running_total"],
+            name="Cumul CA",
+            mode="lines",
+            fill="tozeroy",
+            line=dict(color=CHART_COLORS[2], width=2),
+            fillcolor="rgba(0, 229, 255, 0.15)",
+        ),
+        row=2, col=1,
+    )
+
+    fig.update_layout(
+        template=PLOTLY_TEMPLATE,
+        height=650,
+        margin=dict(l=50, r=50, t=50, b=40),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.04,
+            xanchor="center",
+            x=0.5,
+        ),
+    )
+
+    fig.update_yaxes(title_text="Revenue (R$)", row=1, col=1, secondary_y=False)
+    fig.update_yaxes(
+        title_text="Croissance (%)", range=[-100, 100],
+        row=1, col=1, secondary_y=True,
+    )
+    fig.update_yaxes(title_text="Cumul (R$)", row=2, col=1)
+    fig.update_xaxes(title_text="Mois", row=2, col=1)
+    return fig
@@ -6,7 +6,10 @@ from plotly.subplots import make_subplots
 from nicegui import ui
 
 from src.dashboard.components.page_layout import layout
-from src.dashboard.components.sql_viewer import sql_viewer
+from src.dashboard.components.sql_viewer import sql_viewer_async
+from src.dashboard.chart_payload import plotly_arrays
+from src.dashboard.downsample import for_chart
+from src.dashboard.render_cache import section_chart
 from src.dashboard.theme import CHART_COLORS, PLOTLY_TEMPLATE, PRIMARY, SECONDARY
 from src.dashboard.components.insight import insight_block
 
@@ -30,7 +33,7 @@ def content() -> None:
         )
 
     # ── Top 10 produits ────────────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Top 10 categories par chiffre d'affaires",
         description=(
             "<code>CTE</code>, "
@@ -45,7 +48,7 @@ def content() -> None:
     )
 
     # ── CA YoY ─────────────────────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Evolution du CA annee sur annee",
         description=(
             "<code>CTE</code>, "
@@ -56,10 +59,11 @@ def content() -> None:
         sql_file="ca_yoy.sql",
         chart_builder=_build_ca_yoy,
         show_table=True,
+        load="visible",
     )
 
     # ── Panier moyen ───────────────────────────────────────────────────
-    sql_viewer(
+    sql_viewer_async(
         title="Panier moyen mensuel",
         description=(
             "<code>Vue v_monthly_sales</code>, "
@@ -68,6 +72,7 @@ def content() -> None:
         ),
         sql_file="basket_avg.sql",
         chart_builder=_build_basket_avg,
+        load="visible",
     )
 
 
@@ -77,6 +82,22 @@ def _build_top_products(df: pd.DataFrame) -> None:
         ui.label("Aucune donnee disponible.").classes("text-center mt-4")
         return
 
+    ui.plotly(section_chart(_top_products_figure, df)).classes("w-full mt-4")
+
+    # Insight top produits
+    top1 = df.iloc[0]
+    top3_rev = df.head(3)["total_revenue"].sum()
+    top10_rev = df["total_revenue"].sum()
+    pct_top3 = top3_rev * 100 / top10_rev if top10_rev > 0 else 0
+    insight_block(
+        f"La categorie <b>{top1['category_name']}</b> domine avec "
+        f"<b>R$ {top1['total_revenue']:,.0f}</b> de CA. ".replace(",", " ")
+        + f"Les 3 premieres categories concentrent <b>{pct_top3:.0f}%</b> du Top 10, "
+        f"revelant une forte concentration sectorielle."
+    )
+
+
+def _top_products_figure(df: pd.DataFrame) -> go.Figure:
     fig = go.Figure()
     fig.add_trace(
         go.Bar(
@@ -101,20 +122,7 @@ def _build_top_products(df: pd.DataFrame) -> None:
         xaxis_title="Chiffre d'affaires (R$)",
         margin=dict(l=180, r=40, t=30, b=50),
     )
-
-    ui.plotly(fig).classes("w-full mt-4")
-
-    # Insight top produits
-    top1 = df.iloc[0]
-    top3_rev = df.head(3)["total_revenue"].sum()
-    top10_rev = df["total_revenue"].sum()
-    pct_top3 = top3_rev * 100 / top10_rev if top10_rev > 0 else 0
-    insight_block(
-        f"La categorie <b>{top1['category_name']}</b> domine avec "
-        f"<b>R$ {top1['total_revenue']:,.0f}</b> de CA. ".replace(",", " ")
-        + f"Les 3 premieres categories concentrent <b>{pct_top3:.0f}%</b> du Top 10, "
-        f"revelant une forte concentration sectorielle."
-    )
+    return fig
 
 
 def _build_ca_yoy(df: pd.DataFrame) -> None:
@@ -123,6 +131,23 @@ def _build_ca_yoy(df: pd.DataFrame) -> None:
         ui.label("Aucune donnee disponible.").classes("text-center mt-4")
         return
 
+    ui.plotly(section_chart(_ca_yoy_figure, df)).classes("w-full mt-4")
+
+    # Insight CA YoY
+    if len(df) >= 2:
+        best_year = df.loc[df["annual_revenue"].idxmax()]
+        last_yoy = df[df["yoy_growth_pct"].notna()]
+        if not last_yoy.empty:
+            latest = last_yoy.iloc[-1]
+            sign = "+" if latest["yoy_growth_pct"] > 0 else ""
+            insight_block(
+                f"L'annee <b>{int(best_year['year'])}</b> enregistre le CA le plus eleve "
+                f"avec <b>R$ {best_year['annual_revenue'] / 1e6:.1f}M</b>. "
+                f"La derniere croissance YoY est de <b>{sign}{latest['yoy_growth_pct']:.0f}%</b>."
+            )
+
+
+def _ca_yoy_figure(df: pd.DataFrame) -> go.Figure:
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     fig.add_trace(
@@ -162,21 +187,7 @@ def _build_ca_yoy(df: pd.DataFrame) -> None:
     fig.update_yaxes(title_text="CA (R$)", secondary_y=False)
     fig.update_yaxes(title_text="Croissance (%)", secondary_y=True)
     fig.update_xaxes(title_text="Annee")
-
-    ui.plotly(fig).classes("w-full mt-4")
-
-    # Insight CA YoY
-    if len(df) >= 2:
-        best_year = df.loc[df["annual_revenue"].idxmax()]
-        last_yoy = df[df["yoy_growth_pct"].notna()]
-        if not last_yoy.empty:
-            latest = last_yoy.iloc[-1]
-            sign = "+" if latest["yoy_growth_pct"] > 0 else ""
-            insight_block(
-                f"L'annee <b>{int(best_year['year'])}</b> enregistre le CA le plus eleve "
-                f"avec <b>R$ {best_year['annual_revenue'] / 1e6:.1f}M</b>. "
-                f"La derniere croissance YoY est de <b>{sign}{latest['yoy_growth_pct']:.0f}%</b>."
-            )
+    return fig
 
 
 def _build_basket_avg(df: pd.DataFrame) -> None:
@@ -191,11 +202,28 @@ def _build_basket_avg(df: pd.DataFrame) -> None:
         ui.label("Aucune donnee disponible apres filtrage.").classes("text-center mt-4")
         return
 
+    ui.plotly(section_chart(_basket_avg_figure, df)).classes("w-full mt-4")
+
+    # Insight panier moyen
+    if len(df) >= 2:
+        avg_basket_global = df["avg_basket"].mean()
+        best_basket = df.loc[df["avg_basket"].idxmax()]
+        insight_block(
+            f"Le panier moyen global est de <b>R$ {avg_basket_global:.2f}</b>. "
+            f"Le pic est atteint en <b>{best_basket['month_label']}</b> "
+            f"avec <b>R$ {best_basket['avg_basket']:.2f}</b>. "
+            f"Un panier stable traduit une maturite des habitudes d'achat."
+        )
+
+
+def _basket_avg_figure(df: pd.DataFrame) -> go.Figure:
+    plot = for_chart(df, "month_label", "avg_basket")
+    arrays = plotly_arrays(plot, ["month_label", "avg_basket"])
     fig = go.Figure()
     fig.add_trace(
         go.Scatter(
-            x=df["month_label"],
-            y=df["avg_basket"],
+            x=arrays["month_label"],
+            y=arrays["avg_basket"],
             mode="lines+markers",
             line=dict(color=PRIMARY, width=2),
             marker=dict(size=5),
@@ -214,16 +242,4 @@ def _build_basket_avg(df: pd.DataFrame) -> None:
         yaxis_title="Panier moyen (R$)",
         showlegend=False,
     )
-
-    ui.plotly(fig).classes("w-full mt-4")
-
-    # Insight panier moyen
-    if len(df) >= 2:
-        avg_basket_global = df["avg_basket"].mean()
-        best_basket = df.loc[df["avg_basket"].idxmax()]
-        insight_block(
-            f"Le panier moyen global est de <b>R$ {avg_basket_global:.2f}</b>. "
-            f"Le pic est atteint en <b>{best_basket['month_label']}</b> "
-            f"avec <b>R$ {best_basket['avg_basket']:.2f}</b>. "
-            f"Un panier stable traduit une maturite des habitudes d'achat."
-        )
+    return fig
@@ -0,0 +1,111 @@
+"""Benchmark des profils de connexion : exécuter le corpus sql/dashboard sous chaque profil.
+
+Usage : python -m src.dashboard.profile_benchmark --profiles baseline,cached,immutable
+"""
+
+import logging
+import time
+from pathlib import Path
+
+import click
+import pandas as pd
+
+from src.config import DATABASE_PATH
+from src.dashboard.db import CONNECTION_PROFILES, ConnectionProfile, open_profiled_connection
+from src.etl.layout_benchmark import time_sql_corpus
+
+logger = logging.getLogger(__name__)
+
+
+def _profile_connector(profile: ConnectionProfile):
+    """Connexion de mesure ouverte comme le pool du dashboard, prefetch compris."""
+
+    def connect(db_path: Path):
+        return open_profiled_connection(db_path, profile)
+
+    return connect
+
+
+def benchmark_profiles(
+    profile_names: list[str],
+    db_path: Path = DATABASE_PATH,
+    iterations: int = 5,
+    warmup: int = 1,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Retourner (temps médians par fichier x profil, coût d'ouverture et premier passage)."""
+    rows = []
+    setup = {}
+    for name in profile_names:
+        profile = CONNECTION_PROFILES[name]
+        connect = _profile_connector(profile)
+
+        # Premier passage sur une connexion neuve : cache SQLite vide.
+        start = time.perf_counter()
+        first = time_sql_corpus(db_path, iterations=1, warmup=0, connect=connect)
+        first_ms = (time.perf_counter() - start) * 1000
+
+        for result in time_sql_corpus(db_path, iterations=iterations, warmup=warmup, connect=connect):
+            rows.append({"profile": name, **result})
+        setup[name] = {
+            "first_pass_ms": round(first_ms, 2),
+            "first_pass_queries_ms": round(sum(r["median_ms"] for r in first), 2),
+            "immutable": profile.immutable,
+            "prefetch": profile.prefetch,
+        }
+
+    timings = pd.DataFrame(rows).pivot(index="sql_file", columns="profile", values="median_ms")
+    timings = timings[profile_names]
+    timings.loc["TOTAL"] = timings.sum()
+    return timings, pd.DataFrame.from_dict(setup, orient="index")
+
+
+@click.command()
+@click.option(
+    "--profiles",
+    default=",".join(CONNECTION_PROFILES),
+    show_default=True,
+    help="Profils à comparer, séparés par des virgules",
+)
+@click.option("--iterations", type=int, default=5, show_default=True)
+@click.option("--warmup", type=int, default=1, show_default=True)
+@click.option(
+    "--database",
+    type=click.Path(dir_okay=False, exists=True, path_type=Path),
+    default=DATABASE_PATH,
+    show_default=True,
+    help="Entrepôt à mesurer",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Exporter les temps médians en CSV",
+)
+def main(profiles: str, iterations: int, warmup: int, database: Path, output: Path | None) -> None:
+    """Comparer le corpus sql/dashboard sous chaque profil de connexion."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(name)s | %(message)s")
+
+    profile_names = [name.strip().lower() for name in profiles.split(",") if name.strip()]
+    unknown = set(profile_names) - set(CONNECTION_PROFILES)
+    if unknown:
+        raise click.BadParameter(
+            f"profils inconnus : {sorted(unknown)} (disponibles : {sorted(CONNECTION_PROFILES)})",
+            param_hint="--profiles",
+        )
+
+    timings, setup = benchmark_profiles(
+        profile_names, db_path=database, iterations=iterations, warmup=warmup
+    )
+
+    click.echo("\n== Ouverture et premier passage ==")
+    click.echo(setup.to_string())
+    click.echo("\n== Temps médian par requête (ms) ==")
+    click.echo(timings.to_string())
+
+    if output is not None:
+        timings.to_csv(output)
+        click.echo(f"\nRésultats exportés dans {output}")
+
+
+if __name__ == "__main__":
+    main()
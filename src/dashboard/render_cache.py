@@ -0,0 +1,211 @@
+"""Cache de rendu des sections : figures Plotly et options ECharts prêtes à envoyer.
+
+Les résultats de requêtes sont en cache (``db``), mais chaque visite
+reconstruisait les figures (``make_subplots``, ``update_layout``,
+``to_plotly_json``). Un builder isole la construction de sa figure dans une
+fonction ``build(df)`` et l'appelle via ``section_chart(build, df)`` ; le
+rendu est gardé pour les entrées déclarées :
+
+- la section : fichier SQL, empreinte de l'entrepôt et filtres, posés par
+  ``sql_viewer`` (``section_inputs``). Hors section, l'empreinte du résultat
+  (``frame_hash``) ;
+- le thème des graphiques (template Plotly, thème ECharts, palette) ;
+- ``build`` lui-même et ``key`` (toute autre entrée du builder) ;
+- la résolution : un rendu dont ``for_chart`` n'a réduit aucune série sert
+  toutes les largeurs où ses séries tiennent, sinon il vaut pour la largeur
+  mesurée (en points tracés).
+
+Le rendu est partagé entre clients et visites : ne pas le modifier. Une
+nouvelle empreinte de l'entrepôt (rechargement ETL) vide le cache.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.dashboard import theme
+from src.dashboard.chart_payload import frame_hash
+from src.dashboard.downsample import ChartResolution, current_resolution
+from src.dashboard.filters import DashboardFilters
+
+_ENTRIES_DEFAULT = 128
+
+
+def get_render_cache_entries() -> int:
+    """Nombre de rendus gardés (DASHBOARD_RENDER_CACHE_ENTRIES, 0 = désactivé)."""
+    raw = os.getenv("DASHBOARD_RENDER_CACHE_ENTRIES")
+    if raw is None or not raw.strip():
+        return _ENTRIES_DEFAULT
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_RENDER_CACHE_ENTRIES invalide : '{raw}'") from exc
+    if value < 0:
+        raise ValueError(f"DASHBOARD_RENDER_CACHE_ENTRIES invalide : '{raw}'")
+    return value
+
+
+@dataclass(frozen=True)
+class SectionInputs:
+    """Entrées d'une section ``sql_viewer`` : ce qui détermine son résultat."""
+
+    sql_file: str
+    data_version: str
+    filters: DashboardFilters | None = None
+
+
+_section: ContextVar[SectionInputs | None] = ContextVar("section_inputs", default=None)
+
+
+@contextmanager
+def section_inputs(inputs: SectionInputs | None) -> Iterator[SectionInputs | None]:
+    """Section courante pour ``section_chart`` pendant l'appel d'un builder."""
+    token = _section.set(inputs)
+    try:
+        yield inputs
+    finally:
+        _section.reset(token)
+
+
+def current_section_inputs() -> SectionInputs | None:
+    return _section.get()
+
+
+@dataclass(frozen=True)
+class _Rendered:
+    value: object
+    reduced: tuple[tuple[int, int], ...]
+    longest: int  # plus longue série passée à for_chart (0 : aucune)
+
+
+@dataclass
+class RenderCacheStats:
+    entries: int
+    hits: int
+    misses: int
+
+
+class RenderCache:
+    """Cache LRU des rendus, vidé quand l'empreinte de l'entrepôt change."""
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = get_render_cache_entries() if max_entries is None else max_entries
+        self._entries: OrderedDict[tuple, _Rendered] = OrderedDict()
+        self._lock = threading.Lock()
+        self._data_version: str | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def observe(self, data_version: str) -> None:
+        """Vide le cache si ``data_version`` diffère de la dernière empreinte vue."""
+        with self._lock:
+            if data_version != self._data_version:
+                self._entries.clear()
+                self._data_version = data_version
+
+    def lookup(self, base: tuple, resolution: ChartResolution) -> _Rendered | None:
+        """Rendu valable à ``resolution`` : non réduit si ses séries tiennent, sinon à cette largeur."""
+        with self._lock:
+            unreduced = self._entries.get((*base, None))
+            if unreduced is not None and (
+                resolution.full or unreduced.longest <= resolution.target_points
+            ):
+                self._entries.move_to_end((*base, None))
+                self.hits += 1
+                return unreduced
+            sized = None if resolution.full else self._entries.get((*base, resolution.target_points))
+            if sized is not None:
+                self._entries.move_to_end((*base, resolution.target_points))
+                self.hits += 1
+                return sized
+            self.misses += 1
+            return None
+
+    def store(self, base: tuple, resolution: ChartResolution, rendered: _Rendered) -> None:
+        if self.max_entries <= 0:
+            return
+        slot = resolution.target_points if rendered.reduced else None
+        with self._lock:
+            self._entries[(*base, slot)] = rendered
+            self._entries.move_to_end((*base, slot))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> RenderCacheStats:
+        with self._lock:
+            return RenderCacheStats(len(self._entries), self.hits, self.misses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._data_version = None
+            self.hits = self.misses = 0
+
+
+_cache = RenderCache()
+
+
+def render_cache() -> RenderCache:
+    return _cache
+
+
+def _theme_key() -> tuple:
+    return (
+        theme.PLOTLY_TEMPLATE,
+        theme.ECHARTS_THEME,
+        *theme.CHART_COLORS,
+        theme.PRIMARY,
+        theme.SECONDARY,
+        theme.ACCENT,
+    )
+
+
+def _serialize(value):
+    """Figure Plotly -> dict JSON ; un tuple est sérialisé élément par élément."""
+    if isinstance(value, tuple):
+        return tuple(_serialize(item) for item in value)
+    to_json = getattr(value, "to_plotly_json", None)
+    return to_json() if callable(to_json) else value
+
+
+def section_chart(
+    build: Callable[[pd.DataFrame], object],
+    df: pd.DataFrame,
+    key: Hashable = (),
+):
+    """Rendu de ``build(df)`` : figure Plotly en dict, options ECharts, ou tuple de ceux-ci.
+
+    ``build`` ne doit dépendre que de ``df``, du thème et de ``key`` ; ses
+    appels à ``for_chart`` sont rejoués sur la résolution courante lors d'un
+    succès (le bouton « Pleine resolution » de ``sql_viewer`` en dépend).
+    """
+    inputs = current_section_inputs()
+    if inputs is None:
+        data_key = ("frame", frame_hash(df))
+    else:
+        _cache.observe(inputs.data_version)
+        data_key = ("section", inputs.sql_file, inputs.data_version, inputs.filters)
+    base = (data_key, _theme_key(), build.__module__, build.__qualname__, key)
+    resolution = current_resolution()
+
+    rendered = _cache.lookup(base, resolution)
+    if rendered is None:
+        first_reduced, first_series = len(resolution.reduced), len(resolution.series)
+        value = _serialize(build(df))
+        rendered = _Rendered(
+            value,
+            tuple(resolution.reduced[first_reduced:]),
+            max(resolution.series[first_series:], default=0),
+        )
+        _cache.store(base, resolution, rendered)
+    else:
+        resolution.reduced.extend(rendered.reduced)
+        if rendered.longest:
+            resolution.series.append(rendered.longest)
+    return rendered.value
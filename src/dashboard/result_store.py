@@ -0,0 +1,476 @@
+"""Cache de résultats persistant : DataFrames sérialisés en colonnes, relus par mmap.
+
+Chaque entrée est un fichier ``<empreinte>_<clé>.col`` :
+
+- un en-tête JSON (colonnes, types, positions des buffers) ;
+- un buffer aligné par colonne. Les colonnes numériques, booléennes et
+  datetime sont relues via ``mmap`` sans copie ; les chaînes sont
+  stockées en UTF-8 concaténé + offsets (à la Arrow) et décodées à la lecture.
+
+L'empreinte de l'entrepôt fait partie du nom : un rechargement ETL rend les
+anciennes entrées inatteignables, elles sont évincées en priorité. Le
+répertoire est borné en taille (LRU sur la dernière lecture, via mtime) et
+en âge (compté depuis l'écriture, champ ``created`` de l'en-tête). Une écriture ne parcourt pas le
+répertoire : la taille est suivie en mémoire et l'éviction (avec son
+parcours) ne part qu'au dépassement du budget, ou toutes les
+``_RESCAN_PUTS`` écritures pour prendre en compte les autres processus et
+les entrées expirées.
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import PROCESSED_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+_MAGIC = b"OLRC1\n"
+_ALIGN = 64
+_SUFFIX = ".col"
+# Attente d'un calcul en cours dans un autre worker : sondage non bloquant,
+# de _LOCK_POLL_S à _LOCK_POLL_MAX_S, au plus _LOCK_WAIT_S par défaut.
+_LOCK_POLL_S = 0.01
+_LOCK_POLL_MAX_S = 0.1
+_LOCK_WAIT_S = 30.0
+_RESCAN_PUTS = 256
+
+_DISK_CACHE_MB_DEFAULT = 512
+_DISK_CACHE_MAX_AGE_H_DEFAULT = 7 * 24
+
+
+def get_disk_cache_dir() -> Path:
+    """Répertoire du cache persistant (DASHBOARD_DISK_CACHE_DIR)."""
+    raw = os.getenv("DASHBOARD_DISK_CACHE_DIR")
+    if raw is None or not raw.strip():
+        return PROCESSED_DIR / "cache"
+    return Path(raw)
+
+
+def get_disk_cache_bytes() -> int:
+    """Taille maximale du cache persistant, en octets (DASHBOARD_DISK_CACHE_MB, 0 = désactivé)."""
+    raw = os.getenv("DASHBOARD_DISK_CACHE_MB")
+    if raw is None or not raw.strip():
+        return _DISK_CACHE_MB_DEFAULT * 1024 * 1024
+    try:
+        megabytes = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_DISK_CACHE_MB invalide : '{raw}'") from exc
+    if megabytes < 0:
+        raise ValueError(f"DASHBOARD_DISK_CACHE_MB invalide : '{raw}'")
+    return int(megabytes * 1024 * 1024)
+
+
+def get_disk_cache_max_age() -> float:
+    """Âge maximal d'une entrée depuis son écriture, en secondes (DASHBOARD_DISK_CACHE_MAX_AGE_H)."""
+    raw = os.getenv("DASHBOARD_DISK_CACHE_MAX_AGE_H")
+    if raw is None or not raw.strip():
+        return _DISK_CACHE_MAX_AGE_H_DEFAULT * 3600.0
+    try:
+        hours = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_DISK_CACHE_MAX_AGE_H invalide : '{raw}'") from exc
+    if hours <= 0:
+        raise ValueError(f"DASHBOARD_DISK_CACHE_MAX_AGE_H invalide : '{raw}'")
+    return hours * 3600.0
+
+
+# ── Format colonnes ──────────────────────────────────────────────────────
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Colonne de chaînes (et de valeurs nulles) uniquement."""
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return True
+    if series.dtype != object:
+        return False
+    return all(value is None or isinstance(value, str) for value in series.array)
+
+
+def _encode_column(series: pd.Series) -> tuple[dict, list[np.ndarray]] | None:
+    """Buffers d'une colonne, ou None si son type n'est pas pris en charge."""
+    if series.dtype.kind in "biufmM" and isinstance(series.dtype, np.dtype):
+        return {"kind": "numpy", "dtype": series.dtype.str}, [series.to_numpy()]
+    if not _is_text(series):
+        return None
+    mask = series.isna().to_numpy()
+    encoded = [b"" if null else value.encode("utf-8") for value, null in zip(series.array, mask)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return {"kind": "text", "dtype": str(series.dtype)}, [offsets, data, mask.astype(np.uint8)]
+
+
+def _decode_text(offsets: np.ndarray, data: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    raw = data.tobytes()
+    values = np.empty(len(mask), dtype=object)
+    bounds = offsets.tolist()
+    for i, null in enumerate(mask.tolist()):
+        values[i] = None if null else raw[bounds[i]:bounds[i + 1]].decode("utf-8")
+    return values
+
+
+def write_frame(path: Path, df: pd.DataFrame, meta: dict) -> bool:
+    """Sérialise ``df`` dans ``path`` (écriture atomique) ; False si non sérialisable."""
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        return False
+    columns: list[dict] = []
+    buffers: list[np.ndarray] = []
+    for position in range(df.shape[1]):
+        encoded = _encode_column(df.iloc[:, position])
+        if encoded is None:
+            return False
+        spec, arrays = encoded
+        spec["name"] = str(df.columns[position])
+        spec["buffers"] = []
+        for array in arrays:
+            spec["buffers"].append({"dtype": array.dtype.str, "length": len(array)})
+            buffers.append(np.ascontiguousarray(array))
+        columns.append(spec)
+
+    header = {**meta, "rows": len(df), "columns": columns}
+    # Les offsets dépendent de la taille de l'en-tête, qui les contient :
+    # on recalcule jusqu'à ce que le premier buffer ne bouge plus.
+    start = -1
+    while True:
+        header_bytes = json.dumps(header).encode("utf-8")
+        offset = _aligned(len(_MAGIC) + 8 + len(header_bytes))
+        if offset == start:
+            break
+        start = offset
+        index = 0
+        for spec in columns:
+            for buffer_spec in spec["buffers"]:
+                buffer_spec["offset"] = offset
+                offset = _aligned(offset + buffers[index].nbytes)
+                index += 1
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_MAGIC)
+            handle.write(struct.pack("<Q", len(header_bytes)))
+            handle.write(header_bytes)
+            index = 0
+            for spec in columns:
+                for buffer_spec in spec["buffers"]:
+                    handle.seek(buffer_spec["offset"])
+                    handle.write(buffers[index].tobytes())
+                    index += 1
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def read_header(path: Path) -> dict:
+    with open(path, "rb") as handle:
+        if handle.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"Entrée de cache invalide : {path.name}")
+        (length,) = struct.unpack("<Q", handle.read(8))
+        return json.loads(handle.read(length))
+
+
+def read_frame(path: Path, header: dict | None = None) -> pd.DataFrame:
+    """Relit un DataFrame ; les colonnes numériques restent adossées au fichier (mmap)."""
+    header = read_header(path) if header is None else header
+    with open(path, "rb") as handle:
+        # Les tableaux gardent une référence sur le mapping : il survit au fichier fermé.
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    data = {}
+    for position, spec in enumerate(header["columns"]):
+        arrays = [
+            np.frombuffer(mapped, dtype=np.dtype(b["dtype"]), count=b["length"], offset=b["offset"])
+            if b["length"]
+            else np.empty(0, dtype=np.dtype(b["dtype"]))
+            for b in spec["buffers"]
+        ]
+        if spec["kind"] == "numpy":
+            data[position] = pd.Series(arrays[0], copy=False)
+        else:
+            # dtype explicite : sous pandas 3, object serait sinon inféré en str.
+            data[position] = pd.Series(_decode_text(*arrays), dtype=spec["dtype"])
+    df = pd.DataFrame(data, copy=False)
+    df.columns = [spec["name"] for spec in header["columns"]]
+    return df
+
+
+# ── Verrous inter-processus ──────────────────────────────────────────────
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Verrou exclusif ``flock`` sur ``path``, entre processus comme entre threads.
+
+    Chaque appel ouvre son propre descripteur : deux threads d'un même
+    processus s'excluent aussi. Sans ``fcntl`` (Windows) ou sans droit
+    d'écriture sur le répertoire, pas de verrou.
+    """
+    try:
+        if fcntl is None:
+            raise OSError("fcntl indisponible")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(path, "a+b")
+    except OSError:
+        yield
+        return
+    with handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _acquire_entry_lock(path: Path, timeout_s: float):
+    """Descripteur verrouillé sur ``path``, ou None après ``timeout_s`` (ou sans ``fcntl``).
+
+    Le détenteur supprime le fichier en le libérant : après avoir obtenu le
+    verrou, on vérifie qu'il porte toujours sur le fichier en place.
+    """
+    if fcntl is None:
+        return None
+    deadline = time.monotonic() + timeout_s
+    delay = _LOCK_POLL_S
+    while True:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(path, "a+b")
+        except OSError:
+            return None
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            if time.monotonic() + delay > deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, _LOCK_POLL_MAX_S)
+            continue
+        except OSError:
+            handle.close()
+            return None
+        try:
+            current = os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino
+        except OSError:
+            current = False
+        if current:
+            return handle
+        # Fichier supprimé par le détenteur précédent entre open et flock.
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+
+
+def _release_entry_lock(handle) -> None:
+    try:
+        os.unlink(handle.name)
+    except OSError:
+        pass
+    fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+
+
+# ── Store ────────────────────────────────────────────────────────────────
+
+
+def _created(path: Path, stat: os.stat_result) -> float:
+    """Date d'écriture d'une entrée (en-tête) ; mtime si l'en-tête est illisible."""
+    try:
+        return float(read_header(path)["created"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return stat.st_mtime
+
+
+@dataclass(frozen=True)
+class DiskCacheStats:
+    """Compteurs du cache persistant."""
+
+    hits: int
+    misses: int
+    writes: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class DiskResultStore:
+    """Répertoire d'entrées ``.col`` borné en taille (LRU par mtime) et en âge."""
+
+    def __init__(self, root: Path, max_bytes: int, max_age_s: float):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        # Taille du répertoire vue par ce processus (None : pas encore parcouru).
+        self._size: int | None = None
+        self._puts_since_scan = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, fingerprint: str, key: str) -> Path:
+        return self.root / f"{fingerprint}_{key}{_SUFFIX}"
+
+    @contextmanager
+    def compute_lock(
+        self, fingerprint: str, key: str, timeout_s: float = _LOCK_WAIT_S
+    ) -> Iterator[bool]:
+        """Un seul calcul à la fois par entrée, tous processus confondus.
+
+        Un fichier de verrou par entrée : deux requêtes différentes ne
+        s'attendent jamais. L'attente est bornée par ``timeout_s`` ; au-delà
+        (ou sans ``fcntl``), le bloc s'exécute sans verrou et reçoit False.
+        """
+        handle = _acquire_entry_lock(self.root / "locks" / f"{fingerprint}_{key}.lock", timeout_s)
+        try:
+            yield handle is not None
+        finally:
+            if handle is not None:
+                _release_entry_lock(handle)
+
+    def get(self, fingerprint: str, key: str, count_miss: bool = True) -> pd.DataFrame | None:
+        path = self._path(fingerprint, key)
+        try:
+            header = read_header(path)
+            # L'âge part de l'écriture (``created``), pas de la dernière lecture.
+            if time.time() - header["created"] > self.max_age_s:
+                raise FileNotFoundError(path)
+            df = read_frame(path, header)
+            # mtime sert d'horodatage LRU pour l'éviction.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            if count_miss:
+                with self._lock:
+                    self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return df
+
+    def put(self, fingerprint: str, key: str, df: pd.DataFrame, sql: str = "") -> None:
+        path = self._path(fingerprint, key)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        try:
+            written = write_frame(
+                path, df, {"fingerprint": fingerprint, "sql": sql, "created": time.time()}
+            )
+            size = path.stat().st_size if written else 0
+        except OSError:
+            return
+        if not written:
+            return
+        with self._lock:
+            self._writes += 1
+            self._puts_since_scan += 1
+            if self._size is not None:
+                self._size += size - replaced
+            due = (
+                self._size is None
+                or self._size > self.max_bytes
+                or self._puts_since_scan >= _RESCAN_PUTS
+            )
+        if due:
+            self.evict(fingerprint)
+
+    def _scan(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        try:
+            candidates = list(self.root.glob(f"*{_SUFFIX}"))
+        except OSError:
+            return entries
+        for path in candidates:
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def evict(self, current_fingerprint: str = "") -> int:
+        """Supprime les entrées expirées, puis les plus anciennes au-delà du budget.
+
+        Les entrées d'une autre empreinte (entrepôt rechargé) partent en premier.
+        """
+        now = time.time()
+        entries = self._scan()
+        removed = 0
+        kept = []
+        for path, stat in entries:
+            if now - _created(path, stat) > self.max_age_s:
+                removed += self._unlink(path)
+            else:
+                kept.append((path, stat))
+        size = sum(stat.st_size for _, stat in kept)
+        kept.sort(
+            key=lambda item: (
+                item[0].name.startswith(f"{current_fingerprint}_"),
+                item[1].st_mtime,
+            )
+        )
+        for path, stat in kept:
+            if size <= self.max_bytes:
+                break
+            removed += self._unlink(path)
+            size -= stat.st_size
+        with self._lock:
+            self._size = size
+            self._puts_since_scan = 0
+        return removed
+
+    def _unlink(self, path: Path) -> int:
+        # Entrée absente, protégée ou encore mappée (Windows) : ignorée, la
+        # requête qui a déclenché l'éviction n'échoue pas pour autant.
+        try:
+            path.unlink()
+        except OSError:
+            return 0
+        with self._lock:
+            self._evictions += 1
+        return 1
+
+    def clear(self) -> None:
+        for path, _ in self._scan():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._size = None
+
+    def stats(self) -> DiskCacheStats:
+        entries = self._scan()
+        with self._lock:
+            return DiskCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                writes=self._writes,
+                evictions=self._evictions,
+                entries=len(entries),
+                size_bytes=sum(stat.st_size for _, stat in entries),
+                max_bytes=self.max_bytes,
+            )
@@ -0,0 +1,167 @@
+"""Journal des requêtes lentes : une ligne JSON par requête au-delà du seuil.
+
+Chaque entrée garde le SQL, les paramètres, la durée, le nombre de lignes,
+l'origine (page ou composant appelant) et le plan ``EXPLAIN QUERY PLAN``,
+texte et étapes analysées par ``explain_visualizer.parse_explain``. Le
+fichier tourne à taille fixe (``RotatingFileHandler``) ; la page
+Optimisation le relit pour repérer les SCAN et les B-trees temporaires
+introduits par un nouveau fichier .sql.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.config import PROCESSED_DIR
+
+_SLOW_QUERY_MS_DEFAULT = 500.0
+_SLOW_LOG_MB_DEFAULT = 5.0
+_BACKUP_COUNT = 3
+
+
+def get_slow_query_threshold() -> float:
+    """Seuil du journal, en secondes (DASHBOARD_SLOW_QUERY_MS, 0 = désactivé)."""
+    raw = os.getenv("DASHBOARD_SLOW_QUERY_MS")
+    if raw is None or not raw.strip():
+        return _SLOW_QUERY_MS_DEFAULT / 1000
+    try:
+        milliseconds = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_SLOW_QUERY_MS invalide : '{raw}'") from exc
+    if milliseconds < 0:
+        raise ValueError(f"DASHBOARD_SLOW_QUERY_MS invalide : '{raw}'")
+    return milliseconds / 1000
+
+
+def get_slow_log_path() -> Path:
+    """Fichier du journal (DASHBOARD_SLOW_LOG_PATH)."""
+    raw = os.getenv("DASHBOARD_SLOW_LOG_PATH")
+    if raw is None or not raw.strip():
+        return PROCESSED_DIR / "logs" / "slow_queries.jsonl"
+    return Path(raw)
+
+
+def get_slow_log_bytes() -> int:
+    """Taille d'un fichier avant rotation, en octets (DASHBOARD_SLOW_LOG_MB)."""
+    raw = os.getenv("DASHBOARD_SLOW_LOG_MB")
+    if raw is None or not raw.strip():
+        return int(_SLOW_LOG_MB_DEFAULT * 1024 * 1024)
+    try:
+        megabytes = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_SLOW_LOG_MB invalide : '{raw}'") from exc
+    if megabytes <= 0:
+        raise ValueError(f"DASHBOARD_SLOW_LOG_MB invalide : '{raw}'")
+    return int(megabytes * 1024 * 1024)
+
+
+def _json_safe(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return f"<{len(value)} octets>"
+    return repr(value)
+
+
+@dataclass
+class SlowQuery:
+    """Entrée du journal."""
+
+    query: str
+    sql: str
+    duration_ms: float
+    rows: int
+    origin: str = ""
+    params: list | dict = field(default_factory=list)
+    source: str = "sqlite"
+    error: str = ""
+    plan: str = ""
+    steps: list[dict] = field(default_factory=list)
+    at: float = field(default_factory=time.time)
+
+    @property
+    def scans(self) -> int:
+        return sum(1 for step in self.steps if step.get("type") == "scan")
+
+    @property
+    def temp_btrees(self) -> int:
+        return sum(1 for step in self.steps if step.get("type") == "temp_btree")
+
+    def to_json(self) -> str:
+        entry = asdict(self)
+        if isinstance(self.params, dict):
+            entry["params"] = {key: _json_safe(value) for key, value in self.params.items()}
+        else:
+            entry["params"] = [_json_safe(value) for value in self.params]
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SlowQueryLog:
+    """Fichier JSON lines à rotation ; ouvert à la première entrée."""
+
+    def __init__(self, path: Path, threshold_s: float, max_bytes: int, backups: int = _BACKUP_COUNT):
+        self.path = Path(path)
+        self.threshold_s = threshold_s
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler: logging.handlers.RotatingFileHandler | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_s > 0
+
+    def is_slow(self, duration_s: float) -> bool:
+        return self.enabled and duration_s >= self.threshold_s
+
+    def append(self, entry: SlowQuery) -> None:
+        record = logging.makeLogRecord({"msg": entry.to_json(), "levelno": logging.WARNING})
+        with self._lock:
+            if self._handler is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handler = logging.handlers.RotatingFileHandler(
+                    self.path,
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backups,
+                    encoding="utf-8",
+                    delay=True,
+                )
+            self._handler.handle(record)
+            self._handler.flush()
+
+    def _files(self) -> list[Path]:
+        """Fichier courant puis rotations, du plus récent au plus ancien."""
+        candidates = [self.path] + [
+            self.path.with_name(f"{self.path.name}.{i}") for i in range(1, self.backups + 1)
+        ]
+        return [path for path in candidates if path.exists()]
+
+    def entries(self, limit: int = 200) -> list[SlowQuery]:
+        """Dernières entrées, la plus récente en tête ; les lignes illisibles sont ignorées."""
+        found: list[SlowQuery] = []
+        for path in self._files():
+            try:
+                lines = path.read_text(encoding="utf-8").splitlines()
+            except OSError:
+                continue
+            for line in reversed(lines):
+                try:
+                    found.append(SlowQuery(**json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._handler is not None:
+                self._handler.close()
+                self._handler = None
+            for path in self._files():
+                path.unlink(missing_ok=True)
@@ -0,0 +1,297 @@
+"""Rapport de démarrage : temps d'import (``python -X importtime``) et premier octet.
+
+Usage : python -m src.dashboard.startup_report --output startup.json --baseline old.json
+
+Deux mesures, dans des processus neufs (rien en cache ``sys.modules``) :
+
+- imports du démarrage : ``python -X importtime`` sur ce que fait
+  ``main.run`` avant ``ui.run`` (import de ``main`` et pose des relais de
+  pages). Meilleur de ``--runs`` essais ; total, temps par paquet et
+  modules les plus coûteux ;
+- premier octet : le dashboard est lancé sur un port libre, on note quand il
+  accepte une connexion puis la durée de la première et de la deuxième
+  requête de chaque ``--page`` (la première importe le module de la page).
+
+``--baseline`` compare avec le rapport JSON d'une version précédente et
+sort en erreur (code 1) si le total d'import, un paquet ou le délai
+d'écoute régresse de plus de ``--max-regression`` %, ou si un paquet lourd
+apparaît au démarrage (ex. pandas importé en tête d'un module de ``main``).
+"""
+
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import click
+import httpx
+
+from src.config import PROJECT_ROOT
+
+STARTUP_CODE = (
+    "import src.dashboard.main as main; import src.dashboard.workers as workers; "
+    "workers.get_dashboard_workers(); main.register_pages()"
+)
+
+# Écarts ignorés (bruit de mesure) en dessous de ce seuil absolu.
+_MIN_DELTA_MS = 50.0
+# Mesures qui font échouer la comparaison (les requêtes de page dépendent des
+# caches de résultats et du pré-calcul en cours : affichées seulement).
+_GATED = ("imports", "paquet", "écoute")
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    """Une ligne de ``-X importtime`` (durées en microsecondes)."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTime]:
+    """Lignes ``import time: self | cumulative | module`` de la sortie d'erreur."""
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append(ImportTime(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def measure_imports(code: str = STARTUP_CODE, runs: int = 3) -> list[ImportTime]:
+    """Imports de ``code`` dans un interpréteur neuf ; garde l'essai le plus rapide."""
+    best: list[ImportTime] | None = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        imports = parse_importtime(completed.stderr)
+        if best is None or _total_us(imports) < _total_us(best):
+            best = imports
+    return best or []
+
+
+def _total_us(imports: list[ImportTime]) -> int:
+    return sum(item.self_us for item in imports)
+
+
+def _package(name: str) -> str:
+    """Paquet de rattachement : premier niveau, sauf ``src`` détaillé jusqu'au module."""
+    parts = name.split(".")
+    return ".".join(parts[:3]) if parts[0] == "src" else parts[0]
+
+
+def summarize_imports(imports: list[ImportTime], top: int = 25) -> dict:
+    """Total, temps propre par paquet et modules au temps cumulé le plus élevé."""
+    packages: dict[str, float] = {}
+    for item in imports:
+        key = _package(item.name)
+        packages[key] = packages.get(key, 0.0) + item.self_us / 1000
+    slowest = sorted(imports, key=lambda item: item.cumulative_us, reverse=True)[:top]
+    return {
+        "total_ms": round(_total_us(imports) / 1000, 1),
+        "modules": len(imports),
+        "packages": {key: round(ms, 1) for key, ms in sorted(packages.items())},
+        "top": [
+            {
+                "name": item.name,
+                "self_ms": round(item.self_us / 1000, 1),
+                "cumulative_ms": round(item.cumulative_us / 1000, 1),
+            }
+            for item in slowest
+        ],
+    }
+
+
+# ── Premier octet ────────────────────────────────────────────────────────
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def measure_ttfb(pages: list[str], timeout_s: float = 60.0) -> dict:
+    """Lance le dashboard et mesure (ms) l'écoute puis deux requêtes par page."""
+    port = _free_port()
+    env = {**os.environ, "DASHBOARD_PORT": str(port), "DASHBOARD_SHOW_BROWSER": "0", "DASHBOARD_WORKERS": "1"}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.dashboard"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout_s
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Le dashboard s'est arrêté (code {process.returncode})")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Dashboard injoignable sur le port {port} après {timeout_s:.0f} s")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        result: dict = {"listen_ms": round((time.perf_counter() - start) * 1000, 1), "pages": {}}
+
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout_s) as client:
+            for page in pages:
+                durations = []
+                for _ in range(2):
+                    sent = time.perf_counter()
+                    client.get(page).raise_for_status()
+                    durations.append(round((time.perf_counter() - sent) * 1000, 1))
+                result["pages"][page] = {"first_ms": durations[0], "second_ms": durations[1]}
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ── Rapport ──────────────────────────────────────────────────────────────
+
+
+def build_report(imports: list[ImportTime], ttfb: dict | None, meta: dict, top: int = 25) -> dict:
+    """Rapport JSON (diffable) du démarrage."""
+    return {
+        "meta": {**meta, "python": platform.python_version()},
+        "imports": summarize_imports(imports, top),
+        "ttfb": ttfb,
+    }
+
+
+def format_report(report: dict) -> str:
+    """Texte du rapport : total, paquets les plus lourds, premier octet."""
+    imports = report["imports"]
+    lines = [f"Imports au démarrage : {imports['total_ms']:.0f} ms ({imports['modules']} modules)", ""]
+    lines.append(f"{'paquet':<40} {'ms':>8}")
+    heaviest = sorted(imports["packages"].items(), key=lambda item: item[1], reverse=True)[:15]
+    lines += [f"{name[:40]:<40} {ms:>8.1f}" for name, ms in heaviest]
+    lines += ["", f"{'module (cumulé)':<56} {'propre':>8} {'cumulé':>8}"]
+    lines += [
+        f"{item['name'][:56]:<56} {item['self_ms']:>8.1f} {item['cumulative_ms']:>8.1f}"
+        for item in imports["top"]
+    ]
+    ttfb = report.get("ttfb")
+    if ttfb:
+        lines += ["", f"Écoute : {ttfb['listen_ms']:.0f} ms", f"{'page':<40} {'1re':>8} {'2e':>8}"]
+        lines += [
+            f"{page[:40]:<40} {times['first_ms']:>8.0f} {times['second_ms']:>8.0f}"
+            for page, times in ttfb["pages"].items()
+        ]
+    return "\n".join(lines)
+
+
+def _metrics(report: dict) -> dict[str, float]:
+    """Mesures comparées d'un rapport à l'autre (ms)."""
+    metrics = {"imports total": report["imports"]["total_ms"]}
+    metrics.update({f"paquet {name}": ms for name, ms in report["imports"]["packages"].items()})
+    ttfb = report.get("ttfb")
+    if ttfb:
+        metrics["écoute"] = ttfb["listen_ms"]
+        metrics.update({f"1re requête {page}": times["first_ms"] for page, times in ttfb["pages"].items()})
+    return metrics
+
+
+def compare_reports(baseline: dict, current: dict, max_regression_pct: float = 20.0) -> tuple[str, list[str]]:
+    """Tableau des écarts et liste des régressions au-delà de ``max_regression_pct``.
+
+    Un écart de moins de ``_MIN_DELTA_MS`` n'est jamais une régression (bruit) ;
+    un paquet absent du rapport de référence en est une dès ce seuil. Les
+    paquets dont l'écart reste sous ce seuil ne sont pas listés.
+    """
+    before, after = _metrics(baseline), _metrics(current)
+    header = f"{'mesure':<48} {'avant':>8} {'après':>8} {'écart':>8}"
+    lines, regressions = [header, "-" * len(header)], []
+    for name in sorted(set(before) | set(after), key=lambda key: (key.startswith("paquet"), key)):
+        old, new = before.get(name), after.get(name)
+        if name.startswith("paquet") and abs((new or 0.0) - (old or 0.0)) < _MIN_DELTA_MS:
+            continue
+        gated = name.startswith(_GATED)
+        if new is None:
+            lines.append(f"{name[:48]:<48} {old:>8.1f} {'-':>8} {'absent':>8}")
+            continue
+        if old is None:
+            lines.append(f"{name[:48]:<48} {'-':>8} {new:>8.1f} {'nouveau':>8}")
+            if gated and new >= _MIN_DELTA_MS:
+                regressions.append(f"{name} : nouveau ({new:.0f} ms)")
+            continue
+        delta_pct = (new - old) / old * 100 if old else 0.0
+        lines.append(f"{name[:48]:<48} {old:>8.1f} {new:>8.1f} {delta_pct:>+7.0f}%")
+        if gated and new - old >= _MIN_DELTA_MS and delta_pct > max_regression_pct:
+            regressions.append(f"{name} : {old:.0f} -> {new:.0f} ms ({delta_pct:+.0f}%)")
+    return "\n".join(lines), regressions
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+
+@click.command()
+@click.option("--runs", type=click.IntRange(min=1), default=3, show_default=True,
+              help="Essais d'import (le plus rapide est gardé)")
+@click.option("--top", type=click.IntRange(min=1), default=25, show_default=True)
+@click.option("--ttfb/--no-ttfb", default=True, show_default=True,
+              help="Lancer le dashboard et mesurer le premier octet")
+@click.option("--page", "pages", multiple=True, default=["/", "/ventes"], show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help="Écrire le rapport JSON")
+@click.option("--baseline", type=click.Path(dir_okay=False, exists=True, path_type=Path), default=None,
+              help="Rapport JSON d'une version précédente à comparer")
+@click.option("--max-regression", type=float, default=20.0, show_default=True,
+              help="Régression tolérée (%) avant code de sortie 1")
+def main(
+    runs: int,
+    top: int,
+    ttfb: bool,
+    pages: tuple[str, ...],
+    output: Path | None,
+    baseline: Path | None,
+    max_regression: float,
+) -> None:
+    """Mesurer les imports du démarrage et le premier octet du dashboard."""
+    imports = measure_imports(runs=runs)
+    report = build_report(
+        imports,
+        measure_ttfb(list(pages)) if ttfb else None,
+        {"code": STARTUP_CODE, "runs": runs},
+        top,
+    )
+    click.echo(format_report(report))
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False) + "\n",
+                          encoding="utf-8")
+        click.echo(f"\nRapport écrit dans {output}")
+    if baseline is not None:
+        click.echo("\n== Comparaison avec " + str(baseline) + " ==")
+        table, regressions = compare_reports(
+            json.loads(baseline.read_text(encoding="utf-8")), report, max_regression
+        )
+        click.echo(table)
+        if regressions:
+            click.echo("\nRégressions :\n- " + "\n- ".join(regressions), err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""Télémétrie des requêtes : compteurs, histogramme de latence et plans par requête.
+
+Chaque requête est identifiée par son fichier .sql (``top_products.sql``) ou,
+à défaut, par l'empreinte de son SQL normalisé (``q:1a2b3c4d5e6f``). Pour
+chacune sont comptés : appels, erreurs, hits de cache (mémoire ou disque),
+lignes rendues, octets matérialisés par SQLite, et la durée dans un
+histogramme à buckets fixes (mémoire constante, quantiles estimés comme
+``histogram_quantile`` de Prometheus).
+
+Le nombre de séries est borné (``max_series``) : au-delà, les nouvelles
+requêtes sont cumulées dans la série ``other``, sans plan, pour que la
+mémoire et la cardinalité des labels Prometheus restent finies.
+
+Le premier plan ``EXPLAIN QUERY PLAN`` est conservé ; il est relevé à
+nouveau quand la version de l'entrepôt change, et chaque changement de
+plan est historisé.
+
+L'échantillonnage (DASHBOARD_TELEMETRY_SAMPLE, 0 = désactivé) borne le
+coût : désactivée, la télémétrie se résume à un test par requête.
+"""
+
+import bisect
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+_SAMPLE_DEFAULT = 1.0
+
+# Bornes supérieures des buckets de durée, en secondes (+Inf implicite).
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# Changements de plan conservés (tous fichiers confondus).
+_PLAN_HISTORY = 100
+# Séries distinctes au plus ; les suivantes sont cumulées dans OVERFLOW_SERIES.
+_MAX_SERIES = 500
+OVERFLOW_SERIES = "other"
+
+
+def get_telemetry_sample_rate() -> float:
+    """Fraction des requêtes mesurées (DASHBOARD_TELEMETRY_SAMPLE, entre 0 et 1)."""
+    raw = os.getenv("DASHBOARD_TELEMETRY_SAMPLE")
+    if raw is None or not raw.strip():
+        return _SAMPLE_DEFAULT
+    try:
+        rate = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_TELEMETRY_SAMPLE invalide : '{raw}'") from exc
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"DASHBOARD_TELEMETRY_SAMPLE invalide : '{raw}'")
+    return rate
+
+
+def format_query_plan(rows: list[tuple]) -> str:
+    """Lignes de ``EXPLAIN QUERY PLAN`` (id, parent, notused, detail) au format du shell sqlite3."""
+    children: dict[int, list[tuple[int, str]]] = {}
+    for row in rows:
+        children.setdefault(row[1], []).append((row[0], row[3]))
+    lines = ["QUERY PLAN"]
+
+    def walk(parent: int, indent: str) -> None:
+        nodes = children.get(parent, [])
+        for position, (node_id, detail) in enumerate(nodes):
+            last = position == len(nodes) - 1
+            lines.append(f"{indent}{'`--' if last else '|--'}{detail}")
+            walk(node_id, indent + ("   " if last else "|  "))
+
+    walk(0, "")
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class PlanChange:
+    """Plan relevé pour une requête à un instant donné."""
+
+    query: str
+    at: float
+    previous: str
+    current: str
+
+
+@dataclass(frozen=True)
+class QueryMetrics:
+    """Instantané des compteurs d'une requête."""
+
+    query: str
+    sql: str
+    calls: int
+    errors: int
+    memory_hits: int
+    disk_hits: int
+    rows: int
+    bytes: int
+    duration_s: float
+    buckets: tuple[int, ...]
+    first_plan: str
+    plan: str
+    plan_changes: int
+
+    @property
+    def cache_hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.calls if self.calls else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Quantile ``q`` de la durée (s), interpolé linéairement dans son bucket."""
+        total = sum(self.buckets)
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(self.buckets):
+            if cumulative + count >= rank and count:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                if index == len(LATENCY_BUCKETS):
+                    return lower
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+    @property
+    def p50(self) -> float:
+        return self.quantile(0.50)
+
+    @property
+    def p95(self) -> float:
+        return self.quantile(0.95)
+
+    @property
+    def p99(self) -> float:
+        return self.quantile(0.99)
+
+
+@dataclass
+class _Series:
+    sql: str
+    calls: int = 0
+    errors: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    rows: int = 0
+    bytes: int = 0
+    duration_s: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    first_plan: str = ""
+    plan: str = ""
+    plan_version: tuple | None = None
+    plan_changes: int = 0
+
+
+class QueryTelemetry:
+    """Compteurs par requête, protégés par un verrou (requêtes exécutées en threads)."""
+
+    def __init__(self, sample_rate: float, max_series: int = _MAX_SERIES):
+        self.sample_rate = sample_rate
+        self.max_series = max_series
+        self._series: dict[str, _Series] = {}
+        self._changes: list[PlanChange] = []
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Tirage de l'échantillonnage (toujours faux si désactivé)."""
+        rate = self.sample_rate
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def _full(self, query: str) -> bool:
+        """Vrai si ``query`` n'a pas de série et qu'il n'y a plus de place."""
+        return query not in self._series and len(self._series) >= self.max_series
+
+    def _get(self, query: str, sql: str) -> _Series:
+        if self._full(query):
+            query, sql = OVERFLOW_SERIES, ""
+        series = self._series.get(query)
+        if series is None:
+            series = self._series[query] = _Series(sql=sql)
+        return series
+
+    def record(
+        self,
+        query: str,
+        sql: str,
+        duration_s: float,
+        rows: int,
+        nbytes: int = 0,
+        source: str = "sqlite",
+    ) -> None:
+        """Enregistre un appel ; ``source`` : ``sqlite``, ``memory`` ou ``disk``."""
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration_s)
+        with self._lock:
+            series = self._get(query, sql)
+            series.calls += 1
+            series.rows += rows
+            series.bytes += nbytes
+            series.duration_s += duration_s
+            series.buckets[bucket] += 1
+            if source == "memory":
+                series.memory_hits += 1
+            elif source == "disk":
+                series.disk_hits += 1
+
+    def record_error(self, query: str, sql: str, duration_s: float) -> None:
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration_s)
+        with self._lock:
+            series = self._get(query, sql)
+            series.calls += 1
+            series.errors += 1
+            series.duration_s += duration_s
+            series.buckets[bucket] += 1
+
+    def plan_due(self, query: str, version: tuple) -> bool:
+        """Vrai si le plan de ``query`` n'a pas été relevé pour cette version de l'entrepôt."""
+        with self._lock:
+            if self._full(query):
+                return False
+            series = self._series.get(query)
+            return series is None or series.plan_version != version
+
+    def record_plan(self, query: str, sql: str, version: tuple, plan: str) -> PlanChange | None:
+        """Mémorise le plan relevé ; rend le changement s'il diffère du précédent."""
+        with self._lock:
+            if self._full(query):
+                return None
+            series = self._get(query, sql)
+            series.plan_version = version
+            if not series.first_plan:
+                series.first_plan = series.plan = plan
+                return None
+            if plan == series.plan:
+                return None
+            change = PlanChange(query=query, at=time.time(), previous=series.plan, current=plan)
+            series.plan = plan
+            series.plan_changes += 1
+            self._changes.append(change)
+            del self._changes[:-_PLAN_HISTORY]
+            return change
+
+    def snapshot(self) -> list[QueryMetrics]:
+        """Compteurs de chaque requête, les plus coûteuses (durée cumulée) en tête."""
+        with self._lock:
+            metrics = [
+                QueryMetrics(
+                    query=name,
+                    sql=s.sql,
+                    calls=s.calls,
+                    errors=s.errors,
+                    memory_hits=s.memory_hits,
+                    disk_hits=s.disk_hits,
+                    rows=s.rows,
+                    bytes=s.bytes,
+                    duration_s=s.duration_s,
+                    buckets=tuple(s.buckets),
+                    first_plan=s.first_plan,
+                    plan=s.plan,
+                    plan_changes=s.plan_changes,
+                )
+                for name, s in self._series.items()
+            ]
+        return sorted(metrics, key=lambda m: m.duration_s, reverse=True)
+
+    def plan_changes(self) -> list[PlanChange]:
+        """Changements de plan observés, du plus récent au plus ancien."""
+        with self._lock:
+            return list(reversed(self._changes))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._changes.clear()
+
+
+# ── Format Prometheus ────────────────────────────────────────────────────
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(
+    metrics: list[QueryMetrics],
+    gauges: list[tuple[str, str, str, float]] = (),
+    prefix: str = "dashboard",
+) -> str:
+    """Exposition texte Prometheus (format 0.0.4).
+
+    ``gauges`` : métriques globales supplémentaires ``(nom, type, aide, valeur)``.
+    """
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> str:
+        full = f"{prefix}_{name}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        return full
+
+    counters = (
+        ("query_calls_total", "Query calls", lambda m: m.calls),
+        ("query_errors_total", "Query calls that raised", lambda m: m.errors),
+        ("query_cache_hits_total", "Calls served from the result cache", lambda m: m.cache_hits),
+        ("query_rows_total", "Rows returned", lambda m: m.rows),
+        ("query_bytes_total", "Bytes materialized from SQLite", lambda m: m.bytes),
+        ("query_plan_changes_total", "Query plan changes", lambda m: m.plan_changes),
+    )
+    for name, help_text, value in counters:
+        full = family(name, "counter", help_text)
+        for m in metrics:
+            lines.append(f'{full}{{query="{_escape(m.query)}"}} {value(m)}')
+
+    full = family("query_duration_seconds", "histogram", "Query duration")
+    for m in metrics:
+        label = _escape(m.query)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+            cumulative += count
+            lines.append(f'{full}_bucket{{query="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{full}_bucket{{query="{label}",le="+Inf"}} {m.calls}')
+        lines.append(f'{full}_sum{{query="{label}"}} {m.duration_s!r}')
+        lines.append(f'{full}_count{{query="{label}"}} {m.calls}')
+
+    for name, kind, help_text, value in gauges:
+        full = family(name, kind, help_text)
+        lines.append(f"{full} {_number(value)}")
+    return "\n".join(lines) + "\n"
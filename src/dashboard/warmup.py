@@ -0,0 +1,115 @@
+"""Pré-calcul au démarrage des requêtes des pages (remplissage du cache de résultats)."""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.dashboard import db
+
+logger = logging.getLogger(__name__)
+
+_PAGES_DIR = Path(__file__).resolve().parent / "pages"
+# sql_file="x.sql" (sql_viewer) ou deferred_query("x.sql", ...)
+_SQL_REFERENCE_RE = re.compile(r'(?:sql_file\s*=\s*|deferred_query\(\s*)"([\w\-]+\.sql)"')
+
+_CONCURRENCY_DEFAULT = 2
+
+
+def get_warmup_concurrency() -> int:
+    """Nombre de requêtes de pré-calcul simultanées (DASHBOARD_WARMUP_CONCURRENCY, 0 = désactivé)."""
+    raw = os.getenv("DASHBOARD_WARMUP_CONCURRENCY")
+    if raw is None or not raw.strip():
+        return _CONCURRENCY_DEFAULT
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_WARMUP_CONCURRENCY invalide : '{raw}'") from exc
+    if value < 0:
+        raise ValueError(f"DASHBOARD_WARMUP_CONCURRENCY invalide : '{raw}'")
+    return value
+
+
+def discover_page_sql_files(pages_dir: Path = _PAGES_DIR) -> list[str]:
+    """Fichiers .sql référencés par les pages (ordre de première apparition)."""
+    found: dict[str, None] = {}
+    for page_file in sorted(pages_dir.glob("*.py")):
+        for name in _SQL_REFERENCE_RE.findall(page_file.read_text(encoding="utf-8")):
+            found.setdefault(name, None)
+    return list(found)
+
+
+@dataclass
+class WarmupProgress:
+    """Avancement du pré-calcul, exposé au launcher via /api/warmup."""
+
+    state: str = "pending"  # pending | warming | warm | disabled
+    total: int = 0
+    done: int = 0
+    failed: list[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+_progress = WarmupProgress()
+
+
+def get_warmup_progress() -> WarmupProgress:
+    return _progress
+
+
+async def warm_page_queries(
+    sql_files: list[str] | None = None,
+    concurrency: int | None = None,
+) -> WarmupProgress:
+    """Exécute les requêtes des pages en arrière-plan, ``concurrency`` à la fois.
+
+    Les résultats atterrissent dans le cache de ``db`` : le premier visiteur
+    de chaque page est servi sans exécuter la requête. Un échec est consigné
+    dans ``failed`` sans interrompre le reste du pré-calcul.
+    """
+    global _progress
+    files = discover_page_sql_files() if sql_files is None else sql_files
+    limit = get_warmup_concurrency() if concurrency is None else concurrency
+    if limit <= 0:
+        _progress = WarmupProgress(state="disabled", total=len(files))
+        return _progress
+
+    progress = WarmupProgress(state="warming", total=len(files))
+    _progress = progress
+    semaphore = asyncio.Semaphore(limit)
+    start = time.perf_counter()
+
+    # Profil « immutable » : pages de fact_orders lues avant les requêtes.
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, db.prefetch_fact_pages)
+    except Exception:
+        logger.warning("Fact pages prefetch failed", exc_info=True)
+
+    async def warm(sql_file: str) -> None:
+        async with semaphore:
+            try:
+                with db.query_origin("warmup"):
+                    await db.aquery_from_file(sql_file)
+            except Exception:
+                logger.warning("Warmup failed for %s", sql_file, exc_info=True)
+                progress.failed.append(sql_file)
+            progress.done += 1
+            progress.elapsed_s = round(time.perf_counter() - start, 3)
+
+    await asyncio.gather(*(warm(sql_file) for sql_file in files))
+    progress.state = "warm"
+    progress.elapsed_s = round(time.perf_counter() - start, 3)
+    logger.info(
+        "Dashboard warm: %d/%d queries in %.2fs (%d failed)",
+        progress.done - len(progress.failed),
+        progress.total,
+        progress.elapsed_s,
+        len(progress.failed),
+    )
+    return progress
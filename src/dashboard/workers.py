@@ -0,0 +1,226 @@
+"""Service multi-processus : N workers NiceGUI derrière un seul port.
+
+NiceGUI garde l'état de chaque page (client, websocket) dans le processus
+qui l'a rendue : ses workers ne peuvent pas se partager un port au hasard
+(uvicorn ``workers=N`` est refusé). ``serve`` lance donc N processus
+``python -m src.dashboard`` sur des ports internes (``port + 1`` ...
+``port + N``, en 127.0.0.1) et un proxy TCP sur le port public qui envoie
+chaque adresse client toujours au même worker (affinité par IP, comme
+``ip_hash`` de nginx). Un worker qui meurt est relancé.
+
+Ce qui est partagé entre workers :
+
+- les résultats de requêtes, via le cache persistant (``result_store``) :
+  une requête calculée par un worker est relue par mmap par les autres,
+  et ``DiskResultStore.compute_lock`` évite que deux workers la calculent
+  en même temps ;
+- les calculs « une fois par déploiement » (benchmarks) via ``run_once`` :
+  le premier worker calcule, les autres relisent son résultat JSON.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import webbrowser
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+
+from src.config import PROCESSED_DIR
+
+logger = logging.getLogger(__name__)
+
+_WORKERS_DEFAULT = 1
+_PROXY_CHUNK = 64 * 1024
+_RESTART_DELAY_S = 1.0
+_DEPLOYMENTS_DIR = PROCESSED_DIR / "deployments"
+
+
+def get_dashboard_workers() -> int:
+    """Nombre de processus du dashboard (DASHBOARD_WORKERS, 1 = processus unique)."""
+    raw = os.getenv("DASHBOARD_WORKERS")
+    if raw is None or not raw.strip():
+        return _WORKERS_DEFAULT
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"DASHBOARD_WORKERS invalide : '{raw}'") from exc
+    if value < 1:
+        raise ValueError(f"DASHBOARD_WORKERS invalide : '{raw}'")
+    return value
+
+
+def get_deployment_id() -> str | None:
+    """Identifiant du déploiement, posé par ``serve`` pour ses workers (DASHBOARD_DEPLOYMENT_ID)."""
+    raw = os.getenv("DASHBOARD_DEPLOYMENT_ID")
+    return raw.strip() if raw and raw.strip() else None
+
+
+def is_worker() -> bool:
+    """Vrai dans un worker lancé par ``serve``."""
+    return get_deployment_id() is not None
+
+
+def worker_ports(port: int, workers: int) -> list[int]:
+    """Ports internes des workers : ceux qui suivent le port public."""
+    if port + workers > 65535:
+        raise ValueError(f"Ports insuffisants après {port} pour {workers} workers")
+    return [port + index for index in range(1, workers + 1)]
+
+
+def pick_worker(host: str, workers: int) -> int:
+    """Worker attitré d'une adresse client (stable d'un processus à l'autre)."""
+    return zlib.crc32(host.encode()) % workers
+
+
+# ── Une fois par déploiement ─────────────────────────────────────────────
+
+
+def run_once(name: str, compute: Callable[[], object], directory: Path = _DEPLOYMENTS_DIR):
+    """Résultat de ``compute`` calculé par un seul worker du déploiement.
+
+    Le premier worker prend le verrou, calcule et écrit le résultat (JSON) ;
+    les suivants attendent le verrou puis relisent ce fichier. Hors
+    déploiement multi-workers, ``compute`` est simplement appelé.
+    """
+    deployment = get_deployment_id()
+    if deployment is None:
+        return compute()
+    # result_store charge numpy/pandas : importé au premier usage, pas au démarrage.
+    from src.dashboard.result_store import file_lock
+
+    path = directory / f"{deployment}_{name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path.with_suffix(".lock")):
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+        value = compute()
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(value, handle)
+        os.replace(tmp_name, path)
+        return value
+
+
+def _clear_deployment(deployment: str, directory: Path = _DEPLOYMENTS_DIR) -> None:
+    for path in directory.glob(f"{deployment}_*"):
+        path.unlink(missing_ok=True)
+
+
+# ── Proxy TCP à affinité ─────────────────────────────────────────────────
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Recopie ``reader`` dans ``writer`` jusqu'à la fin du flux."""
+    try:
+        while data := await reader.read(_PROXY_CHUNK):
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+    except (ConnectionError, OSError):
+        # Fermer la destination réveille aussi la copie en sens inverse.
+        writer.close()
+
+
+async def _relay(
+    client_reader: asyncio.StreamReader,
+    client_writer: asyncio.StreamWriter,
+    backends: list[int],
+) -> None:
+    peer = client_writer.get_extra_info("peername") or ("",)
+    port = backends[pick_worker(str(peer[0]), len(backends))]
+    try:
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        # Worker en cours de (re)démarrage : le navigateur se reconnectera.
+        client_writer.close()
+        return
+    await asyncio.gather(
+        _pipe(client_reader, upstream_writer),
+        _pipe(upstream_reader, client_writer),
+    )
+    upstream_writer.close()
+    client_writer.close()
+
+
+async def start_proxy(host: str, port: int, backends: list[int]) -> asyncio.Server:
+    """Proxy sur ``host:port`` vers les workers ``127.0.0.1:<backends>``."""
+    return await asyncio.start_server(
+        lambda reader, writer: _relay(reader, writer, backends), host, port
+    )
+
+
+# ── Superviseur ──────────────────────────────────────────────────────────
+
+
+def _spawn(worker_id: int, port: int, deployment: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DASHBOARD_WORKERS": "1",
+        "DASHBOARD_PORT": str(port),
+        "DASHBOARD_SHOW_BROWSER": "0",
+        "DASHBOARD_DEPLOYMENT_ID": deployment,
+        "DASHBOARD_WORKER_ID": str(worker_id),
+    }
+    return subprocess.Popen([sys.executable, "-m", "src.dashboard"], env=env)
+
+
+async def _supervise(workers: int, port: int, deployment: str, show: bool) -> None:
+    ports = worker_ports(port, workers)
+    processes = [_spawn(index, ports[index], deployment) for index in range(workers)]
+    server = await start_proxy("0.0.0.0", port, ports)
+    logger.info("Dashboard : %d workers (ports %d-%d) derrière le port %d",
+                workers, ports[0], ports[-1], port)
+    if show:
+        webbrowser.open(f"http://localhost:{port}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        while not stop.is_set():
+            for index, process in enumerate(processes):
+                if process.poll() is not None:
+                    logger.warning("Worker %d arrêté (code %s), relance", index, process.returncode)
+                    processes[index] = _spawn(index, ports[index], deployment)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=_RESTART_DELAY_S)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        server.close()
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + 10
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def serve(workers: int, port: int, show: bool = False) -> None:
+    """Démarre ``workers`` processus NiceGUI derrière le proxy du port ``port``."""
+    from src.dashboard.result_store import get_disk_cache_bytes
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if get_disk_cache_bytes() <= 0:
+        logger.warning(
+            "DASHBOARD_DISK_CACHE_MB=0 : les workers ne partagent pas leurs résultats"
+        )
+    deployment = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    try:
+        asyncio.run(_supervise(workers, port, deployment, show))
+    finally:
+        _clear_deployment(deployment)
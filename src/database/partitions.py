@@ -0,0 +1,165 @@
+"""Partitionnement temporel de fact_orders : conventions partagées ETL / dashboard.
+
+En mode partitionné, la base principale ne contient que les dimensions et le
+manifeste ``fact_partitions`` ; les lignes de faits sont réparties dans un
+fichier SQLite par année (ou trimestre), attaché à la connexion puis réuni
+derrière une vue temporaire ``fact_orders``.
+"""
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+PARTITION_SCHEMES = ("year", "quarter")
+MANIFEST_TABLE = "fact_partitions"
+UNDATED_PARTITION = "undated"
+
+# Une base attachée par partition : SQLITE_MAX_ATTACHED vaut 10 par défaut.
+MAX_PARTITIONS = 10
+
+_LABEL_RE = re.compile(r"^(\d{4}(q[1-4])?|undated)$")
+
+
+@dataclass(frozen=True)
+class FactPartition:
+    """Une ligne du manifeste : un fichier de faits et sa plage de date_key."""
+
+    label: str
+    file_name: str
+    date_key_min: int | None
+    date_key_max: int | None
+    row_count: int
+    source_hash: str
+
+    @property
+    def schema(self) -> str:
+        """Nom du schéma SQLite sous lequel la partition est attachée."""
+        return f"p_{self.label}"
+
+    def overlaps(self, date_from: int, date_to: int) -> bool:
+        """Vrai si la partition peut contenir des date_key dans [date_from, date_to]."""
+        if self.date_key_min is None or self.date_key_max is None:
+            return False
+        return self.date_key_min <= date_to and self.date_key_max >= date_from
+
+
+def partition_labels(date_keys: pd.Series, scheme: str) -> pd.Series:
+    """Étiquette de partition ("2017", "2017q3" ou "undated") pour chaque date_key."""
+    if scheme not in PARTITION_SCHEMES:
+        raise ValueError(
+            f"Partitionnement inconnu : '{scheme}'. "
+            f"Valeurs possibles : {list(PARTITION_SCHEMES)}"
+        )
+    labels = pd.Series(UNDATED_PARTITION, index=date_keys.index, dtype=object)
+    dated = date_keys.notna()
+    keys = date_keys[dated].astype("int64")
+    years = (keys // 10000).astype(str)
+    if scheme == "year":
+        labels[dated] = years
+    else:
+        quarters = ((keys // 100 % 100 - 1) // 3 + 1).astype(str)
+        labels[dated] = years + "q" + quarters
+    return labels
+
+
+def partition_bounds(label: str) -> tuple[int | None, int | None]:
+    """Plage (date_key min, date_key max) couverte par une étiquette de partition."""
+    if not _LABEL_RE.match(label):
+        raise ValueError(f"Étiquette de partition invalide : '{label}'")
+    if label == UNDATED_PARTITION:
+        return None, None
+    year = int(label[:4])
+    if len(label) == 4:
+        first_month, last_month = 1, 12
+    else:
+        quarter = int(label[5])
+        first_month, last_month = 3 * quarter - 2, 3 * quarter
+    # Jour 31 pour tous les mois : borne haute suffisante pour comparer des AAAAMMJJ.
+    return year * 10000 + first_month * 100 + 1, year * 10000 + last_month * 100 + 31
+
+
+def partition_file_name(db_path: Path, label: str, generation: str | None = None) -> str:
+    """Nom du fichier d'une partition, à côté de la base principale.
+
+    ``generation`` (empreinte du contenu) distingue les versions d'une même
+    partition : une partition réécrite ne remplace jamais le fichier lu par
+    la base principale en place.
+    """
+    suffix = f".{generation}" if generation else ""
+    return f"{db_path.stem}.fact_{label}{suffix}.db"
+
+
+def read_manifest(conn: sqlite3.Connection) -> list[FactPartition]:
+    """Lire le manifeste ; liste vide si la base n'est pas partitionnée."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (MANIFEST_TABLE,),
+    ).fetchone()
+    if exists is None:
+        return []
+    rows = conn.execute(
+        f"SELECT partition_label, file_name, date_key_min, date_key_max, "
+        f"row_count, source_hash FROM {MANIFEST_TABLE} ORDER BY partition_label"
+    ).fetchall()
+    return [FactPartition(*tuple(row)) for row in rows]
+
+
+def union_view_sql(
+    partitions: list[FactPartition],
+    view_name: str = "fact_orders",
+    if_not_exists: bool = False,
+) -> str:
+    """CREATE TEMP VIEW réunissant les partitions attachées (UNION ALL).
+
+    Un filtre sur date_key posé sur la vue est poussé dans chaque branche
+    par SQLite : les partitions hors plage sont écartées par une simple
+    recherche dans leur index ``idx_fact_date_key``.
+    """
+    if not partitions:
+        raise ValueError("Aucune partition à réunir")
+    branches = "\nUNION ALL\n".join(
+        f"SELECT * FROM {p.schema}.fact_orders" for p in partitions
+    )
+    guard = "IF NOT EXISTS " if if_not_exists else ""
+    return f"CREATE TEMP VIEW {guard}{view_name} AS\n{branches}"
+
+
+def temp_views_sql(views_sql: str) -> str:
+    """Réécrire sql/views.sql en vues TEMP (une vue de main ne peut pas lire une base attachée)."""
+    script = re.sub(r"\bDROP\s+VIEW\s+IF\s+EXISTS\s+(\w+)", r"DROP VIEW IF EXISTS temp.\1",
+                    views_sql, flags=re.IGNORECASE)
+    return re.sub(r"\bCREATE\s+VIEW\b", "CREATE TEMP VIEW", script, flags=re.IGNORECASE)
+
+
+def attach_partitions(
+    conn: sqlite3.Connection,
+    db_path: Path,
+    views_sql: str = "",
+    read_only: bool = True,
+    immutable: bool = False,
+) -> list[FactPartition]:
+    """Attacher les partitions et créer la vue temporaire fact_orders.
+
+    Sans manifeste (base non partitionnée), ne fait rien et retourne une liste
+    vide. En lecture seule, les partitions sont attachées via une URI
+    ``mode=ro`` : la connexion doit avoir été ouverte avec ``uri=True``
+    (``immutable=True`` ajoute ``immutable=1``).
+    ``views_sql`` (contenu de sql/views.sql) est recréé en vues TEMP.
+    """
+    partitions = read_manifest(conn)
+    if not partitions:
+        return []
+    for partition in partitions:
+        path = db_path.with_name(partition.file_name)
+        if read_only:
+            target = f"file:{path}?mode=ro" + ("&immutable=1" if immutable else "")
+        else:
+            target = str(path)
+        conn.execute(f"ATTACH DATABASE ? AS {partition.schema}", (target,))
+    conn.execute(union_view_sql(partitions))
+    if views_sql:
+        conn.executescript(temp_views_sql(views_sql))
+    return partitions
@@ -0,0 +1,36 @@
+"""Découpage des scripts SQL en instructions : partagé par l'ETL et le dashboard.
+
+Les scripts du dépôt (DDL, scores, requêtes multi-instructions du dashboard)
+passent tous par ``split_statements`` : mêmes règles pour les commentaires
+et les point-virgules, quel que soit l'appelant.
+"""
+
+import sqlite3
+
+
+def split_statements(script: str) -> list[str]:
+    """Découpe un script SQL en instructions complètes, sans point-virgule final.
+
+    Les lignes de commentaire (``--`` en début de ligne) et les lignes vides
+    sont ignorées ; ``sqlite3.complete_statement`` tient compte des
+    point-virgules dans les chaînes et des commentaires de fin de ligne. Un
+    reste sans point-virgule en fin de script forme la dernière instruction.
+    """
+    statements: list[str] = []
+    buffer = ""
+    for line in script.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        buffer = f"{buffer}\n{line}" if buffer else line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            if statement.endswith(";"):
+                statement = statement[:-1].rstrip()
+            if statement:
+                statements.append(statement)
+            buffer = ""
+
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
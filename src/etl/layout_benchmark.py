@@ -0,0 +1,182 @@
+"""Benchmark des layouts physiques : exécuter le corpus sql/dashboard sur chaque layout.
+
+Usage : python -m src.etl.layout_benchmark --layouts default,compact
+"""
+
+import logging
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import click
+import pandas as pd
+from sqlalchemy import create_engine
+
+from src.config import PROJECT_ROOT
+from src.database.sql_script import split_statements
+from src.etl.extract import load_all_raw
+from src.etl.load import PHYSICAL_LAYOUTS, load_to_sqlite
+from src.etl.pipeline import StarSchemaTables, build_star_schema
+from src.etl.transform import clean_all
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_SQL_DIR = PROJECT_ROOT / "sql" / "dashboard"
+
+
+def build_layout_databases(
+    tables: StarSchemaTables,
+    layout_names: list[str],
+    target_dir: Path,
+) -> dict[str, Path]:
+    """Charger le même schéma en étoile une fois par layout, dans target_dir."""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    paths: dict[str, Path] = {}
+    for name in layout_names:
+        db_path = target_dir / f"olist_dw_{name}.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *tables, layout=PHYSICAL_LAYOUTS[name])
+        engine.dispose()
+        paths[name] = db_path
+    return paths
+
+
+def _connect_read_only(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def time_sql_corpus(
+    db_path: Path,
+    sql_dir: Path = DASHBOARD_SQL_DIR,
+    iterations: int = 5,
+    warmup: int = 1,
+    connect: Callable[[Path], sqlite3.Connection] = _connect_read_only,
+) -> list[dict]:
+    """Mesurer chaque fichier .sql (toutes instructions confondues) sur une base.
+
+    ``connect`` ouvre la connexion de mesure (défaut : read-only, temp_store
+    en mémoire) ; le benchmark des profils dashboard y passe ses réglages.
+    """
+    conn = connect(db_path)
+    results = []
+    try:
+        for sql_path in sorted(sql_dir.glob("*.sql")):
+            statements = split_statements(sql_path.read_text(encoding="utf-8"))
+
+            def _run() -> int:
+                return sum(len(conn.execute(stmt).fetchall()) for stmt in statements)
+
+            for _ in range(warmup):
+                _run()
+
+            timings: list[float] = []
+            rows = 0
+            for _ in range(iterations):
+                start = time.perf_counter()
+                rows = _run()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            results.append({
+                "sql_file": sql_path.name,
+                "median_ms": round(statistics.median(timings), 2),
+                "min_ms": round(min(timings), 2),
+                "rows": rows,
+            })
+    finally:
+        conn.close()
+    return results
+
+
+def _storage_stats(db_path: Path) -> dict:
+    """Taille de page, nombre de pages et taille fichier d'une base."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "size_mb": round(db_path.stat().st_size / 1_048_576, 2),
+    }
+
+
+def benchmark_layouts(
+    db_paths: dict[str, Path],
+    iterations: int = 5,
+    warmup: int = 1,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Retourner (temps médians par fichier x layout, statistiques de stockage)."""
+    rows = []
+    for name, db_path in db_paths.items():
+        for result in time_sql_corpus(db_path, iterations=iterations, warmup=warmup):
+            rows.append({"layout": name, **result})
+
+    timings = pd.DataFrame(rows).pivot(index="sql_file", columns="layout", values="median_ms")
+    timings = timings[list(db_paths)]
+    timings.loc["TOTAL"] = timings.sum()
+
+    storage = pd.DataFrame.from_dict(
+        {name: _storage_stats(path) for name, path in db_paths.items()},
+        orient="index",
+    )
+    return timings, storage
+
+
+@click.command()
+@click.option(
+    "--layouts",
+    default=",".join(PHYSICAL_LAYOUTS),
+    show_default=True,
+    help="Layouts à comparer, séparés par des virgules",
+)
+@click.option("--iterations", type=int, default=5, show_default=True)
+@click.option("--warmup", type=int, default=1, show_default=True)
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Conserver les bases construites dans ce dossier (défaut : dossier temporaire)",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Exporter les temps médians en CSV",
+)
+def main(layouts: str, iterations: int, warmup: int, work_dir: Path | None, output: Path | None) -> None:
+    """Construire le DWH pour chaque layout puis comparer le corpus sql/dashboard."""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(name)s | %(message)s")
+
+    layout_names = [name.strip().lower() for name in layouts.split(",") if name.strip()]
+    unknown = set(layout_names) - set(PHYSICAL_LAYOUTS)
+    if unknown:
+        raise click.BadParameter(
+            f"layouts inconnus : {sorted(unknown)} (disponibles : {sorted(PHYSICAL_LAYOUTS)})",
+            param_hint="--layouts",
+        )
+
+    tables = build_star_schema(clean_all(load_all_raw()))
+
+    with tempfile.TemporaryDirectory(prefix="olist_layouts_") as tmp:
+        db_paths = build_layout_databases(tables, layout_names, work_dir or Path(tmp))
+        timings, storage = benchmark_layouts(db_paths, iterations=iterations, warmup=warmup)
+
+    click.echo("\n== Stockage ==")
+    click.echo(storage.to_string())
+    click.echo("\n== Temps médian par requête (ms) ==")
+    click.echo(timings.to_string())
+
+    if output is not None:
+        timings.to_csv(output)
+        click.echo(f"\nRésultats exportés dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 """Chargement : construire les tables de dimension/faits et charger dans SQLite."""
 
 import functools
+import hashlib
 import logging
 import os
+import re
 import sqlite3
-from collections.abc import Iterator
+from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 
 import pandas as pd
@@ -12,11 +15,141 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Connection, Engine
 
 from src.config import PROJECT_ROOT
+from src.database.partitions import (
+    MAX_PARTITIONS,
+    PARTITION_SCHEMES,
+    partition_bounds,
+    partition_file_name,
+    partition_labels,
+    read_manifest,
+)
+from src.database.sql_script import split_statements
 from src.etl.utils import safe_mode
 
 logger = logging.getLogger(__name__)
 
 
+# ── Options de chargement ────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class PhysicalLayout:
+    """Options de stockage physique appliquées au chargement SQLite.
+
+    - ``page_size`` : taille de page SQLite (None = défaut SQLite, 4096).
+    - ``without_rowid_dims`` : dimensions à clé naturelle (``customer_id``,
+      ``seller_id``, ``product_id``, ``zip_code_prefix``) stockées ``WITHOUT
+      ROWID`` avec cette clé pour PRIMARY KEY : une recherche par clé naturelle
+      lit directement le B-tree des lignes. La clé surrogate devient une
+      colonne UNIQUE. ``dim_dates`` (clé entière) reste une table rowid, déjà
+      rangée par ``date_key``.
+    - ``cluster_fact_by_date`` : lignes de ``fact_orders`` insérées dans
+      l'ordre ``(date_key, order_id)`` pour que les scans mensuels lisent
+      des pages contiguës.
+    """
+
+    page_size: int | None = None
+    without_rowid_dims: bool = False
+    cluster_fact_by_date: bool = False
+
+
+PHYSICAL_LAYOUTS: dict[str, PhysicalLayout] = {
+    "default": PhysicalLayout(),
+    "clustered": PhysicalLayout(cluster_fact_by_date=True),
+    "compact": PhysicalLayout(
+        page_size=8192,
+        without_rowid_dims=True,
+        cluster_fact_by_date=True,
+    ),
+}
+
+_VALID_PAGE_SIZES = {512 * 2**i for i in range(8)}  # 512 .. 65536
+
+
+def get_physical_layout(name: str | None = None) -> PhysicalLayout:
+    """Retourner le layout nommé (ou ETL_PHYSICAL_LAYOUT), ETL_PAGE_SIZE en surcharge."""
+    raw_name = name if name is not None else os.getenv("ETL_PHYSICAL_LAYOUT", "default")
+    key = raw_name.strip().lower() or "default"
+    try:
+        layout = PHYSICAL_LAYOUTS[key]
+    except KeyError:
+        raise ValueError(
+            f"Layout physique inconnu : '{raw_name}'. "
+            f"Layouts disponibles : {sorted(PHYSICAL_LAYOUTS)}"
+        ) from None
+
+    raw_page_size = os.getenv("ETL_PAGE_SIZE")
+    if raw_page_size:
+        try:
+            page_size = int(raw_page_size)
+        except ValueError:
+            page_size = 0
+        if page_size not in _VALID_PAGE_SIZES:
+            raise ValueError(
+                f"ETL_PAGE_SIZE invalide : '{raw_page_size}' "
+                "(puissance de 2 entre 512 et 65536 attendue)"
+            )
+        layout = PhysicalLayout(
+            page_size=page_size,
+            without_rowid_dims=layout.without_rowid_dims,
+            cluster_fact_by_date=layout.cluster_fact_by_date,
+        )
+    return layout
+
+
+def get_denormalize_fact() -> bool:
+    """Activer la table de faits dénormalisée via ETL_DENORMALIZE_FACT."""
+    raw = os.getenv("ETL_DENORMALIZE_FACT")
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def get_partition_scheme() -> str | None:
+    """Partitionnement de fact_orders via ETL_PARTITION_BY (None = base unique)."""
+    raw = os.getenv("ETL_PARTITION_BY", "")
+    scheme = raw.strip().lower()
+    if scheme in {"", "none"}:
+        return None
+    if scheme not in PARTITION_SCHEMES:
+        raise ValueError(
+            f"ETL_PARTITION_BY invalide : '{raw}' "
+            f"(valeurs possibles : none, {', '.join(PARTITION_SCHEMES)})"
+        )
+    return scheme
+
+
+_DIM_TABLE_RE = re.compile(r"^CREATE\s+TABLE\s+dim_\w+", re.IGNORECASE)
+_SURROGATE_PK_RE = re.compile(
+    r"\bINTEGER\s+PRIMARY\s+KEY(\s+AUTOINCREMENT)?\b", re.IGNORECASE
+)
+_NATURAL_KEY_RE = re.compile(r"\bTEXT(\s+)NOT\s+NULL\s+UNIQUE\b", re.IGNORECASE)
+
+
+def _apply_layout_to_statement(statement: str, layout: PhysicalLayout) -> str:
+    """Adapter une instruction DDL au layout physique demandé."""
+    if (
+        layout.without_rowid_dims
+        and _DIM_TABLE_RE.match(statement)
+        and len(_NATURAL_KEY_RE.findall(statement)) == 1
+    ):
+        # Clé naturelle en PRIMARY KEY (B-tree des lignes), surrogate en UNIQUE.
+        # Les clés surrogate sont attribuées par l'ETL (_add_surrogate_key) :
+        # AUTOINCREMENT, interdit sans rowid, n'est pas nécessaire.
+        statement = _SURROGATE_PK_RE.sub("INTEGER NOT NULL UNIQUE", statement, count=1)
+        statement = _NATURAL_KEY_RE.sub(r"TEXT\1NOT NULL PRIMARY KEY", statement, count=1)
+        statement = f"{statement} WITHOUT ROWID"
+    return statement
+
+
+def _cluster_fact(fact: pd.DataFrame) -> pd.DataFrame:
+    """Trier la table de faits par (date_key, order_id, order_item_id)."""
+    return fact.sort_values(
+        ["date_key", "order_id", "order_item_id"],
+        na_position="last",
+        kind="stable",
+    ).reset_index(drop=True)
+
+
 # ── Utilitaires ──────────────────────────────────────────────────────────
 
 def _add_surrogate_key(df: pd.DataFrame, key_name: str) -> pd.DataFrame:
@@ -27,31 +160,17 @@ def _add_surrogate_key(df: pd.DataFrame, key_name: str) -> pd.DataFrame:
     return df.reset_index()
 
 
-def _iter_sql_statements(script: str) -> Iterator[str]:
-    """Découper un script SQL en instructions complètes."""
-    buffer = ""
-    for line in script.splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("--"):
-            continue
-        buffer = f"{buffer}\n{line}" if buffer else line
-        if sqlite3.complete_statement(buffer):
-            statement = buffer.strip()
-            if statement.endswith(";"):
-                statement = statement[:-1]
-            if statement:
-                yield statement
-            buffer = ""
-
-    if buffer.strip():
-        yield buffer.strip()
-
-
-def _execute_sql_script(conn: Connection, script: str) -> None:
+def _execute_sql_script(
+    conn: Connection,
+    script: str,
+    layout: PhysicalLayout | None = None,
+) -> None:
     """Exécuter un script SQL instruction par instruction dans la transaction courante."""
-    for statement in _iter_sql_statements(script):
+    for statement in split_statements(script):
         if statement.upper().startswith("PRAGMA "):
             continue
+        if layout is not None:
+            statement = _apply_layout_to_statement(statement, layout)
         conn.exec_driver_sql(statement)
 
 
@@ -60,10 +179,14 @@ def _load_into_engine(
     ddl: str,
     views_sql: str,
     tables: list[tuple[str, pd.DataFrame]],
+    layout: PhysicalLayout,
 ) -> None:
     """Créer le schéma, charger les tables et créer les vues dans une même session."""
     with engine.begin() as conn:
-        _execute_sql_script(conn, ddl)
+        if layout.page_size:
+            # Doit précéder le premier CREATE TABLE pour prendre effet.
+            conn.exec_driver_sql(f"PRAGMA page_size = {int(layout.page_size)}")
+        _execute_sql_script(conn, ddl, layout)
         for name, df in tables:
             logger.info("Loading %s (%s rows)...", name, f"{len(df):,}")
             df.to_sql(name, conn, if_exists="append", index=False, chunksize=5000)
@@ -164,6 +287,21 @@ def build_dim_products(products: pd.DataFrame) -> pd.DataFrame:
     return _add_surrogate_key(dim, "product_key")
 
 
+DENORMALIZED_FACT_COLUMNS = ["customer_unique_key", "month_key"]
+
+
+def _customer_unique_keys(dim_customers: pd.DataFrame) -> pd.Series:
+    """Associer chaque customer_id à une clé entière de son customer_unique_id.
+
+    Les clés (1-indexed) suivent l'ordre trié des ``customer_unique_id`` :
+    grouper par clé produit donc le même ordre que grouper par identifiant.
+    """
+    codes, _ = pd.factorize(dim_customers["customer_unique_id"], sort=True)
+    keys = pd.Series(codes + 1, index=dim_customers["customer_id"].to_numpy())
+    # factorize code les valeurs manquantes -1 : pas de clé pour ces clients.
+    return keys.where(codes >= 0)
+
+
 def build_fact_orders(
     order_items: pd.DataFrame,
     orders: pd.DataFrame,
@@ -172,8 +310,15 @@ def build_fact_orders(
     dim_customers: pd.DataFrame,
     dim_sellers: pd.DataFrame,
     dim_products: pd.DataFrame,
+    denormalize: bool = False,
 ) -> pd.DataFrame:
-    """Construire la table de faits au grain article de commande."""
+    """Construire la table de faits au grain article de commande.
+
+    Avec ``denormalize=True``, la table porte aussi ``customer_unique_key``
+    (entier dense, ordonné comme ``customer_unique_id``) et ``month_key``
+    (AAAAMM), ce qui évite les jointures vers ``dim_customers`` et
+    ``dim_dates`` dans les requêtes clients/cohortes.
+    """
 
     # ── Agrégation des paiements par commande : valeur totale + type dominant (mode) ──
     pay_agg = payments.groupby("order_id").agg(
@@ -229,18 +374,141 @@ def build_fact_orders(
     fact["delivery_delta_days"] = fact["delivery_days"] - fact["estimated_days"]
 
     # ── Sélection des colonnes finales ────────────────────────────────────
-    result = fact[[
+    columns = [
         "order_id", "order_item_id", "date_key",
         "customer_key", "seller_key", "product_key",
         "customer_geo_key", "seller_geo_key",
         "order_status", "price", "freight_value",
         "order_payment_total", "payment_type", "review_score",
         "delivery_days", "estimated_days", "delivery_delta_days",
-    ]].copy()
+    ]
+
+    # ── Colonnes dénormalisées (optionnelles) ─────────────────────────────
+    if denormalize:
+        unique_keys = _customer_unique_keys(dim_customers)
+        fact["customer_unique_key"] = fact["customer_id"].map(unique_keys).astype("Int64")
+        fact["month_key"] = fact["date_key"] // 100
+        columns += DENORMALIZED_FACT_COLUMNS
+
+    result = fact[columns].copy()
 
     return result
 
 
+# ── Partitionnement temporel ─────────────────────────────────────────────
+
+_FACT_STATEMENT_RE = re.compile(r"\bfact_orders\b", re.IGNORECASE)
+
+
+def _split_fact_ddl(ddl: str) -> tuple[str, str]:
+    """Séparer le DDL en (dimensions, fact_orders + index de faits)."""
+    dims: list[str] = []
+    facts: list[str] = []
+    for statement in split_statements(ddl):
+        target = facts if _FACT_STATEMENT_RE.search(statement) else dims
+        target.append(f"{statement};")
+    return "\n".join(dims), "\n".join(facts)
+
+
+def _partition_hash(part: pd.DataFrame, fact_ddl: str, layout: PhysicalLayout) -> str:
+    """Empreinte d'une partition (lignes, indépendamment de leur ordre, DDL et layout)."""
+    row_hashes = pd.util.hash_pandas_object(part, index=False).to_numpy()
+    digest = hashlib.sha256()
+    digest.update(repr((list(part.columns), fact_ddl, layout)).encode())
+    digest.update(str(int(row_hashes.sum(dtype="uint64"))).encode())
+    return digest.hexdigest()[:16]
+
+
+def _partition_key_base(label: str) -> int:
+    """Premier fact_key d'une partition : les clés restent uniques entre fichiers."""
+    date_key_min, _ = partition_bounds(label)
+    if date_key_min is None:
+        return 0
+    return (date_key_min // 100) * 10**7
+
+
+def _write_fact_partitions(
+    db_path: Path,
+    fact: pd.DataFrame,
+    fact_ddl: str,
+    layout: PhysicalLayout,
+    scheme: str,
+) -> tuple[pd.DataFrame, list[tuple[Path, Path]]]:
+    """Écrire les partitions modifiées dans des fichiers temporaires.
+
+    Retourne le manifeste complet et la liste (temporaire, final) des
+    fichiers à mettre en place ; les partitions dont l'empreinte est
+    identique au manifeste de la base existante sont conservées telles quelles.
+    Le nom final porte l'empreinte de la partition : il n'est référencé que
+    par le nouveau manifeste, jamais par la base principale en service.
+    """
+    labels = partition_labels(fact["date_key"], scheme)
+    groups = fact.groupby(labels, sort=True)
+    if groups.ngroups > MAX_PARTITIONS:
+        raise ValueError(
+            f"{groups.ngroups} partitions '{scheme}' : au-delà de {MAX_PARTITIONS} "
+            "bases attachées (SQLITE_MAX_ATTACHED). Utiliser un découpage plus large."
+        )
+
+    previous: dict[str, str] = {}
+    if db_path.exists():
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            previous = {p.label: p.source_hash for p in read_manifest(conn)}
+        finally:
+            conn.close()
+
+    manifest = []
+    pending: list[tuple[Path, Path]] = []
+    for label, part in groups:
+        part = part.reset_index(drop=True)
+        source_hash = _partition_hash(part, fact_ddl, layout)
+        file_name = partition_file_name(db_path, label, source_hash)
+        final_path = db_path.with_name(file_name)
+        date_key_min, date_key_max = partition_bounds(label)
+        manifest.append({
+            "partition_label": label,
+            "file_name": file_name,
+            "date_key_min": date_key_min,
+            "date_key_max": date_key_max,
+            "row_count": len(part),
+            "source_hash": source_hash,
+        })
+
+        if previous.get(label) == source_hash and final_path.exists():
+            logger.info("Partition %s unchanged (%s rows), kept.", label, f"{len(part):,}")
+            continue
+
+        first_key = _partition_key_base(label) + 1
+        part.insert(0, "fact_key", range(first_key, first_key + len(part)))
+        tmp_path = final_path.with_name(f".{file_name}.tmp")
+        pending.append((tmp_path, final_path))
+        tmp_engine = create_engine(f"sqlite:///{tmp_path}")
+        try:
+            _load_into_engine(tmp_engine, fact_ddl, "", [("fact_orders", part)], layout)
+            # Sans statistiques, le planificateur estime une dizaine de lignes
+            # par branche de la vue UNION ALL et renonce aux index automatiques.
+            with tmp_engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
+        except Exception:
+            tmp_engine.dispose()
+            for tmp, _ in pending:
+                tmp.unlink(missing_ok=True)
+            raise
+        tmp_engine.dispose()
+        logger.info("Partition %s rebuilt (%s rows).", label, f"{len(part):,}")
+
+    return pd.DataFrame(manifest), pending
+
+
+def _remove_stale_partitions(db_path: Path, keep: set[str]) -> None:
+    """Supprimer les fichiers de partition qui ne figurent plus au manifeste."""
+    for path in db_path.parent.glob(partition_file_name(db_path, "*")):
+        if path.name not in keep:
+            path.unlink()
+            logger.info("Stale partition file removed: %s", path.name)
+
+
 # ── Chargeur SQLite ──────────────────────────────────────────────────────
 
 def load_to_sqlite(
@@ -251,20 +519,45 @@ def load_to_sqlite(
     dim_sellers: pd.DataFrame,
     dim_products: pd.DataFrame,
     fact: pd.DataFrame,
+    layout: PhysicalLayout | None = None,
+    partition_by: str | None = None,
+    before_publish: Callable[[Path], object] | None = None,
 ) -> None:
-    """Charger toutes les tables de dimension et de faits dans SQLite (transaction atomique)."""
+    """Charger toutes les tables de dimension et de faits dans SQLite (transaction atomique).
+
+    ``layout`` contrôle le stockage physique (taille de page, dimensions
+    ``WITHOUT ROWID``, clustering des faits par date) ; par défaut, le layout
+    SQLite standard est conservé.
+
+    ``partition_by`` (``"year"`` ou ``"quarter"``) répartit ``fact_orders``
+    dans un fichier SQLite par période, recensé dans ``fact_partitions`` ;
+    seules les partitions dont les lignes ont changé sont réécrites.
+
+    ``before_publish`` reçoit le chemin de la base complète (partitions en
+    place), avant son remplacement atomique : les tables dérivées (scores)
+    y sont construites et publiées avec le reste. Base SQLite sur fichier
+    uniquement.
+    """
+    layout = layout or PhysicalLayout()
     ddl_path = PROJECT_ROOT / "sql" / "create_star_schema.sql"
     ddl = ddl_path.read_text()
 
+    if layout.cluster_fact_by_date:
+        fact = _cluster_fact(fact)
+
     tables = [
         ("dim_dates", dim_dates),
         ("dim_geolocation", dim_geo),
         ("dim_customers", dim_customers),
         ("dim_sellers", dim_sellers),
         ("dim_products", dim_products),
-        ("fact_orders", fact),
     ]
 
+    # Colonnes dénormalisées : ajoutées (avec leurs index) avant l'insertion.
+    if set(DENORMALIZED_FACT_COLUMNS) <= set(fact.columns):
+        denorm_path = PROJECT_ROOT / "sql" / "denormalized_fact.sql"
+        ddl = f"{ddl}\n{denorm_path.read_text()}"
+
     views_path = PROJECT_ROOT / "sql" / "views.sql"
     views_sql = views_path.read_text() if views_path.exists() else ""
 
@@ -278,10 +571,17 @@ def load_to_sqlite(
         and db_path_str != ":memory:"
     )
 
+    if partition_by is not None and not is_sqlite_file:
+        raise ValueError("Le partitionnement de fact_orders exige une base SQLite sur fichier")
+    if before_publish is not None and not is_sqlite_file:
+        raise ValueError("before_publish exige une base SQLite sur fichier")
+
     if is_sqlite_file:
         db_path = Path(db_path_str)
         tmp_db_path = db_path.with_name(f".{db_path.name}.tmp")
         tmp_engine = create_engine(f"sqlite:///{tmp_db_path}")
+        pending: list[tuple[Path, Path]] = []
+        keep: set[str] = set()
 
         @event.listens_for(tmp_engine, "connect")
         def _set_sqlite_pragmas(dbapi_conn, _connection_record) -> None:
@@ -290,19 +590,55 @@ def load_to_sqlite(
             cursor.close()
 
         try:
-            _load_into_engine(tmp_engine, ddl, views_sql, tables)
+            if partition_by is not None:
+                # Base principale : dimensions + manifeste ; les vues sont
+                # créées en TEMP à l'ouverture (elles lisent les partitions).
+                dims_ddl, fact_ddl = _split_fact_ddl(ddl)
+                manifest, pending = _write_fact_partitions(
+                    db_path, fact, fact_ddl, layout, partition_by
+                )
+                keep = set(manifest["file_name"])
+                manifest_ddl = (PROJECT_ROOT / "sql" / "fact_partitions.sql").read_text()
+                _load_into_engine(
+                    tmp_engine,
+                    f"{dims_ddl}\n{manifest_ddl}",
+                    "",
+                    [*tables, ("fact_partitions", manifest)],
+                    layout,
+                )
+            else:
+                _load_into_engine(
+                    tmp_engine, ddl, views_sql, [*tables, ("fact_orders", fact)], layout
+                )
             tmp_engine.dispose()
             engine.dispose()
             for sidecar in (Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
                 if sidecar.exists():
                     sidecar.unlink()
+            # Nouvelles générations de partitions (noms inconnus de la base en
+            # service), puis remplacement atomique de la base principale qui
+            # les référence : un lecteur voit l'ancien ou le nouvel ensemble.
+            for tmp_partition, final_partition in pending:
+                os.replace(tmp_partition, final_partition)
+            if before_publish is not None:
+                before_publish(tmp_db_path)
             os.replace(tmp_db_path, db_path)
         except Exception:
             tmp_engine.dispose()
-            if tmp_db_path.exists():
-                tmp_db_path.unlink()
+            for tmp_path in (tmp_db_path, *(path for paths in pending for path in paths)):
+                if tmp_path.exists():
+                    tmp_path.unlink()
             raise
+        # Anciennes générations : plus référencées une fois la base remplacée.
+        _remove_stale_partitions(db_path, keep)
     else:
-        _load_into_engine(engine, ddl, views_sql, tables)
-
-    logger.info("All tables loaded successfully.")
+        _load_into_engine(engine, ddl, views_sql, [*tables, ("fact_orders", fact)], layout)
+
+    logger.info(
+        "All tables loaded successfully (page_size=%s, without_rowid_dims=%s, "
+        "cluster_fact_by_date=%s, partition_by=%s).",
+        layout.page_size or "default",
+        layout.without_rowid_dims,
+        layout.cluster_fact_by_date,
+        partition_by or "none",
+    )
@@ -1,10 +1,15 @@
 """Orchestrateur : exécuter le pipeline ETL complet."""
 
 import logging
-from collections.abc import Callable
+import os
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
 from typing import TypeVar
 
-from src.config import DATABASE_DIR
+import pandas as pd
+
+from src.config import DATABASE_DIR, ETL_LOCK_FILE
 from src.database.connection import get_engine
 from src.etl.extract import load_all_raw
 from src.etl.transform import clean_all
@@ -15,14 +20,22 @@ from src.etl.load import (
     build_dim_sellers,
     build_dim_products,
     build_fact_orders,
+    get_denormalize_fact,
+    get_partition_scheme,
+    get_physical_layout,
     load_to_sqlite,
 )
+from src.etl.scores import build_score_tables
 
 logger = logging.getLogger(__name__)
 
 _SEPARATOR = "=" * 60
 _T = TypeVar("_T")
 
+StarSchemaTables = tuple[
+    pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame
+]
+
 
 class PipelinePhaseError(RuntimeError):
     """Erreur du pipeline enrichie avec le nom de la phase en échec."""
@@ -45,46 +58,75 @@ def _run_phase(title: str, action: Callable[[], _T]) -> _T:
         raise PipelinePhaseError(f"{title} failed: {exc}") from exc
 
 
-def run_full_pipeline() -> None:
-    """Extraction -> Transformation -> Construction des dimensions -> Chargement dans SQLite."""
+def build_star_schema(
+    cleaned: dict[str, pd.DataFrame],
+    denormalize: bool = False,
+) -> StarSchemaTables:
+    """Construire les 5 dimensions et la table de faits à partir des données nettoyées."""
+    dim_dates = build_dim_dates(cleaned["orders"])
+    logger.info("dim_dates: %s entries", f"{len(dim_dates):,}")
 
-    dfs = _run_phase("PHASE 1: EXTRACT", load_all_raw)
+    dim_geo = build_dim_geolocation(cleaned["geolocation"])
+    logger.info("dim_geolocation: %s locations", f"{len(dim_geo):,}")
 
-    cleaned = _run_phase("PHASE 2: TRANSFORM", lambda: clean_all(dfs))
+    dim_customers = build_dim_customers(cleaned["customers"], dim_geo)
+    logger.info("dim_customers: %s customers", f"{len(dim_customers):,}")
 
-    def _build_dimensions_and_fact():
-        dim_dates = build_dim_dates(cleaned["orders"])
-        logger.info("dim_dates: %s entries", f"{len(dim_dates):,}")
+    dim_sellers = build_dim_sellers(cleaned["sellers"], dim_geo)
+    logger.info("dim_sellers: %s sellers", f"{len(dim_sellers):,}")
 
-        dim_geo = build_dim_geolocation(cleaned["geolocation"])
-        logger.info("dim_geolocation: %s locations", f"{len(dim_geo):,}")
+    dim_products = build_dim_products(cleaned["products"])
+    logger.info("dim_products: %s products", f"{len(dim_products):,}")
 
-        dim_customers = build_dim_customers(cleaned["customers"], dim_geo)
-        logger.info("dim_customers: %s customers", f"{len(dim_customers):,}")
+    fact = build_fact_orders(
+        cleaned["order_items"],
+        cleaned["orders"],
+        cleaned["order_payments"],
+        cleaned["order_reviews"],
+        dim_customers,
+        dim_sellers,
+        dim_products,
+        denormalize=denormalize,
+    )
+    logger.info("fact_orders: %s rows%s", f"{len(fact):,}", " (denormalized)" if denormalize else "")
+    return dim_dates, dim_geo, dim_customers, dim_sellers, dim_products, fact
 
-        dim_sellers = build_dim_sellers(cleaned["sellers"], dim_geo)
-        logger.info("dim_sellers: %s sellers", f"{len(dim_sellers):,}")
 
-        dim_products = build_dim_products(cleaned["products"])
-        logger.info("dim_products: %s products", f"{len(dim_products):,}")
+@contextmanager
+def etl_lock(database_dir: Path) -> Iterator[None]:
+    """Signale une écriture en cours dans ``database_dir`` (fichier ETL_LOCK_FILE).
 
-        fact = build_fact_orders(
-            cleaned["order_items"],
-            cleaned["orders"],
-            cleaned["order_payments"],
-            cleaned["order_reviews"],
-            dim_customers,
-            dim_sellers,
-            dim_products,
-        )
-        logger.info("fact_orders: %s rows", f"{len(fact):,}")
-        return dim_dates, dim_geo, dim_customers, dim_sellers, dim_products, fact
+    Le dashboard n'ouvre pas de connexion ``immutable=1`` tant que le verrou
+    est présent : la base peut encore changer sous ses pieds.
+    """
+    lock_path = database_dir / ETL_LOCK_FILE
+    lock_path.write_text(str(os.getpid()))
+    try:
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def run_full_pipeline() -> None:
+    """Extraction -> Transformation -> Construction des dimensions -> Chargement (+ scores)."""
+
+    layout = get_physical_layout()
+    denormalize = get_denormalize_fact()
+    partition_by = get_partition_scheme()
+
+    dfs = _run_phase("PHASE 1: EXTRACT", load_all_raw)
+
+    cleaned = _run_phase("PHASE 2: TRANSFORM", lambda: clean_all(dfs))
 
     dim_dates, dim_geo, dim_customers, dim_sellers, dim_products, fact = _run_phase(
         "PHASE 3: BUILD DIMENSIONS",
-        _build_dimensions_and_fact,
+        lambda: build_star_schema(cleaned, denormalize=denormalize),
     )
 
+    def _precompute_scores(staged_path: Path) -> None:
+        # Dans la base en préparation : publiée avec les faits, jamais sans ses scores.
+        _run_phase("PHASE 5: PRECOMPUTE SCORES", lambda: build_score_tables(staged_path))
+
     def _load():
         DATABASE_DIR.mkdir(parents=True, exist_ok=True)
         engine = get_engine()
@@ -96,9 +138,14 @@ def run_full_pipeline() -> None:
             dim_sellers,
             dim_products,
             fact,
+            layout=layout,
+            partition_by=partition_by,
+            before_publish=_precompute_scores,
         )
 
-    _run_phase("PHASE 4: LOAD INTO SQLITE", _load)
+    DATABASE_DIR.mkdir(parents=True, exist_ok=True)
+    with etl_lock(DATABASE_DIR):
+        _run_phase("PHASE 4: LOAD INTO SQLITE", _load)
 
     _log_phase("PIPELINE COMPLETE")
 
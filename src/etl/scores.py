@@ -0,0 +1,179 @@
+"""Scores précalculés : segmentation RFM et scoring vendeurs, une fois par chargement.
+
+Les métriques brutes par client et par vendeur sont agrégées en SQL (mêmes
+expressions que sql/dashboard/rfm_segmentation.sql et seller_scoring.sql) ;
+les quintiles NTILE(5), segments et rangs sont ensuite calculés en numpy puis
+écrits dans ``customer_rfm``, ``rfm_segments`` et ``seller_scores``. Les pages
+du dashboard lisent ces tables (sql/dashboard/precomputed/) au lieu de
+recalculer les fonctions de fenêtre à chaque affichage.
+"""
+
+import logging
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATABASE_PATH, PROJECT_ROOT
+from src.database.partitions import attach_partitions
+from src.database.sql_script import split_statements
+
+logger = logging.getLogger(__name__)
+
+SCORES_SQL_DIR = PROJECT_ROOT / "sql" / "scores"
+SCORE_TABLES = ("customer_rfm", "rfm_segments", "seller_scores")
+
+NTILE_BUCKETS = 5
+
+CUSTOMER_RFM_COLUMNS = [
+    "customer_unique_id", "recency", "frequency", "monetary",
+    "r_score", "f_score", "m_score", "segment",
+]
+SELLER_SCORE_COLUMNS = [
+    "seller_id", "seller_city", "seller_state",
+    "total_revenue", "nb_orders", "avg_review", "avg_delivery_days", "on_time_pct",
+    "revenue_score", "volume_score", "review_score_ntile", "delivery_score", "ontime_score",
+    "total_score", "seller_rank", "seller_dense_rank",
+]
+
+
+# ── Fonctions de fenêtre en numpy ────────────────────────────────────────
+
+def sqlite_ntile(values: np.ndarray, n: int = NTILE_BUCKETS, descending: bool = False) -> np.ndarray:
+    """Équivalent de ``NTILE(n) OVER (ORDER BY values [DESC], <position>)``.
+
+    Les ex-aequo gardent leur ordre d'entrée (tri stable) : l'appelant fournit
+    les lignes triées par identifiant, comme le départage des requêtes SQL.
+    Les NULL (NaN) sont classés comme SQLite : plus petits que toute valeur,
+    donc en tête en ASC et en queue en DESC. Comme NTILE, les ``N % n``
+    premiers groupes reçoivent une ligne de plus.
+    """
+    values = np.asarray(values, dtype="float64")
+    size = len(values)
+    if size == 0:
+        return np.empty(0, dtype="int64")
+    # Rang NULL-first en ASC : NaN remplacés par -inf, puis ordre inversé si DESC.
+    keys = np.where(np.isnan(values), -np.inf, values)
+    order = np.argsort(-keys if descending else keys, kind="stable")
+    position = np.empty(size, dtype="int64")
+    position[order] = np.arange(size)
+
+    base, remainder = divmod(size, n)
+    large = remainder * (base + 1)
+    bucket = np.where(
+        position < large,
+        position // (base + 1),
+        remainder + (position - large) // max(base, 1),
+    )
+    return bucket + 1
+
+
+def rank_desc(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """``RANK()`` et ``DENSE_RANK()`` sur ``ORDER BY values DESC``."""
+    values = np.asarray(values)
+    ascending = np.sort(values)
+    greater = len(values) - np.searchsorted(ascending, values, side="right")
+    distinct = np.unique(values)
+    distinct_greater = len(distinct) - np.searchsorted(distinct, values, side="right")
+    return greater + 1, distinct_greater + 1
+
+
+# ── Scores ───────────────────────────────────────────────────────────────
+
+def score_customers(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Quintiles R/F/M et segment par client (ordre des lignes = départage)."""
+    scored = metrics.reset_index(drop=True).copy()
+    r = sqlite_ntile(scored["recency"].to_numpy(), descending=True)
+    f = sqlite_ntile(scored["frequency"].to_numpy())
+    m = sqlite_ntile(scored["monetary"].to_numpy())
+    scored["r_score"], scored["f_score"], scored["m_score"] = r, f, m
+
+    # Même ordre d'évaluation que le CASE WHEN de rfm_segmentation.sql.
+    scored["segment"] = np.select(
+        [
+            (r >= 4) & (f >= 4),
+            (r <= 2) & (f >= 3),
+            f >= 3,
+            (r <= 2) & (f <= 2),
+            (r >= 4) & (f == 1),
+        ],
+        ["Champions", "At Risk", "Loyal", "Lost", "New"],
+        default="Others",
+    )
+    return scored[CUSTOMER_RFM_COLUMNS]
+
+
+def score_sellers(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Cinq quintiles, score total et rangs par vendeur (ordre des lignes = départage)."""
+    scored = metrics.reset_index(drop=True).copy()
+    scored["revenue_score"] = sqlite_ntile(scored["total_revenue"].to_numpy())
+    scored["volume_score"] = sqlite_ntile(scored["nb_orders"].to_numpy())
+    scored["review_score_ntile"] = sqlite_ntile(scored["avg_review"].to_numpy())
+    scored["delivery_score"] = sqlite_ntile(scored["avg_delivery_days"].to_numpy(), descending=True)
+    scored["ontime_score"] = sqlite_ntile(scored["on_time_pct"].to_numpy())
+    scored["total_score"] = scored[
+        ["revenue_score", "volume_score", "review_score_ntile", "delivery_score", "ontime_score"]
+    ].sum(axis=1)
+    scored["seller_rank"], scored["seller_dense_rank"] = rank_desc(scored["total_score"].to_numpy())
+    return scored[SELLER_SCORE_COLUMNS]
+
+
+# ── Écriture ─────────────────────────────────────────────────────────────
+
+def _records(df: pd.DataFrame) -> list[tuple]:
+    """Lignes en types Python natifs (NaN -> NULL) pour executemany."""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    columns = ", ".join(df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+    conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", _records(df))
+
+
+def build_score_tables(db_path: Path = DATABASE_PATH) -> dict[str, int]:
+    """(Re)construire customer_rfm, rfm_segments et seller_scores dans l'entrepôt.
+
+    Les trois tables sont remplacées dans une seule transaction. Le pipeline
+    l'appelle sur la base en préparation (``load_to_sqlite(before_publish=...)``),
+    publiée ensuite d'un bloc. Retourne le nombre de lignes écrites par table.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA temp_store = MEMORY")
+        attach_partitions(conn, db_path, read_only=False)
+
+        customer_metrics = pd.read_sql_query(
+            (SCORES_SQL_DIR / "customer_rfm_metrics.sql").read_text(), conn
+        )
+        seller_metrics = pd.read_sql_query((SCORES_SQL_DIR / "seller_metrics.sql").read_text(), conn)
+        customers = score_customers(customer_metrics)
+        sellers = score_sellers(seller_metrics)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in split_statements((SCORES_SQL_DIR / "score_tables.sql").read_text()):
+                conn.execute(statement)
+            _insert(conn, "customer_rfm", customers)
+            _insert(conn, "seller_scores", sellers)
+            conn.execute((SCORES_SQL_DIR / "rfm_segments.sql").read_text())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in SCORE_TABLES
+        }
+    finally:
+        conn.close()
+
+    logger.info(
+        "Score tables built: %s customers, %s segments, %s sellers.",
+        f"{counts['customer_rfm']:,}",
+        counts["rfm_segments"],
+        f"{counts['seller_scores']:,}",
+    )
+    return counts
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 from src.config import CSV_FILES, DATABASE_PATH, RAW_DIR
+from src.database.partitions import MANIFEST_TABLE, read_manifest
 
 if TYPE_CHECKING:
     from src.launcher.ui import UIManager
@@ -131,6 +132,23 @@ class HealthChecker:
                 cursor.execute(f"SELECT COUNT(*) FROM {table}")
                 row_counts[table] = cursor.fetchone()[0]
 
+            # Base partitionnée : fact_orders est répartie dans les fichiers du manifeste
+            missing_partitions = []
+            if MANIFEST_TABLE in tables:
+                partitions = read_manifest(conn)
+                missing_partitions = [
+                    p.file_name for p in partitions
+                    if not DATABASE_PATH.with_name(p.file_name).exists()
+                ]
+                size_mb += sum(
+                    DATABASE_PATH.with_name(p.file_name).stat().st_size
+                    for p in partitions
+                    if p.file_name not in missing_partitions
+                ) / (1024 * 1024)
+                tables = sorted(set(tables) - {MANIFEST_TABLE} | {"fact_orders"})
+                del row_counts[MANIFEST_TABLE]
+                row_counts["fact_orders"] = sum(p.row_count for p in partitions)
+
             conn.close()
 
             expected_tables = {
@@ -142,7 +160,16 @@ class HealthChecker:
                 "fact_orders",
             }
 
-            valid_schema = set(tables) == expected_tables
+            # Tables dérivées, écrites par la phase de scores de l'ETL
+            optional_tables = {"customer_rfm", "rfm_segments", "seller_scores"}
+
+            valid_schema = (
+                expected_tables <= set(tables) <= expected_tables | optional_tables
+                and not missing_partitions
+            )
+
+            if missing_partitions:
+                self.ui.warning(f"Missing fact partitions: {', '.join(missing_partitions)}")
 
             if valid_schema:
                 self.ui.success(f"Database exists ({size_mb:.1f} MB)")
@@ -324,7 +324,15 @@ class OlistOrchestrator:
 
             if ready:
                 url = f"http://localhost:{self.port}/presentation"
-                self.ui.info(f"Dashboard is ready at {url}")
+                self.ui.info(f"Dashboard server is up at {url}")
+
+                # Attendre le pré-calcul des requêtes (non bloquant en cas d'échec)
+                from src.launcher.splash.health import wait_for_dashboard_warm
+                warm = await wait_for_dashboard_warm(
+                    self.port, timeout=60, on_progress=self.ui.show_warmup_progress
+                )
+                if not warm:
+                    self.ui.warning("Dashboard warmup not finished, pages may load slowly at first")
 
                 # Afficher la success box (qui déclenche le redirect)
                 self.ui.show_success_box(url)
@@ -18,6 +18,7 @@ class EventType(str, Enum):
     PHASE_COMPLETE = "phase_complete"
     LOG = "log"
     DASHBOARD_READY = "dashboard_ready"
+    DASHBOARD_WARMUP = "dashboard_warmup"
     ERROR = "error"
     CONNECTED = "connected"
 
@@ -4,7 +4,7 @@ Health check pour vérifier que le dashboard est prêt.
 
 import asyncio
 import aiohttp
-from typing import Optional
+from typing import Callable, Optional
 
 
 async def wait_for_dashboard_ready(
@@ -42,6 +42,50 @@ async def wait_for_dashboard_ready(
     return False
 
 
+async def wait_for_dashboard_warm(
+    port: int = 8080,
+    timeout: int = 60,
+    interval: float = 0.5,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> bool:
+    """
+    Poll /api/warmup jusqu'à ce que les requêtes des pages soient en cache.
+
+    Distinct de ``wait_for_dashboard_ready`` : le serveur peut répondre alors
+    que le pré-calcul tourne encore.
+
+    Args:
+        port: Port du dashboard (défaut: 8080)
+        timeout: Timeout maximum en secondes (défaut: 60)
+        interval: Intervalle entre les polls en secondes (défaut: 0.5)
+        on_progress: Callback appelé à chaque changement d'avancement
+
+    Returns:
+        True si le dashboard est chaud (ou pré-calcul désactivé), False si timeout
+    """
+    url = f"http://localhost:{port}/api/warmup"
+    start_time = asyncio.get_event_loop().time()
+    last: Optional[dict] = None
+
+    async with aiohttp.ClientSession() as session:
+        while (asyncio.get_event_loop().time() - start_time) < timeout:
+            try:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=2)) as resp:
+                    if resp.status == 200:
+                        progress = await resp.json()
+                        if on_progress is not None and progress != last:
+                            on_progress(progress)
+                        last = progress
+                        if progress.get("state") in ("warm", "disabled"):
+                            return True
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                pass
+
+            await asyncio.sleep(interval)
+
+    return False
+
+
 async def check_dashboard_health(port: int = 8080) -> Optional[dict]:
     """
     Vérifie si le dashboard répond (check unique, pas de retry).
@@ -110,6 +110,10 @@ class SplashClient {
                 this.addLog(data);
                 break;
 
+            case 'dashboard_warmup':
+                this.updateWarmup(data);
+                break;
+
             case 'dashboard_ready':
                 this.showSuccess(data);
                 break;
@@ -152,6 +156,22 @@ class SplashClient {
         });
     }
 
+    /**
+     * Affiche l'avancement du pré-calcul des requêtes (serveur up, dashboard pas encore chaud)
+     */
+    updateWarmup(data) {
+        const { state, done = 0, total = 0 } = data;
+        if (state === 'warm') {
+            this.elements.phaseTitle.textContent = 'Dashboard warm';
+            this.addLog({
+                level: 'SUCCESS',
+                message: `✓ Dashboard warm: ${done}/${total} queries cached`,
+            });
+        } else {
+            this.elements.phaseTitle.textContent = `Warming queries ${done}/${total}`;
+        }
+    }
+
     /**
      * Met à jour la barre de progression
      */
@@ -132,6 +132,14 @@ class UIManager:
         color = level_colors.get(level.upper(), Fore.WHITE)
         print(f"  {color}[{level}] {message}{Style.RESET_ALL}")
 
+    def show_warmup_progress(self, progress: dict) -> None:
+        """Afficher l'avancement du pré-calcul des requêtes du dashboard."""
+        if progress.get("state") == "warm":
+            self.success(
+                f"Dashboard warm: {progress['done']}/{progress['total']} queries cached "
+                f"in {progress['elapsed_s']:.1f}s"
+            )
+
     def show_success_box(self, url: str) -> None:
         """Afficher la box de succès finale avec l'URL du dashboard."""
         if self.quiet:
@@ -250,6 +258,12 @@ class WebSocketUIAdapter(UIManager):
             return
         self._send_log(level.upper(), message)
 
+    def show_warmup_progress(self, progress: dict) -> None:
+        """Envoie l'avancement du pré-calcul via WebSocket."""
+        from .splash.events import EventType
+
+        self._schedule_broadcast(EventType.DASHBOARD_WARMUP, progress)
+
     def show_success_box(self, url: str) -> None:
         """Envoie l'événement dashboard_ready via WebSocket."""
         from .splash.events import EventType
@@ -1,7 +1,7 @@
 """Tests unitaires pour ExplainVisualizer."""
 
 import pytest
-from src.dashboard.components.explain_visualizer import ExplainVisualizer
+from src.dashboard.components.explain_visualizer import ExplainVisualizer, parse_explain
 
 
 def test_parse_explain_scan():
@@ -110,3 +110,16 @@ QUERY PLAN
     if viz.current_step_index > 0:
         viz.current_step_index -= 1
     assert viz.current_step_index == 0, "Ne devrait pas aller en dessous de 0"
+
+
+def test_parse_explain_modern_format_and_depth():
+    """Vérifie le format SQLite >= 3.36 (sans TABLE) et la profondeur dans l'arbre."""
+    explain_output = """QUERY PLAN
+|--CO-ROUTINE sub
+|  `--SCAN fact_orders
+`--SEARCH d USING INTEGER PRIMARY KEY (rowid=?)"""
+
+    steps = parse_explain(explain_output)
+
+    assert [s['type'] for s in steps] == ['other', 'scan', 'search_indexed']
+    assert [s['depth'] for s in steps] == [0, 1, 0]
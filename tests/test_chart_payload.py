@@ -0,0 +1,118 @@
+"""Tests de la couche de charges utiles des graphiques."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dashboard import chart_payload
+from src.dashboard.chart_payload import (
+    PayloadCache,
+    columns_payload,
+    echarts_dataset,
+    echarts_matrix,
+    frame_hash,
+    get_chart_precision,
+    payload_json,
+    plotly_arrays,
+    records,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(chart_payload, "_cache", PayloadCache(8))
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "month": ["2017-01", "2017-02", "2017-03"],
+        "revenue": [1234.5678, np.nan, 42.0],
+        "orders": [10, 20, 30],
+        "day": pd.to_datetime(["2017-01-01", None, "2017-03-01"]),
+    })
+
+
+def test_columns_payload_rounds_and_nulls_missing_values():
+    payload = columns_payload(_frame(), precision=1)
+
+    assert payload == {
+        "month": ["2017-01", "2017-02", "2017-03"],
+        "revenue": [1234.6, None, 42.0],
+        "orders": [10, 20, 30],
+        "day": ["2017-01-01T00:00:00", None, "2017-03-01T00:00:00"],
+    }
+    assert echarts_dataset(_frame(), ["month", "orders"]) == {
+        "dimensions": ["month", "orders"],
+        "source": {"month": ["2017-01", "2017-02", "2017-03"], "orders": [10, 20, 30]},
+    }
+
+
+def test_records_match_to_dict_up_to_precision():
+    df = _frame()[["month", "revenue", "orders"]]
+
+    assert records(df, precision=2) == [
+        {"month": "2017-01", "revenue": 1234.57, "orders": 10},
+        {"month": "2017-02", "revenue": None, "orders": 20},
+        {"month": "2017-03", "revenue": 42.0, "orders": 30},
+    ]
+
+
+def test_object_columns_with_missing_values_leave_input_untouched():
+    df = pd.DataFrame({
+        "prev_revenue": pd.Series([None, None], dtype=object),
+        "state": pd.Series(["SP", None], dtype=object),
+    })
+    before = df.copy()
+
+    assert chart_payload.column_values(df["prev_revenue"]) == [None, None]
+    assert records(df) == [
+        {"prev_revenue": None, "state": "SP"},
+        {"prev_revenue": None, "state": None},
+    ]
+    pd.testing.assert_frame_equal(df, before)
+    assert df["state"].isna().tolist() == [False, True]
+
+
+def test_echarts_matrix_skips_missing_cells():
+    matrix = pd.DataFrame({1: [12.345, np.nan], 2: [0.0, 7.0]}, index=["2017-01", "2017-02"])
+
+    assert echarts_matrix(matrix, precision=1)["source"] == {
+        "x": [0, 1, 1],
+        "y": [0, 0, 1],
+        "value": [12.3, 0.0, 7.0],
+    }
+
+
+def test_plotly_arrays_keep_numeric_columns_as_numpy():
+    arrays = plotly_arrays(_frame(), ["month", "revenue", "orders"], precision=0)
+
+    assert arrays["month"] == ["2017-01", "2017-02", "2017-03"]
+    assert arrays["orders"].dtype.kind == "i"
+    np.testing.assert_array_equal(arrays["revenue"], [1235.0, np.nan, 42.0])
+
+
+def test_payloads_cached_by_result_hash():
+    cache = chart_payload.payload_cache()
+    first = payload_json(_frame(), ["month", "orders"])
+    second = payload_json(_frame().copy(), ["month", "orders"])
+
+    assert first is second
+    assert json.loads(first) == {"month": ["2017-01", "2017-02", "2017-03"], "orders": [10, 20, 30]}
+    assert cache.hits == 1
+
+    changed = _frame()
+    changed.loc[0, "orders"] = 11
+    assert frame_hash(changed) != frame_hash(_frame())
+
+
+def test_chart_precision_from_env(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_CHART_PRECISION", raising=False)
+    assert get_chart_precision() == 2
+    monkeypatch.setenv("DASHBOARD_CHART_PRECISION", "4")
+    assert get_chart_precision() == 4
+    for raw in ("-1", "deux"):
+        monkeypatch.setenv("DASHBOARD_CHART_PRECISION", raw)
+        with pytest.raises(ValueError, match="DASHBOARD_CHART_PRECISION invalide"):
+            get_chart_precision()
@@ -0,0 +1,61 @@
+"""Tests du moteur de matrices de cohortes."""
+
+import numpy as np
+import pandas as pd
+
+from src.dashboard.cohort_engine import build_cohorts, cohorts_from_frame, month_index
+
+
+def _activity() -> pd.DataFrame:
+    # clients 1, 2 : cohorte 2017-11 ; 3 : cohorte 2017-12 ; données jusqu'à 2018-02.
+    return pd.DataFrame({
+        "customer_unique_key": [1, 1, 1, 2, 3, 3, 1],
+        "order_month": [201711, 201712, 201802, 201711, 201712, 201801, 201711],
+        "revenue": [10.0, 5.0, 20.0, 30.0, 8.0, 2.0, 1.0],
+    })
+
+
+def test_month_index_crosses_years():
+    assert (month_index(np.array([201802])) - month_index(np.array([201712])))[0] == 2
+
+
+def test_matrices_count_distinct_customers_and_revenue():
+    m = cohorts_from_frame(_activity())
+
+    assert m.cohorts.tolist() == [201711, 201712]
+    assert m.labels == ["2017-11", "2017-12"]
+    assert m.sizes.tolist() == [2, 1]
+    # Le client 1 est compté une fois en 2017-11 malgré deux lignes ; revenus additionnés.
+    assert m.active.tolist() == [[2, 1, 0, 1], [1, 1, 0, 0]]
+    assert m.revenue[0].tolist() == [41.0, 5.0, 0.0, 20.0]
+
+
+def test_unobserved_months_are_nan_and_ltv_cumulates():
+    m = cohorts_from_frame(_activity())
+
+    np.testing.assert_allclose(m.retention[0], [100.0, 50.0, 0.0, 50.0])
+    assert np.isnan(m.retention[1, 3])  # 2017-12 + 3 mois > 2018-02
+    np.testing.assert_allclose(m.ltv[0], [20.5, 23.0, 23.0, 33.0])
+    np.testing.assert_allclose(m.ltv[1, :3], [8.0, 10.0, 10.0])
+
+
+def test_select_and_long_format():
+    m = cohorts_from_frame(_activity())
+    small = m.select(min_size=2, horizon=2)
+
+    assert small.cohorts.tolist() == [201711]
+    assert small.active.shape == (1, 2)
+    long = m.long()
+    assert list(long.columns) == [
+        "cohort_month", "months_since_first", "nb_customers",
+        "cohort_revenue", "cumulative_revenue", "ltv_per_customer",
+    ]
+    assert len(long) == 5  # cellules observées avec activité
+    assert m.frame(m.retention).index.tolist() == ["2017-11", "2017-12"]
+
+
+def test_empty_activity():
+    m = build_cohorts(np.array([], dtype=object), np.array([], dtype=np.int64))
+
+    assert m.active.shape == (0, 1)
+    assert m.long().empty
@@ -1,11 +1,39 @@
 """Tests pour la couche DB du dashboard."""
 
+import asyncio
+import os
 import sqlite3
+import threading
+import time
 
+import pandas as pd
+import pytest
+
+from src.config import PROJECT_ROOT
 from src.dashboard import db as dashboard_db
 
 
-def test_get_connection_sets_temp_store_memory(tmp_path, monkeypatch):
+@pytest.fixture(autouse=True)
+def fresh_pool(tmp_path, monkeypatch):
+    """Pool de connexions et caches neufs pour chaque test."""
+    pool = dashboard_db.ConnectionPool(dashboard_db._open_connection, max_size=2)
+    monkeypatch.setattr(dashboard_db, "_pool", pool)
+    monkeypatch.setattr(dashboard_db, "_db_identity", None)
+    monkeypatch.setattr(dashboard_db, "_capabilities_version", None)
+    monkeypatch.setattr(dashboard_db, "_query_cache", dashboard_db.QueryCache(1024 * 1024))
+    monkeypatch.setattr(
+        dashboard_db, "_disk_cache", dashboard_db.DiskResultStore(tmp_path / "disk_cache", 0, 3600.0)
+    )
+    monkeypatch.setattr(dashboard_db, "_fingerprint_memo", None)
+    monkeypatch.setattr(dashboard_db, "_telemetry", dashboard_db.QueryTelemetry(1.0))
+    monkeypatch.setattr(
+        dashboard_db, "_slow_log", dashboard_db.SlowQueryLog(tmp_path / "slow.jsonl", 0.0, 1024 * 1024)
+    )
+    yield pool
+    pool.reset()
+
+
+def test_pooled_connection_sets_temp_store_memory(tmp_path, monkeypatch):
     """La connexion dashboard force temp_store en mémoire."""
     db_path = tmp_path / "dashboard_test.db"
 
@@ -19,20 +47,788 @@ def test_get_connection_sets_temp_store_memory(tmp_path, monkeypatch):
     conn.commit()
     conn.close()
 
-    monkeypatch.setattr(dashboard_db, "_conn", None)
     monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
     monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
 
-    ro_conn = dashboard_db.get_connection()
-    temp_store = ro_conn.execute("PRAGMA temp_store").fetchone()[0]
-    busy_timeout = ro_conn.execute("PRAGMA busy_timeout").fetchone()[0]
-    distinct_orders = ro_conn.execute(
-        "SELECT COUNT(DISTINCT order_id) FROM fact_orders"
-    ).fetchone()[0]
+    with dashboard_db.connection() as ro_conn:
+        temp_store = ro_conn.execute("PRAGMA temp_store").fetchone()[0]
+        busy_timeout = ro_conn.execute("PRAGMA busy_timeout").fetchone()[0]
+        distinct_orders = ro_conn.execute(
+            "SELECT COUNT(DISTINCT order_id) FROM fact_orders"
+        ).fetchone()[0]
 
     assert temp_store == 2  # 2 = MEMORY
     assert busy_timeout == 5000
     assert distinct_orders == 2
 
-    ro_conn.close()
-    monkeypatch.setattr(dashboard_db, "_conn", None)
+
+def test_query_from_file_uses_denormalized_variant(tmp_path, monkeypatch):
+    """La réécriture sans jointure n'est choisie que si fact_orders est dénormalisée."""
+    db_path = tmp_path / "dashboard_test.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE fact_orders (order_id TEXT, customer_unique_key INTEGER)")
+    conn.commit()
+    conn.close()
+
+    sql_dir = tmp_path / "dashboard"
+    (sql_dir / "denormalized").mkdir(parents=True)
+    (sql_dir / "kpi.sql").write_text("SELECT 'canonical' AS variant")
+    (sql_dir / "denormalized" / "kpi.sql").write_text("SELECT 'denormalized' AS variant")
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    monkeypatch.setattr(dashboard_db, "_SQL_DIR", sql_dir)
+    monkeypatch.setattr(dashboard_db, "_DENORMALIZED_SQL_DIR", sql_dir / "denormalized")
+    monkeypatch.setattr(dashboard_db, "_fact_denormalized", False)
+
+    # month_key absent : variante canonique
+    _, df = dashboard_db.query_from_file("kpi.sql")
+    assert df["variant"].iloc[0] == "canonical"
+
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("ALTER TABLE fact_orders ADD COLUMN month_key INTEGER")
+    conn.commit()
+    conn.close()
+
+    sql, df = dashboard_db.query_from_file("kpi.sql")
+    assert df["variant"].iloc[0] == "denormalized"
+    assert "denormalized" in sql
+
+
+def test_query_from_file_prefers_precomputed_scores(tmp_path, monkeypatch):
+    """Les tables de scores de l'ETL priment sur la variante dénormalisée."""
+    db_path = tmp_path / "dashboard_test.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE fact_orders (order_id TEXT, customer_unique_key INTEGER, month_key INTEGER)")
+    conn.commit()
+    conn.close()
+
+    sql_dir = tmp_path / "dashboard"
+    for variant in ("denormalized", "precomputed"):
+        (sql_dir / variant).mkdir(parents=True)
+        (sql_dir / variant / "rfm.sql").write_text(f"SELECT '{variant}' AS variant")
+    (sql_dir / "rfm.sql").write_text("SELECT 'canonical' AS variant")
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    monkeypatch.setattr(dashboard_db, "_SQL_DIR", sql_dir)
+    monkeypatch.setattr(dashboard_db, "_DENORMALIZED_SQL_DIR", sql_dir / "denormalized")
+    monkeypatch.setattr(dashboard_db, "_PRECOMPUTED_SQL_DIR", sql_dir / "precomputed")
+    monkeypatch.setattr(dashboard_db, "_scores_precomputed", False)
+
+    _, df = dashboard_db.query_from_file("rfm.sql")
+    assert df["variant"].iloc[0] == "denormalized"
+
+    conn = sqlite3.connect(str(db_path))
+    for table in ("customer_rfm", "rfm_segments", "seller_scores"):
+        conn.execute(f"CREATE TABLE {table} (id INTEGER)")
+    conn.commit()
+    conn.close()
+
+    _, df = dashboard_db.query_from_file("rfm.sql")
+    assert df["variant"].iloc[0] == "precomputed"
+
+
+def test_query_from_file_pushes_filters_and_caches_each_selection(tmp_path, monkeypatch):
+    """Filtres actifs : template canonique filtré, une entrée de cache par sélection."""
+    db_path = tmp_path / "dashboard_test.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        """
+        CREATE TABLE dim_customers (customer_key INTEGER PRIMARY KEY, state TEXT);
+        CREATE TABLE fact_orders (order_id TEXT, date_key INTEGER, customer_key INTEGER, price REAL);
+        CREATE TABLE customer_rfm (id INTEGER);
+        CREATE TABLE rfm_segments (id INTEGER);
+        CREATE TABLE seller_scores (id INTEGER);
+        INSERT INTO dim_customers VALUES (1, 'SP'), (2, 'RJ');
+        INSERT INTO fact_orders VALUES ('o1', 20170105, 1, 10.0), ('o2', 20180210, 2, 30.0);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    sql_dir = tmp_path / "dashboard"
+    (sql_dir / "precomputed").mkdir(parents=True)
+    (sql_dir / "precomputed" / "kpi.sql").write_text("SELECT 0.0 AS revenue")
+    (sql_dir / "kpi.sql").write_text("SELECT SUM(price) AS revenue FROM fact_orders")
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    monkeypatch.setattr(dashboard_db, "_SQL_DIR", sql_dir)
+    monkeypatch.setattr(dashboard_db, "_PRECOMPUTED_SQL_DIR", sql_dir / "precomputed")
+    monkeypatch.setattr("src.dashboard.filters._VIEWS_SQL", tmp_path / "missing_views.sql")
+
+    _, df = dashboard_db.query_from_file("kpi.sql")
+    assert df["revenue"].iloc[0] == 0.0
+
+    sp = dashboard_db.DashboardFilters(customer_state="SP")
+    sql, df = dashboard_db.query_from_file("kpi.sql", sp)
+    assert "-- Filtres du dashboard" in sql
+    assert df["revenue"].iloc[0] == 10.0
+
+    rj = dashboard_db.DashboardFilters(customer_state="RJ", date_from=20180101)
+    assert dashboard_db.query_from_file("kpi.sql", rj)[1]["revenue"].iloc[0] == 30.0
+    assert dashboard_db.query_from_file("kpi.sql", sp)[1]["revenue"].iloc[0] == 10.0
+
+    stats = dashboard_db.query_cache_stats()
+    assert (stats.hits, stats.entries) == (1, 3)
+
+    # Résolution sans exécution (ETag de l'API) : même SQL, aucun accès au cache.
+    sql_sp, params, fingerprint = dashboard_db.resolve_query_file("kpi.sql", sp)
+    assert sql_sp == sql and params == {"customer_state": "SP"}
+    assert fingerprint == dashboard_db.resolve_query_file("kpi.sql")[2]
+    assert dashboard_db.query_cache_stats() == stats
+    assert dashboard_db.dashboard_sql_files() == ["kpi.sql"]
+
+
+def test_partitioned_warehouse_routes_date_range(tmp_path, monkeypatch):
+    """Base partitionnée : vue fact_orders sur les partitions, élaguée par date_range."""
+    db_path = tmp_path / "olist.db"
+    for label, date_key, price in (("2017", 20170610, 10.0), ("2018", 20180210, 32.0)):
+        part = sqlite3.connect(str(tmp_path / f"olist.fact_{label}.db"))
+        part.execute("CREATE TABLE fact_orders (order_id TEXT, date_key INTEGER, price REAL)")
+        part.execute("INSERT INTO fact_orders VALUES (?, ?, ?)", (f"o{label}", date_key, price))
+        part.commit()
+        part.close()
+
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript((PROJECT_ROOT / "sql" / "fact_partitions.sql").read_text())
+    conn.executemany(
+        "INSERT INTO fact_partitions VALUES (?, ?, ?, ?, 1, 'h')",
+        [
+            ("2017", "olist.fact_2017.db", 20170101, 20171231),
+            ("2018", "olist.fact_2018.db", 20180101, 20181231),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    monkeypatch.setattr(dashboard_db, "_partitions", [])
+
+    total = dashboard_db.query("SELECT SUM(price) AS s FROM fact_orders")
+    assert total["s"].iloc[0] == 42.0
+
+    # Sans filtre date_key, la requête routée ne lit que la partition 2018.
+    routed = dashboard_db.query(
+        "SELECT COUNT(*) AS n, SUM(price) AS s FROM fact_orders",
+        date_range=(20180101, 20180331),
+    )
+    assert routed.iloc[0].tolist() == [1, 32.0]
+    with dashboard_db.connection() as ro_conn:
+        views = ro_conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'view'")
+        assert {row[0] for row in views} == {"fact_orders", "fact_orders__2018"}
+
+
+def test_query_statements_shares_temp_table(tmp_path, monkeypatch):
+    """La table TEMP est calculée une fois, relue par chaque SELECT, puis supprimée."""
+    db_path = tmp_path / "dashboard_test.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE fact_orders (order_id TEXT, price REAL)")
+    conn.executemany(
+        "INSERT INTO fact_orders VALUES (?, ?)",
+        [("o1", 10.0), ("o1", 5.0), ("o2", 7.0)],
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+
+    frames = dashboard_db.query_statements("""
+        DROP TABLE IF EXISTS temp.order_totals;
+        CREATE TEMP TABLE order_totals AS
+        SELECT order_id, SUM(price) AS total FROM fact_orders GROUP BY order_id;
+        SELECT COUNT(*) AS n FROM order_totals;
+        SELECT order_id, total FROM order_totals ORDER BY total DESC;
+    """)
+
+    assert len(frames) == 2
+    assert frames[0]["n"].iloc[0] == 2
+    assert frames[1]["order_id"].tolist() == ["o1", "o2"]
+    with dashboard_db.connection() as ro_conn:
+        assert ro_conn.execute("SELECT name FROM sqlite_temp_master").fetchall() == []
+
+
+def _cached_db(tmp_path, monkeypatch, values):
+    """Base minimale + cache de résultats neuf pour les tests de cache."""
+    db_path = tmp_path / "cache_test.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(v,) for v in values])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    return db_path
+
+
+def test_query_cache_hits_and_protects_entries(tmp_path, monkeypatch):
+    """Un second appel est servi par le cache ; modifier le résultat ne le corrompt pas."""
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+
+    first = dashboard_db.query("SELECT v FROM t ORDER BY v")
+    first.loc[0, "v"] = 99
+    first["extra"] = 0
+    # Même requête aux espaces et commentaires près : même entrée.
+    second = dashboard_db.query("SELECT v\n  FROM t -- tri\n ORDER BY v;")
+
+    stats = dashboard_db.query_cache_stats()
+    assert second["v"].tolist() == [1, 2, 3]
+    assert list(second.columns) == ["v"]
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+    second.loc[1, "v"] = -1
+    assert dashboard_db.query("SELECT v FROM t ORDER BY v")["v"].tolist() == [1, 2, 3]
+
+
+def test_query_cache_invalidated_by_write_and_swap(tmp_path, monkeypatch):
+    """Une écriture (data_version) ou un remplacement du fichier change la version."""
+    db_path = _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    assert dashboard_db.query("SELECT SUM(v) AS s FROM t")["s"].iloc[0] == 6
+
+    rw = sqlite3.connect(str(db_path))
+    rw.execute("INSERT INTO t VALUES (4)")
+    rw.commit()
+    rw.close()
+    assert dashboard_db.query("SELECT SUM(v) AS s FROM t")["s"].iloc[0] == 10
+
+    # Rechargement ETL : nouvelle base écrite à côté puis os.replace.
+    new_path = tmp_path / "cache_test.db.tmp"
+    rw = sqlite3.connect(str(new_path))
+    rw.execute("CREATE TABLE t (v INTEGER)")
+    rw.execute("INSERT INTO t VALUES (100)")
+    rw.commit()
+    rw.close()
+    os.replace(new_path, db_path)
+
+    assert dashboard_db.query("SELECT SUM(v) AS s FROM t")["s"].iloc[0] == 100
+    assert dashboard_db.query_cache_stats().hits == 0
+
+
+def test_query_cache_evicts_least_recently_used():
+    """L'éviction suit l'ordre LRU et respecte le budget mémoire."""
+    frame = pd.DataFrame({"v": range(100)})
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = dashboard_db.QueryCache(max_bytes=2 * size)
+
+    cache.put(("a",), frame)
+    cache.put(("b",), frame)
+    assert cache.get(("a",)) is not None  # "a" devient le plus récent
+    cache.put(("c",), frame)
+
+    stats = cache.stats()
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    assert (stats.entries, stats.evictions) == (2, 1)
+    assert stats.size_bytes <= stats.max_bytes
+
+
+def test_query_cache_size_from_env(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_QUERY_CACHE_MB", "8")
+    assert dashboard_db.get_query_cache_bytes() == 8 * 1024 * 1024
+
+    monkeypatch.setenv("DASHBOARD_QUERY_CACHE_MB", "beaucoup")
+    with pytest.raises(ValueError, match="DASHBOARD_QUERY_CACHE_MB"):
+        dashboard_db.get_query_cache_bytes()
+
+
+def test_connection_pool_bounds_and_metrics():
+    """Le pool ne dépasse pas sa taille, mesure l'attente et rend les connexions."""
+    pool = dashboard_db.ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), 2)
+    release = threading.Event()
+    both_in_use = threading.Barrier(3)
+
+    def hold():
+        with pool.connection():
+            both_in_use.wait()
+            release.wait()
+
+    holders = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in holders:
+        thread.start()
+    both_in_use.wait()
+    assert pool.stats().in_use == 2
+
+    with pytest.raises(TimeoutError):
+        with pool.connection(timeout=0.05):
+            pass
+
+    threading.Timer(0.05, release.set).start()
+    with pool.connection(timeout=5) as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    for thread in holders:
+        thread.join()
+
+    stats = pool.stats()
+    assert (stats.size, stats.max_size, stats.in_use) == (2, 2, 0)
+    assert (stats.waits, stats.timeouts) == (1, 1)
+    assert stats.max_wait_s >= 0.04
+    pool.reset()
+    assert pool.stats().size == 0
+
+
+def test_concurrent_queries_use_separate_connections(tmp_path, monkeypatch):
+    """Des requêtes simultanées empruntent des connexions distinctes du pool."""
+    _cached_db(tmp_path, monkeypatch, range(10))
+    errors: list[Exception] = []
+
+    def run():
+        try:
+            for _ in range(20):
+                df = dashboard_db.query("SELECT SUM(v) AS s FROM t", cache=False)
+                assert df["s"].iloc[0] == 45
+        except Exception as exc:  # pragma: no cover - remonté par l'assert
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = dashboard_db.pool_stats()
+    assert errors == []
+    assert stats.checkouts == 80
+    assert 1 <= stats.size <= stats.max_size == 2
+    assert stats.in_use == 0
+
+
+def test_aquery_runs_off_the_event_loop(tmp_path, monkeypatch):
+    """aquery rend le même résultat que query, via le cache partagé."""
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+
+    async def scenario():
+        return await asyncio.gather(
+            dashboard_db.aquery("SELECT SUM(v) AS s FROM t"),
+            dashboard_db.aquery("SELECT COUNT(*) AS n FROM t"),
+        )
+
+    total, count = asyncio.run(scenario())
+
+    assert total["s"].iloc[0] == 6
+    assert count["n"].iloc[0] == 3
+    assert dashboard_db.query("SELECT SUM(v) AS s FROM t")["s"].iloc[0] == 6
+    assert dashboard_db.query_cache_stats().hits == 1
+
+
+def test_filter_options_load_through_aquery(tmp_path, monkeypatch):
+    """Options de la barre de filtres : requêtes asynchrones, aucune sur la boucle."""
+    from src.dashboard.components import filter_bar
+
+    db_path = tmp_path / "olist.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        "CREATE TABLE dim_customers (state TEXT);"
+        "CREATE TABLE dim_sellers (state TEXT);"
+        "CREATE TABLE dim_products (category_name_en TEXT, category_name_pt TEXT);"
+        "CREATE TABLE fact_orders (date_key INTEGER);"
+        "INSERT INTO dim_customers VALUES ('SP'), ('RJ'), (NULL);"
+        "INSERT INTO dim_sellers VALUES ('PR');"
+        "INSERT INTO dim_products VALUES ('toys', 'brinquedos'), (NULL, 'beleza');"
+        "INSERT INTO fact_orders VALUES (20170105), (20180820);"
+    )
+    conn.close()
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+
+    def blocking_query(*args, **kwargs):
+        raise AssertionError("db.query bloquant appelé depuis la barre de filtres")
+
+    monkeypatch.setattr(dashboard_db, "query", blocking_query)
+    options = asyncio.run(filter_bar.filter_options())
+
+    assert options == {
+        "customer_states": ["RJ", "SP"],
+        "seller_states": ["PR"],
+        "categories": ["beleza", "toys"],
+        "first_key": 20170105,
+        "last_key": 20180820,
+    }
+
+
+def test_aquery_cancellation_interrupts_sqlite(tmp_path, monkeypatch):
+    """Annuler la tâche (client déconnecté) interrompt la requête SQLite en cours."""
+    _cached_db(tmp_path, monkeypatch, [1])
+    endless = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+        "SELECT MAX(i) FROM n"
+    )
+
+    async def scenario():
+        task = asyncio.create_task(dashboard_db.aquery(endless, cache=False))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.perf_counter()
+    asyncio.run(scenario())
+    while dashboard_db.pool_stats().in_use and time.perf_counter() - start < 5:
+        time.sleep(0.01)
+
+    assert dashboard_db.pool_stats().in_use == 0
+    assert time.perf_counter() - start < 5
+
+
+def test_warmup_discovers_page_sql_files():
+    """Chaque requête référencée par une page est trouvée et existe dans sql/dashboard/."""
+    from src.dashboard.warmup import discover_page_sql_files
+
+    files = discover_page_sql_files()
+
+    assert {"overview_kpis.sql", "rfm_segmentation.sql", "trends_monthly.sql"} <= set(files)
+    # Sections chargées à leur entrée dans la fenêtre : pré-calculées aussi.
+    assert {"basket_avg.sql", "customer_months.sql"} <= set(files)
+    assert len(files) == len(set(files))
+    assert all((PROJECT_ROOT / "sql" / "dashboard" / name).exists() for name in files)
+
+
+def test_warmup_fills_query_cache(tmp_path, monkeypatch):
+    """Le pré-calcul remplit le cache ; un fichier en échec n'arrête pas les autres."""
+    from src.dashboard import warmup
+
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    sql_dir = tmp_path / "sql"
+    sql_dir.mkdir()
+    (sql_dir / "total.sql").write_text("SELECT SUM(v) AS s FROM t")
+    (sql_dir / "count.sql").write_text("SELECT COUNT(*) AS n FROM t")
+    (sql_dir / "broken.sql").write_text("SELECT * FROM missing_table")
+    monkeypatch.setattr(dashboard_db, "_SQL_DIR", sql_dir)
+    monkeypatch.setattr(warmup, "_progress", warmup.WarmupProgress())
+
+    progress = asyncio.run(
+        warmup.warm_page_queries(["total.sql", "count.sql", "broken.sql"], concurrency=2)
+    )
+
+    assert progress is warmup.get_warmup_progress()
+    assert (progress.state, progress.total, progress.done) == ("warm", 3, 3)
+    assert progress.failed == ["broken.sql"]
+    assert dashboard_db.query_cache_stats().entries == 2
+    dashboard_db.query_from_file("total.sql")
+    assert dashboard_db.query_cache_stats().hits == 1
+
+
+def test_warmup_disabled_by_env(monkeypatch):
+    from src.dashboard import warmup
+
+    monkeypatch.setenv("DASHBOARD_WARMUP_CONCURRENCY", "0")
+    monkeypatch.setattr(warmup, "_progress", warmup.WarmupProgress())
+
+    progress = asyncio.run(warmup.warm_page_queries(["a.sql"]))
+
+    assert progress.state == "disabled"
+    assert dashboard_db.query_cache_stats().misses == 0
+
+
+def test_disk_cache_survives_restart_until_warehouse_changes(tmp_path, monkeypatch):
+    """Un « redémarrage » (caches mémoire et pool neufs) est servi par le cache disque."""
+    db_path = _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    store = dashboard_db.DiskResultStore(tmp_path / "disk_cache", 1024 * 1024, 3600.0)
+    monkeypatch.setattr(dashboard_db, "_disk_cache", store)
+    sql = "SELECT v, 'n' || v AS label FROM t ORDER BY v"
+
+    first = dashboard_db.query(sql)
+
+    def restart():
+        dashboard_db.close_connections()
+        monkeypatch.setattr(dashboard_db, "_db_identity", None)
+        monkeypatch.setattr(dashboard_db, "_fingerprint_memo", None)
+        monkeypatch.setattr(dashboard_db, "_query_cache", dashboard_db.QueryCache(1024 * 1024))
+
+    restart()
+    second = dashboard_db.query(sql)
+    pd.testing.assert_frame_equal(second, first)
+    assert (store.stats().hits, store.stats().writes) == (1, 1)
+    second.loc[0, "v"] = 99
+    assert dashboard_db.query(sql)["v"].tolist() == [1, 2, 3]
+
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("INSERT INTO t VALUES (4)")
+    conn.commit()
+    conn.close()
+    restart()
+
+    assert dashboard_db.query(sql)["v"].tolist() == [1, 2, 3, 4]
+    assert store.stats().writes == 2
+
+
+def test_editor_queries_stay_out_of_disk_cache(tmp_path, monkeypatch):
+    """Requêtes de l'éditeur (page, COUNT(*)) : cache mémoire seulement."""
+    _cached_db(tmp_path, monkeypatch, list(range(120)))
+    store = dashboard_db.DiskResultStore(tmp_path / "disk_cache", 1024 * 1024, 3600.0)
+    monkeypatch.setattr(dashboard_db, "_disk_cache", store)
+
+    dashboard_db.query("SELECT v FROM t", profile="editor")
+    page = dashboard_db.fetch_page("SELECT v FROM t", page_size=50, profile="exercise")
+    assert page.total == 120
+    assert store.stats().writes == 0
+
+    dashboard_db.query("SELECT MAX(v) FROM t")
+    assert store.stats().writes == 1
+
+
+_CROSS_JOIN = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 3000) "
+    "SELECT COUNT(*) AS c FROM n a, n b, n c"
+)
+
+
+@pytest.mark.parametrize(
+    ("budget", "reason"),
+    [
+        (dashboard_db.QueryBudget(timeout_s=0.2), "timeout"),
+        (dashboard_db.QueryBudget(max_steps=1_000_000), "steps"),
+    ],
+)
+def test_governor_cancels_runaway_query(tmp_path, monkeypatch, budget, reason):
+    """Un produit cartésien est interrompu ; la connexion reste utilisable."""
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    monkeypatch.setitem(dashboard_db._budgets, "editor", budget)
+
+    start = time.perf_counter()
+    with pytest.raises(dashboard_db.QueryCancelled, match="Requête annulée") as excinfo:
+        dashboard_db.query(_CROSS_JOIN, profile="editor")
+
+    assert excinfo.value.reason == reason
+    assert time.perf_counter() - start < 5
+    assert dashboard_db.query_cache_stats().entries == 0
+    assert dashboard_db.query("SELECT SUM(v) AS s FROM t", profile="editor")["s"].iloc[0] == 6
+
+
+def test_governor_row_cap_and_profiles(tmp_path, monkeypatch):
+    """Le plafond de lignes vaut aussi pour un résultat déjà en cache."""
+    _cached_db(tmp_path, monkeypatch, range(50))
+    monkeypatch.setitem(dashboard_db._budgets, "editor", dashboard_db.QueryBudget(max_rows=10))
+
+    full = dashboard_db.query("SELECT v FROM t")
+    with pytest.raises(dashboard_db.QueryCancelled) as excinfo:
+        dashboard_db.query("SELECT v FROM t", profile="editor")
+    with pytest.raises(dashboard_db.QueryCancelled):
+        dashboard_db.query("SELECT v FROM t", profile="editor", cache=False)
+
+    assert len(full) == 50
+    assert excinfo.value.reason == "rows"
+    assert len(dashboard_db.query("SELECT v FROM t LIMIT 10", profile="editor")) == 10
+
+
+def test_query_budget_from_env(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_BUDGET_EXERCISE_TIMEOUT_S", "2.5")
+    monkeypatch.setenv("DASHBOARD_BUDGET_EXERCISE_MAX_ROWS", "0")
+
+    budget = dashboard_db.get_query_budget("exercise")
+
+    assert (budget.timeout_s, budget.max_rows) == (2.5, 0)
+    assert budget.max_steps > 0
+    monkeypatch.setenv("DASHBOARD_BUDGET_EDITOR_MAX_STEPS", "-1")
+    with pytest.raises(ValueError, match="DASHBOARD_BUDGET_EDITOR_MAX_STEPS"):
+        dashboard_db.get_query_budget("editor")
+    with pytest.raises(ValueError, match="Profil"):
+        dashboard_db.get_query_budget("admin")
+
+
+def test_fetch_page_offsets_and_exact_total(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, range(120))
+    sql = "SELECT v FROM t -- toutes les lignes\nORDER BY v DESC;"
+
+    first = dashboard_db.fetch_page(sql, page=0, page_size=50)
+    last = dashboard_db.fetch_page(sql, page=2, page_size=50, count=False)
+
+    assert first.rows["v"].tolist() == list(range(119, 69, -1))
+    assert (first.has_more, first.total, first.total_exact) == (True, 120, True)
+    assert last.rows["v"].tolist() == list(range(19, -1, -1))
+    assert (last.first_row, last.has_more, last.total, last.total_exact) == (100, False, 120, True)
+
+
+def test_fetch_page_total_is_lower_bound_when_count_is_slow(tmp_path, monkeypatch):
+    """Seules page_size + 1 lignes sont lues ; un COUNT trop long donne une borne inférieure."""
+    _cached_db(tmp_path, monkeypatch, [1])
+    monkeypatch.setattr(dashboard_db, "_COUNT_TIMEOUT_S", 0.05)
+    huge = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 50000000) "
+        "SELECT i FROM n"
+    )
+
+    page = dashboard_db.fetch_page(huge, page=3, page_size=10)
+
+    assert page.rows["i"].tolist() == list(range(31, 41))
+    assert (page.has_more, page.total, page.total_exact) == (True, 41, False)
+
+
+def test_fetch_page_reads_non_select_statements_with_cursor(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+
+    page = dashboard_db.fetch_page("PRAGMA table_info(t)", page=0, page_size=10)
+    plan = dashboard_db.fetch_page("EXPLAIN SELECT v FROM t", page=1, page_size=2)
+
+    assert page.rows["name"].tolist() == ["v"]
+    assert (page.has_more, page.total, page.total_exact) == (False, 1, True)
+    assert len(plan.rows) == 2 and plan.first_row == 2
+    with pytest.raises(ValueError, match="Page invalide"):
+        dashboard_db.fetch_page("SELECT v FROM t", page=-1)
+
+
+def test_connection_profile_applies_pragmas(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    monkeypatch.setattr(dashboard_db, "_profile", dashboard_db.CONNECTION_PROFILES["cached"])
+
+    with dashboard_db.connection() as conn:
+        cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+        mmap_size = conn.execute("PRAGMA mmap_size").fetchone()[0]
+        threads = conn.execute("PRAGMA threads").fetchone()[0]
+
+    assert cache_size == -32_768
+    assert mmap_size == 256 * 1024 * 1024
+    assert threads == 2
+
+
+def test_immutable_profile_only_without_running_etl(tmp_path, monkeypatch):
+    """immutable=1 n'est utilisé que si aucun ETL n'écrit ; le prefetch lit fact_orders."""
+    db_path = tmp_path / "immutable.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE fact_orders (order_id TEXT)")
+    conn.executemany("INSERT INTO fact_orders VALUES (?)", [("o1",), ("o2",)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(dashboard_db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    monkeypatch.setattr(dashboard_db, "_profile", dashboard_db.CONNECTION_PROFILES["immutable"])
+
+    with dashboard_db.connection() as ro_conn:
+        assert ro_conn.immutable
+    assert dashboard_db.prefetch_fact_pages() == 2
+
+    dashboard_db.close_connections()
+    (tmp_path / ".etl.lock").write_text("1")
+    with dashboard_db.connection() as ro_conn:
+        assert not ro_conn.immutable
+        assert ro_conn.execute("SELECT COUNT(*) FROM fact_orders").fetchone()[0] == 2
+
+
+def test_profiled_connection_outside_the_pool(tmp_path, monkeypatch):
+    """Même réglages que le pool, sur un entrepôt quelconque, sans toucher au pool."""
+    db_path = tmp_path / "other.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE fact_orders (order_id TEXT)")
+    conn.executemany("INSERT INTO fact_orders VALUES (?)", [("o1",), ("o2",)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(dashboard_db, "_VIEWS_SQL", tmp_path / "missing_views.sql")
+    profile = dashboard_db.CONNECTION_PROFILES["immutable"]
+
+    conn = dashboard_db.open_profiled_connection(db_path, profile)
+    try:
+        assert conn.immutable
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 1024 * 1024 * 1024
+        assert conn.execute("SELECT COUNT(*) FROM fact_orders").fetchone()[0] == 2
+    finally:
+        conn.close()
+    assert dashboard_db.pool_stats().size == 0
+
+
+def test_connection_profile_from_env(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_DB_PROFILE", raising=False)
+    assert dashboard_db.get_connection_profile().name == dashboard_db.DEFAULT_CONNECTION_PROFILE
+
+    monkeypatch.setenv("DASHBOARD_DB_PROFILE", "Immutable")
+    assert dashboard_db.get_connection_profile().immutable
+
+    monkeypatch.setenv("DASHBOARD_DB_PROFILE", "turbo")
+    with pytest.raises(ValueError, match="DASHBOARD_DB_PROFILE"):
+        dashboard_db.get_connection_profile()
+
+
+def test_database_path_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("DASHBOARD_DATABASE", raising=False)
+    assert dashboard_db.get_database_path().name == "olist_dw.db"
+    monkeypatch.setenv("DASHBOARD_DATABASE", str(tmp_path / "release.db"))
+    assert dashboard_db.get_database_path() == tmp_path / "release.db"
+
+
+def test_telemetry_counts_calls_hits_and_plan_changes(tmp_path, monkeypatch):
+    """Appels, hits et lignes par requête ; un nouvel index change le plan relevé."""
+    db_path = _cached_db(tmp_path, monkeypatch, [1, 2, 3])
+    sql = "SELECT v FROM t WHERE v >= ?"
+
+    dashboard_db.query(sql, (2,))
+    dashboard_db.query(sql, (2,))
+    [metrics] = dashboard_db.query_metrics()
+    assert (metrics.calls, metrics.memory_hits, metrics.rows) == (2, 1, 4)
+    assert metrics.bytes > 0 and metrics.query.startswith("q:")
+    assert "SCAN t" in metrics.first_plan
+
+    rw = sqlite3.connect(str(db_path))
+    rw.execute("CREATE INDEX idx_t_v ON t (v)")
+    rw.commit()
+    rw.close()
+    dashboard_db.query(sql, (2,))
+
+    [metrics] = dashboard_db.query_metrics()
+    [change] = dashboard_db.query_plan_changes()
+    assert metrics.plan_changes == 1
+    assert "SCAN t" in change.previous and "idx_t_v" in change.current
+    assert metrics.first_plan == change.previous
+
+
+def test_telemetry_labels_sql_files_and_errors(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, [1])
+    monkeypatch.setattr(dashboard_db, "_SQL_DIR", tmp_path)
+    (tmp_path / "one.sql").write_text("SELECT v FROM t", encoding="utf-8")
+
+    dashboard_db.query_from_file("one.sql")
+    with pytest.raises(Exception):
+        dashboard_db.query("SELECT missing FROM t")
+
+    by_name = {m.query: m for m in dashboard_db.query_metrics()}
+    assert by_name["one.sql"].calls == 1
+    [failed] = [m for name, m in by_name.items() if name != "one.sql"]
+    assert failed.errors == 1
+    assert 'dashboard_query_calls_total{query="one.sql"} 1' in dashboard_db.prometheus_metrics()
+
+
+def test_telemetry_groups_typed_sql_by_profile(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, [1, 2])
+
+    for bound in range(5):
+        dashboard_db.query(f"SELECT v FROM t WHERE v > {bound}", profile="editor")
+    dashboard_db.query("SELECT COUNT(*) FROM t", profile="exercise")
+
+    by_name = {m.query: m for m in dashboard_db.query_metrics()}
+    assert set(by_name) == {"editor", "exercise"}
+    assert by_name["editor"].calls == 5
+    assert by_name["editor"].first_plan == ""
+
+
+def test_telemetry_disabled_records_nothing(tmp_path, monkeypatch):
+    _cached_db(tmp_path, monkeypatch, [1])
+    monkeypatch.setattr(dashboard_db, "_telemetry", dashboard_db.QueryTelemetry(0.0))
+
+    dashboard_db.query("SELECT v FROM t")
+
+    assert dashboard_db.query_metrics() == []
+
+
+def test_slow_queries_logged_with_origin_and_plan(tmp_path, monkeypatch):
+    """Au-delà du seuil : SQL, paramètres, origine et plan analysé sont journalisés."""
+    _cached_db(tmp_path, monkeypatch, range(100))
+    monkeypatch.setattr(
+        dashboard_db, "_slow_log", dashboard_db.SlowQueryLog(tmp_path / "slow.jsonl", 1e-9, 1024 * 1024)
+    )
+    sql = "SELECT v, COUNT(*) AS n FROM t WHERE v > ? GROUP BY v ORDER BY n DESC"
+
+    with dashboard_db.query_origin("/test (sql_viewer)"):
+        asyncio.run(dashboard_db.aquery(sql, (10,)))
+    dashboard_db.query("SELECT COUNT(*) FROM t")
+
+    latest, first = dashboard_db.slow_queries()
+    assert first.sql == sql and first.params == [10] and first.rows == 89
+    assert first.origin == "/test (sql_viewer)"
+    assert first.scans == 1 and first.temp_btrees >= 1
+    assert first.plan.startswith("QUERY PLAN")
+    # Sans origine déclarée : premier module du dashboard (hors db) dans la pile.
+    assert latest.origin == ""
+
+    dashboard_db.clear_slow_queries()
+    assert dashboard_db.slow_queries() == []
@@ -20,15 +20,20 @@ def require_database():
 
 
 @pytest.fixture(scope="module", autouse=True)
-def reset_dashboard_connection():
-    """Réinitialise la connexion singleton dashboard avant/après les tests."""
-    if dashboard_db._conn is not None:
-        dashboard_db._conn.close()
-        dashboard_db._conn = None
-    yield
-    if dashboard_db._conn is not None:
-        dashboard_db._conn.close()
-        dashboard_db._conn = None
+def reset_dashboard_connection(tmp_path_factory):
+    """Réinitialise le pool de connexions dashboard avant/après les tests.
+
+    Le cache persistant est redirigé vers un répertoire temporaire : les
+    requêtes sont réellement exécutées et data/processed/cache/ n'est pas touché.
+    """
+    dashboard_db.close_connections()
+    store = dashboard_db.DiskResultStore(tmp_path_factory.mktemp("disk_cache"), 0, 3600.0)
+    slow_log = dashboard_db.SlowQueryLog(tmp_path_factory.mktemp("logs") / "slow.jsonl", 0.0, 1024)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(dashboard_db, "_disk_cache", store)
+        patch.setattr(dashboard_db, "_slow_log", slow_log)
+        yield
+    dashboard_db.close_connections()
 
 
 @pytest.mark.parametrize(
@@ -42,6 +47,7 @@ def reset_dashboard_connection():
         "cohorts_retention.sql",
         "new_vs_recurring.sql",
         "ltv_cohorts.sql",
+        "customer_months.sql",
         "pareto_sellers.sql",
         "top_products.sql",
         "ca_yoy.sql",
@@ -69,6 +75,7 @@ def test_required_dashboard_sql_are_covered():
         "cohorts_retention.sql",
         "new_vs_recurring.sql",
         "ltv_cohorts.sql",
+        "customer_months.sql",
         "pareto_sellers.sql",
         "top_products.sql",
         "ca_yoy.sql",
@@ -82,6 +89,19 @@ def test_required_dashboard_sql_are_covered():
     )
 
 
+def test_payment_gap_analysis_statements():
+    """Le script multi-instructions retourne ses 5 analyses sans laisser de table TEMP."""
+    _, frames = dashboard_db.query_statements_from_file("payment_gap_analysis.sql")
+
+    assert len(frames) == 5
+    assert list(frames[4].columns) == ["order_id", "invoiced_total", "paid_total", "delta"]
+    with dashboard_db.connection() as conn:
+        temp_tables = conn.execute(
+            "SELECT name FROM sqlite_temp_master WHERE type = 'table'"
+        ).fetchall()
+    assert temp_tables == []
+
+
 @pytest.mark.parametrize(
     ("module_id", "expects_exercises"),
     [
@@ -0,0 +1,120 @@
+"""Tests pour l'API de données (src/dashboard/data_api.py)."""
+
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import PROJECT_ROOT
+from src.dashboard import data_api, db
+
+
+def test_negotiate_format():
+    assert data_api.negotiate_format(None, None) == "json"
+    assert data_api.negotiate_format(None, "text/html, application/json") == "json"
+    assert data_api.negotiate_format(None, data_api.ARROW_MEDIA_TYPE) == "arrow"
+    # Le paramètre d'URL prime sur l'en-tête.
+    assert data_api.negotiate_format("JSON", data_api.ARROW_MEDIA_TYPE) == "json"
+    with pytest.raises(ValueError, match="Format inconnu"):
+        data_api.negotiate_format("xml", None)
+
+
+def test_etag_depends_on_warehouse_sql_params_and_format():
+    base = data_api.result_etag("fp1", "SELECT 1", {"state": "SP"}, "json")
+    assert base.startswith('"') and base.endswith('"')
+    assert base == data_api.result_etag("fp1", "SELECT 1", {"state": "SP"}, "json")
+    assert len({
+        base,
+        data_api.result_etag("fp2", "SELECT 1", {"state": "SP"}, "json"),
+        data_api.result_etag("fp1", "SELECT 2", {"state": "SP"}, "json"),
+        data_api.result_etag("fp1", "SELECT 1", {"state": "RJ"}, "json"),
+        data_api.result_etag("fp1", "SELECT 1", {"state": "SP"}, "arrow"),
+    }) == 5
+
+    assert data_api.etag_matches(base, base)
+    assert data_api.etag_matches(f'"autre", W/{base}', base)
+    assert data_api.etag_matches("*", base)
+    assert not data_api.etag_matches(None, base)
+    assert not data_api.etag_matches('"autre"', base)
+
+
+def test_encode_json_keeps_columns_and_precision():
+    df = pd.DataFrame({"state": ["SP", None], "revenue": [1234.56789, np.nan], "n": [3, 4]})
+    body = json.loads(data_api.encode_json(df))
+    assert body == {
+        "columns": ["state", "revenue", "n"],
+        "rows": 2,
+        "data": {"state": ["SP", None], "revenue": [1234.56789, None], "n": [3, 4]},
+    }
+
+
+def test_query_response_revalidates_without_running_the_query(monkeypatch):
+    executed = []
+    monkeypatch.setattr(db, "dashboard_query_files", lambda: ["kpis.sql"])
+    monkeypatch.setattr(
+        db, "resolve_query_file", lambda name, filters: ("SELECT 1", (), "fp")
+    )
+
+    def fake_query(name, filters):
+        executed.append(name)
+        return "SELECT 1", pd.DataFrame({"v": [1, 2]})
+
+    monkeypatch.setattr(db, "query_from_file", fake_query)
+
+    first = data_api.query_response("kpis.sql", {}, {})
+    assert first.status_code == 200
+    assert json.loads(first.body)["data"] == {"v": [1, 2]}
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    second = data_api.query_response("kpis.sql", {}, {"if-none-match": etag})
+    assert second.status_code == 304 and second.headers["etag"] == etag
+    assert executed == ["kpis.sql"]
+
+    assert data_api.query_response("../views.sql", {}, {}).status_code == 404
+    assert data_api.query_response("kpis.sql", {"format": "xml"}, {}).status_code == 406
+
+
+@pytest.fixture
+def empty_warehouse(tmp_path, monkeypatch):
+    """Entrepôt vide (DDL du schéma en étoile) derrière un pool et des caches neufs."""
+    db_path = tmp_path / "olist.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript((PROJECT_ROOT / "sql" / "create_star_schema.sql").read_text())
+    conn.close()
+
+    monkeypatch.setattr(db, "DATABASE_PATH", db_path)
+    monkeypatch.setattr(db, "_pool", db.ConnectionPool(db._open_connection, max_size=2))
+    monkeypatch.setattr(db, "_db_identity", None)
+    monkeypatch.setattr(db, "_capabilities_version", None)
+    monkeypatch.setattr(db, "_fingerprint_memo", None)
+    monkeypatch.setattr(db, "_query_cache", db.QueryCache(1024 * 1024))
+    monkeypatch.setattr(db, "_disk_cache", db.DiskResultStore(tmp_path / "disk_cache", 0, 3600.0))
+    monkeypatch.setattr(db, "_slow_log", db.SlowQueryLog(tmp_path / "slow.jsonl", 0.0, 1024 * 1024))
+    yield db_path
+    db._pool.reset()
+
+
+def test_every_dashboard_sql_file_answers_without_server_error(empty_warehouse):
+    query_files = db.dashboard_query_files()
+    assert "payment_gap_analysis.sql" not in query_files  # script multi-instructions
+
+    for sql_file in db.dashboard_sql_files():
+        response = data_api.query_response(sql_file, {"customer_state": "SP"}, {})
+        expected = 200 if sql_file in query_files else 404
+        assert response.status_code == expected, (sql_file, response.body)
+
+
+def test_sqlite_errors_become_json_errors(monkeypatch):
+    monkeypatch.setattr(db, "dashboard_query_files", lambda: ["broken.sql"])
+    monkeypatch.setattr(db, "resolve_query_file", lambda name, filters: ("SELECT x", (), "fp"))
+
+    def failing_query(name, filters):
+        raise pd.errors.DatabaseError("no such column: x")
+
+    monkeypatch.setattr(db, "query_from_file", failing_query)
+    response = data_api.query_response("broken.sql", {}, {})
+    assert response.status_code == 500
+    assert "no such column" in json.loads(response.body)["error"]
@@ -0,0 +1,76 @@
+"""Tests du sous-échantillonnage des séries temporelles."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dashboard.downsample import (
+    MIN_POINTS,
+    ChartResolution,
+    chart_resolution,
+    downsample,
+    for_chart,
+    lttb_indices,
+    minmax_indices,
+    target_points,
+)
+
+
+def _series(n: int = 5_000) -> pd.DataFrame:
+    days = pd.date_range("2017-01-01", periods=n, freq="h")
+    values = np.sin(np.linspace(0, 20, n)) * 100
+    values[1234] = 1_000.0  # pic isolé
+    return pd.DataFrame({"day": days, "revenue": values, "label": days.strftime("%Y-%m-%d %H")})
+
+
+def test_target_points_follows_chart_width():
+    assert target_points(1200) == 600
+    assert target_points(40) == MIN_POINTS
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    df = _series()
+    indices = lttb_indices(np.arange(len(df), dtype=float), df["revenue"].to_numpy(), 300)
+
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(df) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 1234 in indices
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    y = np.array([0, 5, -3, 2, 9, 1, 4, -8, 3, 0], dtype=float)
+    indices = minmax_indices(y, 6)
+
+    assert {0, 9, 4, 7}.issubset(set(indices))
+    assert len(indices) <= 6
+
+
+def test_downsample_keeps_whole_rows_and_rejects_unknown_method():
+    df = _series()
+    reduced = downsample(df, "label", ["revenue"], 200)
+
+    assert len(reduced) == 200
+    assert list(reduced.columns) == ["day", "revenue", "label"]
+    assert reduced["revenue"].max() == 1_000.0
+    head = df.head(10)
+    assert downsample(head, "day", "revenue", 200) is head
+    with pytest.raises(ValueError):
+        downsample(df, "day", "revenue", 200, method="mean")
+
+
+def test_for_chart_uses_width_and_full_resolution():
+    df = _series()
+
+    with chart_resolution(ChartResolution(width_px=800)) as resolution:
+        plot = for_chart(df, "day", "revenue")
+    assert len(plot) == 400
+    assert resolution.reduced == [(len(df), 400)]
+
+    with chart_resolution(ChartResolution(width_px=800, full=True)) as resolution:
+        assert len(for_chart(df, "day", "revenue")) == len(df)
+    assert resolution.reduced == []
+    assert resolution.series == [len(df)]
+
+    small = df.head(20)
+    assert for_chart(small, "day", "revenue") is small
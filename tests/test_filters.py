@@ -0,0 +1,104 @@
+"""Tests des filtres globaux du dashboard."""
+
+import sqlite3
+
+import pytest
+
+from src.dashboard.filters import DashboardFilters, _date_key, apply_filters, fact_predicates
+
+
+def _warehouse() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        """
+        CREATE TABLE dim_customers (customer_key INTEGER PRIMARY KEY, state TEXT);
+        CREATE TABLE dim_sellers (seller_key INTEGER PRIMARY KEY, state TEXT);
+        CREATE TABLE dim_products (
+            product_key INTEGER PRIMARY KEY, category_name_en TEXT, category_name_pt TEXT
+        );
+        CREATE TABLE fact_orders (
+            order_id TEXT, date_key INTEGER, customer_key INTEGER,
+            seller_key INTEGER, product_key INTEGER, price REAL
+        );
+        CREATE INDEX idx_fact_date ON fact_orders(date_key);
+        INSERT INTO dim_customers VALUES (1, 'SP'), (2, 'RJ');
+        INSERT INTO dim_sellers VALUES (1, 'SP'), (2, 'MG');
+        INSERT INTO dim_products VALUES (1, 'toys', NULL), (2, NULL, 'livros');
+        INSERT INTO fact_orders VALUES
+            ('o1', 20170105, 1, 1, 1, 10.0),
+            ('o2', 20170610, 2, 2, 2, 20.0),
+            ('o3', 20180210, 1, 2, 1, 40.0);
+        """
+    )
+    return conn
+
+
+def test_filters_round_trip_through_query_string():
+    """Les paramètres d'URL invalides sont ignorés ; to_query relit from_query."""
+    filters = DashboardFilters.from_query(
+        {"date_from": "2017-01-01", "date_to": "bad", "customer_state": "sp", "seller_state": "SPX"}
+    )
+
+    assert filters == DashboardFilters(date_from=20170101, customer_state="SP")
+    assert DashboardFilters.from_query(filters.to_query()) == filters
+    assert filters.params() == {"date_from": 20170101, "customer_state": "SP"}
+    assert not DashboardFilters().active
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2017-03-01", 20170301),
+        (" 20170301 ", 20170301),
+        ("2016-02-29", 20160229),
+        ("2017-02-29", None),
+        ("2017311", None),
+        ("2017-0301", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_date_key_reads_iso_and_compact_dates(value, expected):
+    assert _date_key(value) == expected
+
+
+def test_apply_filters_shadows_fact_table_before_aggregation():
+    """La CTE fact_orders filtre les faits ; le WITH existant est conservé."""
+    conn = _warehouse()
+    template = (
+        "-- Chiffre d'affaires\n"
+        "WITH totals AS (SELECT SUM(price) AS revenue FROM fact_orders)\n"
+        "SELECT revenue FROM totals"
+    )
+    filters = DashboardFilters(date_to=20171231, customer_state="SP")
+
+    sql, params = apply_filters(template, filters)
+
+    assert sql.startswith("-- Chiffre d'affaires\nWITH -- Filtres du dashboard")
+    assert ":customer_state" in sql and params == filters.params()
+    assert conn.execute(sql, params).fetchone()[0] == 10.0
+    plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "idx_fact_date" in plan
+
+
+def test_apply_filters_without_with_and_category():
+    """Template sans WITH : la CTE est ajoutée ; la catégorie suit le COALESCE des vues."""
+    conn = _warehouse()
+    sql, params = apply_filters(
+        "SELECT COUNT(*) FROM fact_orders", DashboardFilters(category="livros")
+    )
+
+    assert "WITH fact_orders AS NOT MATERIALIZED" in sql
+    assert conn.execute(sql, params).fetchone()[0] == 1
+
+
+def test_apply_filters_leaves_templates_without_facts_untouched():
+    """Sans filtre actif ou sans lecture des faits, le template est inchangé."""
+    template = "SELECT * FROM seller_scores -- pas de fact_orders ici"
+
+    assert apply_filters(template, DashboardFilters(seller_state="SP")) == (template, {})
+    assert apply_filters("SELECT 1 FROM fact_orders", DashboardFilters()) == (
+        "SELECT 1 FROM fact_orders",
+        {},
+    )
+    assert fact_predicates(DashboardFilters()) == []
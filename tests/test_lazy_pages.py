@@ -0,0 +1,71 @@
+"""Tests pour l'enregistrement paresseux des pages (src/dashboard/main.py)."""
+
+import asyncio
+import re
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.config import PROJECT_ROOT
+from src.dashboard import main
+
+_DASHBOARD_DIR = Path(main.__file__).resolve().parent
+_PAGE_RE = re.compile(r'@ui\.page\("([^"]+)"\)')
+
+
+def test_page_routes_match_page_declarations():
+    declared = {}
+    for source in [*sorted((_DASHBOARD_DIR / "pages").glob("*.py")), _DASHBOARD_DIR / "presentation.py"]:
+        module = ".".join(source.relative_to(PROJECT_ROOT).with_suffix("").parts)
+        for path in _PAGE_RE.findall(source.read_text(encoding="utf-8")):
+            declared[path] = module
+    assert main.PAGE_ROUTES == declared
+
+
+def test_startup_imports_no_page_nor_heavy_library():
+    code = (
+        "import sys; import src.dashboard.main as main; main.register_pages(); "
+        "print(' '.join(sorted(name for name in sys.modules "
+        "if name.split('.')[0] in {'pandas', 'numpy', 'plotly', 'duckdb'} "
+        "or name.startswith(('src.dashboard.pages', 'src.dashboard.db', 'src.dashboard.presentation')))))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == ""
+
+
+def test_page_arguments_convert_path_params():
+    def lesson(module_id: str, lesson_index: int, request) -> None:
+        pass
+
+    request = SimpleNamespace(path_params={"module_id": "m1", "lesson_index": "2"})
+    assert main._page_arguments(lesson, request) == {
+        "module_id": "m1",
+        "lesson_index": 2,
+        "request": request,
+    }
+    assert main._page_arguments(lambda: None, request) == {}
+
+
+def test_relay_imports_off_the_event_loop(monkeypatch):
+    relays = []
+    imported = []
+    monkeypatch.setattr(main.ui, "page", lambda path: relays.append)
+
+    async def fake_import(module_name):
+        imported.append(module_name)
+
+    async def page(module_id: str) -> str:
+        return f"page {module_id}"
+
+    monkeypatch.setattr(main, "_import_in_background", fake_import)
+    monkeypatch.setattr(main, "_page_function", lambda path, module_name: page)
+    main._lazy_page("/x/{module_id}", "src.dashboard.pages.fake")
+
+    (relay,) = relays
+    request = SimpleNamespace(path_params={"module_id": "m1"})
+    assert asyncio.iscoroutinefunction(relay)
+    assert asyncio.run(relay(request)) == "page m1"
+    assert imported == ["src.dashboard.pages.fake"]
@@ -1,5 +1,9 @@
 """Tests pour le module load."""
 
+import os
+import sqlite3
+from pathlib import Path
+
 import pandas as pd
 import pytest
 from sqlalchemy import create_engine, text
@@ -11,8 +15,17 @@ from src.etl.load import (
     build_dim_sellers,
     build_dim_products,
     build_fact_orders,
+    DENORMALIZED_FACT_COLUMNS,
+    get_denormalize_fact,
+    get_partition_scheme,
+    get_physical_layout,
     load_to_sqlite,
+    PhysicalLayout,
+    PHYSICAL_LAYOUTS,
 )
+from src.etl.layout_benchmark import benchmark_layouts, build_layout_databases
+from src.config import PROJECT_ROOT
+from src.database.partitions import attach_partitions, partition_bounds, partition_labels
 from src.etl.transform import clean_customers, clean_sellers
 
 
@@ -153,52 +166,52 @@ class TestBuildDimSellers:
         assert pd.notna(row["geo_key"].iloc[0])
 
 
-class TestLoadToSqlite:
-    @pytest.fixture
-    def full_star_schema(
-        self,
-        sample_orders_parsed,
-        sample_order_items,
-        sample_order_payments,
-        sample_order_reviews,
-        sample_customers,
-        sample_dim_geo,
-        sample_sellers,
-        sample_products,
-        sample_category_translation,
-    ):
-        """Construire toutes les tables du schema en etoile."""
-        from src.etl.transform import (
-            clean_orders,
-            clean_order_items,
-            clean_products,
-        )
-
-        orders = clean_orders(sample_orders_parsed.copy())
-        items = clean_order_items(sample_order_items.copy())
-
-        dim_cust = build_dim_customers(clean_customers(sample_customers), sample_dim_geo)
-        dim_sell = build_dim_sellers(clean_sellers(sample_sellers), sample_dim_geo)
-        dim_prod = build_dim_products(
-            clean_products(sample_products, sample_category_translation)
-        )
-        dim_dates = build_dim_dates(orders)
-
-        reviews = sample_order_reviews.copy()
-        reviews["review_creation_date"] = pd.to_datetime(reviews["review_creation_date"])
-        reviews["review_answer_timestamp"] = pd.to_datetime(reviews["review_answer_timestamp"])
+@pytest.fixture
+def full_star_schema(
+    sample_orders_parsed,
+    sample_order_items,
+    sample_order_payments,
+    sample_order_reviews,
+    sample_customers,
+    sample_dim_geo,
+    sample_sellers,
+    sample_products,
+    sample_category_translation,
+):
+    """Construire toutes les tables du schema en etoile."""
+    from src.etl.transform import (
+        clean_orders,
+        clean_order_items,
+        clean_products,
+    )
+
+    orders = clean_orders(sample_orders_parsed.copy())
+    items = clean_order_items(sample_order_items.copy())
+
+    dim_cust = build_dim_customers(clean_customers(sample_customers), sample_dim_geo)
+    dim_sell = build_dim_sellers(clean_sellers(sample_sellers), sample_dim_geo)
+    dim_prod = build_dim_products(
+        clean_products(sample_products, sample_category_translation)
+    )
+    dim_dates = build_dim_dates(orders)
+
+    reviews = sample_order_reviews.copy()
+    reviews["review_creation_date"] = pd.to_datetime(reviews["review_creation_date"])
+    reviews["review_answer_timestamp"] = pd.to_datetime(reviews["review_answer_timestamp"])
+
+    fact = build_fact_orders(
+        order_items=items,
+        orders=orders,
+        payments=sample_order_payments,
+        reviews=reviews,
+        dim_customers=dim_cust,
+        dim_sellers=dim_sell,
+        dim_products=dim_prod,
+    )
+    return dim_dates, sample_dim_geo, dim_cust, dim_sell, dim_prod, fact
 
-        fact = build_fact_orders(
-            order_items=items,
-            orders=orders,
-            payments=sample_order_payments,
-            reviews=reviews,
-            dim_customers=dim_cust,
-            dim_sellers=dim_sell,
-            dim_products=dim_prod,
-        )
-        return dim_dates, sample_dim_geo, dim_cust, dim_sell, dim_prod, fact
 
+class TestLoadToSqlite:
     def test_tables_created(self, tmp_path, full_star_schema):
         """Les 6 tables sont creees dans la DB."""
         db_path = tmp_path / "test.db"
@@ -299,3 +312,341 @@ class TestLoadToSqlite:
 
         assert city_after_error == baseline_city
         assert fact_count_after_error == baseline_fact_count
+
+
+class TestPhysicalLayout:
+    def test_default_layout_from_env(self, monkeypatch):
+        monkeypatch.delenv("ETL_PHYSICAL_LAYOUT", raising=False)
+        monkeypatch.delenv("ETL_PAGE_SIZE", raising=False)
+        assert get_physical_layout() == PhysicalLayout()
+
+    def test_page_size_override(self, monkeypatch):
+        monkeypatch.setenv("ETL_PHYSICAL_LAYOUT", "clustered")
+        monkeypatch.setenv("ETL_PAGE_SIZE", "16384")
+        layout = get_physical_layout()
+        assert layout.page_size == 16384
+        assert layout.cluster_fact_by_date
+
+    def test_invalid_layout_and_page_size(self, monkeypatch):
+        with pytest.raises(ValueError, match="Layout physique inconnu"):
+            get_physical_layout("columnar")
+        monkeypatch.setenv("ETL_PAGE_SIZE", "5000")
+        with pytest.raises(ValueError, match="ETL_PAGE_SIZE"):
+            get_physical_layout("default")
+
+    def test_compact_layout_applied(self, tmp_path, full_star_schema):
+        """page_size, dimensions WITHOUT ROWID et faits triés par date."""
+        db_path = tmp_path / "compact.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+
+        load_to_sqlite(engine, *full_star_schema, layout=PHYSICAL_LAYOUTS["compact"])
+
+        with engine.connect() as conn:
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            ddl = dict(conn.execute(
+                text("SELECT name, sql FROM sqlite_master WHERE type='table'")
+            ).fetchall())
+            date_keys = [
+                row[0] for row in conn.execute(
+                    text("SELECT date_key FROM fact_orders ORDER BY fact_key")
+                )
+            ]
+
+        assert page_size == 8192
+        for dim in ("dim_geolocation", "dim_customers", "dim_sellers", "dim_products"):
+            assert ddl[dim].rstrip().endswith("WITHOUT ROWID")
+            assert "AUTOINCREMENT" not in ddl[dim]
+        # Clé entière : la table rowid est déjà rangée par date_key.
+        assert "WITHOUT ROWID" not in ddl["dim_dates"]
+        assert "WITHOUT ROWID" not in ddl["fact_orders"]
+        assert date_keys == sorted(date_keys)
+
+    @pytest.mark.parametrize(
+        ("table", "natural_key", "surrogate_key", "value"),
+        [
+            ("dim_customers", "customer_id", "customer_key", "c1"),
+            ("dim_sellers", "seller_id", "seller_key", "s1"),
+            ("dim_products", "product_id", "product_key", "p1"),
+            ("dim_geolocation", "zip_code_prefix", "geo_key", "01234"),
+        ],
+    )
+    def test_compact_natural_key_lookup_uses_clustered_primary_key(
+        self, tmp_path, full_star_schema, table, natural_key, surrogate_key, value
+    ):
+        """Recherche par clé naturelle : une seule B-tree (la clé primaire), pas d'index."""
+        db_path = tmp_path / "compact.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *full_star_schema, layout=PHYSICAL_LAYOUTS["compact"])
+
+        with engine.connect() as conn:
+            plan = " ".join(
+                row[-1] for row in conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE {natural_key} = ?",
+                    (value,),
+                )
+            )
+            found = conn.exec_driver_sql(
+                f"SELECT {surrogate_key} FROM {table} WHERE {natural_key} = ?", (value,)
+            ).fetchone()
+
+        assert plan == f"SEARCH {table} USING PRIMARY KEY ({natural_key}=?)"
+        assert found is not None
+
+    def test_benchmark_compares_layouts(self, tmp_path, full_star_schema):
+        db_paths = build_layout_databases(full_star_schema, ["default", "compact"], tmp_path)
+        timings, storage = benchmark_layouts(db_paths, iterations=1, warmup=0)
+
+        assert list(timings.columns) == ["default", "compact"]
+        assert "overview_kpis.sql" in timings.index
+        assert "TOTAL" in timings.index
+        assert storage.loc["compact", "page_size"] == 8192
+
+    def test_benchmark_compares_connection_profiles(self, tmp_path, full_star_schema):
+        from src.dashboard.profile_benchmark import benchmark_profiles
+
+        db_path = build_layout_databases(full_star_schema, ["default"], tmp_path)["default"]
+        timings, setup = benchmark_profiles(
+            ["baseline", "immutable"], db_path=db_path, iterations=1, warmup=0
+        )
+
+        assert list(timings.columns) == ["baseline", "immutable"]
+        assert "overview_kpis.sql" in timings.index
+        assert "TOTAL" in timings.index
+        assert bool(setup.loc["immutable", "prefetch"])
+
+
+class TestDenormalizedFact:
+    @pytest.fixture
+    def denormalized_schema(self, full_star_schema):
+        dim_dates, dim_geo, dim_cust, dim_sell, dim_prod, fact = full_star_schema
+        unique_keys = dim_cust.set_index("customer_key")["customer_unique_id"]
+        fact = fact.assign(
+            customer_unique_key=pd.factorize(
+                fact["customer_key"].map(unique_keys), sort=True
+            )[0] + 1,
+            month_key=fact["date_key"] // 100,
+        )
+        return dim_dates, dim_geo, dim_cust, dim_sell, dim_prod, fact
+
+    def test_env_flag(self, monkeypatch):
+        monkeypatch.delenv("ETL_DENORMALIZE_FACT", raising=False)
+        assert get_denormalize_fact() is False
+        monkeypatch.setenv("ETL_DENORMALIZE_FACT", "1")
+        assert get_denormalize_fact() is True
+
+    def test_build_fact_orders_adds_keys(
+        self,
+        sample_orders_parsed,
+        sample_order_items,
+        sample_order_payments,
+        sample_order_reviews,
+        sample_customers,
+        sample_dim_geo,
+        sample_sellers,
+        sample_products,
+        sample_category_translation,
+    ):
+        """customer_unique_key suit l'ordre des customer_unique_id, month_key = AAAAMM."""
+        from src.etl.transform import clean_order_items, clean_orders, clean_products
+
+        dim_cust = build_dim_customers(clean_customers(sample_customers), sample_dim_geo)
+        reviews = sample_order_reviews.copy()
+        reviews["review_creation_date"] = pd.to_datetime(reviews["review_creation_date"])
+        reviews["review_answer_timestamp"] = pd.to_datetime(reviews["review_answer_timestamp"])
+
+        fact = build_fact_orders(
+            order_items=clean_order_items(sample_order_items.copy()),
+            orders=clean_orders(sample_orders_parsed.copy()),
+            payments=sample_order_payments,
+            reviews=reviews,
+            dim_customers=dim_cust,
+            dim_sellers=build_dim_sellers(clean_sellers(sample_sellers), sample_dim_geo),
+            dim_products=build_dim_products(
+                clean_products(sample_products, sample_category_translation)
+            ),
+            denormalize=True,
+        )
+
+        assert set(DENORMALIZED_FACT_COLUMNS) <= set(fact.columns)
+        # u1 -> 1 (o1), u2 -> 2 (o2)
+        keys = fact.set_index("order_id")["customer_unique_key"]
+        assert keys.loc["o1"].tolist() == [1, 1]
+        assert keys.loc["o2"] == 2
+        assert (fact["month_key"] == fact["date_key"] // 100).all()
+
+    def test_load_creates_columns_and_indexes(self, tmp_path, denormalized_schema):
+        engine = create_engine(f"sqlite:///{tmp_path / 'denorm.db'}")
+        load_to_sqlite(engine, *denormalized_schema)
+
+        with engine.connect() as conn:
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_info(fact_orders)"))}
+            indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(fact_orders)"))}
+            month_keys = conn.execute(
+                text("SELECT DISTINCT month_key FROM fact_orders ORDER BY 1")
+            ).scalars().all()
+
+        assert set(DENORMALIZED_FACT_COLUMNS) <= columns
+        assert {"idx_fact_status_cust_unique", "idx_fact_status_month"} <= indexes
+        assert month_keys == [201801, 201802]
+
+    def test_rewritten_sql_matches_canonical(self, tmp_path, denormalized_schema):
+        """Chaque requête réécrite renvoie exactement le résultat de l'originale."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'denorm.db'}")
+        load_to_sqlite(engine, *denormalized_schema)
+
+        sql_dir = PROJECT_ROOT / "sql" / "dashboard"
+        rewritten = sorted((sql_dir / "denormalized").glob("*.sql"))
+        assert rewritten
+
+        with engine.connect() as conn:
+            for path in rewritten:
+                expected = pd.read_sql(text((sql_dir / path.name).read_text()), conn)
+                actual = pd.read_sql(text(path.read_text()), conn)
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+class TestPartitionedLoad:
+    @pytest.fixture
+    def spread_schema(self, full_star_schema):
+        """o2 déplacée en 2017 pour obtenir deux partitions annuelles."""
+        *dims, fact = full_star_schema
+        fact = fact.copy()
+        fact.loc[fact["order_id"] == "o2", "date_key"] = 20170520
+        return (*dims, fact)
+
+    @staticmethod
+    def _open(db_path):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        attach_partitions(conn, db_path)
+        return conn
+
+    def test_partition_scheme_from_env(self, monkeypatch):
+        monkeypatch.delenv("ETL_PARTITION_BY", raising=False)
+        assert get_partition_scheme() is None
+        monkeypatch.setenv("ETL_PARTITION_BY", "Quarter")
+        assert get_partition_scheme() == "quarter"
+        monkeypatch.setenv("ETL_PARTITION_BY", "month")
+        with pytest.raises(ValueError, match="ETL_PARTITION_BY"):
+            get_partition_scheme()
+
+    def test_partition_labels_and_bounds(self):
+        keys = pd.Series([20170520, 20181231, None], dtype="Int64")
+        assert partition_labels(keys, "year").tolist() == ["2017", "2018", "undated"]
+        assert partition_labels(keys, "quarter").tolist() == ["2017q2", "2018q4", "undated"]
+        assert partition_bounds("2017q2") == (20170401, 20170631)
+        assert partition_bounds("undated") == (None, None)
+
+    def test_year_partitions_behind_view(self, tmp_path, spread_schema):
+        db_path = tmp_path / "olist.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *spread_schema, partition_by="year")
+
+        assert len(list(tmp_path.glob("olist.fact_2017.*.db"))) == 1
+        assert len(list(tmp_path.glob("olist.fact_2018.*.db"))) == 1
+
+        conn = self._open(db_path)
+        main_tables = {
+            row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE type='table'")
+        }
+        manifest = dict(conn.execute("SELECT partition_label, row_count FROM fact_partitions"))
+        rows = conn.execute("SELECT fact_key, order_id FROM fact_orders ORDER BY order_id").fetchall()
+        conn.close()
+
+        assert "fact_orders" not in main_tables
+        assert manifest == {"2017": 1, "2018": 2}
+        assert [order_id for _, order_id in rows] == ["o1", "o1", "o2"]
+        assert len({fact_key for fact_key, _ in rows}) == 3
+
+    def test_only_changed_partitions_rebuilt(self, tmp_path, spread_schema):
+        db_path = tmp_path / "olist.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *spread_schema, partition_by="year")
+        [file_2017] = tmp_path.glob("olist.fact_2017.*.db")
+        [file_2018] = tmp_path.glob("olist.fact_2018.*.db")
+        inode_2017 = file_2017.stat().st_ino
+
+        *dims, fact = spread_schema
+        fact = fact.copy()
+        fact.loc[fact["order_id"] == "o1", "price"] += 1.0
+        load_to_sqlite(engine, *dims, fact, partition_by="year")
+
+        assert file_2017.stat().st_ino == inode_2017
+        # Partition réécrite sous une nouvelle génération ; l'ancienne est supprimée.
+        [new_2018] = tmp_path.glob("olist.fact_2018.*.db")
+        assert new_2018 != file_2018 and not file_2018.exists()
+        conn = self._open(db_path)
+        total = conn.execute("SELECT SUM(price) FROM fact_orders").fetchone()[0]
+        conn.close()
+        assert total == fact["price"].sum()
+
+    def test_failed_swap_keeps_previous_partitions(self, tmp_path, spread_schema, monkeypatch):
+        """Échec au remplacement de la base principale : l'ancien ensemble reste cohérent."""
+        db_path = tmp_path / "olist.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *spread_schema, partition_by="year")
+        files_before = sorted(path.name for path in tmp_path.glob("olist.fact_*.db"))
+
+        *dims, fact = spread_schema
+        fact = fact.copy()
+        fact.loc[fact["order_id"] == "o2", "price"] += 1.0
+        real_replace = os.replace
+
+        def failing_replace(src, dst):
+            if Path(dst) == db_path:
+                raise OSError("disk full")
+            real_replace(src, dst)
+
+        monkeypatch.setattr("src.etl.load.os.replace", failing_replace)
+        with pytest.raises(OSError, match="disk full"):
+            load_to_sqlite(engine, *dims, fact, partition_by="year")
+
+        assert sorted(path.name for path in tmp_path.glob("olist.fact_*.db")) == files_before
+        assert not list(tmp_path.glob(".*.tmp"))
+        conn = self._open(db_path)
+        total = conn.execute("SELECT SUM(price) FROM fact_orders").fetchone()[0]
+        conn.close()
+        assert total == spread_schema[-1]["price"].sum()
+
+    def test_scores_built_before_publish(self, tmp_path, spread_schema):
+        """Scores construits dans la base en préparation, partitions attachées."""
+        from src.etl.scores import SCORE_TABLES, build_score_tables
+
+        db_path = tmp_path / "olist.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        staged = []
+
+        def before_publish(path):
+            assert path != db_path and not db_path.exists()
+            staged.append(build_score_tables(path))
+
+        load_to_sqlite(engine, *spread_schema, partition_by="year", before_publish=before_publish)
+
+        conn = self._open(db_path)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in SCORE_TABLES
+        }
+        conn.close()
+        assert staged == [counts] and counts["seller_scores"] == 2
+
+        def failing(path):
+            raise RuntimeError("scores")
+
+        *dims, fact = spread_schema
+        with pytest.raises(RuntimeError, match="scores"):
+            load_to_sqlite(engine, *dims, fact.iloc[:1], partition_by="year", before_publish=failing)
+        conn = self._open(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM seller_scores").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM fact_orders").fetchone()[0] == 3
+        conn.close()
+
+    def test_stale_partitions_removed(self, tmp_path, full_star_schema, spread_schema):
+        db_path = tmp_path / "olist.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        load_to_sqlite(engine, *spread_schema, partition_by="year")
+        load_to_sqlite(engine, *full_star_schema)
+
+        assert not list(tmp_path.glob("olist.fact_*.db"))
+        with engine.connect() as conn:
+            count = conn.execute(text("SELECT COUNT(*) FROM fact_orders")).scalar()
+        assert count == 3
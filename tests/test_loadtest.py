@@ -0,0 +1,99 @@
+"""Tests pour le test de charge (src/dashboard/loadtest.py) — parties hors réseau."""
+
+import json
+
+import pytest
+
+from src.dashboard import loadtest
+from src.dashboard.course.content import COURSE_MODULES
+
+_PAGE = """<html><script type="module">
+const app = createApp(parseElements(String.raw`{"1":{"tag":"nicegui-codemirror","props":{"value":"SELECT 1 &lt; 2"},
+"events":[{"listener_id":"l-edit","type":"update:value"}]},
+"2":{"tag":"q-btn","props":{"label":"▶ Exécuter"},"events":[{"listener_id":"l-run","type":"click"}]},
+"3":{"tag":"q-spinner-dots"}}`), {
+  query: {'client_id': '68805d1f-2079-45ff-8f08-3dfe101e4de3', 'next_message_id': 0},
+});
+</script></html>"""
+
+
+def test_default_scenario_covers_pages_and_course_exercises():
+    actions = loadtest.default_scenario()
+    pages = {action.path for action in actions if action.kind == "page"}
+    assert {"/", "/ventes", "/rfm", "/cohorts", "/optimisation", "/presentation"} <= pages
+
+    editors = [action for action in actions if action.kind == "editor"]
+    assert editors and all(action.sql.strip() for action in editors)
+    for action in editors:
+        _, module_id, index = action.path.rsplit("/", 2)
+        module = next(module for module in COURSE_MODULES if module.id == module_id)
+        assert module.lessons[int(index)].exercise is not None
+        assert action.route == f"editor {action.path}"
+
+
+def test_load_scenario_rejects_unknown_kinds(tmp_path):
+    path = tmp_path / "mix.json"
+    path.write_text(json.dumps([{"kind": "page", "path": "/ventes", "weight": 2}]))
+    assert loadtest.load_scenario(path) == [loadtest.Action("page", "/ventes", 2)]
+
+    path.write_text(json.dumps([{"kind": "download", "path": "/"}]))
+    with pytest.raises(ValueError, match="Parcours invalide"):
+        loadtest.load_scenario(path)
+
+
+def test_parse_page_and_find_editor():
+    client_id, elements = loadtest.parse_page(_PAGE)
+    assert client_id == "68805d1f-2079-45ff-8f08-3dfe101e4de3"
+    assert elements["1"]["props"]["value"] == "SELECT 1 < 2"
+
+    editor_id, editor, button_id, click = loadtest.find_editor(elements)
+    assert (editor_id, button_id, click) == ("1", "2", "l-run")
+    assert editor["events"][0]["listener_id"] == "l-edit"
+
+    with pytest.raises(ValueError):
+        loadtest.find_editor({"3": elements["3"]})
+    with pytest.raises(ValueError):
+        loadtest.parse_page("<html></html>")
+
+
+def test_lazy_sections_need_class_and_visible_listener():
+    elements = {
+        "4": {"tag": "div", "class": ["w-full", "lazy-section"],
+              "events": [{"listener_id": "l-vis", "type": "visible"}]},
+        "5": {"tag": "div", "class": ["w-full"], "events": [{"listener_id": "l-x", "type": "visible"}]},
+        "6": {"tag": "div", "class": ["lazy-section"], "events": []},
+    }
+    assert loadtest.lazy_sections(elements) == [("4", "l-vis")]
+
+
+def test_replace_document_counts_utf16_units():
+    change = loadtest.replace_document("SELECT '🚀'", "SELECT 1\nFROM t")
+    # L'emoji compte pour deux unités UTF-16 côté navigateur.
+    assert change == {"sections": [11, 15], "inserted": [["SELECT 1", "FROM t"]]}
+
+
+def test_report_percentiles_errors_and_comparison():
+    samples = [loadtest.Sample("/ventes", float(ms)) for ms in range(1, 101)]
+    samples += [loadtest.Sample("/ventes", 5000.0, "timeout"), loadtest.Sample("/rfm", 20.0)]
+    report = loadtest.build_report(samples, 10.0, {"clients": 2})
+
+    ventes = report["routes"]["/ventes"]
+    assert ventes["requests"] == 101 and ventes["errors"] == 1
+    assert ventes["error_kinds"] == {"timeout": 1}
+    assert ventes["p50_ms"] == 50.5 and ventes["max_ms"] == 100.0
+    assert ventes["throughput_rps"] == 10.1
+    assert report["total"]["requests"] == 102
+    assert report["meta"] == {"clients": 2, "elapsed_s": 10.0}
+    # Rapport diffable : sérialisable tel quel, routes triées.
+    assert list(report["routes"]) == ["/rfm", "/ventes"]
+    json.dumps(report, sort_keys=True)
+
+    text = loadtest.format_report(report)
+    assert "/ventes" in text and "TOTAL" in text
+
+    slower = loadtest.build_report(
+        [loadtest.Sample("/ventes", ms * 2.0) for ms in range(1, 101)], 10.0, {}
+    )
+    comparison = loadtest.compare_reports(report, slower)
+    assert "+100%" in comparison
+    assert "absente après" in comparison  # /rfm
@@ -1,11 +1,12 @@
 """Tests pour l'orchestrateur du pipeline ETL."""
 
 import logging
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.etl.pipeline import PipelinePhaseError, _log_phase, run_full_pipeline
+from src.etl.pipeline import PipelinePhaseError, _log_phase, etl_lock, run_full_pipeline
 
 
 class TestLogPhase:
@@ -18,6 +19,7 @@ class TestLogPhase:
 
 
 class TestRunFullPipeline:
+    @patch("src.etl.pipeline.build_score_tables")
     @patch("src.etl.pipeline.load_to_sqlite")
     @patch("src.etl.pipeline.get_engine")
     @patch("src.etl.pipeline.build_fact_orders")
@@ -42,6 +44,7 @@ class TestRunFullPipeline:
         mock_fact,
         mock_engine,
         mock_load,
+        mock_scores,
     ):
         """Vérifier que chaque étape du pipeline est appelée dans le bon ordre."""
         # Setup mocks
@@ -75,6 +78,11 @@ class TestRunFullPipeline:
         mock_dim_prod.assert_called_once()
         mock_fact.assert_called_once()
         mock_load.assert_called_once()
+        # Les scores sont construits dans la base en préparation, avant sa publication.
+        mock_scores.assert_not_called()
+        staged = Path("staged.db")
+        mock_load.call_args.kwargs["before_publish"](staged)
+        mock_scores.assert_called_once_with(staged)
 
     @patch("src.etl.pipeline.load_all_raw")
     def test_extraction_error_propagates(self, mock_extract):
@@ -139,3 +147,15 @@ class TestRunFullPipeline:
 
         with pytest.raises(PipelinePhaseError, match="PHASE 4: LOAD INTO SQLITE failed"):
             run_full_pipeline()
+
+
+class TestEtlLock:
+    def test_lock_present_only_while_writing(self, tmp_path):
+        lock_path = tmp_path / ".etl.lock"
+
+        with pytest.raises(RuntimeError):
+            with etl_lock(tmp_path):
+                assert lock_path.exists()
+                raise RuntimeError("load failed")
+
+        assert not lock_path.exists()
@@ -6,6 +6,7 @@ import pandas as pd
 import pytest
 
 from src.config import RAW_DIR, DATABASE_PATH, CSV_FILES as CSV_FILENAMES
+from src.database.partitions import attach_partitions
 
 # ── Chemins complets des CSV ─────────────────────────────────────────────
 
@@ -70,6 +71,8 @@ def db_conn():
         pytest.skip("Base de données absente — lancez d'abord le pipeline ETL")
     uri = f"file:{DATABASE_PATH}?mode=ro"
     conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA temp_store=MEMORY")
+    attach_partitions(conn, DATABASE_PATH)
     yield conn
     conn.close()
 
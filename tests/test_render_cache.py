@@ -0,0 +1,99 @@
+"""Tests pour le cache de rendu des sections (src/dashboard/render_cache.py)."""
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from src.dashboard import render_cache
+from src.dashboard.downsample import ChartResolution, chart_resolution, for_chart
+from src.dashboard.filters import DashboardFilters
+from src.dashboard.render_cache import SectionInputs, section_chart, section_inputs
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(render_cache, "_cache", render_cache.RenderCache(max_entries=16))
+
+
+def _counting(calls: list):
+    def build(df: pd.DataFrame) -> go.Figure:
+        calls.append(len(df))
+        plot = for_chart(df, "x", "y")
+        return go.Figure(go.Scatter(x=plot["x"], y=plot["y"]))
+
+    return build
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"x": range(n), "y": [float(i % 7) for i in range(n)]})
+
+
+def test_figures_are_shared_per_section_inputs_and_cleared_on_new_version():
+    calls = []
+    build = _counting(calls)
+    df = _frame(10)
+
+    with section_inputs(SectionInputs("ventes.sql", "v1")):
+        first = section_chart(build, df)
+        assert section_chart(build, df) is first
+    assert isinstance(first, dict) and first["data"][0]["type"] == "scatter"
+    assert calls == [10]
+
+    with section_inputs(SectionInputs("ventes.sql", "v1", DashboardFilters(customer_state="SP"))):
+        section_chart(build, df)
+    assert calls == [10, 10]
+
+    # Rechargement ETL : nouvelle empreinte, le cache est vidé.
+    with section_inputs(SectionInputs("ventes.sql", "v2")):
+        section_chart(build, df)
+    with section_inputs(SectionInputs("ventes.sql", "v1")):
+        section_chart(build, df)
+    assert len(calls) == 4
+    assert render_cache.render_cache().stats().entries == 1
+
+    # Hors section : clé = empreinte du résultat.
+    section_chart(build, df)
+    section_chart(build, df.copy())
+    assert len(calls) == 5
+
+
+def test_reduced_renders_are_kept_per_width_and_replayed():
+    calls = []
+    build = _counting(calls)
+    df = _frame(2_000)
+
+    with section_inputs(SectionInputs("trends.sql", "v1")):
+        with chart_resolution(ChartResolution(width_px=800)) as resolution:
+            section_chart(build, df)
+        assert resolution.reduced == [(2_000, 400)]
+        with chart_resolution(ChartResolution(width_px=800)) as resolution:
+            section_chart(build, df)
+        assert resolution.reduced == [(2_000, 400)] and len(calls) == 1
+
+        with chart_resolution(ChartResolution(width_px=1_000)):
+            section_chart(build, df)
+        assert len(calls) == 2
+
+        # Pleine résolution : rendu non réduit, valable dès que la série tient.
+        with chart_resolution(ChartResolution(width_px=800, full=True)):
+            section_chart(build, df)
+        with chart_resolution(ChartResolution(width_px=5_000)) as resolution:
+            section_chart(build, df)
+        assert len(calls) == 3 and resolution.reduced == []
+
+
+def test_tuples_are_serialized_and_cache_can_be_disabled(monkeypatch):
+    df = _frame(3)
+    with section_inputs(SectionInputs("clients.sql", "v1")):
+        fig, extra = section_chart(lambda frame: (go.Figure(), len(frame)), df)
+    assert isinstance(fig, dict) and extra == 3
+
+    monkeypatch.setenv("DASHBOARD_RENDER_CACHE_ENTRIES", "0")
+    assert render_cache.get_render_cache_entries() == 0
+    disabled = render_cache.RenderCache()
+    disabled.store(("k",), ChartResolution(), render_cache._Rendered({}, (), 0))
+    assert disabled.stats().entries == 0
+    for raw in ("-1", "abc"):
+        monkeypatch.setenv("DASHBOARD_RENDER_CACHE_ENTRIES", raw)
+        with pytest.raises(ValueError, match="DASHBOARD_RENDER_CACHE_ENTRIES invalide"):
+            render_cache.get_render_cache_entries()
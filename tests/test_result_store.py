@@ -0,0 +1,165 @@
+"""Tests pour le cache de résultats persistant (src/dashboard/result_store.py)."""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dashboard.result_store import DiskResultStore, read_frame, write_frame
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": np.arange(4, dtype=np.int64),
+        "ratio": [0.5, np.nan, 1.25, -3.0],
+        "label": pd.Series(["a", None, "São Paulo", ""], dtype=object),
+        "when": pd.to_datetime(["2017-01-01", "2017-06-15", None, "2018-08-31"]),
+        "flag": [True, False, True, True],
+    })
+
+
+def test_frame_round_trip(tmp_path):
+    df = _frame()
+    path = tmp_path / "entry.col"
+
+    assert write_frame(path, df, {"sql": "SELECT 1"})
+    restored = read_frame(path)
+
+    pd.testing.assert_frame_equal(restored, df)
+    # Colonnes numériques relues sans copie, adossées au fichier.
+    assert not restored["id"].to_numpy().flags.owndata
+
+
+def test_round_trip_keeps_string_dtype_and_duplicate_names(tmp_path):
+    df = pd.DataFrame([["x", 1, "y"], [None, 2, "z"]], columns=["a", "n", "a"])
+    df["n"] = df["n"].astype("int32")
+    path = tmp_path / "dup.col"
+
+    assert write_frame(path, df, {})
+
+    pd.testing.assert_frame_equal(read_frame(path), df)
+
+
+def test_empty_frame_round_trip(tmp_path):
+    df = pd.DataFrame({"v": pd.Series([], dtype="float64"), "s": pd.Series([], dtype=object)})
+    path = tmp_path / "empty.col"
+
+    assert write_frame(path, df, {})
+
+    pd.testing.assert_frame_equal(read_frame(path), df)
+
+
+def test_unsupported_frames_are_not_written(tmp_path):
+    blobs = pd.DataFrame({"b": [b"\x00", None]})
+    indexed = pd.DataFrame({"v": [1, 2]}, index=["x", "y"])
+
+    assert not write_frame(tmp_path / "blob.col", blobs, {})
+    assert not write_frame(tmp_path / "index.col", indexed, {})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_store_hits_and_misses(tmp_path):
+    store = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+    df = _frame()
+
+    assert store.get("fp1", "k") is None
+    store.put("fp1", "k", df, sql="SELECT 1")
+
+    pd.testing.assert_frame_equal(store.get("fp1", "k"), df)
+    assert store.get("fp2", "k") is None
+    stats = store.stats()
+    assert (stats.hits, stats.misses, stats.writes, stats.entries) == (1, 2, 1, 1)
+
+
+def test_store_evicts_other_fingerprints_then_oldest(tmp_path):
+    df = pd.DataFrame({"v": np.arange(1000, dtype=np.int64)})
+    store = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+    store.put("old", "a", df)
+    store.put("new", "b", df)
+    store.put("new", "c", df)
+    entry_size = (tmp_path / "new_b.col").stat().st_size
+    now = time.time()
+    os.utime(tmp_path / "old_a.col", (now, now))
+    os.utime(tmp_path / "new_b.col", (now - 10, now - 10))
+
+    store.max_bytes = 2 * entry_size
+    assert store.evict("new") == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new_b.col", "new_c.col"]
+
+    store.max_bytes = entry_size
+    store.evict("new")
+    assert [p.name for p in tmp_path.iterdir()] == ["new_c.col"]
+
+
+def test_put_scans_the_directory_only_when_over_budget(tmp_path, monkeypatch):
+    df = pd.DataFrame({"v": np.arange(1000, dtype=np.int64)})
+    store = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+    scans = []
+    real_scan = store._scan
+    monkeypatch.setattr(store, "_scan", lambda: scans.append(1) or real_scan())
+
+    store.put("fp", "a", df)
+    assert len(scans) == 1  # premier parcours : taille de départ
+    for key in "bcdefgh":
+        store.put("fp", key, df)
+    store.put("fp", "a", df)  # réécriture : taille inchangée
+    assert len(scans) == 1
+
+    entry_size = (tmp_path / "fp_a.col").stat().st_size
+    store.max_bytes = 8 * entry_size + entry_size // 2
+    store.put("fp", "i", df)
+    assert len(scans) == 2
+    assert store.stats().entries == 8
+
+
+def test_put_survives_entries_that_cannot_be_removed(tmp_path, monkeypatch):
+    df = pd.DataFrame({"v": np.arange(1000, dtype=np.int64)})
+    store = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+    store.put("fp", "a", df)
+    store.max_bytes = 1
+
+    def refuse(self, *args, **kwargs):
+        raise PermissionError(self)
+
+    monkeypatch.setattr(type(tmp_path), "unlink", refuse)
+    store.put("fp", "b", df)
+
+    assert store.stats().evictions == 0
+    pd.testing.assert_frame_equal(store.get("fp", "b"), df)
+
+
+def test_store_expires_entries_by_age(tmp_path, monkeypatch):
+    store = DiskResultStore(tmp_path, 1024 * 1024, 60.0)
+    store.put("fp", "k", pd.DataFrame({"v": [1]}))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+
+    assert store.get("fp", "k") is None
+    store.evict("fp")
+    assert store.stats().entries == 0
+
+
+def test_reads_do_not_extend_entry_lifetime(tmp_path, monkeypatch):
+    store = DiskResultStore(tmp_path, 1024 * 1024, 60.0)
+    store.put("fp", "k", pd.DataFrame({"v": [1]}))
+    now = time.time()
+    for offset in (30, 50):
+        monkeypatch.setattr(time, "time", lambda offset=offset: now + offset)
+        assert store.get("fp", "k") is not None
+
+    # Lue il y a 20 s mais écrite il y a 70 s : l'entrée expire quand même.
+    monkeypatch.setattr(time, "time", lambda: now + 70)
+    assert store.get("fp", "k") is None
+    store.evict("fp")
+    assert store.stats().entries == 0
+
+
+@pytest.mark.parametrize("value", ["-1", "abc"])
+def test_invalid_disk_cache_size(monkeypatch, value):
+    from src.dashboard.result_store import get_disk_cache_bytes
+
+    monkeypatch.setenv("DASHBOARD_DISK_CACHE_MB", value)
+    with pytest.raises(ValueError, match="DASHBOARD_DISK_CACHE_MB"):
+        get_disk_cache_bytes()
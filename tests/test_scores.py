@@ -0,0 +1,131 @@
+"""Tests pour les scores précalculés (src/etl/scores.py)."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import PROJECT_ROOT
+from src.etl.scores import build_score_tables, rank_desc, sqlite_ntile
+
+DASHBOARD_SQL = PROJECT_ROOT / "sql" / "dashboard"
+
+
+def _sqlite_window(values: list, expression: str) -> list:
+    """Évaluer une fonction de fenêtre SQLite sur (position, valeur)."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (pos INTEGER, v REAL)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", list(enumerate(values)))
+    rows = conn.execute(f"SELECT {expression} FROM t ORDER BY pos").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+@pytest.fixture
+def score_db(tmp_path):
+    """Mini-entrepôt aléatoire : nombreux ex-aequo et quelques NULL."""
+    rng = np.random.default_rng(7)
+    n_customers, n_sellers, n_rows = 400, 63, 3000
+    dates = pd.date_range("2017-01-01", "2018-08-31", freq="D")
+
+    dim_dates = pd.DataFrame({
+        "date_key": dates.strftime("%Y%m%d").astype(int),
+        "full_date": dates.strftime("%Y-%m-%d"),
+    })
+    dim_customers = pd.DataFrame({
+        "customer_key": np.arange(1, 2 * n_customers + 1),
+        # Deux customer_key par client unique (adresses multiples).
+        "customer_unique_id": [f"c{i % n_customers:04d}" for i in range(2 * n_customers)],
+    })
+    dim_sellers = pd.DataFrame({
+        "seller_key": np.arange(1, n_sellers + 1),
+        "seller_id": [f"s{i:03d}" for i in range(n_sellers)],
+        "city": rng.choice(["sao paulo", "curitiba", "rio"], n_sellers),
+        "state": rng.choice(["SP", "PR", "RJ"], n_sellers),
+    })
+    review = rng.integers(1, 6, n_rows).astype(float)
+    review[rng.random(n_rows) < 0.05] = np.nan
+    fact = pd.DataFrame({
+        "order_id": [f"o{i:05d}" for i in rng.integers(0, 1800, n_rows)],
+        "customer_key": rng.integers(1, 2 * n_customers + 1, n_rows),
+        "seller_key": rng.integers(1, n_sellers + 1, n_rows),
+        "date_key": rng.choice(dim_dates["date_key"], n_rows),
+        "order_status": rng.choice(["delivered"] * 9 + ["canceled"], n_rows),
+        "price": rng.choice([10.0, 19.9, 25.5, 99.99], n_rows),
+        "review_score": review,
+        "delivery_days": rng.integers(2, 30, n_rows).astype(float),
+        "delivery_delta_days": rng.integers(-10, 5, n_rows).astype(float),
+    })
+
+    db_path = tmp_path / "scores.db"
+    conn = sqlite3.connect(db_path)
+    for name, df in [
+        ("dim_dates", dim_dates),
+        ("dim_customers", dim_customers),
+        ("dim_sellers", dim_sellers),
+        ("fact_orders", fact),
+    ]:
+        df.to_sql(name, conn, index=False)
+    conn.close()
+    return db_path
+
+
+class TestWindowFunctions:
+    @pytest.mark.parametrize("size", [0, 1, 4, 5, 13, 101])
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_ntile_matches_sqlite(self, size, descending):
+        """Même découpage que NTILE(5) de SQLite, ex-aequo et NULL compris."""
+        rng = np.random.default_rng(size)
+        values = rng.integers(0, 4, size).astype(float)
+        values[rng.random(size) < 0.2] = np.nan
+        as_sql = [None if np.isnan(v) else float(v) for v in values]
+        direction = "DESC" if descending else "ASC"
+
+        expected = _sqlite_window(as_sql, f"NTILE(5) OVER (ORDER BY v {direction}, pos)")
+
+        assert sqlite_ntile(values, descending=descending).tolist() == expected
+
+    def test_rank_desc_matches_sqlite(self):
+        values = [3, 7, 7, 1, 3, 9, 7]
+
+        rank, dense = rank_desc(np.array(values))
+
+        assert rank.tolist() == _sqlite_window(values, "RANK() OVER (ORDER BY v DESC)")
+        assert dense.tolist() == _sqlite_window(values, "DENSE_RANK() OVER (ORDER BY v DESC)")
+
+
+class TestBuildScoreTables:
+    def test_tables_and_indexes_created(self, score_db):
+        counts = build_score_tables(score_db)
+
+        conn = sqlite3.connect(score_db)
+        indexes = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        conn.close()
+        assert counts["seller_scores"] == 63
+        assert counts["customer_rfm"] > 300
+        assert counts["rfm_segments"] >= 4
+        assert {"idx_customer_rfm_segment", "idx_seller_scores_total"} <= indexes
+
+    def test_rebuild_is_idempotent(self, score_db):
+        assert build_score_tables(score_db) == build_score_tables(score_db)
+
+    @pytest.mark.parametrize("filename", ["rfm_segmentation.sql", "seller_scoring.sql"])
+    def test_precomputed_sql_matches_live_sql(self, score_db, filename):
+        """La lecture des tables précalculées rend le même résultat que la requête d'origine."""
+        build_score_tables(score_db)
+        conn = sqlite3.connect(score_db)
+        live = pd.read_sql_query((DASHBOARD_SQL / filename).read_text(), conn)
+        precomputed = pd.read_sql_query(
+            (DASHBOARD_SQL / "precomputed" / filename).read_text(), conn
+        )
+        conn.close()
+
+        key = live.columns[0]
+        pd.testing.assert_frame_equal(
+            precomputed.sort_values(key).reset_index(drop=True),
+            live.sort_values(key).reset_index(drop=True),
+            check_dtype=False,
+        )
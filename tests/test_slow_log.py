@@ -0,0 +1,42 @@
+"""Tests pour le journal des requêtes lentes (src/dashboard/slow_log.py)."""
+
+import pytest
+
+from src.dashboard.slow_log import SlowQuery, SlowQueryLog, get_slow_query_threshold
+
+
+def test_log_rotates_and_reads_newest_first(tmp_path):
+    log = SlowQueryLog(tmp_path / "slow.jsonl", 0.1, max_bytes=600, backups=2)
+    for i in range(12):
+        log.append(SlowQuery(query=f"q{i}", sql="SELECT 1" + " " * 200, duration_ms=150.0, rows=i))
+
+    entries = log.entries()
+
+    assert (tmp_path / "slow.jsonl.1").exists()
+    assert not (tmp_path / "slow.jsonl.3").exists()
+    assert entries[0].query == "q11"
+    assert [e.rows for e in entries] == sorted((e.rows for e in entries), reverse=True)
+    assert len(log.entries(limit=2)) == 2
+
+
+def test_entries_keep_params_json_safe(tmp_path):
+    log = SlowQueryLog(tmp_path / "slow.jsonl", 0.1, max_bytes=1024 * 1024)
+    log.append(SlowQuery(query="q", sql="SELECT ?", duration_ms=1.0, rows=0, params=[b"\x00\x01", 3]))
+    with (tmp_path / "slow.jsonl").open("a") as handle:
+        handle.write("not json\n")
+
+    [entry] = log.entries()
+
+    assert entry.params == ["<2 octets>", 3]
+
+
+def test_threshold(monkeypatch):
+    log = SlowQueryLog("unused.jsonl", 0.5, 1024)
+    assert log.is_slow(0.5) and not log.is_slow(0.2)
+    assert not SlowQueryLog("unused.jsonl", 0.0, 1024).is_slow(10.0)
+
+    monkeypatch.setenv("DASHBOARD_SLOW_QUERY_MS", "250")
+    assert get_slow_query_threshold() == 0.25
+    monkeypatch.setenv("DASHBOARD_SLOW_QUERY_MS", "-1")
+    with pytest.raises(ValueError, match="DASHBOARD_SLOW_QUERY_MS"):
+        get_slow_query_threshold()
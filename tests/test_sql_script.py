@@ -0,0 +1,35 @@
+"""Tests pour le découpage des scripts SQL (src/database/sql_script.py)."""
+
+from src.database.sql_script import split_statements
+
+
+def test_split_statements_ignores_comments():
+    script = """
+    -- en-tête ; avec point-virgule
+    SELECT 1;
+    SELECT ';' AS sep; -- commentaire final
+    SELECT 3
+    -- fin de fichier
+    """
+    statements = split_statements(script)
+
+    assert len(statements) == 3
+    assert statements[1].startswith("SELECT ';'")
+    assert statements[2].startswith("SELECT 3")
+
+
+def test_split_statements_drops_comment_lines_and_final_semicolon():
+    script = """
+    -- Dimension
+    CREATE TABLE dim_a (
+        -- clé technique
+        a_key INTEGER PRIMARY KEY
+    );
+    PRAGMA foreign_keys = ON ;
+    ;
+    """
+
+    assert split_statements(script) == [
+        "CREATE TABLE dim_a (\n        a_key INTEGER PRIMARY KEY\n    )",
+        "PRAGMA foreign_keys = ON",
+    ]
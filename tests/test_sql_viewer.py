@@ -0,0 +1,17 @@
+"""Tests pour les sections différées de sql_viewer (parties hors navigateur)."""
+
+import pytest
+
+from src.dashboard.components import sql_viewer
+
+
+def test_deferred_query_rejects_unknown_load_mode():
+    with pytest.raises(ValueError, match="Mode de chargement inconnu"):
+        sql_viewer.deferred_query("kpis.sql", lambda sql, df: None, load="scroll")
+
+
+def test_lazy_section_script_observes_the_section_class():
+    script = sql_viewer._LAZY_SECTION_JS
+    assert f'".{sql_viewer._LAZY_CLASS}"' in script
+    assert 'new CustomEvent("visible")' in script
+    assert f'rootMargin: "{sql_viewer._VIEWPORT_MARGIN_PX}px"' in script
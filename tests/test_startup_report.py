@@ -0,0 +1,53 @@
+"""Tests pour le rapport de démarrage (src/dashboard/startup_report.py) — parties hors serveur."""
+
+import json
+
+from src.dashboard import startup_report
+
+_STDERR = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2000 |     pandas.core
+import time:      1000 |       3000 |   pandas
+import time:       500 |       3500 | src.dashboard.db
+some other warning
+"""
+
+
+def test_parse_importtime_and_summary():
+    imports = startup_report.parse_importtime(_STDERR)
+    assert [item.name for item in imports] == ["_io", "pandas.core", "pandas", "src.dashboard.db"]
+    assert imports[1] == startup_report.ImportTime("pandas.core", 2000, 2000, 2)
+
+    summary = startup_report.summarize_imports(imports, top=2)
+    assert summary["total_ms"] == 3.6 and summary["modules"] == 4
+    assert summary["packages"] == {"_io": 0.1, "pandas": 3.0, "src.dashboard.db": 0.5}
+    assert [item["name"] for item in summary["top"]] == ["src.dashboard.db", "pandas"]
+
+
+def _report(total: float, packages: dict, listen: float, first: float) -> dict:
+    imports = {"total_ms": total, "modules": 1, "packages": packages, "top": []}
+    ttfb = {"listen_ms": listen, "pages": {"/": {"first_ms": first, "second_ms": 1.0}}}
+    return {"meta": {}, "imports": imports, "ttfb": ttfb}
+
+
+def test_compare_reports_flags_gated_regressions_only():
+    baseline = _report(500.0, {"nicegui": 400.0, "src.dashboard.main": 1.0}, 800.0, 300.0)
+    same = _report(510.0, {"nicegui": 405.0, "src.dashboard.main": 1.5}, 790.0, 300.0)
+    _, regressions = startup_report.compare_reports(baseline, same)
+    assert regressions == []
+
+    # pandas importé au démarrage : nouveau paquet, total et écoute en hausse.
+    slower = _report(820.0, {"nicegui": 400.0, "pandas": 320.0}, 1200.0, 3000.0)
+    table, regressions = startup_report.compare_reports(baseline, slower)
+    assert "paquet pandas : nouveau (320 ms)" in regressions
+    assert any(line.startswith("imports total") for line in regressions)
+    assert any(line.startswith("écoute") for line in regressions)
+    # Les requêtes de page sont affichées sans faire échouer la comparaison.
+    assert "1re requête /" in table
+    assert not any(line.startswith("1re requête") for line in regressions)
+    # Petits écarts de paquets masqués.
+    assert "src.dashboard.main" not in table
+
+    report = startup_report.build_report([], None, {"runs": 1})
+    json.dumps(report, sort_keys=True)
+    assert "Imports au démarrage" in startup_report.format_report(report)
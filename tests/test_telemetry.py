@@ -0,0 +1,78 @@
+"""Tests pour la télémétrie des requêtes (src/dashboard/telemetry.py)."""
+
+import pytest
+
+from src.dashboard.telemetry import (
+    OVERFLOW_SERIES,
+    QueryTelemetry,
+    format_query_plan,
+    get_telemetry_sample_rate,
+    render_prometheus,
+)
+
+
+def test_quantiles_interpolate_within_buckets():
+    telemetry = QueryTelemetry(1.0)
+    for _ in range(90):
+        telemetry.record("q", "SELECT 1", 0.003, rows=1)
+    for _ in range(10):
+        telemetry.record("q", "SELECT 1", 0.2, rows=1, source="memory")
+
+    [metrics] = telemetry.snapshot()
+
+    assert 0.0025 < metrics.p50 <= 0.005
+    assert 0.1 < metrics.p95 <= 0.25
+    assert metrics.hit_rate == pytest.approx(0.1)
+
+
+def test_format_query_plan_matches_sqlite_shell():
+    rows = [(2, 0, 0, "CO-ROUTINE sub"), (5, 2, 0, "SCAN t"), (9, 0, 0, "SCAN sub")]
+
+    assert format_query_plan(rows) == "QUERY PLAN\n|--CO-ROUTINE sub\n|  `--SCAN t\n`--SCAN sub"
+
+
+def test_plan_change_recorded_once_per_version():
+    telemetry = QueryTelemetry(1.0)
+    assert telemetry.plan_due("q", (1,))
+    assert telemetry.record_plan("q", "SELECT 1", (1,), "QUERY PLAN\n`--SCAN t") is None
+    assert not telemetry.plan_due("q", (1,))
+
+    change = telemetry.record_plan("q", "SELECT 1", (2,), "QUERY PLAN\n`--SEARCH t")
+
+    assert change.previous.endswith("SCAN t") and change.current.endswith("SEARCH t")
+    assert telemetry.plan_changes() == [change]
+
+
+def test_series_beyond_the_cap_fold_into_other():
+    telemetry = QueryTelemetry(1.0, max_series=2)
+    for index in range(5):
+        telemetry.record(f"q:{index}", f"SELECT {index}", 0.001, rows=1)
+    telemetry.record("q:0", "SELECT 0", 0.001, rows=1)
+
+    by_name = {m.query: m for m in telemetry.snapshot()}
+    assert set(by_name) == {"q:0", "q:1", OVERFLOW_SERIES}
+    assert by_name["q:0"].calls == 2
+    assert by_name[OVERFLOW_SERIES].calls == 3
+    assert not telemetry.plan_due("q:9", (1,))
+    assert telemetry.record_plan("q:9", "SELECT 9", (1,), "QUERY PLAN\n`--SCAN t") is None
+
+
+def test_prometheus_histogram_is_cumulative():
+    telemetry = QueryTelemetry(1.0)
+    telemetry.record('a"b.sql', "SELECT 1", 0.002, rows=3, nbytes=64)
+    telemetry.record('a"b.sql', "SELECT 1", 0.04, rows=3)
+
+    text = render_prometheus(telemetry.snapshot(), [("pool_in_use", "gauge", "Borrowed", 1)])
+
+    assert '# TYPE dashboard_query_duration_seconds histogram' in text
+    assert 'dashboard_query_duration_seconds_bucket{query="a\\"b.sql",le="0.0025"} 1' in text
+    assert 'dashboard_query_duration_seconds_bucket{query="a\\"b.sql",le="+Inf"} 2' in text
+    assert 'dashboard_query_rows_total{query="a\\"b.sql"} 6' in text
+    assert text.endswith("dashboard_pool_in_use 1\n")
+
+
+@pytest.mark.parametrize("value", ["1.5", "-0.1", "often"])
+def test_invalid_sample_rate(monkeypatch, value):
+    monkeypatch.setenv("DASHBOARD_TELEMETRY_SAMPLE", value)
+    with pytest.raises(ValueError, match="DASHBOARD_TELEMETRY_SAMPLE"):
+        get_telemetry_sample_rate()
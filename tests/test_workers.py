@@ -0,0 +1,143 @@
+"""Tests pour le service multi-workers (src/dashboard/workers.py)."""
+
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.dashboard import workers
+from src.dashboard.result_store import DiskResultStore
+
+
+def test_get_dashboard_workers(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_WORKERS", raising=False)
+    assert workers.get_dashboard_workers() == 1
+    monkeypatch.setenv("DASHBOARD_WORKERS", "4")
+    assert workers.get_dashboard_workers() == 4
+    for raw in ("0", "-2", "deux"):
+        monkeypatch.setenv("DASHBOARD_WORKERS", raw)
+        with pytest.raises(ValueError, match="DASHBOARD_WORKERS invalide"):
+            workers.get_dashboard_workers()
+
+
+def test_worker_ports_and_affinity():
+    assert workers.worker_ports(8080, 3) == [8081, 8082, 8083]
+    with pytest.raises(ValueError):
+        workers.worker_ports(65534, 2)
+    # Même adresse -> même worker ; toutes les adresses tombent dans la plage.
+    assert workers.pick_worker("10.0.0.7", 4) == workers.pick_worker("10.0.0.7", 4)
+    assert {workers.pick_worker(f"10.0.0.{i}", 4) for i in range(64)} == {0, 1, 2, 3}
+
+
+def test_run_once_computes_once_per_deployment(tmp_path, monkeypatch):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"speedup": 3.5}
+
+    # Hors déploiement : calcul à chaque appel, rien d'écrit.
+    monkeypatch.delenv("DASHBOARD_DEPLOYMENT_ID", raising=False)
+    assert workers.run_once("bench", compute, tmp_path) == {"speedup": 3.5}
+    assert len(calls) == 1 and not list(tmp_path.iterdir())
+
+    monkeypatch.setenv("DASHBOARD_DEPLOYMENT_ID", "d1")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(workers.run_once("bench", compute, tmp_path)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"speedup": 3.5}] * 4
+    assert len(calls) == 2
+
+    # Nouveau déploiement : nouveau calcul ; le nettoyage ne touche que le sien.
+    monkeypatch.setenv("DASHBOARD_DEPLOYMENT_ID", "d2")
+    workers.run_once("bench", compute, tmp_path)
+    assert len(calls) == 3
+    workers._clear_deployment("d1", tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["d2_bench.json", "d2_bench.lock"]
+
+
+def test_compute_lock_serializes_same_entry(tmp_path):
+    """Deux « workers » (stores distincts, même répertoire) : un seul calcule l'entrée."""
+    stores = [DiskResultStore(tmp_path, 1024 * 1024, 3600.0) for _ in range(2)]
+    computed = []
+
+    def worker(store):
+        if store.get("fp", "k") is None:
+            with store.compute_lock("fp", "k"):
+                if store.get("fp", "k", count_miss=False) is None:
+                    computed.append(store)
+                    time.sleep(0.05)
+                    store.put("fp", "k", pd.DataFrame({"v": [1, 2]}))
+
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(computed) == 1
+    assert all(store.get("fp", "k")["v"].tolist() == [1, 2] for store in stores)
+
+
+def test_compute_lock_is_per_entry_and_bounded(tmp_path):
+    store = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+    other = DiskResultStore(tmp_path, 1024 * 1024, 3600.0)
+
+    with store.compute_lock("fp", "a") as held:
+        assert held
+        # Autre entrée : aucune attente.
+        start = time.perf_counter()
+        with other.compute_lock("fp", "b") as held_b:
+            assert held_b
+        assert time.perf_counter() - start < 0.05
+        # Même entrée : attente bornée, puis calcul sans verrou.
+        start = time.perf_counter()
+        with other.compute_lock("fp", "a", timeout_s=0.1) as held_a:
+            assert not held_a
+        assert 0.05 <= time.perf_counter() - start < 0.5
+
+    # Fichiers de verrou supprimés à la libération ; l'entrée se reverrouille.
+    assert list((tmp_path / "locks").iterdir()) == []
+    with other.compute_lock("fp", "a", timeout_s=0.1) as held_a:
+        assert held_a
+
+
+def test_proxy_keeps_each_client_on_its_worker():
+    async def scenario():
+        async def backend(name, reader, writer):
+            data = await reader.read(100)
+            writer.write(name + b":" + data)
+            await writer.drain()
+            writer.close()
+
+        servers = [
+            await asyncio.start_server(lambda r, w, n=name: backend(n, r, w), "127.0.0.1", 0)
+            for name in (b"w0", b"w1")
+        ]
+        ports = [server.sockets[0].getsockname()[1] for server in servers]
+        proxy = await workers.start_proxy("127.0.0.1", 0, ports)
+        proxy_port = proxy.sockets[0].getsockname()[1]
+
+        replies = []
+        for message in (b"ping", b"pong"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", proxy_port)
+            writer.write(message)
+            await writer.drain()
+            replies.append(await reader.read())
+            writer.close()
+        proxy.close()
+        for server in servers:
+            server.close()
+        return replies
+
+    expected = f"w{workers.pick_worker('127.0.0.1', 2)}".encode()
+    assert asyncio.run(scenario()) == [expected + b":ping", expected + b":pong"]